@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, measure
+
+from plox.CompileCache import CompileCache
+from plox.Parser import Parser
+from plox.Resolver import Resolver
+from plox.Scanner import Scanner
+
+# Cuánto tarda en arrancar `plox script.lox` sobre un script grande generado,
+# con el cache de programas compilados frío (sin cache, o la primera vez, que
+# además lo guarda) y caliente (las siguientes veces). El script casi no hace
+# nada al correr, así que lo que se mide es escanear, parsear y resolver.
+# El cache se guarda en un directorio temporal, no en el del usuario
+# `python3 ./benchmarks/cache.py`
+
+FUNCTIONS = 3000
+
+
+def generated() -> str:
+    functions = []
+    for i in range(FUNCTIONS):
+        functions.append(
+            f"""
+fun f{i}(n, m) {{
+    var total = 0;
+    for (var i = 0; i < n; i = i + 1) {{
+        if (i % 3 == 0 and i != m) total = total + i * {i};
+        else {{ var x = (total - m) / 2; total = x; }}
+    }}
+    fun inner(k) {{ return k + total + n; }}
+    return inner(m);
+}}"""
+        )
+    return "\n".join(functions) + "\nprint f1(10, 2);\n"
+
+
+# Lo que hace Plox.run antes de interpretar, y lo que se guarda en el cache
+def compile(source: str):
+    statements = Parser(Scanner(source).scan()).parse()
+    resolver = Resolver()
+    for statement in statements:
+        resolver.resolve(statement)
+    return statements, resolver
+
+
+# El mejor tiempo de correr plox como proceso aparte, con `args`
+def startup(env: dict, *args: str, repeat: int = 5) -> float:
+    command = [sys.executable, "-m", "plox", *args]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, cwd=ROOT, check=True, capture_output=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "script.lox")
+    source = generated()
+    with open(path, "w") as file:
+        file.write(source)
+    env = dict(os.environ, XDG_CACHE_HOME=os.path.join(directory, "cache"))
+
+    # En el mismo proceso: compilar el programa contra leerlo del cache
+    cache = CompileCache(os.path.join(directory, "measure"))
+    cache.store(source, *compile(source))
+    compiling = measure(lambda: compile(source))
+    loading = measure(lambda: cache.load(source))
+
+    # Y el arranque entero, como lo ve quien corre el script
+    cold = startup(env, "--no-cache", path)
+    first = startup(env, path, repeat=1)
+    warm = startup(env, path)
+    (stored,) = os.listdir(os.path.join(directory, "cache", "plox"))
+    size = os.path.getsize(os.path.join(directory, "cache", "plox", stored))
+
+print(
+    f"{len(source) / 1024:.0f} KB, {FUNCTIONS} funciones, "
+    f"{size / 1024:.0f} KB en el cache"
+)
+print(f"{'':<36}{'tiempo':>10}")
+print(f"{'escanear, parsear y resolver':<36}{compiling:>9.3f}s")
+print(f"{'leer del cache':<36}{loading:>9.3f}s")
+print(f"{'plox --no-cache':<36}{cold:>9.3f}s")
+print(f"{'plox, frío (compila y guarda)':<36}{first:>9.3f}s")
+print(f"{'plox, caliente':<36}{warm:>9.3f}s")
+print(f"{'speedup caliente / --no-cache':<36}{cold / warm:>9.1f}x")
@@ -0,0 +1,45 @@
+from common import load, measure
+
+from plox.Interpreter import Interpreter
+
+# Mide el intérprete tree-walk sobre programas que hacen muchas llamadas
+# a funciones, donde lo que más pesa es el costo de cada return
+# `python3 ./benchmarks/calls.py`
+
+PROGRAMS = {
+    "fib(22)": """
+        fun fib(n) {
+            if (n <= 1) return n;
+            return fib(n - 2) + fib(n - 1);
+        }
+        print fib(22);
+    """,
+    "identity x 50000": """
+        fun id(x) { return x; }
+        var i = 0;
+        while (i < 50000) i = id(i) + 1;
+        print i;
+    """,
+    "nested return x 20000": """
+        fun find(n) {
+            var i = 0;
+            while (true) {
+                { if (i == n) { return i; } }
+                i = i + 1;
+            }
+        }
+        var total = 0;
+        var j = 0;
+        while (j < 20000) { total = total + find(3); j = j + 1; }
+        print total;
+    """,
+}
+
+
+def run(source: str):
+    Interpreter().interpret(load(source))
+
+
+print(f"{'programa':<28}{'tree-walk':>14}")
+for name, source in PROGRAMS.items():
+    print(f"{name:<28}{measure(lambda: run(source)):>13.3f}s")
@@ -0,0 +1,38 @@
+import os
+
+from common import ROOT, load, measure, read, report
+
+from plox.Interpreter import Interpreter
+from plox.ClosureCompiler import ClosureCompiler
+
+# Compara el intérprete tree-walk contra el compilador a clausuras,
+# sobre todos los programas de examples/ que llegan a ejecutarse
+# `python3 ./benchmarks/closures.py`
+
+
+def run(source: str, interpreter: Interpreter):
+    try:
+        interpreter.interpret(load(source))
+    except Exception:
+        # Algunos ejemplos terminan a propósito con un error
+        pass
+
+
+rows = []
+for program in sorted(os.listdir(os.path.join(ROOT, "examples"))):
+    source = read(os.path.join("examples", program))
+    try:
+        load(source)
+    except Exception:
+        # Los ejemplos de errores de scanning, parsing o resolución no se ejecutan
+        continue
+
+    rows.append(
+        (
+            program,
+            measure(lambda: run(source, Interpreter())),
+            measure(lambda: run(source, ClosureCompiler())),
+        )
+    )
+
+report(rows, "tree-walk", "closures")
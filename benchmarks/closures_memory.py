@@ -0,0 +1,57 @@
+import gc
+import tracemalloc
+
+from common import load
+
+from plox.Interpreter import Interpreter
+from plox.ClosureCompiler import ClosureCompiler
+
+# Mide cuánta memoria queda retenida después de crear muchas clausuras en un loop.
+# Cada clausura solo usa `prev`, pero en el mismo scope hay un string de 1KB
+# distinto en cada iteración: si la clausura se quedara con el entorno entero
+# (y con su cadena de entornos), ese string no podría liberarse
+# `python3 ./benchmarks/closures_memory.py`
+
+ITERATIONS = 5000
+
+SOURCE = f"""
+var big = "x";
+var n = 0;
+while (n < 10) {{ big = big + big; n = n + 1; }}
+
+var last = nil;
+fun chain() {{
+    var i = 0;
+    while (i < {ITERATIONS}) {{
+        var payload = big + "!";
+        var prev = last;
+        fun link() {{ return prev; }}
+        last = link;
+        i = i + 1;
+    }}
+}}
+chain();
+"""
+
+
+# Devuelve cuántos bytes siguen vivos después de correr el programa,
+# mientras el intérprete (y la cadena de clausuras en `last`) siga vivo
+def retained(interpreter: Interpreter) -> int:
+    statements = load(SOURCE)
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    interpreter.interpret(statements)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before
+
+
+print(f"{'backend':<14}{'retenido':>14}{'por clausura':>16}")
+for name, interpreter in [
+    ("tree-walk", Interpreter()),
+    ("closures", ClosureCompiler()),
+]:
+    size = retained(interpreter)
+    print(f"{name:<14}{size / 1024:>12.1f}KB{size / ITERATIONS:>15.0f}B")
@@ -0,0 +1,44 @@
+import contextlib
+import io
+import os
+import time
+
+from plox.Scanner import Scanner
+from plox.Parser import Parser
+from plox.Resolver import Resolver
+
+# Funciones compartidas por los benchmarks de este directorio.
+# Se corren desde la raíz del repo, por ejemplo: `python3 ./benchmarks/vm.py`
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read(path: str) -> str:
+    with open(os.path.join(ROOT, path)) as file:
+        return file.read()
+
+
+# Escanea, parsea y resuelve un programa, igual que Plox.run
+def load(source: str):
+    statements = Parser(Scanner(source).scan()).parse()
+    resolver = Resolver()
+    for statement in statements:
+        resolver.resolve(statement)
+    return statements
+
+
+# Corre `fn` varias veces descartando lo que imprime, y devuelve el mejor tiempo
+def measure(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(rows: list[tuple[str, float, float]], baseline: str, contender: str):
+    print(f"{'programa':<28}{baseline:>14}{contender:>14}{'speedup':>10}")
+    for name, before, after in rows:
+        print(f"{name:<28}{before:>13.3f}s{after:>13.3f}s{before / after:>9.1f}x")
@@ -0,0 +1,58 @@
+from common import load, measure, report
+
+from plox.ClosureCompiler import ClosureCompiler
+from plox.Interpreter import Interpreter
+from plox.Walk import walk
+from plox.Stmt import ForStmt
+
+# Compara los for recorridos como un while (evaluando la condición y el
+# incremento en cada vuelta) contra los loops contados, que se recorren con
+# un range de Python, en el intérprete tree-walk y en --closures
+# `python3 ./benchmarks/counted.py`
+
+PROGRAMS = {
+    "for x 100000": """
+        var total = 0;
+        for (var i = 0; i < 100000; i = i + 1) total = total + i;
+        print total;
+    """,
+    "nested for 300x300": """
+        fun run(n) {
+            var total = 0;
+            for (var i = 0; i < n; i = i + 1) {
+                for (var j = n; j > 0; j = j - 1) total = total + 1;
+            }
+            return total;
+        }
+        print run(300);
+    """,
+    "for with calls x 20000": """
+        fun square(x) { return x * x; }
+        var total = 0;
+        for (var i = 0; i < 20000; i = i + 1) total = total + square(i);
+        print total;
+    """,
+}
+
+
+def run(source: str, backend: type[Interpreter], counted: bool):
+    statements = load(source)
+    if not counted:
+        for node in walk(statements):
+            if isinstance(node, ForStmt):
+                node.counted = None
+    backend().interpret(statements)
+
+
+for backend in (Interpreter, ClosureCompiler):
+    print(backend.__name__)
+    rows = [
+        (
+            name,
+            measure(lambda: run(source, backend, False)),
+            measure(lambda: run(source, backend, True)),
+        )
+        for name, source in PROGRAMS.items()
+    ]
+    report(rows, "while", "counted")
+    print()
@@ -0,0 +1,52 @@
+from common import load, measure, report
+
+from plox.Interpreter import Interpreter
+from plox.Walk import walk
+from plox.Resolver import Resolver
+from plox.optimizer.DeadCodeEliminator import DeadCodeEliminator
+
+# Compara el intérprete tree-walk sobre programas generados, con cientos de
+# funciones de las que se llaman unas pocas, con y sin el código muerto (las
+# funciones a las que no se llega, las locales sin usar y lo que sigue a un
+# return). Se mide resolver y ejecutar el árbol, que es lo que hace plox al
+# arrancar, y se muestra cuántos nodos tiene cada árbol
+# `python3 ./benchmarks/dead_code.py`
+
+
+def helpers(count: int) -> str:
+    return "\n".join(
+        f"""
+        fun helper{i}(a, b) {{
+            var unused = {i};
+            if (a > b) return a * {i} + b;
+            return b * {i} - a;
+            print "unreachable";
+        }}
+        """
+        for i in range(count)
+    )
+
+
+PROGRAMS = {
+    f"{count} helpers, 3 used": helpers(count)
+    + "print helper0(1, 2) + helper1(3, 4) + helper2(5, 6);"
+    for count in (100, 500, 2000)
+}
+
+
+def start(statements):
+    resolver = Resolver()
+    for statement in statements:
+        resolver.resolve(statement)
+    Interpreter().interpret(statements)
+
+
+rows = []
+for name, source in PROGRAMS.items():
+    full = load(source)
+    shaken = DeadCodeEliminator(whole_program=True).run(load(source))
+    print(f"{name}: {len(list(walk(full)))} -> {len(list(walk(shaken)))} nodes")
+    rows.append((name, measure(lambda: start(full)), measure(lambda: start(shaken))))
+
+print()
+report(rows, "full tree", "no dead code")
@@ -0,0 +1,46 @@
+from common import load, measure, read, report
+
+from plox.Interpreter import Interpreter
+from plox.optimizer.Optimizer import Optimizer
+
+# Compara el intérprete tree-walk con el árbol optimizado con y sin inlining
+# (--opt-level 1 contra --opt-level 2), sobre programas que llaman mucho a
+# funciones chicas
+# `python3 ./benchmarks/inlining.py`
+
+MINSKY = read("real-tests/3-minsky.lox").split('print "--- MINSKY MACHINE ---";')[0]
+
+PROGRAMS = {
+    "assert x 10000": MINSKY
+    + """
+        var i = 0;
+        while (i < 10000) { assert(i, i); i = i + 1; }
+    """,
+    "square x 20000": """
+        fun square(x) { return x * x; }
+        fun total(n) {
+            var i = 0;
+            var t = 0;
+            while (i < n) { t = t + square(i); i = i + 1; }
+            return t;
+        }
+        print total(20000);
+    """,
+    "minsky_even(40) x 50": MINSKY
+    + """
+        var j = 0;
+        while (j < 50) { assert(minsky_even(40), 1); j = j + 1; }
+    """,
+}
+
+
+def run(source: str, level: int):
+    statements = Optimizer(level, whole_program=True).optimize(load(source))
+    Interpreter().interpret(statements)
+
+
+rows = [
+    (name, measure(lambda: run(source, 1)), measure(lambda: run(source, 2)))
+    for name, source in PROGRAMS.items()
+]
+report(rows, "opt-level 1", "opt-level 2")
@@ -0,0 +1,44 @@
+from common import load, measure, read, report
+
+from plox.Interpreter import Interpreter
+from plox.TieredInterpreter import TieredInterpreter
+
+# Compara el intérprete tree-walk con el intérprete por niveles (--jit), que
+# compila a clausuras las funciones y los loops calientes
+# `python3 ./benchmarks/jit.py`
+
+PROGRAMS = {
+    "fib.lox": read("examples/fib.lox"),
+    "quad-loops.lox": read("examples/quad-loops.lox"),
+    "fib(18) recursivo": """
+        fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+        print fib(18);
+    """,
+    "loop x 50000": """
+        var total = 0;
+        for (var i = 0; i < 50000; i = i + 1) total = total + i % 7;
+        print total;
+    """,
+    # Nada llega a calentarse: solo se paga el costo de contar
+    "50 llamadas (frío)": """
+        fun add(a, b) { return a + b; }
+        var total = 0;
+        for (var i = 0; i < 50; i = i + 1) total = add(total, i);
+        print total;
+    """,
+}
+
+
+def run(source: str, interpreter: Interpreter):
+    interpreter.interpret(load(source))
+
+
+rows = [
+    (
+        name,
+        measure(lambda: run(source, Interpreter())),
+        measure(lambda: run(source, TieredInterpreter())),
+    )
+    for name, source in PROGRAMS.items()
+]
+report(rows, "tree-walk", "jit")
@@ -0,0 +1,58 @@
+from common import load, measure, read, report
+
+from plox.Interpreter import Interpreter
+from plox.optimizer.Optimizer import Optimizer
+
+# Compara el intérprete tree-walk con el árbol optimizado con y sin
+# loop-invariant code motion y eliminación de subexpresiones comunes
+# (--opt-level 2 contra --opt-level 3), sobre loops anidados al estilo
+# de examples/quad-loops.lox
+# `python3 ./benchmarks/loops.py`
+
+PROGRAMS = {
+    "quad-loops.lox": read("examples/quad-loops.lox"),
+    "invariant x 100x100": """
+        fun run(n, m) {
+            var total = 0;
+            var i = 0;
+            while (i < n) {
+                var j = 0;
+                while (j < 100) {
+                    total = total + (n * 2 + 1) * (m - 1) + i * m * m + j;
+                    j = j + 1;
+                }
+                i = i + 1;
+            }
+            return total;
+        }
+        print run(100, 7);
+    """,
+    "common x 20000": """
+        fun run(n) {
+            var a = 3;
+            var b = 4;
+            var total = 0;
+            var i = 0;
+            while (i < n) {
+                var x = a * i + b * i;
+                var y = a * i + b * i + 1;
+                total = total + x * y - (a * i + b * i);
+                i = i + 1;
+            }
+            return total;
+        }
+        print run(20000);
+    """,
+}
+
+
+def run(source: str, level: int):
+    statements = Optimizer(level, whole_program=True).optimize(load(source))
+    Interpreter().interpret(statements)
+
+
+rows = [
+    (name, measure(lambda: run(source, 2)), measure(lambda: run(source, 3)))
+    for name, source in PROGRAMS.items()
+]
+report(rows, "opt-level 2", "opt-level 3")
@@ -0,0 +1,47 @@
+import random
+
+from common import measure
+
+from plox.Parser import Parser
+from plox.RegexScanner import RegexScanner
+
+# Cuántos tokens por segundo parsea el parser sobre programas generados con
+# expresiones grandes y chicas. Los tokens se escanean una sola vez, antes de
+# medir
+# `python3 ./benchmarks/parser.py`
+
+OPERATORS = ["+", "-", "*", "/", "%", "<", "<=", ">", ">=", "==", "!=", "and", "or"]
+
+
+def expression(rng: random.Random, depth: int) -> str:
+    if depth == 0:
+        return rng.choice(["1", "2.5", '"s"', "true", "nil", "a", "b", "c"])
+    match rng.randrange(4):
+        case 0:
+            return f"({expression(rng, depth - 1)})"
+        case 1:
+            return f"{rng.choice(['-', '!'])}{expression(rng, depth - 1)}"
+        case 2:
+            return f"f({expression(rng, depth - 1)}, {expression(rng, depth - 1)})"
+        case _:
+            left, right = expression(rng, depth - 1), expression(rng, depth - 1)
+            return f"{left} {rng.choice(OPERATORS)} {right}"
+
+
+def program(statements: int, depth: int) -> str:
+    rng = random.Random(0)
+    return "\n".join(f"x = {expression(rng, depth)};" for _ in range(statements))
+
+
+PROGRAMS = {
+    "literals x 100000": "print 1;\n" * 100000,
+    "assignments x 50000": "a = b + 1;\n" * 50000,
+    "expressions depth 4 x 5000": program(5000, 4),
+    "expressions depth 10 x 200": program(200, 10),
+}
+
+print(f"{'programa':<28}{'tokens':>10}{'tiempo':>12}{'tokens/s':>12}")
+for name, source in PROGRAMS.items():
+    tokens = RegexScanner(source).scan()
+    elapsed = measure(lambda: Parser(tokens).parse())
+    print(f"{name:<28}{len(tokens):>10}{elapsed:>11.3f}s{len(tokens) / elapsed:>12.0f}")
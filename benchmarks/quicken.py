@@ -0,0 +1,32 @@
+from common import load, measure, read, report
+
+from plox.Interpreter import Interpreter
+from plox.Quickening import QuickeningInterpreter
+
+# Compara el intérprete tree-walk con el intérprete adaptativo (--quicken),
+# que especializa los operadores y las llamadas según los tipos que ve
+# `python3 ./benchmarks/quicken.py`
+
+PROGRAMS = {
+    "fib.lox": read("examples/fib.lox"),
+    "quad-loops.lox": read("examples/quad-loops.lox"),
+    "fib(18) recursivo": """
+        fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+        print fib(18);
+    """,
+}
+
+
+def run(source: str, interpreter: Interpreter):
+    interpreter.interpret(load(source))
+
+
+rows = [
+    (
+        name,
+        measure(lambda: run(source, Interpreter())),
+        measure(lambda: run(source, QuickeningInterpreter())),
+    )
+    for name, source in PROGRAMS.items()
+]
+report(rows, "tree-walk", "quicken")
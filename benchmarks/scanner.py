@@ -0,0 +1,43 @@
+import glob
+import os
+
+from common import ROOT, measure, read
+
+from plox.RegexScanner import RegexScanner
+from plox.Scanner import Scanner
+
+# Cuántos MB/s escanean Scanner (caracter por caracter) y RegexScanner
+# (--regex-scanner) sobre un programa generado de varios MB, armado con los
+# programas de examples/ que se escanean sin errores
+# `python3 ./benchmarks/scanner.py`
+
+SIZE = 4 * 1024 * 1024
+
+
+def generated() -> str:
+    programs = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.lox"))):
+        source = read(path)
+        try:
+            Scanner(source).scan()
+        except Exception:
+            # Algunos ejemplos muestran errores del scanner
+            continue
+        programs.append(source)
+    chunk = "\n".join(programs) + "\n"
+    return chunk * (SIZE // len(chunk) + 1)
+
+
+source = generated()
+megabytes = len(source.encode()) / (1024 * 1024)
+tokens = len(RegexScanner(source).scan())
+print(f"{megabytes:.1f} MB, {tokens} tokens")
+print(f"{'scanner':<28}{'tiempo':>14}{'MB/s':>10}")
+times = {}
+for scanner in (Scanner, RegexScanner):
+    times[scanner] = measure(lambda: scanner(source).scan(), repeat=1)
+    print(
+        f"{scanner.__name__:<28}{times[scanner]:>13.3f}s"
+        f"{megabytes / times[scanner]:>10.1f}"
+    )
+print(f"speedup: {times[Scanner] / times[RegexScanner]:.1f}x")
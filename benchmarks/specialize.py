@@ -0,0 +1,73 @@
+import glob
+import os
+
+from common import ROOT, load, measure, read, report
+
+from plox.Interpreter import Interpreter
+from plox.cfg.TypeInference import TypeInference
+
+# Cuántos operadores especializa la inferencia de tipos (--specialize) en los
+# programas de examples/, y cuánto tarda el intérprete tree-walk con y sin
+# los nodos especializados
+# `python3 ./benchmarks/specialize.py`
+
+PROGRAMS = {
+    "quad-loops.lox": read("examples/quad-loops.lox"),
+    "counter x 50000": """
+        var total = 0;
+        for (var i = 0; i < 50000; i = i + 1) {
+            total = total + i * 2 - 1;
+        }
+        print total;
+    """,
+    "strings x 20000": """
+        fun run() {
+            var s = "";
+            var n = 0;
+            while (n < 20000) {
+                s = s + "a";
+                n = n + 1;
+            }
+            return s;
+        }
+        run();
+    """,
+}
+
+
+def sites():
+    total, specialized = 0, 0
+    print(f"{'programa':<28}{'operadores':>12}{'especializados':>16}")
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.lox"))):
+        try:
+            statements = load(read(path))
+        except Exception:
+            # Algunos ejemplos muestran errores del scanner, parser o resolvedor
+            continue
+        inference = TypeInference()
+        inference.specialize(statements)
+        if not inference.sites:
+            continue
+        total += len(inference.sites)
+        specialized += inference.specialized
+        print(
+            f"{os.path.basename(path):<28}{len(inference.sites):>12}"
+            f"{inference.specialized:>16}"
+        )
+    print(f"{'total':<28}{total:>12}{specialized:>16} ({specialized / total:.0%})")
+    print()
+
+
+def run(source: str, specialize: bool):
+    statements = load(source)
+    if specialize:
+        statements = TypeInference().specialize(statements)
+    Interpreter().interpret(statements)
+
+
+sites()
+rows = [
+    (name, measure(lambda: run(source, False)), measure(lambda: run(source, True)))
+    for name, source in PROGRAMS.items()
+]
+report(rows, "checked", "specialized")
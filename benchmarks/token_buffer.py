@@ -0,0 +1,66 @@
+import gc
+import glob
+import os
+import tracemalloc
+
+from common import ROOT, measure, read
+
+from plox.Parser import Parser
+from plox.RegexScanner import RegexScanner
+from plox.Scanner import Scanner
+
+# Compara la lista de Tokens que devuelven los scanners con el TokenBuffer
+# (--token-buffer) sobre un programa generado de 1 MB: cuánta memoria ocupan
+# los tokens escaneados, y cuánto tarda escanear y parsear el programa
+# `python3 ./benchmarks/token_buffer.py`
+
+SIZE = 1024 * 1024
+
+
+def generated() -> str:
+    programs = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.lox"))):
+        source = read(path)
+        try:
+            Parser(Scanner(source).scan()).parse()
+        except Exception:
+            # Algunos ejemplos muestran errores del scanner o del parser
+            continue
+        programs.append(source)
+    chunk = "\n".join(programs) + "\n"
+    return chunk * (SIZE // len(chunk) + 1)
+
+
+SCANNERS = {
+    "Scanner (list)": lambda source: Scanner(source).scan(),
+    "RegexScanner (list)": lambda source: RegexScanner(source).scan(),
+    "RegexScanner (buffer)": lambda source: RegexScanner(source).scan_buffer(),
+}
+
+
+# Cuántos bytes ocupan los tokens escaneados, sin contar el código
+def retained(scan, source: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    tokens = scan(source)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tokens
+    return size
+
+
+source = generated()
+megabytes = len(source.encode()) / (1024 * 1024)
+count = len(RegexScanner(source).scan_buffer())
+print(f"{megabytes:.1f} MB, {count} tokens")
+print(
+    f"{'tokens':<28}{'memoria':>14}{'por token':>12}{'escanear':>12}{'+ parsear':>12}"
+)
+for name, scan in SCANNERS.items():
+    size = retained(scan, source)
+    scanning = measure(lambda: scan(source), repeat=1)
+    parsing = measure(lambda: Parser(scan(source)).parse(), repeat=1)
+    print(
+        f"{name:<28}{size / (1024 * 1024):>11.1f} MB{size / count:>10.1f} B"
+        f"{scanning:>11.3f}s{parsing:>11.3f}s"
+    )
@@ -0,0 +1,39 @@
+import os
+
+from common import ROOT, load, measure, read, report
+
+from plox.Interpreter import Interpreter
+from plox.Transpiler import Transpiler
+
+# Compara el intérprete tree-walk contra el código de Python generado por el
+# transpilador (incluyendo el tiempo de generarlo y compilarlo),
+# sobre todos los programas de examples/ que llegan a ejecutarse
+# `python3 ./benchmarks/transpiler.py`
+
+
+def run(source: str, interpreter: Interpreter | Transpiler):
+    try:
+        interpreter.interpret(load(source))
+    except Exception:
+        # Algunos ejemplos terminan a propósito con un error
+        pass
+
+
+rows = []
+for program in sorted(os.listdir(os.path.join(ROOT, "examples"))):
+    source = read(os.path.join("examples", program))
+    try:
+        load(source)
+    except Exception:
+        # Los ejemplos de errores de scanning, parsing o resolución no se ejecutan
+        continue
+
+    rows.append(
+        (
+            program,
+            measure(lambda: run(source, Interpreter())),
+            measure(lambda: run(source, Transpiler())),
+        )
+    )
+
+report(rows, "tree-walk", "python")
@@ -0,0 +1,36 @@
+from common import load, measure, read, report
+
+from plox.Interpreter import Interpreter
+from plox.bytecode.VM import VM
+
+# Compara el intérprete tree-walk contra la máquina virtual de bytecode
+# `python3 ./benchmarks/vm.py`
+
+PROGRAMS = [
+    "examples/fib.lox",
+    "examples/quad-loops.lox",
+    "real-tests/3-minsky.lox",
+]
+
+
+def run_interpreter(source: str):
+    interpreter = Interpreter()
+    interpreter.interpret(load(source))
+
+
+def run_vm(source: str):
+    VM().interpret(load(source))
+
+
+rows = []
+for program in PROGRAMS:
+    source = read(program)
+    rows.append(
+        (
+            program,
+            measure(lambda: run_interpreter(source)),
+            measure(lambda: run_vm(source)),
+        )
+    )
+
+report(rows, "tree-walk", "vm")
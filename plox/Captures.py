@@ -0,0 +1,139 @@
+from functools import singledispatchmethod
+
+from .Token import Token
+from .Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ReturnStmt,
+)
+from .Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+
+
+# Antes de compilar a bytecode (bytecode/Compiler.py) o a Python
+# (Transpiler.py) necesitamos saber qué variables locales son capturadas
+# por alguna función anidada: esas viven en una celda en vez de directamente
+# en el stack o en una local de Python. Recorremos el árbol con las mismas
+# reglas de scopes que el resolvedor (Resolver.py) y marcamos el token que
+# declara cada variable capturada.
+class CaptureAnalyzer(object):
+    def __init__(self):
+        self.scopes: list[dict[str, Token]] = []
+        # Para cada función que estamos recorriendo, el índice de su primer scope
+        self.function_starts: list[int] = []
+        self.captured: set[Token] = set()
+
+    def declare(self, name: Token):
+        if self.scopes:
+            self.scopes[-1][name.lexeme] = name
+
+    def reference(self, name: Token):
+        function_start = self.function_starts[-1] if self.function_starts else 0
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if name.lexeme in self.scopes[i]:
+                # Si la variable se declaró por fuera de la función actual,
+                # es una variable capturada
+                if i < function_start:
+                    self.captured.add(self.scopes[i][name.lexeme])
+                return
+
+    @singledispatchmethod
+    def analyze(self, node: Stmt | Expr):
+        raise RuntimeError(f"Unknown statement or expression type: `{type(node)}`")
+
+    @analyze.register
+    def _(self, statement: BlockStmt):
+        self.scopes.append({})
+        for stmt in statement.statements:
+            self.analyze(stmt)
+        self.scopes.pop()
+
+    @analyze.register
+    def _(self, statement: VarDecl):
+        self.declare(statement.name)
+        if statement.initializer is not None:
+            self.analyze(statement.initializer)
+
+    @analyze.register
+    def _(self, statement: FunDecl):
+        self.declare(statement.name)
+        self.scopes.append({})
+        self.function_starts.append(len(self.scopes) - 1)
+        for param in statement.parameters:
+            self.declare(param)
+        for stmt in statement.body:
+            self.analyze(stmt)
+        self.function_starts.pop()
+        self.scopes.pop()
+
+    @analyze.register
+    def _(self, statement: ExpressionStmt):
+        self.analyze(statement.expression)
+
+    @analyze.register
+    def _(self, statement: PrintStmt):
+        self.analyze(statement.expression)
+
+    @analyze.register
+    def _(self, statement: ReturnStmt):
+        if statement.value is not None:
+            self.analyze(statement.value)
+
+    @analyze.register
+    def _(self, statement: IfStmt):
+        self.analyze(statement.condition)
+        self.analyze(statement.then_branch)
+        if statement.else_branch is not None:
+            self.analyze(statement.else_branch)
+
+    @analyze.register
+    def _(self, statement: WhileStmt):
+        self.analyze(statement.condition)
+        self.analyze(statement.body)
+
+    @analyze.register
+    def _(self, expression: VariableExpr):
+        self.reference(expression.name)
+
+    @analyze.register
+    def _(self, expression: AssignmentExpr):
+        self.analyze(expression.value)
+        self.reference(expression.name)
+
+    @analyze.register
+    def _(self, expression: LiteralExpr):
+        return
+
+    @analyze.register
+    def _(self, expression: GroupingExpr):
+        self.analyze(expression.expression)
+
+    @analyze.register
+    def _(self, expression: UnaryExpr):
+        self.analyze(expression.right)
+
+    @analyze.register
+    def _(self, expression: BinaryExpr | LogicExpr):
+        self.analyze(expression.left)
+        self.analyze(expression.right)
+
+    @analyze.register
+    def _(self, expression: CallExpr):
+        self.analyze(expression.callee)
+        for arg in expression.arguments:
+            self.analyze(arg)
@@ -0,0 +1,634 @@
+from functools import singledispatchmethod
+from typing import Any, Callable, cast
+
+from .Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ForStmt,
+    ReturnStmt,
+)
+from .Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+from .Function import Function, ReturnValue, TailCall
+from .Interpreter import Interpreter, counted_range, counted_end
+from .Token import TokenType
+from .Env import Env, Cell, UNDEFINED
+from .Operators import check_numbers, check_plus, divide, modulo, negate
+
+# Cada nodo se compila a una función de Python que recibe el entorno en el que
+# se ejecuta. Las expresiones devuelven su valor. Los statements devuelven None,
+# salvo un return, que devuelve una tupla (valor,) que se propaga hasta la función.
+# Así los returns no necesitan lanzar excepciones. Las tail calls, igual que en el
+# intérprete, devuelven una TailCall que hace la función que se está ejecutando.
+CompiledExpr = Callable[[Env], Any]
+CompiledStmt = Callable[[Env], tuple | None]
+
+
+# Un intérprete que, en vez de recorrer el árbol en cada ejecución, lo recorre
+# una única vez y arma una clausura de Python por cada nodo, con el operador,
+# los chequeos de tipos y la profundidad resuelta de cada variable ya fijados.
+# Ejecutar el programa es solamente llamar a esas clausuras.
+# Reutiliza todo lo del intérprete: el resolvedor completa sus profundidades
+# de la misma manera, y el entorno global es el mismo.
+class ClosureCompiler(Interpreter):
+    def interpret(self, statements: list[Stmt]):
+        lastvalue_produced = None
+        for statement in statements:
+            # Igual que el intérprete, nos guardamos el valor de los
+            # statements de expresión para mostrarlo en el REPL
+            if isinstance(statement, ExpressionStmt):
+                lastvalue_produced = self.compile_expr(statement.expression)(self.env)
+                continue
+
+            lastvalue_produced = None
+            completion = self.compile_stmt(statement)(self.env)
+            if completion is not None:
+                # Un return por fuera de una función
+                raise ReturnValue(completion[0])
+        return lastvalue_produced
+
+    # ---------- Compilación de Statements ---------- #
+
+    @singledispatchmethod
+    def compile_stmt(self, statement: Stmt) -> CompiledStmt:
+        raise RuntimeError(f"Unknown statement type: `{type(statement)}`")
+
+    @compile_stmt.register
+    def _(self, statement: ExpressionStmt) -> CompiledStmt:
+        expression = self.compile_expr(statement.expression)
+
+        def run(env):
+            expression(env)
+
+        return run
+
+    @compile_stmt.register
+    def _(self, statement: PrintStmt) -> CompiledStmt:
+        expression = self.compile_expr(statement.expression)
+
+        def run(env):
+            print(expression(env))
+
+        return run
+
+    @compile_stmt.register
+    def _(self, statement: VarDecl) -> CompiledStmt:
+        define = self.compile_define(statement)
+        if statement.initializer is None:
+            return lambda env: define(env, None)
+
+        initializer = self.compile_expr(statement.initializer)
+        return lambda env: define(env, initializer(env))
+
+    @compile_stmt.register
+    def _(self, statement: FunDecl) -> CompiledStmt:
+        body = self.compile_block(statement.body)
+        captures = [self.compile_cell(variable) for variable in statement.captures]
+
+        if statement.slot is not None and statement.captured:
+            # La función se captura a sí misma: su celda tiene que existir antes
+            slot = statement.slot
+
+            def run_captured(env):
+                cell = env.values[slot] = Cell(UNDEFINED)
+                upvalues = [capture(env) for capture in captures]
+                cell.value = CompiledFunction(statement, upvalues, body)
+
+            return run_captured
+
+        define = self.compile_define(statement)
+
+        def run(env):
+            upvalues = [capture(env) for capture in captures]
+            define(env, CompiledFunction(statement, upvalues, body))
+
+        return run
+
+    # Compila la definición de una variable en su slot local, o por nombre si es global
+    def compile_define(
+        self, statement: VarDecl | FunDecl
+    ) -> Callable[[Env, Any], None]:
+        if statement.slot is None:
+            name = statement.name.lexeme
+            global_values = self.globals
+
+            def define_global(env, value):
+                global_values[name] = value
+
+            return define_global
+
+        slot = statement.slot
+
+        if statement.captured:
+
+            def define_cell(env, value):
+                env.values[slot] = Cell(value)
+
+            return define_cell
+
+        def define_local(env, value):
+            env.values[slot] = value
+
+        return define_local
+
+    # Compila el acceso a la celda de una variable capturada: una local que
+    # usa alguna clausura, o una upvalue de la función actual
+    def compile_cell(
+        self, expression: VariableExpr | AssignmentExpr
+    ) -> Callable[[Env], Cell]:
+        if expression.upvalue is not None:
+            index = expression.upvalue
+            return lambda env: env.upvalues[index]
+
+        depth, slot = expression.depth, expression.slot
+        if depth is None:
+            # Si el resolvedor está bien hecho, esto no debería pasar nunca!
+            raise RuntimeError(
+                f"Cannot capture global variable '{expression.name.lexeme}'"
+            )
+        return lambda env: env.cell(slot, depth)
+
+    @compile_stmt.register
+    def _(self, statement: ReturnStmt) -> CompiledStmt:
+        if statement.value is None:
+            return lambda env: (None,)
+
+        if statement.tail_call:
+            return self.compile_tail_call(cast(CallExpr, statement.value))
+
+        value = self.compile_expr(statement.value)
+        return lambda env: (value(env),)
+
+    @compile_stmt.register
+    def _(self, statement: IfStmt) -> CompiledStmt:
+        condition = self.compile_expr(statement.condition)
+        then_branch = self.compile_stmt(statement.then_branch)
+
+        if statement.else_branch is None:
+
+            def run(env):
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+
+            return run
+
+        else_branch = self.compile_stmt(statement.else_branch)
+
+        def run_with_else(env):
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+
+        return run_with_else
+
+    @compile_stmt.register
+    def _(self, statement: WhileStmt) -> CompiledStmt:
+        return self.compile_loop(statement)
+
+    def compile_loop(self, statement: WhileStmt) -> CompiledStmt:
+        condition = self.compile_expr(statement.condition)
+        body = self.compile_stmt(statement.body)
+
+        def run(env):
+            while True:
+                value = condition(env)
+                if value is None or value is False:
+                    return None
+                completion = body(env)
+                if completion is not None:
+                    return completion
+
+        return run
+
+    @compile_stmt.register
+    def _(self, statement: ForStmt) -> CompiledStmt:
+        # Igual que en el intérprete, los loops contados se recorren con un
+        # range de Python. Como el programa ya está resuelto, se sabe desde
+        # ahora si el contador y el límite son locales
+        generic = self.compile_loop(statement)
+        loop = statement.counted
+        if loop is None or not loop.local():
+            return generic
+
+        counter = self.compile_expr(loop.counter)
+        bound = self.compile_expr(loop.bound)
+        body = self.compile_block(cast(BlockStmt, statement.body).statements[:-1])
+        depth, slot = cast(int, loop.counter.depth), loop.counter.slot
+
+        def run(env):
+            steps = counted_range(loop, counter(env), bound(env))
+            if steps is None:
+                return generic(env)
+            values = env.ancestor(depth).values if depth else env.values
+            for value in map(float, steps):
+                values[slot] = value
+                completion = body(env)
+                if completion is not None:
+                    return completion
+            values[slot] = counted_end(steps)
+
+        return run
+
+    @compile_stmt.register
+    def _(self, statement: BlockStmt) -> CompiledStmt:
+        block = self.compile_block(statement.statements)
+        size = statement.scope_size
+
+        # Igual que en el intérprete, los bloques que no declaran variables
+        # se ejecutan en el entorno que los encierra
+        if size == 0:
+            return block
+
+        # Como las clausuras no se quedan con su entorno, lo reutilizamos
+        # entre ejecuciones. Lo sacamos de `free` mientras se usa, por si el
+        # bloque vuelve a ejecutarse antes de terminar (ej: recursión)
+        free: list[Env] = []
+
+        def run(env):
+            if free:
+                block_env = free.pop()
+                block_env.enclosing = env
+                block_env.upvalues = env.upvalues
+            else:
+                block_env = Env(size, enclosing=env)
+            try:
+                return block(block_env)
+            finally:
+                block_env.release()
+                free.append(block_env)
+
+        return run
+
+    # Compila una lista de statements que se ejecutan en un entorno ya creado
+    def compile_block(self, statements: list[Stmt]) -> CompiledStmt:
+        compiled = [self.compile_stmt(statement) for statement in statements]
+
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def run(env):
+            for statement in compiled:
+                completion = statement(env)
+                if completion is not None:
+                    return completion
+
+        return run
+
+    # ---------- Compilación de Expresiones ---------- #
+
+    @singledispatchmethod
+    def compile_expr(self, expression: Expr) -> CompiledExpr:
+        raise RuntimeError(f"Unknown expression type: `{type(expression)}`")
+
+    @compile_expr.register
+    def _(self, expression: LiteralExpr) -> CompiledExpr:
+        value = expression.value
+        return lambda env: value
+
+    @compile_expr.register
+    def _(self, expression: GroupingExpr) -> CompiledExpr:
+        # Los paréntesis solo importan al parsear: compilamos directo lo de adentro
+        return self.compile_expr(expression.expression)
+
+    @compile_expr.register
+    def _(self, expression: VariableExpr) -> CompiledExpr:
+        name = expression.name.lexeme
+
+        # Las variables capturadas se leen desde su celda
+        if expression.upvalue is not None or expression.captured:
+            cell = self.compile_cell(expression)
+
+            def get_cell(env):
+                value = cell(env).value
+                if value is UNDEFINED:
+                    raise RuntimeError(f"Undefined variable '{name}'")
+                return value
+
+            return get_cell
+
+        # Las variables que el resolvedor no encontró en ningún scope local
+        # se buscan entre las globales
+        if expression.depth is None:
+            global_values = self.globals
+
+            def get_global(env):
+                if name in global_values:
+                    return global_values[name]
+                raise RuntimeError(f"Undefined variable '{name}'")
+
+            return get_global
+
+        depth, slot = expression.depth, expression.slot
+
+        # Los casos más comunes no necesitan recorrer la cadena de entornos
+        if depth == 0:
+
+            def get_local(env):
+                value = env.values[slot]
+                if value is UNDEFINED:
+                    raise RuntimeError(f"Undefined variable '{name}'")
+                return value
+
+            return get_local
+
+        if depth == 1:
+
+            def get_enclosing(env):
+                value = env.enclosing.values[slot]
+                if value is UNDEFINED:
+                    raise RuntimeError(f"Undefined variable '{name}'")
+                return value
+
+            return get_enclosing
+
+        return lambda env: env.get(name, slot, depth)
+
+    @compile_expr.register
+    def _(self, expression: AssignmentExpr) -> CompiledExpr:
+        name = expression.name.lexeme
+        value = self.compile_expr(expression.value)
+
+        if expression.upvalue is not None or expression.captured:
+            cell = self.compile_cell(expression)
+
+            def set_cell(env):
+                result = value(env)
+                target = cell(env)
+                if target.value is UNDEFINED:
+                    raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+                target.value = result
+                return result
+
+            return set_cell
+
+        if expression.depth is None:
+            global_values = self.globals
+
+            def set_global(env):
+                result = value(env)
+                if name not in global_values:
+                    raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+                global_values[name] = result
+                return result
+
+            return set_global
+
+        depth, slot = expression.depth, expression.slot
+
+        if depth == 0:
+
+            def set_local(env):
+                result = value(env)
+                values = env.values
+                if values[slot] is UNDEFINED:
+                    raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+                values[slot] = result
+                return result
+
+            return set_local
+
+        return lambda env: env.assign(name, slot, value(env), depth)
+
+    @compile_expr.register
+    def _(self, expression: UnaryExpr) -> CompiledExpr:
+        right = self.compile_expr(expression.right)
+
+        match expression.operator.token_type:
+            case TokenType.MINUS:
+
+                def minus(env):
+                    value = right(env)
+                    if type(value) is float:
+                        return -value
+                    return negate(value)
+
+                return minus
+            case TokenType.BANG:
+
+                def bang(env):
+                    value = right(env)
+                    return value is None or value is False
+
+                return bang
+            case _:
+                raise RuntimeError(f"Unknown unary operator: `{expression.operator}`")
+
+    # Cada operador se compila a una clausura que solo llama a su chequeo (de
+    # Operators.py) si los operandos no son los floats que produce el scanner
+    @compile_expr.register
+    def _(self, expression: BinaryExpr) -> CompiledExpr:
+        left = self.compile_expr(expression.left)
+        right = self.compile_expr(expression.right)
+
+        match expression.operator.token_type:
+            case TokenType.PLUS:
+
+                def plus(env):
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is not float or type(b) is not float:
+                        check_plus(a, b)
+                    return a + b
+
+                return plus
+            case TokenType.MINUS:
+
+                def minus(env):
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is not float or type(b) is not float:
+                        check_numbers("-", a, b)
+                    return a - b
+
+                return minus
+            case TokenType.STAR:
+
+                def star(env):
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is not float or type(b) is not float:
+                        check_numbers("*", a, b)
+                    return a * b
+
+                return star
+            case TokenType.SLASH:
+
+                def slash(env):
+                    a = left(env)
+                    b = right(env)
+                    check_numbers("/", a, b)
+                    return divide(a, b)
+
+                return slash
+            case TokenType.PERCENT:
+
+                def percent(env):
+                    a = left(env)
+                    b = right(env)
+                    check_numbers("%", a, b)
+                    return modulo(a, b)
+
+                return percent
+            case TokenType.GREATER:
+
+                def greater(env):
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is not float or type(b) is not float:
+                        check_numbers(">", a, b)
+                    return a > b
+
+                return greater
+            case TokenType.GREATER_EQUAL:
+
+                def greater_equal(env):
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is not float or type(b) is not float:
+                        check_numbers(">=", a, b)
+                    return a >= b
+
+                return greater_equal
+            case TokenType.LESS:
+
+                def less(env):
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is not float or type(b) is not float:
+                        check_numbers("<", a, b)
+                    return a < b
+
+                return less
+            case TokenType.LESS_EQUAL:
+
+                def less_equal(env):
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is not float or type(b) is not float:
+                        check_numbers("<=", a, b)
+                    return a <= b
+
+                return less_equal
+            case TokenType.EQUAL_EQUAL:
+                return lambda env: left(env) == right(env)
+            case TokenType.BANG_EQUAL:
+                return lambda env: left(env) != right(env)
+            case _:
+                raise RuntimeError(f"Unknown binary operator: `{expression.operator}`")
+
+    @compile_expr.register
+    def _(self, expression: LogicExpr) -> CompiledExpr:
+        left = self.compile_expr(expression.left)
+        right = self.compile_expr(expression.right)
+
+        if expression.operator.token_type == TokenType.OR:
+
+            def logic_or(env):
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+
+            return logic_or
+
+        def logic_and(env):
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+
+        return logic_and
+
+    @compile_expr.register
+    def _(self, expression: CallExpr) -> CompiledExpr:
+        callee = self.compile_expr(expression.callee)
+        arguments = [self.compile_expr(arg) for arg in expression.arguments]
+        interpreter = self
+
+        def call(env):
+            function = callee(env)
+            values = [arg(env) for arg in arguments]
+
+            if not callable(function):
+                raise RuntimeError(f"Cannot call non-callable object: `{function}`")
+
+            if len(values) != function.arity:
+                raise RuntimeError(
+                    f"Expected {function.arity} arguments, got {len(values)}"
+                )
+
+            return function(interpreter, values)
+
+        return call
+
+    # Compila un `return f(...);` en posición de cola: igual que una llamada,
+    # pero en vez de hacerla se la devuelve a la función que se está ejecutando
+    def compile_tail_call(self, expression: CallExpr) -> CompiledStmt:
+        callee = self.compile_expr(expression.callee)
+        arguments = [self.compile_expr(arg) for arg in expression.arguments]
+
+        def tail_call(env):
+            function = callee(env)
+            values = [arg(env) for arg in arguments]
+
+            if not callable(function):
+                raise RuntimeError(f"Cannot call non-callable object: `{function}`")
+
+            if len(values) != function.arity:
+                raise RuntimeError(
+                    f"Expected {function.arity} arguments, got {len(values)}"
+                )
+
+            return TailCall(function, values)
+
+        return tail_call
+
+
+# Una función cuyo cuerpo ya fue compilado a clausuras.
+# Se imprime y se llama igual que una Function del intérprete
+class CompiledFunction(Function):
+    def __init__(
+        self,
+        declaration: FunDecl,
+        upvalues: list[Cell],
+        body: CompiledStmt,
+    ):
+        super().__init__(declaration, upvalues)
+        self.body = body
+        # Los slots del cuerpo que no ocupan los parámetros
+        self.padding = [UNDEFINED] * (self.scope_size - self.arity)
+        self.captured_params = declaration.captured_params
+
+    def __call__(self, interpreter: Interpreter, arguments: list):
+        function = self
+        while True:
+            function_env = Env(upvalues=function.upvalues)
+            values = function_env.values = arguments + function.padding
+            for slot in function.captured_params:
+                values[slot] = Cell(values[slot])
+
+            completion = function.body(function_env)
+            if completion is None:
+                return None
+            # Las tail calls se ejecutan en este mismo frame de Python
+            if type(completion) is TailCall:
+                function, arguments = completion.function, completion.arguments
+                continue
+            return completion[0]
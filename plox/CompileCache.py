@@ -0,0 +1,115 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from platformdirs import user_cache_dir
+
+from .Stmt import Stmt
+from .Resolver import Resolver
+
+PACKAGE = Path(__file__).parent
+
+# Cuántos programas guarda por defecto el cache
+CACHE_SIZE = 256
+
+
+# Lo que identifica al plox que armó un programa: su versión, y la fecha y el
+# tamaño de cada uno de sus archivos, por si se lo está editando (ej: instalado
+# con --editable) sin cambiar la versión. Cualquier cambio invalida el cache
+def fingerprint() -> str:
+    try:
+        plox = version("plox")
+    except PackageNotFoundError:
+        plox = "unknown"
+    files = []
+    for path in sorted(PACKAGE.rglob("*.py")):
+        stat = path.stat()
+        files.append(f"{path.relative_to(PACKAGE)}:{stat.st_mtime_ns}:{stat.st_size}")
+    return f"{plox}\0" + "\0".join(files)
+
+
+# Un cache en disco de los programas ya escaneados, parseados y resueltos, al
+# estilo de __pycache__: correr el mismo archivo otra vez se saltea todo eso y
+# arranca desde el árbol resuelto (plox --no-cache lo desactiva).
+# Cada programa se guarda con pickle, en un archivo cuyo nombre es el hash del
+# código junto con lo que puede cambiar el resultado (el plox que lo armó y el
+# límite de anidamiento), así que un código o un plox distintos nunca
+# encuentran un árbol viejo. Es solo un atajo: si no se puede leer o escribir
+# un archivo, el programa se compila como si no hubiese cache.
+# Guarda como mucho `maxsize` programas: al guardar uno nuevo se borran los
+# que hace más tiempo que no se usan, como los de un código que cambió o los
+# que armó un plox anterior, que ya no se van a volver a leer
+class CompileCache(object):
+    def __init__(
+        self,
+        directory: str | None = None,
+        max_nesting: int | None = None,
+        maxsize: int = CACHE_SIZE,
+    ):
+        self.directory = Path(directory or user_cache_dir("plox"))
+        self.max_nesting = max_nesting
+        self.maxsize = maxsize
+        self.fingerprint: str | None = None
+
+    def path(self, source: str) -> Path:
+        if self.fingerprint is None:
+            self.fingerprint = fingerprint()
+        key = f"{self.fingerprint}\0{self.max_nesting}\0{source}"
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.pickle"
+
+    # El programa guardado para este código, o None si no está (o no se pudo leer)
+    def load(self, source: str) -> tuple[list[Stmt], Resolver] | None:
+        path = self.path(source)
+        try:
+            with open(path, "rb") as file:
+                statements, resolver = pickle.load(file)
+        except Exception:
+            return None
+        # La fecha de modificación del archivo es la de su último uso
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return statements, resolver
+
+    # Guarda el programa recién resuelto, antes de que el optimizador o el
+    # intérprete lo toquen. El resolvedor va junto con el árbol, porque sus
+    # listas de declaraciones y accesos apuntan a nodos del árbol
+    def store(self, source: str, statements: list[Stmt], resolver: Resolver):
+        try:
+            data = pickle.dumps((statements, resolver), pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            # pickle recorre el árbol recursivamente: los programas muy
+            # anidados no se guardan
+            return
+
+        # Escribimos a un archivo temporal y lo renombramos, así otro plox
+        # corriendo a la vez nunca lee un archivo a medio escribir
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temporary, self.path(source))
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(temporary)
+            return
+        self.prune()
+
+    # Borra los programas que hace más tiempo que no se usan, hasta que queden
+    # `maxsize`. Si otro plox ya borró alguno, no pasa nada
+    def prune(self):
+        entries = []
+        for path in self.directory.glob("*.pickle"):
+            with contextlib.suppress(OSError):
+                entries.append((path.stat().st_mtime_ns, path))
+        entries.sort(reverse=True)
+        for _, path in entries[self.maxsize :]:
+            with contextlib.suppress(OSError):
+                path.unlink()
@@ -1,11 +1,49 @@
-from typing import Optional
+from typing import Optional, cast
+
+
+# El valor de un slot cuya variable todavía no fue definida. Por ejemplo,
+# en `{ if (false) var x = 1; print x; }` el resolvedor le reserva un slot a x
+# en el bloque, pero la declaración nunca se ejecuta
+class Undefined(object):
+    def __repr__(self) -> str:
+        return "<undefined>"
+
+
+UNDEFINED = Undefined()
+
+
+# Una variable capturada por alguna clausura. En vez de guardar el valor
+# directo en su slot, se guarda una celda que comparten el scope que la
+# declara y todas las funciones que la usan
+class Cell(object):
+    __slots__ = ("value",)
+
+    def __init__(self, value: object):
+        self.value = value
 
 
 class Env(object):
-    def __init__(self, *, enclosing: Optional["Env"] = None):
-        self.values: dict[str, object] = {}
-        # El entorno global es el único que no tiene enclosing
+    def __init__(
+        self,
+        size: int = 0,
+        *,
+        enclosing: Optional["Env"] = None,
+        upvalues: list[Cell] | None = None,
+    ):
+        # El resolvedor ya sabe cuántas variables declara cada scope, y le asigna
+        # a cada una un slot: su posición en esta lista. Así, acceder a una variable
+        # es indexar una lista y no hashear su nombre en un diccionario.
+        # Las variables globales no viven acá, sino en una tabla por nombre del
+        # intérprete, porque pueden declararse en cualquier momento (ej: en el REPL)
+        self.values: list[object] = [UNDEFINED] * size
+        # Los entornos de las funciones y el más externo no tienen enclosing:
+        # una función no necesita la cadena de entornos en la que se declaró
         self.enclosing: Optional["Env"] = enclosing
+        # Las celdas de las variables de afuera que usa la función que se está
+        # ejecutando. Los bloques comparten las de su función
+        if upvalues is None:
+            upvalues = enclosing.upvalues if enclosing is not None else []
+        self.upvalues: list[Cell] = upvalues
 
     def __repr__(self) -> str:
         all_values = str(self.values)
@@ -15,6 +53,15 @@ class Env(object):
             enclosing = enclosing.enclosing
         return all_values
 
+    # Suelta los valores, el entorno de afuera y las celdas de la última ejecución,
+    # para guardarlo y reutilizarlo sin que mantenga vivo el resto del programa
+    # (ej: el entorno de la función que lo ejecutó). Así además cada ejecución
+    # arranca con todos los slots vacíos
+    def release(self):
+        self.values[:] = [UNDEFINED] * len(self.values)
+        self.enclosing = None
+        self.upvalues = []
+
     def ancestor(self, distance: int) -> "Env":
         # Agarrar el scope a una distancia particular del actual
         env = self
@@ -28,38 +75,39 @@ class Env(object):
             env = env.enclosing
         return env
 
-    def define(self, name: str, value: object):
+    def cell(self, slot: int, distance: int = 0) -> Cell:
+        # La celda de una variable capturada. Si todavía no fue definida
+        # (ej: `{ if (false) var x = 1; fun f() { return x; } }`), le dejamos
+        # una celda vacía, que comparten todos los que la usen
+        scope = self.ancestor(distance) if distance else self
+        cell = scope.values[slot]
+        if cell is UNDEFINED:
+            cell = scope.values[slot] = Cell(UNDEFINED)
+        return cast(Cell, cell)
+
+    def define(self, slot: int, value: object):
         # No estamos chequeando si la variable ya esta definida.
         # Lox nos permite hacer var x = 1; var x = 2;
         # mientras que otros lenguajes lo consideran un error
-        self.values[name] = value
-
-    def get(self, name: str, distance: int | None = None) -> object:
-        scope = self
-
-        # Si recibimos una distancia, nos movemos al scope correspondiente
-        if distance is not None:
-            scope = self.ancestor(distance)
-
-        if name in scope.values:
-            return scope.values[name]
+        self.values[slot] = value
 
-        # Lox considera un error el intentar referenciar una
-        # variable inexistente
-        # una opción mucho más permisiva habria sido devolver Nil,
-        # en estos casos
-        raise RuntimeError(f"Undefined variable '{name}'")
+    def get(self, name: str, slot: int, distance: int = 0) -> object:
+        # Nos movemos al scope correspondiente y leemos el slot
+        scope = self.ancestor(distance) if distance else self
+        value = scope.values[slot]
 
-    def assign(self, name: str, value: object, distance: int | None = None) -> object:
-        scope = self
+        # El nombre solo lo necesitamos para el error, si el slot
+        # está reservado pero la variable nunca llegó a definirse
+        if value is UNDEFINED:
+            raise RuntimeError(f"Undefined variable '{name}'")
+        return value
 
-        # Si recibimos una distancia, nos movemos al scope correspondiente
-        if distance is not None:
-            scope = self.ancestor(distance)
+    def assign(self, name: str, slot: int, value: object, distance: int = 0) -> object:
+        scope = self.ancestor(distance) if distance else self
 
-        if name in scope.values:
-            scope.values[name] = value
-            return value
+        if scope.values[slot] is UNDEFINED:
+            # Si la variable todavía no fue definida, lanzamos un error!
+            raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
 
-        # Si no encontramos la variable, lanzamos un error!
-        raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+        scope.values[slot] = value
+        return value
@@ -1,5 +1,10 @@
+from typing import TYPE_CHECKING
+
 from .Token import Token, TokenLiteralType
 
+if TYPE_CHECKING:
+    from .Stmt import VarDecl, FunDecl
+
 
 class Expr(object):
     pass
@@ -70,6 +75,18 @@ class CallExpr(Expr):
 class VariableExpr(Expr):
     def __init__(self, name: Token):
         self.name = name
+        # Los completa el resolvedor: a qué profundidad de scopes (partiendo
+        # del actual) y en qué slot de ese scope está la variable.
+        # Si depth queda en None, la variable es global, o es una variable de
+        # afuera de la función y upvalue es su índice entre las que capturó.
+        # captured indica si en el slot hay una celda en vez del valor,
+        # y declaration es la declaración local a la que se refiere (si no es
+        # un parámetro), para el optimizador
+        self.depth: int | None = None
+        self.slot = 0
+        self.upvalue: int | None = None
+        self.captured = False
+        self.declaration: "VarDecl | FunDecl | None" = None
 
     def __repr__(self) -> str:
         return f"<{self.name.lexeme}>"
@@ -80,6 +97,12 @@ class AssignmentExpr(Expr):
     def __init__(self, name: Token, value: Expr):
         self.name = name
         self.value = value
+        # Igual que en VariableExpr, los completa el resolvedor
+        self.depth: int | None = None
+        self.slot = 0
+        self.upvalue: int | None = None
+        self.captured = False
+        self.declaration: "VarDecl | FunDecl | None" = None
 
     def __repr__(self) -> str:
         return f"{self.name.lexeme} = {self.value}"
@@ -94,3 +117,24 @@ class LogicExpr(Expr):
 
     def __repr__(self) -> str:
         return f"({self.left} {self.operator} {self.right})"
+
+
+# Las versiones especializadas de los operadores, que arma TypeInference
+# (plox --specialize) donde puede probar de qué tipo son los operandos: el
+# intérprete las evalúa sin chequear tipos. Para el resto de plox son un
+# BinaryExpr o un UnaryExpr más
+
+
+# Un operador aritmético o de comparación entre dos números
+class NumberBinaryExpr(BinaryExpr):
+    pass
+
+
+# Un + entre dos cadenas
+class StringBinaryExpr(BinaryExpr):
+    pass
+
+
+# Un - sobre un número
+class NumberUnaryExpr(UnaryExpr):
+    pass
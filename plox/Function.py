@@ -1,47 +1,151 @@
+import math
+from collections import OrderedDict
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .Interpreter import Interpreter
 
 from .Stmt import FunDecl
-from .Env import Env
+from .Env import Env, Cell, UNDEFINED
 
 
+# Los returns adentro de una función no lanzan excepciones: la ejecución de
+# cada statement devuelve el valor hasta Function.__call__ (ver Interpreter.execute).
+# Solo un return por fuera de una función termina el programa con este error
 class ReturnValue(Exception):
     def __init__(self, value: object):
         super().__init__(f"Return Value: {value}")
         self.value = value
 
 
+# Lo que devuelve un `return f(...);` en posición de cola: la función a llamar
+# y sus argumentos ya evaluados. La función que se está ejecutando termina,
+# y es su __call__ el que llama a la siguiente, sin anidar frames de Python
+class TailCall(object):
+    __slots__ = ("function", "arguments")
+
+    def __init__(self, function: "Function", arguments: list):
+        self.function = function
+        self.arguments = arguments
+
+
 class Function(object):
     def __init__(
         self,
         declaration: FunDecl,
-        closure_env: Env,
+        upvalues: list[Cell],
     ):
-        self.closure_env = closure_env
+        # La clausura no es la cadena de entornos en la que se declaró la función,
+        # sino solo las celdas de las variables de afuera que usa (en el orden
+        # de declaration.captures). Así no mantiene vivo nada más de ese scope
+        self.upvalues = upvalues
         self.declaration = declaration
         self.arity = len(declaration.parameters)
+        # Cuántos slots necesita el entorno de cada invocación:
+        # primero los parámetros y después las locales del cuerpo
+        self.scope_size = declaration.scope_size
 
     # La invocación! La parte mas linda. El código toma vida
     def __call__(self, interpreter: "Interpreter", arguments: list):
-        # Creamos un nuevo entorno, solo para esta invocación
-        function_env = Env(enclosing=self.closure_env)
+        function = self
+        while True:
+            # Ejecutamos el cuerpo de la función y devolvemos el valor del return
+            completion = interpreter.execute_block(
+                function.declaration.body, function.bind(arguments)
+            )
 
-        # Definimos los parámetros en el nuevo entorno
-        # con el valor de los argumentos
-        for param, arg in zip(self.declaration.parameters, arguments):
-            function_env.define(param.lexeme, arg)
+            # Si terminó con una tail call, ejecutamos la función llamada en este
+            # mismo frame de Python: así una recursión de cola no tiene límite
+            if type(completion) is TailCall:
+                function, arguments = completion.function, completion.arguments
+                continue
+
+            if completion is not None:
+                return completion[0]
 
-        # Ejecutamos el cuerpo de la función y devolvemos el return value que salte
-        try:
-            interpreter.execute_block(self.declaration.body, function_env)
-        except ReturnValue as returnvalue:
-            return returnvalue.value
+            # Si no hubo return, devolvemos nil
+            return None
 
-        # Si no hubo return, devolvemos nil
-        return None
+    # Crea un nuevo entorno, solo para una invocación
+    def bind(self, arguments: list) -> Env:
+        function_env = Env(self.scope_size, upvalues=self.upvalues)
+
+        # Definimos los parámetros en el nuevo entorno
+        # con el valor de los argumentos: ocupan los primeros slots
+        for slot, arg in enumerate(arguments):
+            function_env.define(slot, arg)
+        # Los que captura alguna clausura van en una celda
+        for slot in self.declaration.captured_params:
+            function_env.define(slot, Cell(function_env.values[slot]))
+        return function_env
 
     def __repr__(self) -> str:
         params = ", ".join(param.lexeme for param in self.declaration.parameters)
         return f"<fn {self.declaration.name.lexeme}({params})>"
+
+
+# Cuántos resultados guarda por defecto cada función memoizada
+MEMO_SIZE = 1024
+
+
+# Los resultados de una función pura, por argumentos. Cuando se llena,
+# se olvida del resultado que hace más tiempo que no se usa (LRU)
+class MemoCache(object):
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: OrderedDict[tuple, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # El resultado guardado para la clave, o UNDEFINED si no está. Cuenta el
+    # acierto o el fallo
+    def lookup(self, key: tuple) -> object:
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        return UNDEFINED
+
+    def store(self, key: tuple, value: object):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    # Vacía el cache, y deja de guardar resultados
+    def disable(self):
+        self.entries.clear()
+        self.maxsize = 0
+
+
+# La clave de un llamado en el cache: los argumentos junto con sus tipos,
+# porque en Python True == 1.0. None si el llamado no se puede cachear:
+# -0.0 == 0.0, pero no se imprimen igual
+def memo_key(arguments: list) -> tuple | None:
+    key = []
+    for arg in arguments:
+        if type(arg) is float and arg == 0.0 and math.copysign(1.0, arg) < 0:
+            return None
+        key.append((type(arg), arg))
+    return tuple(key)
+
+
+# Una función pura (ver Purity.py) que se acuerda de sus resultados.
+# Solo la crea el intérprete en modo --memoize
+class MemoizedFunction(Function):
+    def __init__(self, declaration: FunDecl, upvalues: list[Cell], cache_size: int):
+        super().__init__(declaration, upvalues)
+        self.cache = MemoCache(cache_size)
+
+    def __call__(self, interpreter: "Interpreter", arguments: list):
+        key = memo_key(arguments)
+        if key is None:
+            return super().__call__(interpreter, arguments)
+
+        value = self.cache.lookup(key)
+        if value is UNDEFINED:
+            value = super().__call__(interpreter, arguments)
+            self.cache.store(key, value)
+        return value
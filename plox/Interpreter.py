@@ -1,3 +1,5 @@
+import weakref
+from math import ceil, copysign, floor, isfinite
 from functools import singledispatchmethod
 from typing import Union, cast
 
@@ -10,6 +12,8 @@ from .Stmt import (
     BlockStmt,
     IfStmt,
     WhileStmt,
+    ForStmt,
+    CountedLoop,
     ReturnStmt,
 )
 from .Expr import (
@@ -22,42 +26,128 @@ from .Expr import (
     AssignmentExpr,
     LogicExpr,
     CallExpr,
+    NumberBinaryExpr,
+    StringBinaryExpr,
+    NumberUnaryExpr,
 )
-from .Function import Function, ReturnValue
-from .Token import TokenType
-from .Env import Env
+from .Function import Function, MemoizedFunction, ReturnValue, TailCall
+from .Token import Token, TokenType
+from .Env import Env, Cell, UNDEFINED
+from .Operators import CHECKED, UNCHECKED, negate
+
+
+# Las vueltas de un loop contado (ver CountedLoop) como un range de Python, si
+# se pueden contar así: el contador tiene que arrancar en un entero (para que
+# contar con enteros dé los mismos floats que ir sumando el paso), el límite
+# tiene que ser un número, y el contador tiene que ir hacia el límite.
+# Si no, devuelve None y el for se ejecuta como un while
+def counted_range(loop: CountedLoop, start: object, bound: object) -> range | None:
+    if type(start) is not float or type(bound) is not float:
+        return None
+    if not start.is_integer() or not isfinite(bound):
+        return None
+    # Los floats representan exactamente a los enteros hasta 2^53
+    if max(abs(start), abs(bound)) + abs(loop.step) >= 2**53:
+        return None
+    # range no tiene -0.0: el contador arrancaría en 0.0
+    if start == 0 and copysign(1.0, start) < 0:
+        return None
+
+    step = int(loop.step)
+    match loop.operator:
+        case TokenType.LESS if step > 0:
+            stop = ceil(bound)
+        case TokenType.LESS_EQUAL if step > 0:
+            stop = floor(bound) + 1
+        case TokenType.GREATER if step < 0:
+            stop = floor(bound)
+        case TokenType.GREATER_EQUAL if step < 0:
+            stop = ceil(bound) - 1
+        case _:
+            return None
+    return range(int(start), stop, step)
+
+
+# El valor del contador al terminar el loop: el primero que no cumple la condición
+def counted_end(steps: range) -> float:
+    return float(steps.start + len(steps) * steps.step)
+
+
+# Un singledispatchmethod con los mismos métodos que otro, al que se le pueden
+# registrar métodos nuevos sin cambiar el original. Los intérpretes que heredan
+# de este lo usan para cambiar cómo se ejecutan algunos nodos:
+#   evaluate = extend(vars(Interpreter)["evaluate"])
+def extend(method: singledispatchmethod) -> singledispatchmethod:
+    extended = singledispatchmethod(method.func)
+    for cls, handler in method.dispatcher.registry.items():
+        if cls is not object:
+            extended.register(cls, handler)
+    return extended
 
 
 class Interpreter(object):
     def __init__(self):
-        self.globals = Env()
-        self.env = self.globals
-
-        # De mano del resolvedor (Resolver.py), ahora el intérprete sabe
-        # a qué profundidad hay que buscar cada expresión
-        # de variable o asignación.
-        # Por ejemplo, saber si `print x;` tiene que buscar el x
-        # en el entorno local actual (depth 0), en el entorno padre (depth 1),
-        # o en el entorno global (directamente no esta en el dict).
-        self.local_scope_depths: dict[VariableExpr | AssignmentExpr, int] = {}
+        # Las variables globales se guardan por nombre, porque pueden
+        # declararse (y redeclararse) en cualquier momento
+        self.globals: dict[str, object] = {}
+        # El entorno más externo no tiene slots: lo que se declara ahí es global
+        self.env = Env()
+
+        # Con --memoize, el tamaño del cache de cada función pura.
+        # Los caches dependen de las funciones globales puras a las que llaman
+        # (memo_globals, ver Purity.py): si alguna cambia, se descartan
+        self.memo_size: int | None = None
+        self.memo_globals: set[str] = set()
+        # Las funciones memoizadas que siguen vivas, en el orden en que se
+        # crearon (un WeakSet no tiene orden, y --memo-stats las recorre)
+        self.memoized: weakref.WeakKeyDictionary[MemoizedFunction, None] = (
+            weakref.WeakKeyDictionary()
+        )
+
+        # De mano del resolvedor (Resolver.py), cada expresión de variable o
+        # asignación ya sabe a qué profundidad y en qué slot buscar su variable.
+        # Por ejemplo, si `print x;` tiene que buscar el x
+        # en el slot 2 del entorno local actual (depth 0, slot 2),
+        # en el slot 0 del entorno padre (depth 1, slot 0),
+        # o en las variables globales (depth None).
+        # Las variables de afuera que usa una función no se buscan en la cadena
+        # de entornos: la función se las lleva en sus upvalues (upvalue = índice).
 
     # Interpretar es ejecutar la lista de statements que tenemos
     def interpret(self, statements: list[Stmt]):
         lastvalue_produced = None
         for statement in statements:
-            # Se guarda el ultimo valor producido por un statement
-            lastvalue_produced = self.execute(statement)
+            # Se guarda el ultimo valor producido por un statement de expresión
+            if isinstance(statement, ExpressionStmt):
+                lastvalue_produced = self.evaluate(statement.expression)
+                continue
+
+            lastvalue_produced = None
+            completion = self.execute(statement)
+            if completion is not None:
+                # Un return por fuera de una función
+                raise ReturnValue(completion[0])
         # Se retorna el ultimo valor producido
         return lastvalue_produced
 
-    # Guarda la profundidad en la que buscar una variable o asignación
-    # Es llamado por el resolvedor de scopes para poblar el diccionario
-    # antes de la ejecución del programa
-    def resolve_depth(self, expression: VariableExpr | AssignmentExpr, depth: int):
-        self.local_scope_depths[expression] = depth
+    # Define una variable en su slot local, o por nombre si es global.
+    # Si alguna clausura la captura, el slot guarda una celda nueva con el valor
+    def define(self, statement: VarDecl | FunDecl, value: object):
+        if statement.slot is None:
+            if statement.name.lexeme in self.memo_globals:
+                self.forget_memos(statement.name.lexeme)
+            self.globals[statement.name.lexeme] = value
+        elif statement.captured:
+            self.env.define(statement.slot, Cell(value))
+        else:
+            self.env.define(statement.slot, value)
 
     # ---------- Ejecutadores de Statements ---------- #
 
+    # Ejecutar un statement devuelve None, salvo que se ejecute un return:
+    # ahí devuelve una tupla (valor,) (o una TailCall), que cada statement que lo
+    # contiene (bloques, ifs, whiles) corta su ejecución y devuelve, hasta llegar a la función.
+    # Así un return no necesita lanzar una excepción y desenrollar el stack
     @singledispatchmethod
     def execute(self, statement: Stmt):
         raise RuntimeError(f"Unknown statement type: `{type(statement)}`")
@@ -65,7 +155,7 @@ class Interpreter(object):
     @execute.register
     def _(self, statement: ExpressionStmt):
         # Ejecutar un expression statement es solamente evaluar la expresión
-        return self.evaluate(statement.expression)
+        self.evaluate(statement.expression)
 
     @execute.register
     def _(self, statement: PrintStmt):
@@ -77,26 +167,46 @@ class Interpreter(object):
     def _(self, statement: VarDecl):
         # Ejecutar una declaración de una variable es solamente agregar el binding al entorno
         if statement.initializer is not None:
-            self.env.define(statement.name.lexeme, self.evaluate(statement.initializer))
+            self.define(statement, self.evaluate(statement.initializer))
         else:
-            self.env.define(statement.name.lexeme, statement.initializer)
+            self.define(statement, statement.initializer)
 
     @execute.register
     def _(self, statement: FunDecl):
         # Ejecutar una declaración de una variable es solamente...
-        # 1. Construir la función
-        fun = Function(statement, self.env)
+        # 0. Si la función se captura a sí misma (ej: es recursiva), crear su celda antes
+        cell = None
+        if statement.slot is not None and statement.captured:
+            cell = Cell(UNDEFINED)
+            self.env.define(statement.slot, cell)
+        # 1. Construir la función, llevándose las celdas de las variables de afuera que usa
+        upvalues = [self.cell(variable) for variable in statement.captures]
+        fun: Function
+        if self.memo_size is not None and statement.pure:
+            fun = MemoizedFunction(statement, upvalues, self.memo_size)
+            self.memoized[fun] = None
+        else:
+            fun = Function(statement, upvalues)
         # 2. Atarla a su nombre
-        self.env.define(statement.name.lexeme, fun)
+        if cell is not None:
+            cell.value = fun
+        else:
+            self.define(statement, fun)
 
     @execute.register
     def _(self, statement: ReturnStmt):
+        # En una tail call no hacemos la llamada acá: se la devolvemos a la
+        # función que se está ejecutando, para que la haga ella (ver Function)
+        if statement.tail_call:
+            callee, arguments = self.prepare_call(cast(CallExpr, statement.value))
+            return TailCall(callee, arguments)
+
         returnvalue = None
         if statement.value is not None:
-            # Si hay un valor de retorno, lo evaluamos y lo lanzamos cual error
+            # Si hay un valor de retorno, lo evaluamos y lo devolvemos hasta la función
             returnvalue = self.evaluate(statement.value)
 
-        raise ReturnValue(returnvalue)
+        return (returnvalue,)
 
     @execute.register
     def _(self, statement: IfStmt):
@@ -104,33 +214,102 @@ class Interpreter(object):
         # Si la condición resuelve a verdadero, ejecuto el bloque del then
         # si no, ejecuto el bloque del else
         if self.is_truthy(self.evaluate(statement.condition)):
-            self.execute(statement.then_branch)
+            return self.execute(statement.then_branch)
         elif statement.else_branch is not None:
             # Si la condición es falsa y hay un bloque de else, lo ejecuto
-            self.execute(statement.else_branch)
+            return self.execute(statement.else_branch)
+        return None
 
     @execute.register
     def _(self, statement: WhileStmt):
+        return self.loop(statement)
+
+    def loop(self, statement: WhileStmt) -> tuple | None:
         # El while se implementa con... un while
         while self.is_truthy(self.evaluate(statement.condition)):
-            self.execute(statement.body)
+            completion = self.execute(statement.body)
+            # Un return adentro del loop lo corta
+            if completion is not None:
+                return completion
+        return None
 
     @execute.register
-    def _(self, statement: BlockStmt):
-        return self.execute_block(statement.statements, Env(enclosing=self.env))
+    def _(self, statement: ForStmt):
+        # Un loop contado se recorre con un range de Python: el contador se
+        # escribe directo en su slot, y no hace falta evaluar ni la condición
+        # ni el incremento en cada vuelta
+        loop = statement.counted
+        if loop is None or not loop.local():
+            return self.loop(statement)
+        steps = counted_range(
+            loop, self.evaluate(loop.counter), self.evaluate(loop.bound)
+        )
+        if steps is None:
+            return self.loop(statement)
+
+        values = self.env.ancestor(cast(int, loop.counter.depth)).values
+        slot = loop.counter.slot
+        # El cuerpo, sin el incremento
+        body = cast(BlockStmt, statement.body).statements[:-1]
+        for value in map(float, steps):
+            values[slot] = value
+            for s in body:
+                completion = self.execute(s)
+                if completion is not None:
+                    return completion
+        values[slot] = counted_end(steps)
+        return None
 
-    def execute_block(self, statements: list[Stmt], block_env: Env):
+    @execute.register
+    def _(self, statement: BlockStmt):
+        # Un bloque que no declara variables no necesita su propio entorno:
+        # el resolvedor ya no lo contó al calcular las profundidades
+        if statement.scope_size == 0:
+            for s in statement.statements:
+                completion = self.execute(s)
+                if completion is not None:
+                    return completion
+            return None
+
+        env = self.block_env(statement)
+        try:
+            return self.execute_block(statement.statements, env)
+        finally:
+            env.release()
+            statement.free_env = env
+
+    # Devuelve el entorno en el que se ejecuta el bloque, que hay que devolver
+    # a statement.free_env cuando termina
+    def block_env(self, statement: BlockStmt) -> Env:
+        # Las clausuras nunca se quedan con el entorno de la ejecución anterior
+        # del bloque (ej: la iteración anterior de un loop), así que lo reutilizamos
+        env = statement.free_env
+        if env is None:
+            return Env(statement.scope_size, enclosing=self.env)
+
+        # Mientras lo usamos, lo sacamos de ahí, por si el bloque vuelve a
+        # ejecutarse antes de terminar (ej: una función recursiva)
+        statement.free_env = None
+        env.enclosing = self.env
+        env.upvalues = self.env.upvalues
+        return env
+
+    def execute_block(self, statements: list[Stmt], block_env: Env) -> tuple | None:
         # Para ejecutar un bloque de statements, tenemos que crear un nuevo entorno
         # y ejecutar los statements ahí
         # Tenemos que guardarnos el entorno del bloque, y después acordarnos de volver al previo
         previous_env = self.env
         self.env = block_env
-        # Ojo con los returns! Hacemos un try/finally para asegurarnos de
-        # recuperar el entorno previo pase lo que pase
+        # Ojo con los errores! Hacemos un try/finally para asegurarnos de
+        # recuperar el entorno previo pase lo que pase (ej: en el REPL)
         try:
             self.env = block_env
             for s in statements:
-                self.execute(s)
+                completion = self.execute(s)
+                # Si se ejecutó un return, no seguimos con el resto del bloque
+                if completion is not None:
+                    return completion
+            return None
         finally:
             self.env = previous_env
 
@@ -143,28 +322,61 @@ class Interpreter(object):
 
     @evaluate.register
     def _(self, expression: VariableExpr):
-        # Si la variable se encuentra en nuestro diccionario de scope local,
-        # la buscamos con esa profundidad.
-        if expression in self.local_scope_depths:
-            depth = self.local_scope_depths[expression]
-            return self.env.get(expression.name.lexeme, depth)
+        # Si el resolvedor encontró la variable en un scope local,
+        # la buscamos con esa profundidad y en ese slot.
+        if expression.depth is not None and not expression.captured:
+            return self.env.get(
+                expression.name.lexeme, expression.slot, expression.depth
+            )
+
+        name = expression.name.lexeme
+        if expression.depth is None and expression.upvalue is None:
+            # Si no, la buscamos dinámicamente entre las globales
+            if name in self.globals:
+                return self.globals[name]
+            # Lox considera un error el intentar referenciar una
+            # variable inexistente
+            raise RuntimeError(f"Undefined variable '{name}'")
+
+        # Si la captura alguna clausura, el valor está en su celda
+        value = self.cell(expression).value
+        if value is not UNDEFINED:
+            return value
 
-        # Si no, la buscamos dinámicamente en el entorno global
-        return self.globals.get(expression.name.lexeme)
+        # Lox considera un error el intentar referenciar una
+        # variable inexistente
+        raise RuntimeError(f"Undefined variable '{name}'")
 
     @evaluate.register
     def _(self, expression: AssignmentExpr):
         value = self.evaluate(expression.value)
+        return self.assign(expression, value)
+
+    # Asigna el valor ya evaluado a la variable de la asignación
+    def assign(self, expression: AssignmentExpr, value: object):
+        # Si el resolvedor encontró la variable en un scope local,
+        # la asignamos en esa profundidad y en ese slot.
+        if expression.depth is not None and not expression.captured:
+            self.env.assign(
+                expression.name.lexeme, expression.slot, value, expression.depth
+            )
+            return value
 
-        # Si la variable se encuentra en nuestro diccionario de scope local,
-        # la asignamos en esa profundidad.
-        if expression in self.local_scope_depths:
-            depth = self.local_scope_depths[expression]
-            self.env.assign(expression.name.lexeme, value, depth)
+        name = expression.name.lexeme
+        if expression.depth is None and expression.upvalue is None:
+            # Si no, la asignamos entre las globales
+            if name not in self.globals:
+                raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+            if name in self.memo_globals:
+                self.forget_memos(name)
+            self.globals[name] = value
             return value
 
-        # Si no, la asignamos en el entorno global
-        self.globals.assign(expression.name.lexeme, value)
+        # Si la captura alguna clausura, la asignamos en su celda
+        cell = self.cell(expression)
+        if cell.value is UNDEFINED:
+            raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+        cell.value = value
         return value
 
     @evaluate.register
@@ -180,20 +392,19 @@ class Interpreter(object):
     @evaluate.register
     def _(self, expression: UnaryExpr):
         right = self.evaluate(expression.right)
+        return self.unary(expression.operator, right)
 
-        match expression.operator.token_type:
+    # Aplica un operador unario a su operando ya evaluado
+    def unary(self, operator: Token, right):
+        match operator.token_type:
             case TokenType.MINUS:
                 # El operador - solo funciona sobre números
-                if not self.is_number(right):
-                    raise RuntimeError(
-                        f"Operand of - must be a number, got: `-{right}`"
-                    )
-                return -right
+                return negate(right)
             case TokenType.BANG:
                 # Negar un valor lo castea implicitamente a un booleano
                 return not self.is_truthy(right)
             case _:
-                raise RuntimeError(f"Unknown unary operator: `{expression.operator}`")
+                raise RuntimeError(f"Unknown unary operator: `{operator}`")
 
     @evaluate.register
     def _(self, expression: BinaryExpr):
@@ -206,7 +417,10 @@ class Interpreter(object):
         # evaluamos y chequeamos todo y luego levantamos el error.
         left = self.evaluate(expression.left)
         right = self.evaluate(expression.right)
+        return self.binary(expression.operator, left, right)
 
+    # Aplica un operador binario a sus operandos ya evaluados
+    def binary(self, operator: Token, left, right):
         # Es acá donde más ojo hay que poner en qué utilizamos del lenguaje de la implementación,
         # y sobre qué agregamos lógica propia.
         # Tenemos que asegurarnos de que lo que hagamos en Python sea parte de la semántica de Lox,
@@ -214,7 +428,7 @@ class Interpreter(object):
         # Si no, el riesgo es que una implementación de Lox en otro lenguaje de resultados distintos
         # frente a código de Lox.
 
-        match expression.operator.token_type:
+        match operator.token_type:
             # Por ejemplo, Lox no hace coerciones de tipos implicitas en la igualdad,
             # y Python tampoco. Es decir, "1" == 1 es False en ambos lenguajes.
             # Si este intérprete estuviese implementado en Ruby o JavaScript,
@@ -225,74 +439,34 @@ class Interpreter(object):
             # con todos los operadores, Lox solo nos permite hacerlo con los de == y !=.
             # Es por eso que tenemos que levantar un error al intentar llamar < frente a cadenas,
             # mientras que eso en Python no sucederia.
-            case TokenType.PLUS:
-                # El operador + en Lox esta sobrecargado al igual que en Python.
-                # Se permite sumar tanto cadenas como números.
-                # Y, al igual que en Python, no hay conversión implicita entre los operandos.
-                # Es decir, en Lox, "a" + 1 es un error. (en JavaScript, por ejemplo, sería "a1").
-                if not self.is_number(left, right) and not self.is_string(left, right):
-                    raise RuntimeError(
-                        f"Operands of + must be either numbers or strings, got: `{left} + {right}`"
-                    )
-                return left + right
-            case TokenType.MINUS:
-                if not self.is_number(left, right):
-                    raise RuntimeError(
-                        f"Operands of - must be numbers, got: `{left} - {right}`"
-                    )
-                return left - right
-            case TokenType.STAR:
-                if not self.is_number(left, right):
-                    raise RuntimeError(
-                        f"Operands of * must be numbers, got: `{left} * {right}`"
-                    )
-                return left * right
-            case TokenType.SLASH:
-                if not self.is_number(left, right):
-                    raise RuntimeError(
-                        f"Operands of / must be numbers, got: `{left} / {right}`"
-                    )
-                elif right == 0:
-                    raise RuntimeError(f"Division by {right} is not allowed")
-                return left / right
-            case TokenType.PERCENT:
-                if not self.is_number(left, right):
-                    raise RuntimeError(
-                        f"Operands of % must be numbers, got: `{left} % {right}`"
-                    )
-                elif right == 0:
-                    raise RuntimeError(f"Modulo by {right} is not allowed")
-                return left % right
-            case TokenType.GREATER:
-                if not self.is_number(left, right):
-                    raise RuntimeError(
-                        f"Operands of > must be numbers, got: `{left} > {right}`"
-                    )
-                return left > right
-            case TokenType.GREATER_EQUAL:
-                if not self.is_number(left, right):
-                    raise RuntimeError(
-                        f"Operands of >= must be numbers, got: `{left} >= {right}`"
-                    )
-                return left >= right
-            case TokenType.LESS:
-                if not self.is_number(left, right):
-                    raise RuntimeError(
-                        f"Operands of < must be numbers, got: `{left} < {right}`"
-                    )
-                return left < right
-            case TokenType.LESS_EQUAL:
-                if not self.is_number(left, right):
-                    raise RuntimeError(
-                        f"Operands of <= must be numbers, got: `{left} <= {right}`"
-                    )
-                return left <= right
             case TokenType.EQUAL_EQUAL:
                 return left == right
             case TokenType.BANG_EQUAL:
                 return left != right
+            # El resto de los operadores, con sus chequeos de tipos, están en
+            # Operators.py, porque los comparten todos los backends.
+            # El operador + en Lox esta sobrecargado al igual que en Python: se
+            # permite sumar tanto cadenas como números, pero sin conversión
+            # implicita entre los operandos. El resto solo funciona entre números
+            case token_type if token_type in CHECKED:
+                return CHECKED[token_type](left, right)
             case _:
-                raise RuntimeError(f"Unknown binary operator: `{expression.operator}`")
+                raise RuntimeError(f"Unknown binary operator: `{operator}`")
+
+    # Los operadores especializados no chequean el tipo de sus operandos
+    @evaluate.register
+    def _(self, expression: NumberBinaryExpr):
+        left = self.evaluate(expression.left)
+        right = self.evaluate(expression.right)
+        return UNCHECKED[expression.operator.token_type](left, right)
+
+    @evaluate.register
+    def _(self, expression: StringBinaryExpr):
+        return self.evaluate(expression.left) + self.evaluate(expression.right)
+
+    @evaluate.register
+    def _(self, expression: NumberUnaryExpr):
+        return -self.evaluate(expression.right)
 
     @evaluate.register
     def _(self, expression: LogicExpr):
@@ -316,6 +490,11 @@ class Interpreter(object):
 
     @evaluate.register
     def _(self, expression: CallExpr):
+        callee, arguments = self.prepare_call(expression)
+        return callee(self, arguments)
+
+    # Evalúa la función y los argumentos de una llamada, y chequea que se pueda hacer
+    def prepare_call(self, expression: CallExpr) -> tuple[Function, list]:
         # Evaluamos al llamado a la función, que puede ser cualquier cosa
         callee = self.evaluate(expression.callee)
 
@@ -324,6 +503,11 @@ class Interpreter(object):
         for arg in expression.arguments:
             arguments.append(self.evaluate(arg))
 
+        self.check_call(callee, arguments)
+        return callee, arguments
+
+    # Chequea que la función ya evaluada se pueda llamar con esos argumentos
+    def check_call(self, callee, arguments: list):
         # Si el llamado no es una función, levantamos un error
         if not callable(callee):
             raise RuntimeError(f"Cannot call non-callable object: `{callee}`")
@@ -334,10 +518,27 @@ class Interpreter(object):
                 f"Expected {callee.arity} arguments, got {len(arguments)}"
             )
 
-        return callee(self, arguments)
-
     # ---------- Helpers ---------- #
 
+    # Si cambia una función global de la que dependen las funciones memoizadas,
+    # sus resultados guardados ya no sirven: dejamos de memoizarlas
+    def forget_memos(self, name: str):
+        if name in self.globals:
+            for function in self.memoized:
+                function.cache.disable()
+
+    # Devuelve la celda de una variable capturada: una local que usa alguna
+    # clausura, o una upvalue de la función actual
+    def cell(self, expression: VariableExpr | AssignmentExpr) -> Cell:
+        if expression.upvalue is not None:
+            return self.env.upvalues[expression.upvalue]
+        if expression.depth is None:
+            # Si el resolvedor está bien hecho, esto no debería pasar nunca!
+            raise RuntimeError(
+                f"Cannot capture global variable '{expression.name.lexeme}'"
+            )
+        return self.env.cell(expression.slot, expression.depth)
+
     # Devuelve si el valor es truthy (es decir, si evalua a verdadero)
     def is_truthy(self, value):
         # Lox mantiene la semántica de Ruby:
@@ -345,11 +546,3 @@ class Interpreter(object):
         if value is None or value is False:
             return False
         return True
-
-    # Devuelve si los valores recibidos son un número según Lox
-    def is_number(self, *values):
-        return all(type(value) is int or type(value) is float for value in values)
-
-    # Devuelve si los valores recibidos son una cadena según Lox
-    def is_string(self, *values):
-        return all(type(value) is str for value in values)
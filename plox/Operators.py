@@ -0,0 +1,127 @@
+from operator import add, sub, mul, gt, ge, lt, le
+
+from .Token import TokenType
+
+# Los operadores de Lox, con sus chequeos de tipos y sus mensajes de error.
+# Todos los backends (el intérprete, el compilador a clausuras, la VM, el
+# transpilador) los usan desde acá, para que un mismo programa falle igual en
+# cualquiera de ellos. Los backends rápidos tienen un camino en línea para
+# cuando ambos operandos son floats (los únicos números que produce el
+# scanner), y solo llaman a estas funciones si no
+
+
+# Si el valor es un número según Lox
+def is_number(value) -> bool:
+    return type(value) is int or type(value) is float
+
+
+def check_numbers(symbol: str, left, right):
+    if not (is_number(left) and is_number(right)):
+        raise RuntimeError(
+            f"Operands of {symbol} must be numbers, got: `{left} {symbol} {right}`"
+        )
+
+
+# El operador + en Lox esta sobrecargado al igual que en Python.
+# Se permite sumar tanto cadenas como números.
+# Y, al igual que en Python, no hay conversión implicita entre los operandos.
+# Es decir, en Lox, "a" + 1 es un error. (en JavaScript, por ejemplo, sería "a1").
+def check_plus(left, right):
+    if not (is_number(left) and is_number(right)) and not (
+        type(left) is str and type(right) is str
+    ):
+        raise RuntimeError(
+            f"Operands of + must be either numbers or strings, got: `{left} + {right}`"
+        )
+
+
+# Los operadores entre números que ya se sabe que son números (ej: los nodos
+# especializados por TypeInference): solo queda chequear que no se divida por cero
+def divide(left: float, right: float) -> float:
+    if right == 0:
+        raise RuntimeError(f"Division by {right} is not allowed")
+    return left / right
+
+
+def modulo(left: float, right: float) -> float:
+    if right == 0:
+        raise RuntimeError(f"Modulo by {right} is not allowed")
+    return left % right
+
+
+UNCHECKED = {
+    TokenType.PLUS: add,
+    TokenType.MINUS: sub,
+    TokenType.STAR: mul,
+    TokenType.SLASH: divide,
+    TokenType.PERCENT: modulo,
+    TokenType.GREATER: gt,
+    TokenType.GREATER_EQUAL: ge,
+    TokenType.LESS: lt,
+    TokenType.LESS_EQUAL: le,
+}
+
+
+# Los operadores con todos sus chequeos
+def plus(left, right):
+    check_plus(left, right)
+    return left + right
+
+
+def minus(left, right):
+    check_numbers("-", left, right)
+    return left - right
+
+
+def star(left, right):
+    check_numbers("*", left, right)
+    return left * right
+
+
+def slash(left, right):
+    check_numbers("/", left, right)
+    return divide(left, right)
+
+
+def percent(left, right):
+    check_numbers("%", left, right)
+    return modulo(left, right)
+
+
+def greater(left, right):
+    check_numbers(">", left, right)
+    return left > right
+
+
+def greater_equal(left, right):
+    check_numbers(">=", left, right)
+    return left >= right
+
+
+def less(left, right):
+    check_numbers("<", left, right)
+    return left < right
+
+
+def less_equal(left, right):
+    check_numbers("<=", left, right)
+    return left <= right
+
+
+def negate(value):
+    if not is_number(value):
+        raise RuntimeError(f"Operand of - must be a number, got: `-{value}`")
+    return -value
+
+
+CHECKED = {
+    TokenType.PLUS: plus,
+    TokenType.MINUS: minus,
+    TokenType.STAR: star,
+    TokenType.SLASH: slash,
+    TokenType.PERCENT: percent,
+    TokenType.GREATER: greater,
+    TokenType.GREATER_EQUAL: greater_equal,
+    TokenType.LESS: less,
+    TokenType.LESS_EQUAL: less_equal,
+}
@@ -1,4 +1,8 @@
+import sys
+from typing import Generator
+
 from .Token import Token, TokenType
+from .TokenBuffer import TokenBuffer
 from .Expr import (
     Expr,
     BinaryExpr,
@@ -19,14 +23,75 @@ from .Stmt import (
     FunDecl,
     IfStmt,
     WhileStmt,
+    ForStmt,
     ReturnStmt,
 )
 
 
+# El binding power de cada operador binario: cuanto más alto, más fuerte liga.
+# Sigue el orden de la gramática, de or (el que liga más débil) a los de factor.
+# Todos asocian a izquierda. Los tokens que no están acá no son operadores
+# binarios, y cortan la expresión
+BINDING_POWER = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.BANG_EQUAL: 3,
+    TokenType.EQUAL_EQUAL: 3,
+    TokenType.GREATER: 4,
+    TokenType.GREATER_EQUAL: 4,
+    TokenType.LESS: 4,
+    TokenType.LESS_EQUAL: 4,
+    TokenType.MINUS: 5,
+    TokenType.PLUS: 5,
+    TokenType.STAR: 6,
+    TokenType.SLASH: 6,
+    TokenType.PERCENT: 6,
+}
+
+# Los valores de las palabras reservadas que son literales
+KEYWORD_LITERALS = {
+    TokenType.TRUE: True,
+    TokenType.FALSE: False,
+    TokenType.NIL: None,
+}
+
+# Lo que queda pendiente de cada nivel de una expresión a medio parsear (ver
+# expression). Cada nivel es una tupla que arranca con alguno de estos tipos:
+GROUPING = 0  # (GROUPING,): la expresión adentro de un paréntesis
+CALL = 1  # (CALL, callee, arguments): los argumentos de una llamada
+ASSIGNMENT = 2  # (ASSIGNMENT, name): el valor de una asignación
+UNARY = 3  # (UNARY, operator): el operando de un operador prefijo
+BINARY = 4  # (BINARY, left, operator, power): el operando derecho de un binario
+
+# Los statements que contienen otros statements (bloques, if, while, for y
+# funciones) se parsean con un generador: cada vez que necesitan el siguiente
+# statement de adentro, lo piden con `yield` y reciben el statement ya
+# parseado (igual que los frames de StackInterpreter). Al terminar,
+# devuelven (con return) su nodo
+StmtRule = Generator[None, Stmt, Stmt]
+
+
+# El parser no usa el stack de Python para anidar reglas: tanto los
+# statements como las expresiones guardan lo que tienen a medio parsear en una
+# pila propia, así que el código puede estar tan anidado como entre en memoria
+# (ej: `((((1))))` o `{ { { } } }` generados por otro programa).
+# Con un max_depth, los programas con más niveles de anidamiento que eso se
+# cortan con un SyntaxError en vez de parsearse
 class Parser(object):
-    def __init__(self, tokens: list[Token]):
-        self.tokens = tokens  # la lista de tokens ya escaneados
+    def __init__(self, tokens: list[Token] | TokenBuffer, max_depth: int | None = None):
+        # los tokens ya escaneados, en una lista o en un TokenBuffer
+        self.tokens = tokens
         self.current = 0  # el token en el que estamos parados
+        # Los tipos de los tokens, aparte: el parser los consulta todo el tiempo,
+        # y así no necesita armar cada Token de un TokenBuffer para saber su tipo
+        self.types = (
+            tokens.types()
+            if isinstance(tokens, TokenBuffer)
+            else [token.token_type for token in tokens]
+        )
+        self.max_depth = max_depth
+        # Las reglas de statements que están esperando un statement de adentro
+        self.rules: list[StmtRule] = []
 
     # Obtiene la lista de statements parseados
     def parse(self) -> list[Stmt]:
@@ -37,8 +102,42 @@ class Parser(object):
 
     # ---------- Reglas de Producción de Statements ---------- #
 
-    # statement      → exprStmt | printStmt | varDecl | funDecl | blockStmt | ifStmt | whileStmt | forStmt ;
+    # Parsea un statement entero, con todos los que tenga adentro. Las reglas
+    # que esperan un statement de adentro se apilan en self.rules en vez de
+    # llamarse recursivamente
     def statement(self) -> Stmt:
+        rules = self.rules
+        parsed = self.begin_statement()
+        while True:
+            # Si es una regla de un statement compuesto, la corremos hasta
+            # que pida su primer statement de adentro (o termine sin pedirlo)
+            if not isinstance(parsed, Stmt):
+                try:
+                    next(parsed)
+                except StopIteration as finished:
+                    parsed = finished.value
+                else:
+                    rules.append(parsed)
+                    self._check_depth(len(rules))
+                    parsed = self.begin_statement()
+                    continue
+
+            # El statement ya terminó: se lo pasamos a la regla que lo pidió,
+            # que puede terminar también o pedir el siguiente
+            if not rules:
+                return parsed
+            try:
+                rules[-1].send(parsed)
+            except StopIteration as finished:
+                rules.pop()
+                parsed = finished.value
+            else:
+                parsed = self.begin_statement()
+
+    # statement      → exprStmt | printStmt | varDecl | funDecl | blockStmt | ifStmt | whileStmt | forStmt ;
+    # Los statements simples se parsean directo, y de los compuestos
+    # devolvemos su regla, sin arrancarla
+    def begin_statement(self) -> Stmt | StmtRule:
         # si me cruzo un var, parseo una variable declaration
         if self._match(TokenType.VAR):
             return self.variable_declaration()
@@ -99,19 +198,16 @@ class Parser(object):
         return PrintStmt(value)
 
     # blockStmt       → "{" statement* "}" ;
-    def block_statement(self) -> BlockStmt:
-        return BlockStmt(self.block())
+    def block_statement(self) -> StmtRule:
+        return BlockStmt((yield from self.block()))
 
     # Parsea una lista de statements hasta el siguiente }
     # sin agregarle la semántica de que es un statement de bloque:
     # de eso se ocupa el llamador
-    def block(self) -> list[Stmt]:
+    def block(self) -> Generator[None, Stmt, list[Stmt]]:
         statements = []
-        while (
-            not self._is_at_end()
-            and self._lookahead().token_type is not TokenType.RIGHT_BRACE
-        ):
-            statements.append(self.statement())
+        while not self._is_at_end() and self._peek() is not TokenType.RIGHT_BRACE:
+            statements.append((yield))
 
         if not self._match(TokenType.RIGHT_BRACE):
             raise SyntaxError(
@@ -121,7 +217,7 @@ class Parser(object):
         return statements
 
     # whileStmt     → "while" "(" expression ")" statement ;
-    def while_statement(self) -> WhileStmt:
+    def while_statement(self) -> StmtRule:
         # Después de un while, espero un paréntesis abierto
         if not self._match(TokenType.LEFT_PAREN):
             raise SyntaxError(
@@ -136,12 +232,12 @@ class Parser(object):
                 f"Expected ')' after condition, got `{self._lookahead()}` instead"
             )
 
-        body = self.statement()
+        body = yield
 
         return WhileStmt(condition, body)
 
     # ifStmt        → "if" "(" expression ")" statement ( "else" statement )? ;
-    def if_statement(self) -> IfStmt:
+    def if_statement(self) -> StmtRule:
         # Después de un if, espero un paréntesis abierto
         if not self._match(TokenType.LEFT_PAREN):
             raise SyntaxError(
@@ -156,18 +252,18 @@ class Parser(object):
                 f"Expected ')' after condition, got `{self._lookahead()}` instead"
             )
 
-        then_branch = self.statement()
+        then_branch = yield
 
         # Si me cruzo un else, parseo el statement que sigue
         if self._match(TokenType.ELSE):
-            else_branch = self.statement()
+            else_branch = yield
         else:
             else_branch = None
 
         return IfStmt(condition, then_branch, else_branch)
 
     # forStmt        → "for" "(" ( varDecl | expressionStmt | ";") expression? ";" expression? ")" statement ;
-    def for_statement(self) -> Stmt:
+    def for_statement(self) -> StmtRule:
         # El for se compone de 3 cláusulas: un inicializador, una condición y un incremento
         # Y estas 3 cláusulas son opcionales!
 
@@ -192,7 +288,7 @@ class Parser(object):
             initializer = self.expression_statement()
 
         # Después del inicializador, espero una expresión de condicion, y un ;
-        if not self._lookahead().token_type == TokenType.SEMICOLON:
+        if not self._peek() == TokenType.SEMICOLON:
             condition = self.expression()
         else:
             condition = None
@@ -202,7 +298,7 @@ class Parser(object):
             )
 
         # Y después de la condición, espero una expresión de incremento, y un )
-        if not self._lookahead().token_type == TokenType.RIGHT_PAREN:
+        if not self._peek() == TokenType.RIGHT_PAREN:
             increment = self.expression()
         else:
             increment = None
@@ -212,7 +308,7 @@ class Parser(object):
             )
 
         # Tomamos el cuerpo del for
-        body = self.statement()
+        body = yield
 
         # Si tengo un incremento, lo agrego al final del cuerpo que voy a ejecutar en cada iteración
         if increment is not None:
@@ -222,7 +318,9 @@ class Parser(object):
         if condition is None:
             condition = LiteralExpr(True)
 
-        body = WhileStmt(condition, body)
+        # El while queda marcado como un for, para que el intérprete pueda
+        # reconocer los loops que cuentan (ver CountedLoop)
+        body = ForStmt(condition, body, increment is not None)
 
         # Si tengo un inicializador, entonces reemplazo los statements que tengo por un
         # bloque que arranque por el inicializador, y después interprete el while
@@ -240,7 +338,7 @@ class Parser(object):
 
         # Si no me cruzo un punto y coma, parseo la expresión que me
         # da el valor de retorno
-        if not self._lookahead().token_type == TokenType.SEMICOLON:
+        if not self._peek() == TokenType.SEMICOLON:
             value = self.expression()
 
         # Después de eso, si o sí tengo que encontrar un punto y coma
@@ -252,7 +350,7 @@ class Parser(object):
         return ReturnStmt(value)
 
     # funDecl        → "fun" IDENTIFIER "(" parameters? ")" blockStmt ;
-    def function_declaration(self) -> FunDecl:
+    def function_declaration(self) -> StmtRule:
         # Después del fun, viene el nombre de la función
         if not self._match(TokenType.IDENTIFIER):
             raise SyntaxError(
@@ -269,10 +367,7 @@ class Parser(object):
             )
 
         # Mientras no me cruce un paréntesis de cierre, sigo parseando argumentos
-        while (
-            not self._is_at_end()
-            and self._lookahead().token_type != TokenType.RIGHT_PAREN
-        ):
+        while not self._is_at_end() and self._peek() != TokenType.RIGHT_PAREN:
             if not self._match(TokenType.IDENTIFIER):
                 raise SyntaxError(
                     f"Expected parameter name, got `{self._lookahead()}` instead"
@@ -296,7 +391,7 @@ class Parser(object):
                 f"Expected '{{' after function parameters, got `{self._lookahead()}` instead"
             )
 
-        body = self.block()
+        body = yield from self.block()
         return FunDecl(functionname, parameters, body)
 
     # varDecl        → "var" IDENTIFIER ( "=" expression )? ";" ;
@@ -325,189 +420,174 @@ class Parser(object):
     # ---------- Reglas de Producción de Expresiones ---------- #
 
     # expression     → assignment ;
-    def expression(self) -> Expr:
-        return self.assignment()
-
     # assignment     → IDENTIFIER "=" assignment | logic_or ;
-    def assignment(self) -> Expr:
-        expr = self.logic_or()
-
-        # En una asignación tenemos dos partes: el nombre a la izquierda, y el valor a la derecha.
-        # La expresión de la izquierda (el lvalue) no es una expresión que resuelve a un valor,
-        # es una expresión que resuelve a un "algo" asignable. Esa expresión no la evaluamos, solo la usamos
-        # `a = 5` tiene que funcionar, pero `(a + b) = 5` no!
-        #
-        # Por el momento, solo podemos asignar sobre identificadores de variables, pero también podríamos agregar
-        # asignaciones a propiedades de objetos como `obj.attr() = 'a'`, o a elementos de arrays como `arr[0] = 'a'`
-        if self._match(TokenType.EQUAL):
-            if not isinstance(expr, VariableExpr):
-                raise SyntaxError(
-                    f"Invalid assignment target, got `{self._lookahead()}` instead"
-                )
-
-            value = self.assignment()
-            return AssignmentExpr(expr.name, value)
-
-        return expr
-
-    # logic_or      → logic_and ( "or" logic_and )* ;
-    def logic_or(self) -> Expr:
-        expr = self.logic_and()
-
-        # mientras nos crucemos or, seguimos parseando
-        while not self._is_at_end() and self._match(TokenType.OR):
-            operator = self._previous()
-            right = self.logic_and()
-            expr = LogicExpr(expr, operator, right)
-
-        return expr
-
-    # logic_and     → equality ( "and" equality )* ;
-    def logic_and(self) -> Expr:
-        expr = self.equality()
-
-        # mientras nos crucemos and, seguimos parseando
-        while not self._is_at_end() and self._match(TokenType.AND):
-            operator = self._previous()
-            right = self.equality()
-            expr = LogicExpr(expr, operator, right)
-
-        return expr
-
+    # logic_or       → logic_and ( "or" logic_and )* ;
+    # logic_and      → equality ( "and" equality )* ;
     # equality       → comparison ( ( "!=" | "==" ) comparison )* ;
-    def equality(self) -> Expr:
-        expr = self.comparison()
-
-        # mientras nos crucemos != o ==, seguimos parseando
-        # la secuencia de igualdades
-        while not self._is_at_end() and self._match(
-            TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL
-        ):
-            operator = self._previous()
-            right = self.comparison()
-            expr = BinaryExpr(expr, operator, right)
-
-        return expr
-
     # comparison     → term ( ( ">" | ">=" | "<" | "<=" ) term )* ;
-    def comparison(self) -> Expr:
-        expr = self.term()
-
-        # mientras nos crucemos >, >=, < o <=, seguimos parseando
-        # la secuencia de comparadores
-        while not self._is_at_end() and self._match(
-            TokenType.GREATER,
-            TokenType.GREATER_EQUAL,
-            TokenType.LESS,
-            TokenType.LESS_EQUAL,
-        ):
-            operator = self._previous()
-            right = self.term()
-            expr = BinaryExpr(expr, operator, right)
-
-        return expr
-
     # term           → factor ( ( "-" | "+" ) factor )* ;
-    def term(self) -> Expr:
-        expr = self.factor()
-
-        # mientras nos crucemos - o +, seguimos parseando
-        # la secuencia de sumas o restas
-        while not self._is_at_end() and self._match(TokenType.MINUS, TokenType.PLUS):
-            operator = self._previous()
-            right = self.factor()
-            expr = BinaryExpr(expr, operator, right)
-
-        return expr
-
     # factor         → unary ( ( "/" | "*" | "%" ) unary )* ;
-    def factor(self) -> Expr:
-        expr = self.unary()
-
-        # mientras nos crucemos *, / o %, seguimos parseando
-        # la secuencia de multiplicaciones, divisiones o modulos
-        while not self._is_at_end() and self._match(
-            TokenType.STAR, TokenType.SLASH, TokenType.PERCENT
-        ):
-            operator = self._previous()
-            right = self.unary()
-            expr = BinaryExpr(expr, operator, right)
-
-        return expr
-
     # unary          → ( "!" | "-" ) unary | call ;
-    def unary(self) -> Expr:
-        # a diferencia de las reglas de expresiones binarias,
-        # acá el operador es un prefijo.
-        # primero chequeamos el operador, y después seguimos
-        if self._match(TokenType.BANG, TokenType.MINUS):
-            operator = self._previous()
-            right = self.unary()
-            return UnaryExpr(operator, right)
-
-        # Si no tuve recursividad de unarios, entonces tengo una llamada a una función
-        return self.call()
-
     # call           → primary ( "(" arguments? ")" )* ;
-    # arguments      → expression ( "," expression )* ;
-    def call(self) -> Expr:
-        expr = self.primary()
-
-        # Si me cruzo un paréntesis abierto, tengo una llamada a función
-        # y tengo que parsear los argumentos
-        while self._match(TokenType.LEFT_PAREN):
-            arguments: list[Expr] = []
-
-            # Mientras no me cruce un paréntesis de cierre, sigo parseando argumentos
-            while (
-                not self._is_at_end()
-                and self._lookahead().token_type != TokenType.RIGHT_PAREN
+    #
+    # Escrita así, la gramática se parsea con un método por regla, y una
+    # expresión tan simple como `1` pasa por todos. En vez de eso, parseamos
+    # los operadores binarios por precedencia (un parser de Pratt): cada
+    # operador tiene un binding power (ver BINDING_POWER), y un operador
+    # pendiente se cierra cuando aparece otro que liga igual o más débil.
+    #
+    # Tampoco usamos recursión para lo que se anida (paréntesis, operadores
+    # prefijo, operandos derechos, asignaciones y argumentos): cada nivel
+    # abierto queda en `frames`, una pila de tuplas (ver GROUPING y los demás),
+    # y se cierra cuando termina su operando. Recorremos la expresión
+    # alternando entre los dos lados de un operando: antes, donde pueden abrirse
+    # niveles, y después (ver after_operand), donde se cierran.
+    # Los árboles y los errores son los mismos que con un método por regla
+    def expression(self) -> Expr:
+        types = self.types
+        frames: list[tuple] = []
+        # Cuántos niveles puede abrir la expresión, descontando los statements
+        # que la contienen
+        room = (
+            sys.maxsize if self.max_depth is None else self.max_depth - len(self.rules)
+        )
+        while True:
+            # Antes de cada operando puede haber operadores prefijo y paréntesis
+            # abiertos, y cada uno abre un nivel
+            token_type = types[self.current]
+            if token_type is TokenType.BANG or token_type is TokenType.MINUS:
+                self.current += 1
+                frames.append((UNARY, self._previous()))
+            elif token_type is TokenType.LEFT_PAREN:
+                self.current += 1
+                frames.append((GROUPING,))
+            else:
+                expr = self.after_operand(frames, self.primary())
+                if expr is not None:
+                    return expr
+
+            if len(frames) > room:
+                self._check_depth(len(self.rules) + len(frames))
+
+    # Sigue la expresión después de un operando: cierra los niveles que
+    # terminan con él, hasta encontrar algo que abre uno nuevo. Devuelve la
+    # expresión entera si ya terminó, o None si hay que parsear otro operando
+    def after_operand(self, frames: list[tuple], expr: Expr) -> Expr | None:
+        types = self.types
+        while True:
+            # Si me cruzo un paréntesis abierto, tengo una llamada a función
+            # y tengo que parsear los argumentos
+            while types[self.current] is TokenType.LEFT_PAREN:
+                self.current += 1
+                if not self._is_at_end() and self._peek() != TokenType.RIGHT_PAREN:
+                    frames.append((CALL, expr, []))
+                    return None
+                expr = self.call(expr, [])
+
+            # Los operadores prefijo se aplican sobre el operando con sus
+            # llamadas: `-f()` es `-(f())`, y ligan más fuerte que cualquier binario
+            while frames and frames[-1][0] == UNARY:
+                expr = UnaryExpr(frames.pop()[1], expr)
+
+            # Cerramos los operadores binarios pendientes que liguen igual o
+            # más fuerte que el que sigue: así `1 - 2 - 3` es `(1 - 2) - 3`
+            # y `1 * 2 + 3` es `(1 * 2) + 3`. Si lo que sigue no es un
+            # operador binario, se cierran todos
+            token_type = types[self.current]
+            power = BINDING_POWER.get(token_type, 0)
+            while frames and frames[-1][0] == BINARY and frames[-1][3] >= power:
+                _, left, operator, _ = frames.pop()
+                if operator.token_type is TokenType.OR or (
+                    operator.token_type is TokenType.AND
+                ):
+                    expr = LogicExpr(left, operator, expr)
+                else:
+                    expr = BinaryExpr(left, operator, expr)
+
+            # El operador queda pendiente hasta tener su operando derecho, que
+            # solo junta operadores que liguen más fuerte que él
+            if power:
+                self.current += 1
+                frames.append((BINARY, expr, self._previous(), power))
+                return None
+
+            # En una asignación tenemos dos partes: el nombre a la izquierda, y el valor a la derecha.
+            # La expresión de la izquierda (el lvalue) no es una expresión que resuelve a un valor,
+            # es una expresión que resuelve a un "algo" asignable. Esa expresión no la evaluamos, solo la usamos
+            # `a = 5` tiene que funcionar, pero `(a + b) = 5` no!
+            #
+            # Por el momento, solo podemos asignar sobre identificadores de variables, pero también podríamos agregar
+            # asignaciones a propiedades de objetos como `obj.attr() = 'a'`, o a elementos de arrays como `arr[0] = 'a'`
+            if self._match(TokenType.EQUAL):
+                if not isinstance(expr, VariableExpr):
+                    raise SyntaxError(
+                        f"Invalid assignment target, got `{self._lookahead()}` instead"
+                    )
+
+                # La asignación asocia a derecha: `a = b = 1` es `a = (b = 1)`
+                frames.append((ASSIGNMENT, expr.name))
+                return None
+
+            # Terminó una expresión entera, que era el valor de las
+            # asignaciones pendientes, y que puede estar entre paréntesis, ser
+            # el argumento de una llamada, o ser la expresión de afuera de todo
+            while frames and frames[-1][0] == ASSIGNMENT:
+                expr = AssignmentExpr(frames.pop()[1], expr)
+            if not frames:
+                return expr
+
+            frame = frames.pop()
+            if frame[0] == GROUPING:
+                # Si o si tengo que cerrar el paréntesis abierto
+                if not self._match(TokenType.RIGHT_PAREN):
+                    raise SyntaxError(
+                        f"Expected ')' after grouping expression, got `{self._lookahead()}` instead"
+                    )
+                expr = GroupingExpr(expr)
+                continue
+
+            # arguments      → expression ( "," expression )* ;
+            _, callee, arguments = frame
+            arguments.append(expr)
+            # Sigo parseando argumentos mientras me cruce una coma, o mientras
+            # no me cruce un paréntesis de cierre
+            if self._match(TokenType.COMMA) or (
+                not self._is_at_end() and self._peek() != TokenType.RIGHT_PAREN
             ):
-                # Consumo el primer argumento
-                arguments.append(self.expression())
-
-                # Consumo un argumento por cada coma que tengo adelante
-                while not self._is_at_end() and self._match(TokenType.COMMA):
-                    arguments.append(self.expression())
+                frames.append(frame)
+                return None
+            expr = self.call(callee, arguments)
 
-            # Si o sí tengo que cerrar el paréntesis abierto
-            if not self._match(TokenType.RIGHT_PAREN):
-                raise SyntaxError(
-                    f"Expected ')' after function arguments, got `{self._lookahead()}` instead"
-                )
-
-            expr = CallExpr(expr, arguments)
+    # Termina una llamada, después de sus argumentos
+    def call(self, callee: Expr, arguments: list[Expr]) -> CallExpr:
+        # Si o sí tengo que cerrar el paréntesis abierto
+        if not self._match(TokenType.RIGHT_PAREN):
+            raise SyntaxError(
+                f"Expected ')' after function arguments, got `{self._lookahead()}` instead"
+            )
 
-        return expr
+        return CallExpr(callee, arguments)
 
     # primary        → NUMBER | STRING | "true" | "false" | "nil" | "(" expression ")" | IDENTIFIER ;
-    # Nuestro átomo más chico es un literal, un identificador, o una expresión entre paréntesis
+    # Nuestro átomo más chico es un literal, un identificador, o una expresión
+    # entre paréntesis (de esa se ocupa expression, porque abre un nivel)
     def primary(self) -> Expr:
-        # Si es un token literal, lo convertimos en una expresión literal
-        if self._match(TokenType.FALSE):
-            return LiteralExpr(False)
-        if self._match(TokenType.TRUE):
-            return LiteralExpr(True)
-        if self._match(TokenType.NIL):
-            return LiteralExpr(None)
+        token_type = self.types[self.current]
 
         # Si es un token literal, lo convertimos en una expresión literal con el valor del token
-        if self._match(TokenType.NUMBER, TokenType.STRING):
+        if token_type is TokenType.NUMBER or token_type is TokenType.STRING:
+            self.current += 1
             return LiteralExpr(self._previous().literal)
 
         # Si es un token de un identificador, lo convertimos en una expresión de una variable
-        if self._match(TokenType.IDENTIFIER):
+        if token_type is TokenType.IDENTIFIER:
+            self.current += 1
             return VariableExpr(self._previous())
 
-        # Si me cruzo un parentesis abierto, quiero parsear la expresion que contiene y
-        # si o si cerrar el parentesis. Si no aparece ese parentesis de cierre, tengo un error
-        if self._match(TokenType.LEFT_PAREN):
-            expr = self.expression()
-            if not self._match(TokenType.RIGHT_PAREN):
-                raise SyntaxError(
-                    f"Expected ')' after grouping expression, got `{self._lookahead()}` instead"
-                )
-            return GroupingExpr(expr)
+        # true, false y nil son literales sin valor en el token
+        if token_type in KEYWORD_LITERALS:
+            self.current += 1
+            return LiteralExpr(KEYWORD_LITERALS[token_type])
 
         # Si llegué aca sin matchear ningun otro token, entonces
         # me quede colgado esperando una expresion del usuario
@@ -515,9 +595,18 @@ class Parser(object):
 
     # ---------- Helpers ---------- #
 
+    # Corta el parseo si hay más niveles abiertos que max_depth, con la
+    # posición del token que abriría el siguiente
+    def _check_depth(self, depth: int):
+        if self.max_depth is not None and depth > self.max_depth:
+            token = self._lookahead()
+            raise SyntaxError(
+                f"Nesting deeper than {self.max_depth} levels at line {token.line}, got `{token}`"
+            )
+
     # Devuelve si llegamos al token EOF
     def _is_at_end(self) -> bool:
-        return self._lookahead().token_type == TokenType.EOF
+        return self._peek() == TokenType.EOF
 
     # Devuelve el token anterior, ya consumido
     def _previous(self) -> Token:
@@ -527,23 +616,22 @@ class Parser(object):
     def _lookahead(self) -> Token:
         return self.tokens[self.current]
 
-    # Consume un token y lo devuelve
-    def _advance(self) -> Token:
-        token = self._lookahead()
+    # Devuelve el tipo del token actual, sin consumirlo
+    def _peek(self) -> TokenType:
+        return self.types[self.current]
+
+    # Consume un token
+    def _advance(self):
         if not self._is_at_end():
             self.current += 1
 
-        return token
-
     # Devuelve si el siguiente token es cualquiera de los esperados, y lo consume
     # Es solo una combinación de advance y check
     # Como estamos tomando decisiones en base a los tokens que se vienen,
     # este parser se clasifica como un parser predictivo
     def _match(self, *token_types: TokenType) -> bool:
-        for token_type in token_types:
-            token = self._lookahead()
-            if token.token_type == token_type:
-                self._advance()
-                return True
+        if self._peek() in token_types:
+            self._advance()
+            return True
 
         return False
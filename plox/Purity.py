@@ -0,0 +1,94 @@
+from .Stmt import Stmt, PrintStmt, VarDecl, FunDecl
+from .Expr import VariableExpr, AssignmentExpr, CallExpr
+from .Walk import walk
+
+
+def is_global(expression: VariableExpr | AssignmentExpr) -> bool:
+    return expression.depth is None and expression.upvalue is None
+
+
+# Decide qué funciones son puras: siempre que se las llama con los mismos
+# argumentos devuelven lo mismo y no tienen efectos, así que con --memoize
+# el intérprete puede guardarse sus resultados (ver MemoizedFunction).
+# Es conservador: ante la duda, la función no es pura. Una función es pura si
+#  - no imprime ni declara otras funciones (sus clausuras serían valores nuevos)
+#  - solo asigna a sus propias variables locales
+#  - no usa variables de afuera, salvo globales que son funciones puras
+#  - solo llama por nombre a funciones globales puras (no a parámetros o locales)
+# Las funciones globales puras se recuerdan entre líneas del REPL
+class PurityAnalyzer(object):
+    def __init__(self):
+        # Los nombres globales que son funciones puras
+        self.pure_globals: set[str] = set()
+        # Las globales de las que alguna vez dependió una función pura.
+        # Si cambian, el intérprete descarta los resultados memoizados
+        self.dependencies: set[str] = set()
+
+    def analyze(self, statements: list[Stmt]):
+        declarations = [node for node in walk(statements) if isinstance(node, FunDecl)]
+
+        # Las globales que cambian de valor en este programa no son confiables:
+        # las que se asignan, las que se declaran con var, y las funciones
+        # declaradas más de una vez
+        unstable: set[str] = set()
+        declared: set[str] = set()
+        for node in walk(statements):
+            if isinstance(node, AssignmentExpr) and is_global(node):
+                unstable.add(node.name.lexeme)
+            elif isinstance(node, (VarDecl, FunDecl)) and node.slot is None:
+                name = node.name.lexeme
+                if isinstance(node, VarDecl) or name in declared:
+                    unstable.add(name)
+                declared.add(name)
+
+        # Las funciones candidatas, con las globales de las que dependen
+        candidates: dict[FunDecl, set[str]] = {}
+        for declaration in declarations:
+            dependencies = self.free_globals(declaration)
+            if dependencies is not None:
+                candidates[declaration] = dependencies
+
+        # Las globales que pueden ser funciones puras: las de antes que no se
+        # redeclaran ahora, y las candidatas globales de ahora
+        pure = (self.pure_globals - declared) | {
+            d.name.lexeme for d in candidates if d.slot is None
+        }
+        pure -= unstable
+
+        # Una candidata que depende de algo que no es puro deja de serlo, y eso
+        # puede arrastrar a otras: repetimos hasta que no cambie nada
+        changed = True
+        while changed:
+            changed = False
+            for declaration, dependencies in list(candidates.items()):
+                if dependencies <= pure:
+                    continue
+                del candidates[declaration]
+                pure.discard(declaration.name.lexeme)
+                changed = True
+
+        for declaration in declarations:
+            declaration.pure = declaration in candidates
+        for dependencies in candidates.values():
+            self.dependencies.update(dependencies)
+        self.pure_globals.clear()
+        self.pure_globals.update(pure)
+
+    # Devuelve las globales que usa la función, o None si no puede ser pura
+    def free_globals(self, declaration: FunDecl) -> set[str] | None:
+        dependencies: set[str] = set()
+        for node in walk(declaration.body):
+            match node:
+                case PrintStmt() | FunDecl():
+                    return None
+                case AssignmentExpr() if node.depth is None:
+                    return None
+                case VariableExpr() if node.upvalue is not None:
+                    return None
+                case VariableExpr() if node.depth is None:
+                    dependencies.add(node.name.lexeme)
+                case CallExpr() if not (
+                    isinstance(node.callee, VariableExpr) and is_global(node.callee)
+                ):
+                    return None
+        return dependencies
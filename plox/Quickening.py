@@ -0,0 +1,153 @@
+import weakref
+from collections import Counter
+from typing import cast
+
+from .Stmt import FunDecl
+from .Expr import Expr, BinaryExpr, CallExpr
+from .Function import Function
+from .Interpreter import Interpreter, extend
+from .Operators import UNCHECKED
+from .Token import TokenType
+
+# Cuántas veces se evalúa un operador o una llamada antes de especializarlo
+QUICKEN_AFTER = 8
+# Cada vez que un nodo se desespecializa, espera el doble antes de volver a
+# intentarlo, hasta este máximo de veces
+MAX_BACKOFF = 6
+
+
+# Los nodos especializados por el intérprete adaptativo. Son el mismo nodo del
+# árbol, al que se le cambia la clase: para el resto de plox siguen siendo un
+# BinaryExpr o un CallExpr. Cada uno chequea que sigan llegando valores del
+# tipo para el que se especializó (el guard); si no, vuelve a ser genérico
+
+
+# Un operador aritmético o de comparación entre dos números
+class QuickNumberExpr(BinaryExpr):
+    pass
+
+
+# Un + entre dos cadenas
+class QuickConcatExpr(BinaryExpr):
+    pass
+
+
+# Una llamada a una función de Lox de la aridad justa: mientras se llame a
+# una clausura de la misma declaración, no hace falta chequear la llamada
+class QuickCallExpr(CallExpr):
+    target: FunDecl
+
+
+# Las clases especializadas de cada nodo, y el nombre con el que se cuentan
+KINDS: dict[type[Expr], str] = {
+    QuickNumberExpr: "number",
+    QuickConcatExpr: "concat",
+    QuickCallExpr: "call",
+}
+
+
+# Un intérprete adaptativo (plox --quicken), al estilo del de CPython 3.11:
+# los operadores y las llamadas anotan qué tipos de valores reciben y, si
+# después de unas vueltas siempre recibieron lo mismo, se reescriben a una
+# versión especializada que saltea los chequeos de tipos. Si llega otro tipo,
+# el nodo vuelve a su versión genérica (se desoptimiza), que chequea y da los
+# mismos errores de siempre
+class QuickeningInterpreter(Interpreter):
+    def __init__(self):
+        super().__init__()
+        # Cuántas evaluaciones le faltan a cada nodo genérico para
+        # especializarse, y cuántas veces se desespecializó. No se quedan con
+        # los nodos, así el árbol de cada línea del REPL se libera al terminar
+        self.countdown: weakref.WeakKeyDictionary[Expr, int] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.deopts: weakref.WeakKeyDictionary[Expr, int] = weakref.WeakKeyDictionary()
+        self.specializations: Counter[str] = Counter()
+        self.deoptimizations: Counter[str] = Counter()
+
+    evaluate = extend(vars(Interpreter)["evaluate"])
+
+    # ---------- Nodos genéricos ---------- #
+
+    @evaluate.register
+    def _(self, expression: BinaryExpr):
+        left = self.evaluate(expression.left)
+        right = self.evaluate(expression.right)
+        # Chequea los tipos y levanta los errores, igual que siempre
+        value = self.binary(expression.operator, left, right)
+        if self.warm(expression):
+            operator = expression.operator.token_type
+            if type(left) is float and type(right) is float:
+                if operator in UNCHECKED:
+                    self.quicken(expression, QuickNumberExpr)
+            elif type(left) is str and type(right) is str:
+                if operator == TokenType.PLUS:
+                    self.quicken(expression, QuickConcatExpr)
+        return value
+
+    @evaluate.register
+    def _(self, expression: CallExpr):
+        callee, arguments = self.prepare_call(expression)
+        if self.warm(expression) and type(callee) is Function:
+            self.quicken(expression, QuickCallExpr)
+            cast(QuickCallExpr, expression).target = callee.declaration
+        return callee(self, arguments)
+
+    # Cuenta una evaluación del nodo genérico. Devuelve si ya le toca
+    # especializarse
+    def warm(self, expression: Expr) -> bool:
+        countdown = self.countdown.get(expression, QUICKEN_AFTER) - 1
+        if countdown > 0:
+            self.countdown[expression] = countdown
+            return False
+        # Si no se puede especializar, espera otra vez antes de volver a probar
+        self.countdown[expression] = self.backoff(expression)
+        return True
+
+    def backoff(self, expression: Expr) -> int:
+        return QUICKEN_AFTER << min(self.deopts.get(expression, 0), MAX_BACKOFF)
+
+    def quicken(self, expression: Expr, specialized: type[Expr]):
+        # Mientras está especializado no se cuenta: si se desespecializa,
+        # vuelve a arrancar la cuenta
+        self.countdown.pop(expression, None)
+        expression.__class__ = specialized
+        self.specializations[KINDS[specialized]] += 1
+
+    # El guard falló: el nodo vuelve a ser genérico
+    def deoptimize(self, expression: Expr, generic: type[Expr]):
+        self.deoptimizations[KINDS[type(expression)]] += 1
+        expression.__class__ = generic
+        self.deopts[expression] = self.deopts.get(expression, 0) + 1
+        self.countdown[expression] = self.backoff(expression)
+
+    # ---------- Nodos especializados ---------- #
+
+    @evaluate.register
+    def _(self, expression: QuickNumberExpr):
+        left = self.evaluate(expression.left)
+        right = self.evaluate(expression.right)
+        if type(left) is float and type(right) is float:
+            return UNCHECKED[expression.operator.token_type](left, right)
+        self.deoptimize(expression, BinaryExpr)
+        return self.binary(expression.operator, left, right)
+
+    @evaluate.register
+    def _(self, expression: QuickConcatExpr):
+        left = self.evaluate(expression.left)
+        right = self.evaluate(expression.right)
+        if type(left) is str and type(right) is str:
+            return left + right
+        self.deoptimize(expression, BinaryExpr)
+        return self.binary(expression.operator, left, right)
+
+    @evaluate.register
+    def _(self, expression: QuickCallExpr):
+        callee = self.evaluate(expression.callee)
+        arguments = [self.evaluate(argument) for argument in expression.arguments]
+        # La aridad es la de la declaración, que ya se chequeó al especializar
+        if type(callee) is Function and callee.declaration is expression.target:
+            return callee(self, arguments)
+        self.deoptimize(expression, CallExpr)
+        self.check_call(callee, arguments)
+        return callee(self, arguments)
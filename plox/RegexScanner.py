@@ -0,0 +1,163 @@
+import re
+from typing import cast
+
+from .Token import Token, TokenType, TokenKeywords
+from .TokenBuffer import TokenBuffer, CODES
+
+# Los tokens de uno o dos caracteres, por su lexema
+OPERATORS = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.STAR,
+    ";": TokenType.SEMICOLON,
+    "%": TokenType.PERCENT,
+    "/": TokenType.SLASH,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+}
+
+# Una única expresión regular con una alternativa por cada clase de lexema,
+# precedida por los espacios que haya antes (así no hace falta un match aparte
+# para cada uno). Las alternativas se prueban en orden (ej: un comentario antes
+# que un /), y la última agarra cualquier caracter, así que cada posición del
+# código matchea con alguna: recorrer los matches es recorrer el código entero
+TOKEN = re.compile(
+    r"""
+    [ \r\t]*
+    (?:
+      (?P<newline>(?:\n[ \r\t]*)+)
+    | (?P<comment>//[^\n]*)
+    | (?P<operator>[!=<>]=?|[(){},+\-*;%/])
+    | (?P<identifier>[^\W\d]\w*)
+    | (?P<number>[0-9][0-9.]*)
+    | (?P<string>'[^'\n]*'|"[^"]*")
+    | (?P<unterminated>'[^'\n]*|"[^"]*)
+    | (?P<unexpected>.)
+    | (?P<end>\Z)
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+# El tipo de un identificador o palabra reservada. \w también acepta algunos
+# números que no son dígitos (ej: ²), que no pueden empezar un identificador
+def identifier(lexeme: str) -> TokenType:
+    first = lexeme[0]
+    if not first.isalpha() and first != "_":
+        raise Exception(f"Unexpected character: `{first}`")
+    return TokenKeywords.get(lexeme, TokenType.IDENTIFIER)
+
+
+def number(lexeme: str) -> float:
+    # un número no puede tener más de un punto decimal, ni terminar en punto
+    if lexeme.count(".") > 1 or lexeme[-1] == ".":
+        raise Exception(f"Invalid number: `{lexeme}`")
+    return float(lexeme)
+
+
+# Un scanner (plox --regex-scanner) que, en vez de avanzar caracter por
+# caracter, recorre el código con la expresión regular de arriba, ya compilada.
+# Devuelve los mismos tokens que Scanner, con las mismas líneas (tampoco
+# cuenta los saltos de línea adentro de las cadenas) y los mismos errores
+class RegexScanner(object):
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens: list[Token] = []
+        self.line = 1
+
+    def scan(self) -> list[Token]:
+        tokens = self.tokens
+        line = self.line
+        for match in TOKEN.finditer(self.source):
+            # siempre matchea alguna de las alternativas, que tienen nombre
+            kind = cast(str, match.lastgroup)
+            lexeme = match.group(kind)
+            token_type: TokenType
+            literal: float | str | None = None
+
+            # los casos van de los lexemas más comunes a los menos comunes
+            if kind == "operator":
+                token_type = OPERATORS[lexeme]
+            elif kind == "identifier":
+                token_type = identifier(lexeme)
+            elif kind == "newline":
+                line += lexeme.count("\n")
+                continue
+            elif kind == "number":
+                token_type = TokenType.NUMBER
+                literal = number(lexeme)
+            elif kind == "string":
+                # la cadena la guardamos sin las comillas
+                token_type = TokenType.STRING
+                literal = lexeme[1:-1]
+            elif kind == "comment" or kind == "end":
+                continue
+            elif kind == "unterminated":
+                raise Exception(f"Unterminated string: `{lexeme}`")
+            else:
+                raise Exception(f"Unexpected character: `{lexeme}`")
+
+            tokens.append(Token(token_type, lexeme=lexeme, literal=literal, line=line))
+
+        # terminamos la lista de tokens con un EOF, igual que Scanner
+        tokens.append(Token(TokenType.EOF, lexeme="", literal=None, line=line))
+        self.line = line
+        return tokens
+
+    # Igual que scan, pero guarda los tokens en un TokenBuffer (plox
+    # --token-buffer): no arma ningún Token ni se guarda ningún lexema
+    def scan_buffer(self) -> TokenBuffer:
+        source = self.source
+        buffer = TokenBuffer(source)
+        kinds, starts, ends, lines = (
+            buffer.kinds,
+            buffer.starts,
+            buffer.ends,
+            buffer.lines,
+        )
+        line = self.line
+        for match in TOKEN.finditer(source):
+            kind = cast(str, match.lastgroup)
+            start, end = match.span(kind)
+            token_type: TokenType
+
+            if kind == "operator":
+                token_type = OPERATORS[source[start:end]]
+            elif kind == "identifier":
+                token_type = identifier(source[start:end])
+            elif kind == "newline":
+                line += source.count("\n", start, end)
+                continue
+            elif kind == "number":
+                # el valor se calcula recién cuando se pide
+                number(source[start:end])
+                token_type = TokenType.NUMBER
+            elif kind == "string":
+                token_type = TokenType.STRING
+            elif kind == "comment" or kind == "end":
+                continue
+            elif kind == "unterminated":
+                raise Exception(f"Unterminated string: `{source[start:end]}`")
+            else:
+                raise Exception(f"Unexpected character: `{source[start:end]}`")
+
+            kinds.append(CODES[token_type])
+            starts.append(start)
+            ends.append(end)
+            lines.append(line)
+
+        buffer.append(TokenType.EOF, len(source), len(source), line)
+        self.line = line
+        return buffer
@@ -1,6 +1,6 @@
 from functools import singledispatchmethod
+from typing import Generator, Optional
 
-from .Interpreter import Interpreter
 from .Stmt import (
     Stmt,
     ExpressionStmt,
@@ -10,6 +10,8 @@ from .Stmt import (
     BlockStmt,
     IfStmt,
     WhileStmt,
+    ForStmt,
+    CountedLoop,
     ReturnStmt,
 )
 from .Expr import (
@@ -23,34 +25,114 @@ from .Expr import (
     LogicExpr,
     CallExpr,
 )
-
-
+from .Walk import walk
+from .Token import TokenType
+
+# La resolución de un nodo con hijos es un generador: cada vez que necesita
+# resolver un hijo, lo pide con `yield hijo` (igual que los frames de
+# StackInterpreter). Los nodos sin hijos se resuelven directo, sin frame
+Frame = Generator[Stmt | Expr, None, None]
+
+
+# Lo que el resolvedor va aprendiendo de cada scope local, y que decide
+# cómo se arma su entorno en tiempo de ejecución
+class ScopeLayout(object):
+    def __init__(self, function: bool, owner: Optional["FunctionScope"]):
+        self.function = function
+        # La función a la que pertenece el scope (None en el script)
+        self.owner = owner
+        # El slot que le toca a cada variable: se numeran en el orden en el que se declaran
+        self.slots: dict[str, int] = {}
+        # Las declaraciones del scope, y los nombres que captura alguna clausura
+        self.declarations: dict[str, VarDecl | FunDecl] = {}
+        self.captured: set[str] = set()
+        # Los accesos a variables de este scope, con los scopes que cruzan para llegar.
+        # Su profundidad se calcula al terminar el scope, cuando ya sabemos cuáles
+        # de los scopes intermedios tienen entorno propio
+        self.accesses: list[
+            tuple[VariableExpr | AssignmentExpr, list["ScopeLayout"]]
+        ] = []
+
+    # Las funciones siempre crean un entorno por invocación. Un bloque que no
+    # declara nada no lo necesita: se ejecuta directo en el entorno que lo encierra
+    def allocates(self) -> bool:
+        return self.function or len(self.slots) > 0
+
+
+# Lo que el resolvedor va aprendiendo de cada función que está resolviendo
+class FunctionScope(object):
+    def __init__(self, declaration: FunDecl, enclosing: Optional["FunctionScope"]):
+        self.declaration = declaration
+        self.enclosing = enclosing
+        self.layout: ScopeLayout
+        # Las variables de afuera que usa la función (sus upvalues),
+        # con su índice en FunDecl.captures
+        self.upvalues: dict[tuple[str, ScopeLayout], int] = {}
+
+
+# El resolvedor anota los resultados directamente en los nodos del árbol
+# (profundidades, slots y tamaños de los scopes), así el intérprete no necesita
+# ninguna tabla aparte que crezca con cada línea del REPL.
+# Tampoco usa el stack de Python para recorrer el árbol, que puede ser tan
+# profundo como el código anidado que lo generó: con un max_depth, los árboles
+# más profundos que eso se cortan con un NameError
 class Resolver(object):
-    def __init__(self, interpreter: Interpreter):
+    def __init__(self, max_depth: int | None = None):
+        self.max_depth = max_depth
         # Nos guardamos un stack de scopes, para saber cuan anidados estamos
         # En cada scope tenemos una tabla que nos dice si bajo un nombre tenemos
         # una variable solo declarada (False) o ya definida (True)
         self.scopes: list[dict[str, bool]] = []
-        # Una referencia al intérprete, para poder resolver las variables
-        self.interpreter = interpreter
-
-    def begin_scope(self):
+        # En paralelo, cómo va a ser el entorno de cada scope
+        self.layouts: list[ScopeLayout] = []
+        # Las funciones que estamos resolviendo, de la más externa a la más interna
+        self.functions: list[FunctionScope] = []
+        # Las declaraciones y los accesos locales que se resolvieron,
+        # para poder mostrarlos en el modo --resolve
+        self.declarations: list[VarDecl | FunDecl] = []
+        self.locals: list[VariableExpr | AssignmentExpr] = []
+
+    def begin_scope(self, function: FunctionScope | None = None):
         # Empezar un scope es apilar una tabla
         self.scopes.append({})
+        if function is not None:
+            function.layout = ScopeLayout(True, function)
+            self.layouts.append(function.layout)
+        else:
+            self.layouts.append(ScopeLayout(False, self.current_function()))
+
+    def current_function(self) -> FunctionScope | None:
+        return self.functions[-1] if self.functions else None
 
-    def end_scope(self):
+    def end_scope(self) -> ScopeLayout:
         # Terminar un scope es desapilar la tabla
+        # Ya conocemos todos los scopes que hay entre cada acceso y este scope,
+        # así que podemos calcular su profundidad contando solo los que tienen entorno
         self.scopes.pop()
-
-    def declare(self, name: str):
-        # Declarar una variable es guardarla bajo False en el tope del stack
+        layout = self.layouts.pop()
+        # También sabemos qué variables captura alguna clausura: esas se guardan en celdas
+        for expression, crossed in layout.accesses:
+            expression.depth = sum(1 for scope in crossed if scope.allocates())
+            expression.captured = expression.name.lexeme in layout.captured
+        for name, declaration in layout.declarations.items():
+            declaration.captured = name in layout.captured
+        return layout
+
+    def declare(self, name: str) -> int | None:
+        # Declarar una variable es guardarla bajo False en el tope del stack,
+        # y asignarle el siguiente slot libre de su scope
+        # Las globales no tienen slot
         if not self.scopes:
-            return
+            return None
 
         if name in self.scopes[-1]:
             raise NameError(f"Variable `{name}` already exists")
 
         self.scopes[-1][name] = False
+        slots = self.layouts[-1].slots
+        slot = len(slots)
+        slots[name] = slot
+        return slot
 
     def define(self, name: str):
         # Declarar una variable es guardarla bajo True en el tope del stack
@@ -58,77 +140,140 @@ class Resolver(object):
             return
         self.scopes[-1][name] = True
 
+    # Resuelve un nodo y todo lo que cuelga de él. Los nodos a medio resolver
+    # se apilan como frames en una lista propia, en vez de en el stack de Python
+    def resolve(self, node: Stmt | Expr):
+        frame = self.frame(node)
+        if frame is None:
+            return
+
+        stack = [frame]
+        while stack:
+            # El frame de arriba pide el siguiente hijo, o terminó
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                continue
+
+            frame = self.frame(child)
+            if frame is not None:
+                if self.max_depth is not None and len(stack) >= self.max_depth:
+                    raise NameError(
+                        f"Nesting deeper than {self.max_depth} levels{at_line(child)}"
+                    )
+                stack.append(frame)
+
     @singledispatchmethod
-    def resolve(self, arg: Stmt | Expr):
+    def frame(self, arg: Stmt | Expr) -> Frame | None:
         raise NameError(f"Unknown statement or expression type: `{type(arg)}`")
 
     # ---------- Resolver Statements  ---------- #
 
-    @resolve.register
-    def _(self, statement: BlockStmt):
+    @frame.register
+    def _(self, statement: BlockStmt) -> Frame:
         # Los bloques arrancan su propio scope
         self.begin_scope()
         for stmt in statement.statements:
-            self.resolve(stmt)
-        self.end_scope()
-
-    @resolve.register
-    def _(self, statement: VarDecl):
+            yield stmt
+        layout = self.end_scope()
+        # Las clausuras se quedan solo con las celdas que usan, nunca con el entorno,
+        # así que el intérprete puede reutilizar el entorno del bloque la próxima
+        # vez que lo ejecute (ej: en cada iteración de un loop)
+        statement.scope_size = len(layout.slots)
+
+    @frame.register
+    def _(self, statement: VarDecl) -> Frame:
         # Las variables se declaran en el scope actual,
         # y después de resolver su inicializador, se definen
         # Esto esta desacoplado de esta manera para que podamos atajar
         # el error donde uno hace `var x = x;`, e intenta
         # referenciar una variable que todavía no fue definida
-        self.declare(statement.name.lexeme)
+        slot = self.declare(statement.name.lexeme)
+        statement.slot = slot
+        statement.captured = False
+        if slot is not None:
+            self.layouts[-1].declarations[statement.name.lexeme] = statement
+            self.declarations.append(statement)
         if statement.initializer is not None:
-            self.resolve(statement.initializer)
+            yield statement.initializer
         self.define(statement.name.lexeme)
 
-    @resolve.register
-    def _(self, statement: FunDecl):
+    @frame.register
+    def _(self, statement: FunDecl) -> Frame:
         # Las funciones arrancan un scope nuevo después del nombre de la función
         # fun nombre() { <scope nuevo> }
-        self.declare(statement.name.lexeme)
+        slot = self.declare(statement.name.lexeme)
+        statement.slot = slot
+        statement.captured = False
+        if slot is not None:
+            self.layouts[-1].declarations[statement.name.lexeme] = statement
+            self.declarations.append(statement)
         self.define(statement.name.lexeme)
-        self.begin_scope()
+
+        # Mientras resolvemos el cuerpo, vamos juntando las variables de afuera que usa
+        statement.captures = []
+        function = FunctionScope(statement, self.current_function())
+        self.functions.append(function)
+        self.begin_scope(function)
+        # Los parámetros ocupan los primeros slots del entorno de la función
         for param in statement.parameters:
             self.declare(param.lexeme)
             self.define(param.lexeme)
         for stmt in statement.body:
-            self.resolve(stmt)
-        self.end_scope()
+            yield stmt
+        layout = self.end_scope()
+        self.functions.pop()
+
+        statement.scope_size = len(layout.slots)
+        statement.captured_params = [
+            layout.slots[param.lexeme]
+            for param in statement.parameters
+            if param.lexeme in layout.captured
+        ]
 
     ## El resto de los statements son triviales de resolver
 
-    @resolve.register
-    def _(self, statement: ExpressionStmt):
-        self.resolve(statement.expression)
+    @frame.register
+    def _(self, statement: ExpressionStmt) -> Frame:
+        yield statement.expression
 
-    @resolve.register
-    def _(self, statement: PrintStmt):
-        self.resolve(statement.expression)
+    @frame.register
+    def _(self, statement: PrintStmt) -> Frame:
+        yield statement.expression
 
-    @resolve.register
-    def _(self, statement: ReturnStmt):
+    @frame.register
+    def _(self, statement: ReturnStmt) -> Frame:
         if statement.value is not None:
-            self.resolve(statement.value)
-
-    @resolve.register
-    def _(self, statement: IfStmt):
-        self.resolve(statement.condition)
-        self.resolve(statement.then_branch)
+            yield statement.value
+        # Después de una llamada en un return no queda nada por hacer en la
+        # función, así que el intérprete puede reemplazar la llamada actual
+        # por la nueva en vez de anidarla
+        statement.tail_call = bool(self.functions) and isinstance(
+            statement.value, CallExpr
+        )
+
+    @frame.register
+    def _(self, statement: IfStmt) -> Frame:
+        yield statement.condition
+        yield statement.then_branch
         if statement.else_branch is not None:
-            self.resolve(statement.else_branch)
+            yield statement.else_branch
+
+    @frame.register
+    def _(self, statement: WhileStmt) -> Frame:
+        yield statement.condition
+        yield statement.body
 
-    @resolve.register
-    def _(self, statement: WhileStmt):
-        self.resolve(statement.condition)
-        self.resolve(statement.body)
+    @frame.register
+    def _(self, statement: ForStmt) -> Frame:
+        yield statement.condition
+        yield statement.body
+        statement.counted = counted_loop(statement)
 
     # ---------- Resolver Expresiones ---------- #
 
-    @resolve.register
-    def _(self, expression: VariableExpr):
+    @frame.register
+    def _(self, expression: VariableExpr) -> None:
         # Si la variable esta declarada e intenta ser referenciada antes de ser definida,
         # es decir, si su valor en la tabla es False, en vez de ser True,
         # lanzamos un error
@@ -138,55 +283,210 @@ class Resolver(object):
                 f"Variable `{expression.name.lexeme}` was declared but not defined"
             )
 
-        # Luego, agregamos al intérprete la profundidad del scope
+        # Luego, anotamos en el nodo la profundidad del scope
         # en la que buscar la variable referenciada, partiendo
-        # desde el top del stack
-        for i, scope in enumerate(reversed(self.scopes)):
-            if expression.name.lexeme in scope:
-                self.interpreter.resolve_depth(expression, i)
-                return
-
-    @resolve.register
-    def _(self, expression: AssignmentExpr):
-        value = self.resolve(expression.value)
-
-        # Agregamos al intérprete la profundidad del scope en la que
-        # se tiene que asignar el valor de la variable
-        for i, scope in enumerate(reversed(self.scopes)):
-            if expression.name.lexeme in scope:
-                self.interpreter.resolve_depth(expression, i)
-                return value
-
-        return value
-
-    @resolve.register
-    def _(self, expression: LiteralExpr):
+        # desde el top del stack, y su slot en ese scope
+        self.resolve_local(expression)
+
+    @frame.register
+    def _(self, expression: AssignmentExpr) -> Frame:
+        yield expression.value
+
+        # Anotamos en el nodo la profundidad del scope y el slot
+        # en los que se tiene que asignar el valor de la variable
+        self.resolve_local(expression)
+
+    # Busca la variable desde el scope más interno hacia afuera.
+    # Si no está en ningún scope local, es una global y su depth queda en None
+    def resolve_local(self, expression: VariableExpr | AssignmentExpr):
+        # Empezamos de cero, por si el nodo ya se había resuelto antes
+        # (ej: el optimizador vuelve a resolver el árbol que transformó)
+        expression.depth = None
+        expression.upvalue = None
+        expression.captured = False
+        expression.declaration = None
+        if self.resolve_in(expression, self.layouts, self.current_function()):
+            self.locals.append(expression)
+
+    # Resuelve la variable como si estuviese en el tope de `layouts`,
+    # adentro de la función `function`. Devuelve si la encontró
+    def resolve_in(
+        self,
+        expression: VariableExpr | AssignmentExpr,
+        layouts: list[ScopeLayout],
+        function: FunctionScope | None,
+    ) -> bool:
+        name = expression.name.lexeme
+        for i, layout in enumerate(reversed(layouts)):
+            if name not in layout.slots:
+                continue
+
+            expression.declaration = layout.declarations.get(name)
+            if layout.owner is not function:
+                # La variable es de una función que encierra a la actual:
+                # la función la captura y la lee desde sus upvalues
+                layout.captured.add(name)
+                expression.upvalue = self.capture(function, expression, layout)
+                return True
+
+            expression.slot = layout.slots[name]
+            layout.accesses.append((expression, layouts[len(layouts) - i :]))
+            return True
+        return False
+
+    # Agrega la variable (declarada en el scope `layout`) a las upvalues de la
+    # función, y devuelve su índice. La función la captura al crearse, así que la
+    # resolvemos desde donde se declara la función: puede ser una local de la
+    # función que la encierra, o a su vez una de sus upvalues
+    def capture(
+        self,
+        function: FunctionScope | None,
+        expression: VariableExpr | AssignmentExpr,
+        layout: ScopeLayout,
+    ) -> int:
+        name = expression.name.lexeme
+        key = (name, layout)
+
+        # Vamos hacia afuera juntando las funciones que todavía no la capturan,
+        # hasta llegar a la que la tiene como local o ya la capturó
+        missing: list[FunctionScope] = []
+        upvalue: int | None = None
+        while True:
+            if function is None:
+                # Si el resolvedor está bien hecho, esto no debería pasar nunca!
+                raise NameError(f"Cannot capture `{name}` outside a function")
+            if key in function.upvalues:
+                upvalue = function.upvalues[key]
+                break
+            missing.append(function)
+            if layout.owner is function.enclosing:
+                break
+            function = function.enclosing
+
+        # Y las completamos de afuera hacia adentro: la más externa la lee como
+        # local (o upvalue) de la que la encierra, y cada una de las demás,
+        # desde las upvalues de la anterior
+        for function in reversed(missing):
+            variable = VariableExpr(expression.name)
+            if upvalue is None:
+                declared_in = self.layouts[: self.layouts.index(function.layout)]
+                self.resolve_in(variable, declared_in, function.enclosing)
+            else:
+                variable.upvalue = upvalue
+                variable.declaration = layout.declarations.get(name)
+            upvalue = function.upvalues[key] = len(function.declaration.captures)
+            function.declaration.captures.append(variable)
+        return function.upvalues[key]
+
+    @frame.register
+    def _(self, expression: LiteralExpr) -> None:
         # Los literales son lo más chico que hay en el lenguaje,
         # no queda nada por resolver!
         return
 
     ## El resto de las resoluciones son triviales de resolver
 
-    @resolve.register
-    def _(self, expression: GroupingExpr):
-        self.resolve(expression.expression)
+    @frame.register
+    def _(self, expression: GroupingExpr) -> Frame:
+        yield expression.expression
 
-    @resolve.register
-    def _(self, expression: UnaryExpr):
-        self.resolve(expression.right)
+    @frame.register
+    def _(self, expression: UnaryExpr) -> Frame:
+        yield expression.right
 
-    @resolve.register
-    def _(self, expression: BinaryExpr):
-        self.resolve(expression.left)
-        self.resolve(expression.right)
+    @frame.register
+    def _(self, expression: BinaryExpr) -> Frame:
+        yield expression.left
+        yield expression.right
 
-    @resolve.register
-    def _(self, expression: LogicExpr):
-        self.resolve(expression.left)
-        self.resolve(expression.right)
+    @frame.register
+    def _(self, expression: LogicExpr) -> Frame:
+        yield expression.left
+        yield expression.right
 
-    @resolve.register
-    def _(self, expression: CallExpr):
-        self.resolve(expression.callee)
+    @frame.register
+    def _(self, expression: CallExpr) -> Frame:
+        yield expression.callee
         for arg in expression.arguments:
-            self.resolve(arg)
+            yield arg
+
+
+# Para los errores, la línea del primer token que aparece en el nodo o en lo
+# que cuelga de él (no todos los nodos tienen uno)
+def at_line(node: Stmt | Expr) -> str:
+    for child in walk([node]):
+        if isinstance(child, (VariableExpr, AssignmentExpr, VarDecl, FunDecl)):
+            return f" at line {child.name.line}"
+        if isinstance(child, (BinaryExpr, LogicExpr, UnaryExpr)):
+            return f" at line {child.operator.line}"
+    return ""
+
+
+# Los operadores de comparación que puede tener la condición de un loop contado
+COMPARISONS = {
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+}
+
+
+# Reconoce un loop contado (ver CountedLoop): la condición compara una
+# variable contra un número o contra otra variable, el incremento le suma o
+# resta un número entero a esa variable, y ninguna de las dos se asigna en el
+# resto del cuerpo. El cuerpo tiene que ser el bloque que arma el parser, sin
+# variables propias, para poder ejecutarlo sin el incremento
+def counted_loop(statement: ForStmt) -> CountedLoop | None:
+    condition, body = statement.condition, statement.body
+    if not statement.increment or not isinstance(body, BlockStmt):
+        return None
+    if body.scope_size != 0 or not body.statements:
+        return None
+    if not isinstance(condition, BinaryExpr) or not isinstance(
+        condition.left, VariableExpr
+    ):
+        return None
+    counter, bound = condition.left, condition.right
+    if condition.operator.token_type not in COMPARISONS:
+        return None
+    if not isinstance(bound, VariableExpr) and not (
+        isinstance(bound, LiteralExpr) and type(bound.value) is float
+    ):
+        return None
+
+    # El incremento: `i = i + paso` o `i = i - paso`
+    increment = body.statements[-1]
+    name = counter.name.lexeme
+    if not isinstance(increment, ExpressionStmt):
+        return None
+    assignment = increment.expression
+    if not isinstance(assignment, AssignmentExpr) or assignment.name.lexeme != name:
+        return None
+    value = assignment.value
+    if not isinstance(value, BinaryExpr):
+        return None
+    left, step = value.left, value.right
+    if not isinstance(left, VariableExpr) or left.name.lexeme != name:
+        return None
+    if not isinstance(step, LiteralExpr) or type(step.value) is not float:
+        return None
+    if not step.value.is_integer() or step.value == 0:
+        return None
+    if value.operator.token_type == TokenType.PLUS:
+        delta = step.value
+    elif value.operator.token_type == TokenType.MINUS:
+        delta = -step.value
+    else:
+        return None
+
+    # Ni el contador ni el límite pueden cambiar en el resto del cuerpo
+    variables = {name}
+    if isinstance(bound, VariableExpr):
+        if bound.name.lexeme == name:
+            return None
+        variables.add(bound.name.lexeme)
+    for node in walk(body.statements[:-1]):
+        if isinstance(node, AssignmentExpr) and node.name.lexeme in variables:
+            return None
+
+    return CountedLoop(counter, condition.operator.token_type, bound, delta)
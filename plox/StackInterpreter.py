@@ -0,0 +1,284 @@
+from functools import singledispatchmethod
+from types import GeneratorType
+from typing import Any, Generator
+
+from .Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ReturnStmt,
+)
+from .Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+from .Function import Function, MemoizedFunction, ReturnValue, TailCall, memo_key
+from .Interpreter import Interpreter
+from .Token import TokenType
+from .Env import Env, UNDEFINED
+
+# Cuántas llamadas de Lox puede haber anidadas, igual que FRAMES_MAX en la VM
+MAX_DEPTH = 10000
+
+# La ejecución de un nodo es un generador de Python: cada vez que necesita
+# el valor de un hijo, lo pide con `yield hijo` y recibe el resultado.
+# Al terminar, devuelve (con return) su valor o su completion
+Frame = Generator[Any, Any, Any]
+
+# Los nodos que no tienen hijos se ejecutan directo con el intérprete
+# tree-walk, sin armarles un frame
+LEAVES = (LiteralExpr, VariableExpr, FunDecl)
+
+
+# Un intérprete que no usa el stack de Python para recorrer el árbol.
+# El intérprete tree-walk evalúa cada hijo de un nodo con una llamada recursiva,
+# así que un programa con mucha recursión (o una expresión muy anidada) termina
+# en un RecursionError. Acá, en cambio, cada nodo que se está ejecutando es un
+# generador, y los generadores pendientes se guardan en una lista propia:
+# la profundidad solo está limitada por la memoria y por max_depth.
+# Reutiliza todo lo del intérprete: el resolvedor, los entornos, los operadores
+class StackInterpreter(Interpreter):
+    def __init__(self, max_depth: int = MAX_DEPTH):
+        super().__init__()
+        self.max_depth = max_depth
+        # Cuántas llamadas de Lox hay en curso
+        self.depth = 0
+
+    def interpret(self, statements: list[Stmt]):
+        lastvalue_produced = None
+        for statement in statements:
+            # Igual que el intérprete, nos guardamos el valor de los
+            # statements de expresión para mostrarlo en el REPL
+            if isinstance(statement, ExpressionStmt):
+                lastvalue_produced = self.run(statement.expression)
+                continue
+
+            lastvalue_produced = None
+            completion = self.run(statement)
+            if completion is not None:
+                # Un return por fuera de una función
+                raise ReturnValue(completion[0])
+        return lastvalue_produced
+
+    # Ejecuta un nodo hasta el final, manejando a mano el stack de frames
+    def run(self, node: Stmt | Expr):
+        if isinstance(node, LEAVES):
+            return self.leaf(node)
+
+        stack: list[Frame] = [self.frame(node)]
+        value: Any = None
+        error: Exception | None = None
+        while stack:
+            frame = stack[-1]
+            try:
+                if error is not None:
+                    # Un error en un hijo se relanza en el frame que lo pidió,
+                    # así corren sus finally (ej: el que restaura el entorno)
+                    thrown, error = error, None
+                    child = frame.throw(thrown)
+                else:
+                    child = frame.send(value)
+            except StopIteration as stop:
+                # El frame terminó: su resultado es lo que recibe el que lo pidió
+                stack.pop()
+                value = stop.value
+                continue
+            except Exception as e:
+                stack.pop()
+                if not stack:
+                    raise
+                error = e
+                continue
+
+            # El frame pide el valor de un hijo
+            value = None
+            if type(child) is GeneratorType:
+                stack.append(child)
+            elif isinstance(child, LEAVES):
+                try:
+                    value = self.leaf(child)
+                except Exception as e:
+                    error = e
+            else:
+                stack.append(self.frame(child))
+        return value
+
+    def leaf(self, node: LiteralExpr | VariableExpr | FunDecl):
+        if isinstance(node, FunDecl):
+            return self.execute(node)
+        return self.evaluate(node)
+
+    # ---------- Frames de Statements y Expresiones ---------- #
+
+    @singledispatchmethod
+    def frame(self, node: Stmt | Expr) -> Frame:
+        raise RuntimeError(f"Unknown statement or expression type: `{type(node)}`")
+
+    @frame.register
+    def _(self, statement: ExpressionStmt) -> Frame:
+        yield statement.expression
+
+    @frame.register
+    def _(self, statement: PrintStmt) -> Frame:
+        value = yield statement.expression
+        print(value)
+
+    @frame.register
+    def _(self, statement: VarDecl) -> Frame:
+        value = None
+        if statement.initializer is not None:
+            value = yield statement.initializer
+        self.define(statement, value)
+
+    @frame.register
+    def _(self, statement: ReturnStmt) -> Frame:
+        if statement.tail_call:
+            expression = statement.value
+            assert isinstance(expression, CallExpr)
+            callee, arguments = yield from self.prepare_call_frame(expression)
+            return TailCall(callee, arguments)
+
+        value = None
+        if statement.value is not None:
+            value = yield statement.value
+        return (value,)
+
+    @frame.register
+    def _(self, statement: IfStmt) -> Frame:
+        if self.is_truthy((yield statement.condition)):
+            return (yield statement.then_branch)
+        elif statement.else_branch is not None:
+            return (yield statement.else_branch)
+        return None
+
+    @frame.register
+    def _(self, statement: WhileStmt) -> Frame:
+        while self.is_truthy((yield statement.condition)):
+            completion = yield statement.body
+            if completion is not None:
+                return completion
+        return None
+
+    @frame.register
+    def _(self, statement: BlockStmt) -> Frame:
+        if statement.scope_size == 0:
+            for s in statement.statements:
+                completion = yield s
+                if completion is not None:
+                    return completion
+            return None
+
+        env = self.block_env(statement)
+        try:
+            return (yield self.block_frame(statement.statements, env))
+        finally:
+            env.release()
+            statement.free_env = env
+
+    def block_frame(self, statements: list[Stmt], block_env: Env) -> Frame:
+        # Mientras el frame del bloque está en el stack, todos los frames que
+        # están arriba suyo son de sus statements, así que el entorno queda
+        # bien puesto hasta que termina
+        previous_env = self.env
+        self.env = block_env
+        try:
+            for s in statements:
+                completion = yield s
+                if completion is not None:
+                    return completion
+            return None
+        finally:
+            self.env = previous_env
+
+    @frame.register
+    def _(self, expression: GroupingExpr) -> Frame:
+        return (yield expression.expression)
+
+    @frame.register
+    def _(self, expression: AssignmentExpr) -> Frame:
+        value = yield expression.value
+        return self.assign(expression, value)
+
+    @frame.register
+    def _(self, expression: UnaryExpr) -> Frame:
+        right = yield expression.right
+        return self.unary(expression.operator, right)
+
+    @frame.register
+    def _(self, expression: BinaryExpr) -> Frame:
+        left = yield expression.left
+        right = yield expression.right
+        return self.binary(expression.operator, left, right)
+
+    @frame.register
+    def _(self, expression: LogicExpr) -> Frame:
+        left = yield expression.left
+
+        if expression.operator.token_type == TokenType.OR:
+            if self.is_truthy(left):
+                return left
+
+        if expression.operator.token_type == TokenType.AND:
+            if not self.is_truthy(left):
+                return left
+
+        return (yield expression.right)
+
+    @frame.register
+    def _(self, expression: CallExpr) -> Frame:
+        callee, arguments = yield from self.prepare_call_frame(expression)
+        return (yield self.call_frame(callee, arguments))
+
+    def prepare_call_frame(self, expression: CallExpr) -> Frame:
+        callee = yield expression.callee
+        arguments = []
+        for arg in expression.arguments:
+            arguments.append((yield arg))
+        self.check_call(callee, arguments)
+        return callee, arguments
+
+    # Lo mismo que Function.__call__, pero el cuerpo se ejecuta como un frame más.
+    # Con --memoize, igual que MemoizedFunction.__call__, primero se busca el
+    # resultado en el cache de la función
+    def call_frame(self, function: Function, arguments: list) -> Frame:
+        if type(function) is MemoizedFunction:
+            key = memo_key(arguments)
+            if key is not None:
+                value = function.cache.lookup(key)
+                if value is UNDEFINED:
+                    value = yield from self.body_frame(function, arguments)
+                    function.cache.store(key, value)
+                return value
+        return (yield from self.body_frame(function, arguments))
+
+    def body_frame(self, function: Function, arguments: list) -> Frame:
+        if self.depth >= self.max_depth:
+            raise RuntimeError("Stack overflow")
+
+        self.depth += 1
+        try:
+            while True:
+                completion = yield self.block_frame(
+                    function.declaration.body, function.bind(arguments)
+                )
+                # Las tail calls reutilizan este frame, y no cuentan para max_depth
+                if type(completion) is TailCall:
+                    function, arguments = completion.function, completion.arguments
+                    continue
+                if completion is not None:
+                    return completion[0]
+                return None
+        finally:
+            self.depth -= 1
@@ -1,5 +1,6 @@
-from .Expr import Expr
-from .Token import Token
+from .Env import Env
+from .Expr import Expr, LiteralExpr, VariableExpr
+from .Token import Token, TokenType
 
 
 class Stmt(object):
@@ -28,6 +29,11 @@ class PrintStmt(Stmt):
 class BlockStmt(Stmt):
     def __init__(self, statements: list[Stmt]):
         self.statements = statements
+        # Los completa el resolvedor: cuántas variables declara el bloque,
+        # y si hay que vaciar sus slots cada vez que se reutiliza su entorno
+        self.scope_size = 0
+        # El entorno que el intérprete guarda para reutilizar
+        self.free_env: Env | None = None
 
     def __repr__(self) -> str:
         return f"{{ {'; '.join(str(stmt) for stmt in self.statements)} }}"
@@ -38,6 +44,10 @@ class VarDecl(Stmt):
     def __init__(self, name: Token, initializer: Expr | None):
         self.name = name
         self.initializer = initializer
+        # Los completa el resolvedor: el slot de la variable en su scope,
+        # o None si es global, y si alguna clausura la captura
+        self.slot: int | None = None
+        self.captured = False
 
     def __repr__(self) -> str:
         return f"VAR {self.name.lexeme} = {self.initializer}"
@@ -49,6 +59,19 @@ class FunDecl(Stmt):
         self.name = name
         self.parameters = parameters
         self.body = body
+        # Los completa el resolvedor: el slot del nombre de la función en su scope
+        # (o None si es global) y si alguna clausura lo captura, y cuántas
+        # variables declara la función, contando los parámetros
+        self.slot: int | None = None
+        self.captured = False
+        self.scope_size = 0
+        # Las variables de afuera que usa la función, resueltas desde donde se
+        # declara: al crear la función se capturan sus celdas, en este orden
+        self.captures: list[VariableExpr] = []
+        # Los slots de los parámetros que alguna clausura captura
+        self.captured_params: list[int] = []
+        # Lo completa el análisis de pureza (Purity.py), solo con --memoize
+        self.pure = False
 
     def __repr__(self) -> str:
         params = ", ".join(param.lexeme for param in self.parameters)
@@ -59,6 +82,9 @@ class FunDecl(Stmt):
 class ReturnStmt(Stmt):
     def __init__(self, value: Expr | None):
         self.value = value
+        # Lo completa el resolvedor: si es un `return f(...);` adentro de una
+        # función, la llamada es lo último que hace la función (una tail call)
+        self.tail_call = False
 
     def __repr__(self) -> str:
         return f"RETURN {self.value or 'NIL'}"
@@ -85,3 +111,52 @@ class WhileStmt(Stmt):
 
     def __repr__(self) -> str:
         return f"WHILE {self.condition} {self.body}"
+
+
+# forStmt       → "for" "(" ( varDecl | exprStmt | ";" ) expression? ";" expression? ")" statement ;
+# El for sigue siendo un while, con el incremento al final del cuerpo (ver
+# Parser.for_statement), así que todo lo que sabe ejecutar un while sabe
+# ejecutar un for. Pero el parser lo marca, para reconocer los loops contados
+class ForStmt(WhileStmt):
+    def __init__(self, condition: Expr, body: Stmt, increment: bool):
+        super().__init__(condition, body)
+        # Si el último statement del cuerpo es el incremento del for
+        self.increment = increment
+        # Lo completa el resolvedor, si es un loop contado
+        self.counted: CountedLoop | None = None
+
+    def __repr__(self) -> str:
+        return f"FOR {self.condition} {self.body}"
+
+
+# Un for que cuenta: su contador es un número que solo cambia en el
+# incremento, con un paso constante, y se compara contra un límite que no
+# cambia adentro del loop. Por ejemplo
+#   for (var i = 0; i < n; i = i + 1) { ... }
+# El intérprete lo puede recorrer con un range de Python, sin evaluar la
+# condición ni el incremento en cada vuelta
+class CountedLoop(object):
+    def __init__(
+        self,
+        counter: VariableExpr,
+        operator: TokenType,
+        bound: LiteralExpr | VariableExpr,
+        step: float,
+    ):
+        # La variable de la condición (`i`), con su depth y slot ya resueltos
+        self.counter = counter
+        self.operator = operator
+        self.bound = bound
+        self.step = step
+
+    # Si nada de afuera del loop puede cambiar el contador o el límite: tienen
+    # que ser variables locales que no captura ninguna clausura. El resolvedor
+    # recién lo sabe al terminar el scope que las declara, así que se chequea
+    # al ejecutar el loop
+    def local(self) -> bool:
+        for variable in (self.counter, self.bound):
+            if isinstance(variable, VariableExpr) and (
+                variable.depth is None or variable.captured
+            ):
+                return False
+        return True
@@ -0,0 +1,183 @@
+import sys
+import time
+import weakref
+from typing import cast
+
+from .Stmt import Stmt, FunDecl, WhileStmt, ForStmt
+from .Function import Function, TailCall
+from .Interpreter import Interpreter, extend
+from .ClosureCompiler import ClosureCompiler, CompiledStmt
+from .Env import Cell, UNDEFINED
+from .optimizer.SourcePrinter import SourcePrinter
+
+# Cuántas veces se llama a una función antes de compilarla
+CALL_THRESHOLD = 100
+# Cuántas vueltas da un loop (sumando todas sus ejecuciones) antes de compilarlo
+LOOP_THRESHOLD = 1000
+
+
+# Una función del intérprete por niveles: su cuerpo se recorre como árbol
+# hasta que la función se vuelve caliente, y desde ahí se ejecuta compilado
+class TieredFunction(Function):
+    def __call__(self, interpreter: "Interpreter", arguments: list):
+        tiered = cast(TieredInterpreter, interpreter)
+        function = self
+        while True:
+            env = function.bind(arguments)
+            body = tiered.function_body(function.declaration)
+            if body is not None:
+                completion = body(env)
+            else:
+                completion = interpreter.execute_block(function.declaration.body, env)
+
+            # Igual que en Function.__call__, las tail calls se hacen acá
+            if type(completion) is TailCall:
+                function, arguments = completion.function, completion.arguments
+                if type(function) is not TieredFunction:
+                    return function(interpreter, arguments)
+                continue
+            if completion is not None:
+                return completion[0]
+            return None
+
+
+# Un intérprete por niveles (plox --jit): empieza recorriendo el árbol, como
+# el intérprete, y cuenta cuántas veces se llama a cada función y cuántas
+# vueltas da cada loop. Cuando una función o un loop pasa su umbral, lo
+# compila a clausuras de Python (igual que ClosureCompiler) y desde ahí usa
+# la versión compilada. El resto del programa se sigue recorriendo.
+# Las dos versiones comparten todo (los entornos, las globales, las
+# funciones), así que se puede pasar de una a otra en cualquier momento:
+# un loop caliente se compila en medio de su ejecución y sigue compilado
+class TieredInterpreter(ClosureCompiler):
+    def __init__(
+        self,
+        call_threshold: int = CALL_THRESHOLD,
+        loop_threshold: int = LOOP_THRESHOLD,
+        log: bool = False,
+    ):
+        super().__init__()
+        self.call_threshold = call_threshold
+        self.loop_threshold = loop_threshold
+        # Con --jit-log, se muestra qué se compiló y cuándo
+        self.log = log
+        self.start = time.perf_counter()
+        # Los contadores de cada función (por su declaración) y de cada loop.
+        # No se quedan con los nodos: el árbol de una línea del REPL se libera
+        # apenas termina de ejecutarse, aunque se haya compilado
+        self.calls: weakref.WeakKeyDictionary[FunDecl, int] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.iterations: weakref.WeakKeyDictionary[WhileStmt, int] = (
+            weakref.WeakKeyDictionary()
+        )
+        # Lo que ya se compiló
+        self.functions: weakref.WeakKeyDictionary[FunDecl, CompiledStmt] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.loops: weakref.WeakKeyDictionary[WhileStmt, CompiledStmt] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    # El programa arranca recorriéndose como árbol
+    def interpret(self, statements: list[Stmt]):
+        return Interpreter.interpret(self, statements)
+
+    execute = extend(vars(Interpreter)["execute"])
+    compile_stmt = extend(vars(ClosureCompiler)["compile_stmt"])
+
+    # ---------- Funciones ---------- #
+
+    @execute.register
+    def _(self, statement: FunDecl):
+        # Igual que Interpreter.execute(FunDecl), pero con una TieredFunction
+        cell = None
+        if statement.slot is not None and statement.captured:
+            cell = Cell(UNDEFINED)
+            self.env.define(statement.slot, cell)
+        upvalues = [self.cell(variable) for variable in statement.captures]
+        fun = TieredFunction(statement, upvalues)
+        if cell is not None:
+            cell.value = fun
+        else:
+            self.define(statement, fun)
+
+    # Las funciones que se declaran adentro de código compilado también son
+    # TieredFunctions, pero ya tienen su cuerpo compilado
+    @compile_stmt.register
+    def _(self, statement: FunDecl) -> CompiledStmt:
+        self.functions[statement] = self.compile_block(statement.body)
+        captures = [self.compile_cell(variable) for variable in statement.captures]
+
+        if statement.slot is not None and statement.captured:
+            slot = statement.slot
+
+            def run_captured(env):
+                cell = env.values[slot] = Cell(UNDEFINED)
+                upvalues = [capture(env) for capture in captures]
+                cell.value = TieredFunction(statement, upvalues)
+
+            return run_captured
+
+        define = self.compile_define(statement)
+
+        def run(env):
+            upvalues = [capture(env) for capture in captures]
+            define(env, TieredFunction(statement, upvalues))
+
+        return run
+
+    # El cuerpo compilado de la función, si ya es caliente. Cuenta la llamada
+    def function_body(self, declaration: FunDecl) -> CompiledStmt | None:
+        body = self.functions.get(declaration)
+        if body is not None:
+            return body
+        calls = self.calls.get(declaration, 0) + 1
+        self.calls[declaration] = calls
+        if calls < self.call_threshold:
+            return None
+        body = self.functions[declaration] = self.compile_block(declaration.body)
+        self.report(
+            f"fun {declaration.name.lexeme} (line {declaration.name.line})",
+            f"{calls} calls",
+        )
+        return body
+
+    # ---------- Loops ---------- #
+
+    # Los for también se cuentan acá, aunque sean loops contados: si son
+    # calientes, se compilan (ClosureCompiler también los recorre con un range)
+    @execute.register
+    def _(self, statement: ForStmt):
+        return self.loop(statement)
+
+    def loop(self, statement: WhileStmt) -> tuple | None:
+        compiled = self.loops.get(statement)
+        if compiled is not None:
+            return compiled(self.env)
+
+        iterations = self.iterations.get(statement, 0)
+        while self.is_truthy(self.evaluate(statement.condition)):
+            completion = self.execute(statement.body)
+            if completion is not None:
+                self.iterations[statement] = iterations
+                return completion
+            iterations += 1
+            # En la vuelta en que el loop se vuelve caliente, se compila y
+            # las vueltas que faltan siguen compiladas, en el mismo entorno
+            if iterations >= self.loop_threshold:
+                compiled = self.loops[statement] = self.compile_stmt(statement)
+                self.report(
+                    f"loop while ({SourcePrinter().bare(statement.condition)})",
+                    f"{iterations} iterations",
+                )
+                return compiled(self.env)
+        self.iterations[statement] = iterations
+        return None
+
+    def report(self, what: str, after: str):
+        if self.log:
+            elapsed = time.perf_counter() - self.start
+            print(
+                f"[jit {elapsed:.3f}s] compiled {what} after {after}", file=sys.stderr
+            )
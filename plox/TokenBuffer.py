@@ -0,0 +1,66 @@
+from array import array
+from collections.abc import Iterator
+
+from .Token import Token, TokenType
+
+# El número que se guarda por cada tipo de token, y el tipo de cada número
+CODES = {token_type: token_type.value for token_type in TokenType}
+TYPES = {token_type.value: token_type for token_type in TokenType}
+
+
+# Los tokens escaneados guardados como columnas (plox --token-buffer): en vez
+# de un objeto Token con su lexema por cada token, cuatro arrays de números
+# paralelos, con el tipo, dónde empieza y dónde termina el lexema en el código,
+# y su línea. Los lexemas y los literales se arman recién cuando alguien los
+# pide: el parser solo necesita los de los tokens que guarda en el árbol
+# (identificadores, operadores y literales) o que muestra en un error
+class TokenBuffer(object):
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+
+    def append(self, token_type: TokenType, start: int, end: int, line: int):
+        self.kinds.append(CODES[token_type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def type(self, index: int) -> TokenType:
+        return TYPES[self.kinds[index]]
+
+    def lexeme(self, index: int) -> str:
+        return self.source[self.starts[index] : self.ends[index]]
+
+    def literal(self, index: int) -> float | str | None:
+        kind = self.kinds[index]
+        if kind == CODES[TokenType.NUMBER]:
+            return float(self.lexeme(index))
+        if kind == CODES[TokenType.STRING]:
+            # la cadena la guardamos sin las comillas
+            return self.source[self.starts[index] + 1 : self.ends[index] - 1]
+        return None
+
+    # Arma el Token completo, igual al que devuelve Scanner
+    def __getitem__(self, index: int) -> Token:
+        return Token(
+            self.type(index),
+            lexeme=self.lexeme(index),
+            literal=self.literal(index),
+            line=self.lines[index],
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        return (self[index] for index in range(len(self)))
+
+    def tokens(self) -> list[Token]:
+        return list(self)
+
+    # Los tipos de todos los tokens, en orden
+    def types(self) -> list[TokenType]:
+        return [TYPES[kind] for kind in self.kinds]
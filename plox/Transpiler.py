@@ -0,0 +1,715 @@
+import math
+from functools import singledispatchmethod
+from typing import Optional
+
+from .Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ReturnStmt,
+)
+from .Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+from .Function import ReturnValue
+from .Token import Token, TokenType
+from .Captures import CaptureAnalyzer
+
+# ---------- Runtime del código generado ---------- #
+
+# El código que genera el transpilador importa estos nombres (ver RUNTIME).
+# Los operadores tienen un camino rápido en línea para cuando ambos operandos
+# son floats (los únicos números que produce el scanner), y si no, llaman a
+# los de Operators.py, que chequean los tipos igual que el intérprete
+
+
+# Una función de Lox: la función de Python generada, más lo necesario
+# para chequear la aridad e imprimirla igual que el intérprete
+class LoxFunction(object):
+    __slots__ = ("fn", "name", "parameters", "arity")
+
+    def __init__(self, fn, name: str, parameters: list[str]):
+        self.fn = fn
+        self.name = name
+        self.parameters = parameters
+        self.arity = len(parameters)
+
+    def __repr__(self) -> str:
+        return f"<fn {self.name}({', '.join(self.parameters)})>"
+
+
+# El camino lento de un llamado: el llamado no es una función de Lox,
+# o no recibió la cantidad de argumentos que espera
+def call(callee, arguments: list):
+    if not isinstance(callee, LoxFunction):
+        raise RuntimeError(f"Cannot call non-callable object: `{callee}`")
+    if len(arguments) != callee.arity:
+        raise RuntimeError(f"Expected {callee.arity} arguments, got {len(arguments)}")
+    return callee.fn(*arguments)
+
+
+def undefined_variable(name: str):
+    raise RuntimeError(f"Undefined variable '{name}'")
+
+
+def undefined_assignment(name: str, value=None):
+    raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+
+
+def assign_global(namespace: dict, key: str, value):
+    if key not in namespace:
+        undefined_assignment(key[len(GLOBAL_PREFIX) :])
+    return value
+
+
+def top_return(value):
+    raise ReturnValue(value)
+
+
+# Ejecuta el script generado, traduciendo el error de Python que salta al
+# leer una global que no existe al error de Lox
+def run(script):
+    try:
+        return script()
+    except NameError as e:
+        if e.name is not None and e.name.startswith(GLOBAL_PREFIX):
+            undefined_variable(e.name[len(GLOBAL_PREFIX) :])
+        raise
+
+
+# Lo que importa el código generado, por módulo
+RUNTIME = {
+    "plox.Env": ["Cell", "UNDEFINED"],
+    "plox.Operators": [
+        "greater",
+        "greater_equal",
+        "less",
+        "less_equal",
+        "minus",
+        "negate",
+        "percent",
+        "plus",
+        "slash",
+        "star",
+    ],
+    "plox.Transpiler": [
+        "LoxFunction",
+        "assign_global",
+        "call",
+        "run",
+        "top_return",
+        "undefined_assignment",
+        "undefined_variable",
+    ],
+}
+
+# Las variables globales de Lox se traducen a globales de Python con este prefijo,
+# y las locales a locales de Python con un número que las hace únicas. Así ningún
+# nombre de Lox choca con una palabra reservada o un builtin de Python
+GLOBAL_PREFIX = "g_"
+
+# El tokenizer de Python no admite más de 200 paréntesis anidados. Antes de llegar
+# a ese límite, sacamos las subexpresiones más anidadas a variables temporales
+MAX_NESTING = 50
+
+# Por cada operador, la operación de Python para el camino rápido y la función
+# de Operators.py para el camino lento
+BINARY_OPERATORS = {
+    TokenType.PLUS: ("+", "plus"),
+    TokenType.MINUS: ("-", "minus"),
+    TokenType.STAR: ("*", "star"),
+    TokenType.SLASH: ("/", "slash"),
+    TokenType.PERCENT: ("%", "percent"),
+    TokenType.GREATER: (">", "greater"),
+    TokenType.GREATER_EQUAL: (">=", "greater_equal"),
+    TokenType.LESS: ("<", "less"),
+    TokenType.LESS_EQUAL: ("<=", "less_equal"),
+}
+
+# Las expresiones que siempre producen un booleano de Python, y que por lo tanto
+# pueden usarse directo como condición de un if o un while
+BOOLEAN_OPERATORS = {
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.EQUAL_EQUAL,
+    TokenType.BANG_EQUAL,
+}
+
+
+# ---------- Transpilador ---------- #
+
+
+# Una variable local de Lox, ya traducida a su nombre de Python
+class Binding(object):
+    def __init__(self, name: str, pyname: str, boxed: bool):
+        self.name = name
+        self.pyname = pyname
+        # Las locales declaradas adentro de un loop y capturadas por una clausura
+        # viven en una celda: en Lox cada iteración tiene su propia variable,
+        # mientras que una clausura de Python compartiría una sola
+        self.boxed = boxed
+        self.defined = False  # False mientras se traduce su inicializador
+        self.maybe_undefined = False  # declarada en un if o while sin bloque
+
+
+# El estado de cada función de Python que se está generando
+class FunctionContext(object):
+    def __init__(self, enclosing: Optional["FunctionContext"], is_script: bool):
+        self.enclosing = enclosing
+        self.is_script = is_script
+        # El script arranca en el scope global: sin scopes locales
+        self.scopes: list[dict[str, Binding]] = [] if is_script else [{}]
+        self.loop_depth = 0
+        self.lines: list[str] = []
+        self.indent = 1
+        # Las declaraciones que hay que poner al principio de la función
+        self.globals: set[str] = set()
+        self.nonlocals: set[str] = set()
+        # Las celdas de otras funciones que esta función usa, que recibe como
+        # argumentos keyword-only con valor por defecto al momento de definirse
+        self.boxed_captures: dict[str, None] = {}
+
+
+# Traduce un programa de Lox ya resuelto a un módulo de Python,
+# lo compila con compile() y lo ejecuta
+class Transpiler(object):
+    def __init__(self):
+        # El espacio de nombres del módulo generado sobrevive entre ejecuciones,
+        # para que el REPL mantenga las variables globales
+        self.namespace: dict[str, object] = {}
+        self.counter = 0
+        self.captured: set[Token] = set()
+        self.predeclared: dict[Stmt, Binding] = {}
+        self.context: FunctionContext
+        # Las líneas que hay que emitir antes de la línea actual
+        self.prelude: list[str] = []
+        self.nesting = 0
+        self.leftmost = True
+
+    # Misma interfaz que Interpreter.interpret
+    def interpret(self, statements: list[Stmt]):
+        source = self.transpile(statements)
+        try:
+            code = compile(source, "<lox>", "exec")
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            raise RuntimeError(f"Cannot compile the program to Python: {e}")
+        exec(code, self.namespace)
+        return run(self.namespace["__script__"])
+
+    # Devuelve el código fuente del módulo de Python equivalente al programa
+    def transpile(self, statements: list[Stmt]) -> str:
+        analyzer = CaptureAnalyzer()
+        for statement in statements:
+            analyzer.analyze(statement)
+        self.captured = analyzer.captured
+
+        self.context = FunctionContext(None, is_script=True)
+        for i, statement in enumerate(statements):
+            # Igual que el intérprete, el script devuelve el valor del último
+            # statement si es una expresión (para que el REPL lo pueda mostrar)
+            if i == len(statements) - 1 and isinstance(statement, ExpressionStmt):
+                self.emit_with_prelude(
+                    lambda: f"return {self.expression(statement.expression)}"
+                )
+            else:
+                self.statement(statement)
+
+        header = [
+            "# Generado por plox",
+            *(
+                f"from {module} import {', '.join(names)}"
+                for module, names in RUNTIME.items()
+            ),
+            "",
+            "G = globals()",
+            "",
+            "",
+            "def __script__():",
+        ]
+        footer = [
+            "",
+            "",
+            'if __name__ == "__main__":',
+            "    run(__script__)",
+            "",
+        ]
+        return "\n".join(header + self.function_body(self.context) + footer)
+
+    # ---------- Helpers ---------- #
+
+    def emit(self, line: str):
+        self.context.lines.append("    " * self.context.indent + line)
+
+    def temporary(self) -> str:
+        self.counter += 1
+        return f"_t{self.counter}"
+
+    def local_name(self, name: str) -> str:
+        self.counter += 1
+        return f"l{self.counter}_{name}"
+
+    # Las líneas de una función: primero sus declaraciones, después el cuerpo
+    def function_body(self, context: FunctionContext) -> list[str]:
+        lines = []
+        if context.globals:
+            lines.append(f"    global {', '.join(sorted(context.globals))}")
+        if context.nonlocals:
+            lines.append(f"    nonlocal {', '.join(sorted(context.nonlocals))}")
+        lines.extend(context.lines)
+        if not lines:
+            lines.append("    pass")
+        return lines
+
+    # Emite una línea armada a partir de expresiones. Si alguna expresión queda
+    # demasiado anidada, sus partes más profundas se calculan en líneas previas
+    def emit_with_prelude(self, build):
+        self.prelude = []
+        self.nesting = 0
+        self.leftmost = True
+        line = build()
+        for prelude_line in self.prelude:
+            self.emit(prelude_line)
+        self.emit(line)
+
+    # Emite un statement como cuerpo de un if, else o while
+    def suite(self, statement: Stmt):
+        self.context.indent += 1
+        start = len(self.context.lines)
+        self.statement(statement)
+        if len(self.context.lines) == start:
+            self.emit("pass")
+        self.context.indent -= 1
+
+    # Busca una variable local en la función actual y las que la encierran.
+    # Devuelve None si es una global
+    def lookup(self, name: str) -> tuple[Binding, list[FunctionContext]] | None:
+        context: FunctionContext | None = self.context
+        # Las funciones que hay entre la actual y la que declara la variable
+        crossed: list[FunctionContext] = []
+        while context is not None:
+            for scope in reversed(context.scopes):
+                if name in scope:
+                    return scope[name], crossed
+            crossed.append(context)
+            context = context.enclosing
+        return None
+
+    def declare(self, name: Token) -> Binding:
+        binding = Binding(
+            name.lexeme,
+            self.local_name(name.lexeme),
+            name in self.captured and self.context.loop_depth > 0,
+        )
+        self.context.scopes[-1][name.lexeme] = binding
+        return binding
+
+    # Lox permite `if (c) var x = 1;`: x se declara en el scope actual pero solo
+    # se define si se ejecuta la rama. Le reservamos el nombre de antemano con
+    # un valor que marca que no está definida
+    def predeclare(self, branch: Stmt | None):
+        if not isinstance(branch, (VarDecl, FunDecl)) or not self.context.scopes:
+            return
+
+        binding = Binding(
+            branch.name.lexeme,
+            self.local_name(branch.name.lexeme),
+            branch.name in self.captured,
+        )
+        binding.defined = True
+        binding.maybe_undefined = True
+        self.emit(
+            f"{binding.pyname} = Cell(UNDEFINED)"
+            if binding.boxed
+            else f"{binding.pyname} = UNDEFINED"
+        )
+        self.predeclared[branch] = binding
+
+    # ---------- Traducción de Statements ---------- #
+
+    @singledispatchmethod
+    def statement(self, statement: Stmt):
+        raise RuntimeError(f"Unknown statement type: `{type(statement)}`")
+
+    @statement.register
+    def _(self, statement: ExpressionStmt):
+        expression = statement.expression
+        # Las asignaciones sueltas se traducen a una asignación de Python,
+        # sin pasar por el operador :=
+        if isinstance(expression, AssignmentExpr):
+            self.emit_with_prelude(lambda: self.assignment_value(expression))
+            value = self.context.lines.pop().strip()
+            self.emit_assignment(expression.name.lexeme, value)
+            return
+        self.emit_with_prelude(lambda: self.expression(expression))
+
+    @statement.register
+    def _(self, statement: PrintStmt):
+        self.emit_with_prelude(
+            lambda: f"print({self.expression(statement.expression)})"
+        )
+
+    @statement.register
+    def _(self, statement: VarDecl):
+        def initializer() -> str:
+            if statement.initializer is None:
+                return "None"
+            return self.expression(statement.initializer)
+
+        if not self.context.scopes:
+            name = GLOBAL_PREFIX + statement.name.lexeme
+            self.context.globals.add(name)
+            self.emit_with_prelude(lambda: f"{name} = {initializer()}")
+            return
+
+        if statement in self.predeclared:
+            binding = self.predeclared.pop(statement)
+            self.emit_with_prelude(lambda: f"{self.target(binding)} = {initializer()}")
+            self.context.scopes[-1][binding.name] = binding
+            return
+
+        binding = self.declare(statement.name)
+        if binding.boxed:
+            self.emit_with_prelude(lambda: f"{binding.pyname} = Cell({initializer()})")
+        else:
+            self.emit_with_prelude(lambda: f"{binding.pyname} = {initializer()}")
+        binding.defined = True
+
+    @statement.register
+    def _(self, statement: FunDecl):
+        name = statement.name.lexeme
+
+        # El nombre de la función se declara antes del cuerpo,
+        # para que pueda llamarse recursivamente
+        if not self.context.scopes:
+            target = GLOBAL_PREFIX + name
+            self.context.globals.add(target)
+        elif statement in self.predeclared:
+            binding = self.predeclared.pop(statement)
+            self.context.scopes[-1][name] = binding
+            target = self.target(binding)
+        else:
+            binding = self.declare(statement.name)
+            binding.defined = True
+            target = binding.pyname
+            if binding.boxed:
+                self.emit(f"{binding.pyname} = Cell(None)")
+                target = f"{binding.pyname}.value"
+
+        enclosing = self.context
+        context = FunctionContext(enclosing, is_script=False)
+        self.context = context
+        parameters = [self.declare(param) for param in statement.parameters]
+        for param in parameters:
+            param.defined = True
+        for stmt in statement.body:
+            self.statement(stmt)
+        self.context = enclosing
+
+        fn = self.local_name(name)
+        arguments = [param.pyname for param in parameters]
+        if context.boxed_captures:
+            arguments.append("*")
+            arguments.extend(f"{cell}={cell}" for cell in context.boxed_captures)
+        self.emit(f"def {fn}({', '.join(arguments)}):")
+        for line in self.function_body(context):
+            self.emit(line)
+        param_names = [param.lexeme for param in statement.parameters]
+        self.emit(f"{target} = LoxFunction({fn}, {name!r}, {param_names!r})")
+
+    @statement.register
+    def _(self, statement: ReturnStmt):
+        def value() -> str:
+            if statement.value is None:
+                return "None"
+            return self.expression(statement.value)
+
+        if self.context.is_script:
+            # Un return por fuera de una función es un error en tiempo de ejecución
+            self.emit_with_prelude(lambda: f"top_return({value()})")
+        else:
+            self.emit_with_prelude(lambda: f"return {value()}")
+
+    @statement.register
+    def _(self, statement: IfStmt):
+        self.predeclare(statement.then_branch)
+        self.predeclare(statement.else_branch)
+        self.emit_with_prelude(lambda: f"if {self.condition(statement.condition)}:")
+        self.suite(statement.then_branch)
+        if statement.else_branch is not None:
+            self.emit("else:")
+            self.suite(statement.else_branch)
+
+    @statement.register
+    def _(self, statement: WhileStmt):
+        self.predeclare(statement.body)
+
+        self.emit_with_prelude(lambda: f"while {self.condition(statement.condition)}:")
+        header = self.context.lines.pop()
+        if not self.prelude:
+            self.context.lines.append(header)
+        else:
+            # Si la condición necesitó líneas previas, esas líneas tienen que
+            # ejecutarse antes de cada iteración, no solo antes de la primera
+            for _ in self.prelude:
+                self.context.lines.pop()
+            condition = header.strip()[len("while ") : -1]
+            self.emit("while True:")
+            self.context.indent += 1
+            for line in self.prelude:
+                self.emit(line)
+            self.emit(f"if not ({condition}):")
+            self.emit("    break")
+            self.context.indent -= 1
+
+        self.context.loop_depth += 1
+        self.suite(statement.body)
+        self.context.loop_depth -= 1
+
+    @statement.register
+    def _(self, statement: BlockStmt):
+        self.context.scopes.append({})
+        for stmt in statement.statements:
+            self.statement(stmt)
+        self.context.scopes.pop()
+
+    # ---------- Traducción de Expresiones ---------- #
+
+    # Traduce una expresión a una expresión de Python que evalúa su valor
+    def expression(self, expression: Expr) -> str:
+        self.nesting += 1
+        result = self.translate(expression)
+        self.nesting -= 1
+
+        # Si la expresión quedó muy anidada y es lo primero que se evalúa en la
+        # línea, la podemos calcular en una línea previa sin cambiar el orden de evaluación
+        if self.nesting > MAX_NESTING and self.leftmost and not result.isidentifier():
+            temporary = self.temporary()
+            self.prelude.append(f"{temporary} = {result}")
+            return temporary
+
+        return result
+
+    # Traduce una expresión que ya no es lo primero que se evalúa en la línea
+    def operand(self, expression: Expr) -> str:
+        leftmost = self.leftmost
+        self.leftmost = False
+        result = self.expression(expression)
+        self.leftmost = leftmost
+        return result
+
+    # Traduce una condición a algo que Python pueda usar en un if o un while,
+    # respetando los valores truthy de Lox
+    def condition(self, expression: Expr) -> str:
+        while isinstance(expression, GroupingExpr):
+            expression = expression.expression
+
+        if (
+            isinstance(expression, BinaryExpr)
+            and expression.operator.token_type in BOOLEAN_OPERATORS
+        ) or (
+            isinstance(expression, UnaryExpr)
+            and expression.operator.token_type == TokenType.BANG
+        ):
+            return self.expression(expression)
+
+        value = self.temporary()
+        return f"({value} := {self.expression(expression)}) is not None and {value} is not False"
+
+    @singledispatchmethod
+    def translate(self, expression: Expr) -> str:
+        raise RuntimeError(f"Unknown expression type: `{type(expression)}`")
+
+    @translate.register
+    def _(self, expression: LiteralExpr) -> str:
+        value = expression.value
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return f"float({str(value)!r})"
+            return repr(value) if value >= 0 else f"({value!r})"
+        return repr(value)
+
+    @translate.register
+    def _(self, expression: GroupingExpr) -> str:
+        return self.expression(expression.expression)
+
+    @translate.register
+    def _(self, expression: VariableExpr) -> str:
+        name = expression.name.lexeme
+        found = self.lookup(name)
+        if found is None:
+            return GLOBAL_PREFIX + name
+
+        binding, crossed = found
+        self.capture(binding, crossed)
+        value = self.target(binding)
+        if binding.maybe_undefined:
+            temporary = self.temporary()
+            return f"({temporary} if ({temporary} := {value}) is not UNDEFINED else undefined_variable({name!r}))"
+        return value
+
+    @translate.register
+    def _(self, expression: AssignmentExpr) -> str:
+        value = self.assignment_value(expression)
+        name = expression.name.lexeme
+
+        found = self.lookup(name)
+        if found is None:
+            target = GLOBAL_PREFIX + name
+            self.context.globals.add(target)
+            return f"({target} := assign_global(G, {target!r}, {value}))"
+
+        binding, crossed = found
+        if not binding.defined:
+            # `var x = (x = 1);`: el intérprete tampoco encuentra a x
+            # en su entorno mientras evalúa el inicializador
+            return f"undefined_assignment({name!r}, {value})"
+
+        self.capture(binding, crossed)
+        if binding.boxed:
+            temporary = self.temporary()
+            return f"[{temporary} := {value}, {self.check_assignable(binding)}setattr({binding.pyname}, 'value', {temporary})][0]"
+        if crossed:
+            self.context.nonlocals.add(binding.pyname)
+        if binding.maybe_undefined:
+            temporary = self.temporary()
+            return f"[{temporary} := {value}, {self.check_assignable(binding)}{binding.pyname} := {temporary}][-1]"
+        return f"({binding.pyname} := {value})"
+
+    # El valor a asignar en una asignación, que es lo primero que se evalúa
+    def assignment_value(self, expression: AssignmentExpr) -> str:
+        return self.expression(expression.value)
+
+    # Emite una asignación como statement
+    def emit_assignment(self, name: str, value: str):
+        found = self.lookup(name)
+        if found is None:
+            target = GLOBAL_PREFIX + name
+            self.context.globals.add(target)
+            temporary = self.temporary()
+            self.emit(f"{temporary} = {value}")
+            self.emit(f"if {target!r} not in G:")
+            self.emit(f"    undefined_assignment({name!r})")
+            self.emit(f"{target} = {temporary}")
+            return
+
+        binding, crossed = found
+        if not binding.defined:
+            self.emit(f"undefined_assignment({name!r}, {value})")
+            return
+
+        self.capture(binding, crossed)
+        if crossed and not binding.boxed:
+            self.context.nonlocals.add(binding.pyname)
+        if binding.maybe_undefined:
+            temporary = self.temporary()
+            self.emit(f"{temporary} = {value}")
+            self.emit(self.check_assignable(binding).rstrip(", "))
+            value = temporary
+        self.emit(f"{self.target(binding)} = {value}")
+
+    # Lo que se lee o escribe para acceder a una local
+    def target(self, binding: Binding) -> str:
+        return f"{binding.pyname}.value" if binding.boxed else binding.pyname
+
+    # Una expresión que falla si la local todavía no fue definida
+    def check_assignable(self, binding: Binding) -> str:
+        if not binding.maybe_undefined:
+            return ""
+        return f"{self.target(binding)} is not UNDEFINED or undefined_assignment({binding.name!r}), "
+
+    # Registra que la función actual usa una local de una función que la encierra
+    def capture(self, binding: Binding, crossed: list[FunctionContext]):
+        if binding.boxed:
+            # Las celdas se pasan explícitamente a cada función intermedia
+            for context in crossed:
+                context.boxed_captures[binding.pyname] = None
+
+    @translate.register
+    def _(self, expression: UnaryExpr) -> str:
+        value = self.temporary()
+        right = self.expression(expression.right)
+
+        match expression.operator.token_type:
+            case TokenType.MINUS:
+                return f"(-{value} if type({value} := {right}) is float else negate({value}))"
+            case TokenType.BANG:
+                return f"(({value} := {right}) is None or {value} is False)"
+            case _:
+                raise RuntimeError(f"Unknown unary operator: `{expression.operator}`")
+
+    @translate.register
+    def _(self, expression: BinaryExpr) -> str:
+        operator = expression.operator.token_type
+        left = self.expression(expression.left)
+        right = self.operand(expression.right)
+
+        if operator == TokenType.EQUAL_EQUAL:
+            return f"({left} == {right})"
+        if operator == TokenType.BANG_EQUAL:
+            return f"({left} != {right})"
+        if operator not in BINARY_OPERATORS:
+            raise RuntimeError(f"Unknown binary operator: `{expression.operator}`")
+
+        symbol, slow_path = BINARY_OPERATORS[operator]
+        # El camino rápido es cuando los dos operandos son floats
+        # (y para / y %, cuando además no dividimos por cero).
+        # Los literales numéricos no hace falta chequearlos
+        checks = []
+        operands = []
+        for operand, value in ((expression.left, left), (expression.right, right)):
+            if isinstance(operand, LiteralExpr) and type(operand.value) is float:
+                operands.append(value)
+            else:
+                temporary = self.temporary()
+                checks.append(f"(type({temporary} := {value}) is float)")
+                operands.append(temporary)
+        a, b = operands
+        if operator in (TokenType.SLASH, TokenType.PERCENT):
+            if right == "0.0":
+                # Siempre falla: que lo reporte el camino lento
+                return f"{slow_path}({left}, {right})"
+            if b != right:
+                checks.append(f"({b} != 0)")
+        if not checks:
+            return f"({a} {symbol} {b})"
+        return f"({a} {symbol} {b} if {' & '.join(checks)} else {slow_path}({a}, {b}))"
+
+    @translate.register
+    def _(self, expression: LogicExpr) -> str:
+        value = self.temporary()
+        left = self.expression(expression.left)
+        right = self.operand(expression.right)
+        truthy = f"(({value} := {left}) is not None and {value} is not False)"
+
+        if expression.operator.token_type == TokenType.OR:
+            return f"({value} if {truthy} else {right})"
+        return f"({right} if {truthy} else {value})"
+
+    @translate.register
+    def _(self, expression: CallExpr) -> str:
+        callee = self.temporary()
+        function = self.expression(expression.callee)
+        arguments = ", ".join(self.operand(arg) for arg in expression.arguments)
+        arity = len(expression.arguments)
+        # Si no es una función de Lox con la aridad correcta, igual evaluamos
+        # los argumentos antes de dar el error, como el intérprete
+        return (
+            f"({callee}.fn({arguments}) "
+            f"if type({callee} := {function}) is LoxFunction and {callee}.arity == {arity} "
+            f"else call({callee}, [{arguments}]))"
+        )
@@ -0,0 +1,103 @@
+from collections.abc import Sequence
+from functools import singledispatch
+
+from .Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ReturnStmt,
+)
+from .Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+
+
+# Los hijos directos de un nodo del árbol, en orden
+@singledispatch
+def children(node: Stmt | Expr) -> list[Stmt | Expr]:
+    raise NameError(f"Unknown statement or expression type: `{type(node)}`")
+
+
+@children.register
+def _(node: ExpressionStmt | PrintStmt | GroupingExpr):
+    return [node.expression]
+
+
+@children.register
+def _(node: VarDecl):
+    return [node.initializer] if node.initializer is not None else []
+
+
+@children.register
+def _(node: FunDecl):
+    return list(node.body)
+
+
+@children.register
+def _(node: BlockStmt):
+    return list(node.statements)
+
+
+@children.register
+def _(node: IfStmt):
+    branches: list[Stmt | Expr] = [node.condition, node.then_branch]
+    if node.else_branch is not None:
+        branches.append(node.else_branch)
+    return branches
+
+
+@children.register
+def _(node: WhileStmt):
+    return [node.condition, node.body]
+
+
+@children.register
+def _(node: ReturnStmt):
+    return [node.value] if node.value is not None else []
+
+
+@children.register
+def _(node: BinaryExpr | LogicExpr):
+    return [node.left, node.right]
+
+
+@children.register
+def _(node: UnaryExpr):
+    return [node.right]
+
+
+@children.register
+def _(node: AssignmentExpr):
+    return [node.value]
+
+
+@children.register
+def _(node: CallExpr):
+    return [node.callee, *node.arguments]
+
+
+@children.register
+def _(node: LiteralExpr | VariableExpr):
+    return []
+
+
+# Todos los nodos que cuelgan de los recibidos, sin usar recursión
+def walk(nodes: Sequence[Stmt | Expr]):
+    pending = list(reversed(nodes))
+    while pending:
+        node = pending.pop()
+        yield node
+        pending.extend(reversed(children(node)))
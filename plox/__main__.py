@@ -1,9 +1,31 @@
 import traceback
 import argparse
+from typing import cast
 from plox.Scanner import Scanner
+from plox.RegexScanner import RegexScanner
+from plox.TokenBuffer import TokenBuffer
+from plox.Token import Token
 from plox.Parser import Parser
 from plox.Resolver import Resolver
+from plox.CompileCache import CompileCache
+from plox.Stmt import Stmt
+from plox.Purity import PurityAnalyzer
+from plox.Walk import walk
+from plox.optimizer.Optimizer import Optimizer, MAX_LEVEL
+from plox.optimizer.SourcePrinter import SourcePrinter
+from plox.optimizer.Inliner import INLINE_SIZE
+from plox.Function import MEMO_SIZE
 from plox.Interpreter import Interpreter
+from plox.ClosureCompiler import ClosureCompiler
+from plox.StackInterpreter import StackInterpreter, MAX_DEPTH
+from plox.Quickening import QuickeningInterpreter
+from plox.TieredInterpreter import TieredInterpreter, CALL_THRESHOLD, LOOP_THRESHOLD
+from plox.Transpiler import Transpiler
+from plox.cfg.Lowering import Lowering
+from plox.cfg.CFGPrinter import CFGPrinter
+from plox.cfg.CFGInterpreter import CFGInterpreter
+from plox.cfg.TypeInference import TypeInference
+from plox.bytecode.VM import VM
 
 from prompt_toolkit import PromptSession
 from prompt_toolkit.history import FileHistory
@@ -16,43 +38,209 @@ class Plox:
     def __init__(self):
         self.debug = False
         self.show_warnings = False
-        self.mode = None  # "scanning" | "parsing" | "resolve"
+        self.mode = None  # "scanning" | "parsing" | "resolve" | "optimized" | "cfg"
+        # Con --regex-scanner, el código se escanea con una única expresión regular
+        self.scanner: type[Scanner] | type[RegexScanner] = Scanner
+        # Con --token-buffer, los tokens se guardan en un TokenBuffer
+        self.token_buffer = False
+        # Con --max-nesting, el parser y el resolvedor cortan los programas
+        # más anidados que eso (si no, el límite es la memoria)
+        self.max_nesting: int | None = None
+        # Los archivos que ya se compilaron se guardan en disco, salvo con --no-cache
+        self.cache: CompileCache | None = None
         self.interpreter = Interpreter()
+        self.backend = "tree-walk"  # "tree-walk" | "vm" | "closures" | "python" | "stack" | "cfg" | "quicken" | "jit"
+        self.vm = VM()
+        self.transpiler = Transpiler()
+        self.emit_python: str | None = None
+        # Con --opt-level, el árbol resuelto pasa por el optimizador antes de ejecutarse
+        self.opt_level = 0
+        self.inline_size = INLINE_SIZE
+        self.opt_stats = False
+        # Si lo que se corre es un archivo entero, y no una línea del REPL:
+        # solo ahí se pueden inlinear las funciones globales
+        self.whole_program = False
+        # Con --memoize, el análisis de pureza se acuerda de las funciones
+        # globales puras entre líneas del REPL
+        self.purity: PurityAnalyzer | None = None
+        self.memo_stats = False
+        # Con --specialize, los operadores cuyos operandos se puede probar que
+        # son números (o cadenas) se evalúan sin chequear tipos
+        self.specialize = False
+        self.specialize_stats = False
+        self.quicken_stats = False
         self.in_repl = True
 
     def run(self, source: str):
-        scanner = Scanner(source)
+        # Un archivo entero se busca primero en el cache, salvo que solo haya
+        # que mostrar sus tokens o su árbol recién parseado
+        cache = None
+        if self.whole_program and self.mode not in ("scanning", "parsing"):
+            cache = self.cache
+        program = cache.load(source) if cache is not None else None
+        if program is None:
+            program = self.compile(source)
+            if program is None:
+                return
+            if cache is not None:
+                cache.store(source, *program)
+        statements, resolver = program
+
+        # El optimizador reescribe el árbol, así que lo volvemos a resolver
+        if self.opt_level > 0:
+            optimizer = Optimizer(self.opt_level, self.inline_size, self.whole_program)
+            before = sum(1 for _ in walk(statements))
+            try:
+                statements = optimizer.optimize(statements)
+            except Exception as e:
+                if self.debug:
+                    traceback.print_exc()
+                print(colored(f"Optimizer Error: {e}", "light_red"))
+                return
+            if self.opt_stats:
+                self.print_opt_stats(optimizer, before, statements)
+            optimized = self.resolve(statements)
+            if optimized is None:
+                return
+            resolver = optimized
+
+        if self.mode == "parsing":
+            self.print_statements(statements)
+            return
+
+        # en modo optimized, imprimimos el programa optimizado como código Lox
+        if self.mode == "optimized":
+            try:
+                dump = SourcePrinter().print(statements)
+            except Exception as e:
+                if self.debug:
+                    traceback.print_exc()
+                print(colored(f"Optimizer Error: {e}", "light_red"))
+                return
+            print(colored(dump, "light_blue"))
+            return
+
+        # en modo cfg, imprimimos el grafo de flujo de control de cada función
+        if self.mode == "cfg":
+            try:
+                dump = CFGPrinter().print(Lowering().lower(statements))
+            except Exception as e:
+                if self.debug:
+                    traceback.print_exc()
+                print(colored(f"CFG Error: {e}", "light_red"))
+                return
+            print(colored(dump, "light_blue"))
+            return
+
+        if self.purity is not None:
+            self.purity.analyze(statements)
+
+        if self.specialize:
+            inference = TypeInference()
+            try:
+                statements = inference.specialize(statements)
+            except Exception as e:
+                if self.debug:
+                    traceback.print_exc()
+                print(colored(f"Specialize Error: {e}", "light_red"))
+                return
+            if self.specialize_stats:
+                self.print_specialize_stats(inference)
+
+        # en modo resolve, imprimimos lo que el resolvedor anotó en el árbol:
+        # el slot de cada declaración local, y la (profundidad, slot) de cada acceso
+        # (o el índice de la upvalue, si la variable es de afuera de la función)
+        if self.mode == "resolve":
+            declarations = {k.name: k.slot for k in resolver.declarations}
+            slots = {
+                k.name: ("upvalue", k.upvalue)
+                if k.upvalue is not None
+                else (k.depth, k.slot)
+                for k in resolver.locals
+            }
+            print(
+                colored(
+                    f"Interpreter Slots: {declarations}",
+                    "light_blue",
+                )
+            )
+            print(
+                colored(
+                    f"Interpreter Locals: {slots}",
+                    "light_blue",
+                )
+            )
+            return
+
+        # con --emit-python, escribimos el módulo de Python generado en vez de ejecutarlo
+        if self.emit_python is not None:
+            with open(self.emit_python, "w") as file:
+                file.write(self.transpiler.transpile(statements))
+            return
+
         try:
-            tokens = scanner.scan()
+            if self.backend == "vm":
+                lastvalue_produced = self.vm.interpret(statements)
+            elif self.backend == "python":
+                lastvalue_produced = self.transpiler.interpret(statements)
+            else:
+                lastvalue_produced = self.interpreter.interpret(statements)
+            if self.in_repl and lastvalue_produced is not None:
+                print(lastvalue_produced)
         except Exception as e:
             if self.debug:
                 traceback.print_exc()
-            print(colored(f"Scanning Error: {e}", "light_red"))
+            print(colored(f"Runtime Error: {e}", "light_red"))
             return
+        finally:
+            if self.memo_stats:
+                self.print_memo_stats()
+            if self.quicken_stats:
+                self.print_quicken_stats()
+
+    # Escanea, parsea y resuelve el código. Devuelve None si hubo un error, o
+    # si en el modo actual solo había que mostrar los tokens o el árbol
+    def compile(self, source: str) -> tuple[list[Stmt], Resolver] | None:
+        tokens: list[Token] | TokenBuffer
+        try:
+            if self.token_buffer:
+                tokens = RegexScanner(source).scan_buffer()
+            else:
+                tokens = self.scanner(source).scan()
+        except Exception as e:
+            if self.debug:
+                traceback.print_exc()
+            print(colored(f"Scanning Error: {e}", "light_red"))
+            return None
 
         # en modo scanning, solo imprimimos los tokens
         if self.mode == "scanning":
             for token in tokens:
                 print(colored(repr(token), "light_blue"))
-            return
+            return None
 
-        parser = Parser(tokens)
+        parser = Parser(tokens, self.max_nesting)
         try:
             statements = parser.parse()
         except Exception as e:
             if self.debug:
                 traceback.print_exc()
             print(colored(f"Parsing Error: {e}", "light_red"))
-            return
+            return None
 
         # en modo parsing, imprimimos las expresiones encontradas
-        if self.mode == "parsing":
-            for stmt in statements:
-                print(colored(repr(stmt), "light_blue"))
-            print()
-            return
+        # (con --opt-level, las imprimimos después de optimizarlas)
+        if self.mode == "parsing" and self.opt_level == 0:
+            self.print_statements(statements)
+            return None
+
+        resolver = self.resolve(statements)
+        if resolver is None:
+            return None
+        return statements, resolver
 
-        resolver = Resolver(self.interpreter)
+    def resolve(self, statements: list[Stmt]) -> Resolver | None:
+        resolver = Resolver(self.max_nesting)
         for statement in statements:
             try:
                 resolver.resolve(statement)
@@ -60,28 +248,73 @@ class Plox:
                 if self.debug:
                     traceback.print_exc()
                 print(colored(f"Resolve Error: {e}", "light_red"))
-                return
+                return None
+        return resolver
 
-        # en modo resolve, imprimimos los scopes locales del intérprete
-        if self.mode == "resolve":
-            depths = {k.name: v for k, v in self.interpreter.local_scope_depths.items()}
+    def print_statements(self, statements: list[Stmt]):
+        # El parser no tiene límite de anidamiento, pero mostrar el árbol es
+        # recursivo: un programa demasiado anidado no se puede mostrar
+        try:
+            lines = [repr(stmt) for stmt in statements]
+        except Exception as e:
+            if self.debug:
+                traceback.print_exc()
+            print(colored(f"Parsing Error: {e}", "light_red"))
+            return
+        for line in lines:
+            print(colored(line, "light_blue"))
+        print()
+
+    def print_opt_stats(
+        self, optimizer: Optimizer, before: int, statements: list[Stmt]
+    ):
+        after = sum(1 for _ in walk(statements))
+        dead_code = optimizer.dead_code
+        print(
+            colored(
+                f"Optimized: {before} nodes before, {after} after; "
+                f"dead code removed {dead_code.removed} nodes "
+                f"({dead_code.removed_functions} unreachable functions)",
+                "light_blue",
+            )
+        )
+
+    def print_specialize_stats(self, inference: TypeInference):
+        total = len(inference.sites)
+        percentage = f" ({inference.specialized / total:.0%})" if total else ""
+        print(
+            colored(
+                f"Specialized {inference.specialized} of {total} operators{percentage}",
+                "light_blue",
+            )
+        )
+
+    def print_quicken_stats(self):
+        interpreter = cast(QuickeningInterpreter, self.interpreter)
+        for title, counts in (
+            ("Specializations", interpreter.specializations),
+            ("Deoptimizations", interpreter.deoptimizations),
+        ):
+            kinds = ", ".join(
+                f"{kind} {count}" for kind, count in sorted(counts.items())
+            )
             print(
                 colored(
-                    f"Interpreter Locals: {depths}",
+                    f"{title}: {counts.total()}" + (f" ({kinds})" if kinds else ""),
                     "light_blue",
                 )
             )
-            return
 
-        try:
-            lastvalue_produced = self.interpreter.interpret(statements)
-            if self.in_repl and lastvalue_produced is not None:
-                print(lastvalue_produced)
-        except Exception as e:
-            if self.debug:
-                traceback.print_exc()
-            print(colored(f"Runtime Error: {e}", "light_red"))
-            return
+    def print_memo_stats(self):
+        for function in self.interpreter.memoized:
+            cache = function.cache
+            print(
+                colored(
+                    f"Memoized {function}: {cache.hits} hits, {cache.misses} misses, "
+                    f"{len(cache.entries)}/{cache.maxsize} entries",
+                    "light_blue",
+                )
+            )
 
     def main(self):
         parser = argparse.ArgumentParser(
@@ -104,6 +337,171 @@ class Plox:
         options.add_argument(
             "--resolve", action="store_true", help="Run in resolve mode"
         )
+        options.add_argument(
+            "--dump-optimized",
+            action="store_true",
+            help="Print the program as Lox source after optimizing it "
+            f"(at --opt-level, or {MAX_LEVEL} if not given)",
+        )
+        options.add_argument(
+            "--dump-cfg",
+            action="store_true",
+            help="Print the control flow graph of each function, "
+            "with the variables each instruction reads and writes",
+        )
+
+        backends = parser.add_mutually_exclusive_group()
+        backends.add_argument(
+            "--vm",
+            action="store_true",
+            help="Compile to bytecode and run it on a stack-based virtual machine",
+        )
+        backends.add_argument(
+            "--closures",
+            action="store_true",
+            help="Compile the tree into nested Python closures before running it",
+        )
+        backends.add_argument(
+            "--explicit-stack",
+            action="store_true",
+            help="Run on an interpreter that keeps its own call stack instead of Python's",
+        )
+        backends.add_argument(
+            "--jit",
+            action="store_true",
+            help="Start tree-walking, and compile functions and loops to Python closures "
+            "once they get hot",
+        )
+        backends.add_argument(
+            "--quicken",
+            action="store_true",
+            help="Run on an adaptive interpreter that specializes operators and calls "
+            "to the types they see at runtime",
+        )
+        backends.add_argument(
+            "--cfg",
+            action="store_true",
+            help="Lower the tree to control flow graphs and run them block by block",
+        )
+        backends.add_argument(
+            "--python",
+            action="store_true",
+            help="Transpile to Python source and run it with CPython's compiler",
+        )
+        backends.add_argument(
+            "--emit-python",
+            metavar="OUT",
+            help="Transpile to Python source and write it to OUT instead of running it",
+        )
+
+        parser.add_argument(
+            "--regex-scanner",
+            action="store_true",
+            help="Scan with a single precompiled regular expression "
+            "instead of character by character",
+        )
+        parser.add_argument(
+            "--token-buffer",
+            action="store_true",
+            help="Scan with --regex-scanner into compact arrays of token types, "
+            "offsets and lines, building tokens only where the parser needs them",
+        )
+        parser.add_argument(
+            "--max-depth",
+            type=int,
+            default=MAX_DEPTH,
+            metavar="N",
+            help=f"Maximum call depth with --explicit-stack (default: {MAX_DEPTH})",
+        )
+        parser.add_argument(
+            "--max-nesting",
+            type=int,
+            metavar="N",
+            help="Reject programs nested more than N levels deep while parsing "
+            "and resolving (default: no limit)",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Always scan, parse and resolve the file, instead of reusing "
+            "the resolved program cached from a previous run",
+        )
+        parser.add_argument(
+            "--memoize",
+            action="store_true",
+            help="Cache the results of pure functions (on the tree-walk interpreter, "
+            "--explicit-stack and --quicken)",
+        )
+        parser.add_argument(
+            "--memo-size",
+            type=int,
+            default=MEMO_SIZE,
+            metavar="N",
+            help=f"Results cached per function with --memoize (default: {MEMO_SIZE})",
+        )
+        parser.add_argument(
+            "--memo-stats",
+            action="store_true",
+            help="Print the cache hits and misses of each memoized function",
+        )
+        parser.add_argument(
+            "--jit-threshold",
+            type=int,
+            default=CALL_THRESHOLD,
+            metavar="N",
+            help=f"Calls before --jit compiles a function (default: {CALL_THRESHOLD})",
+        )
+        parser.add_argument(
+            "--jit-loop-threshold",
+            type=int,
+            default=LOOP_THRESHOLD,
+            metavar="N",
+            help=f"Iterations before --jit compiles a loop (default: {LOOP_THRESHOLD})",
+        )
+        parser.add_argument(
+            "--jit-log",
+            action="store_true",
+            help="Print to stderr what --jit compiled and when",
+        )
+        parser.add_argument(
+            "--quicken-stats",
+            action="store_true",
+            help="Print how many nodes --quicken specialized and deoptimized",
+        )
+        parser.add_argument(
+            "--specialize",
+            action="store_true",
+            help="Infer the types of variables and skip the type checks of the "
+            "operators whose operands are known to be numbers or strings",
+        )
+        parser.add_argument(
+            "--specialize-stats",
+            action="store_true",
+            help="Print how many operators were specialized with --specialize",
+        )
+        parser.add_argument(
+            "--opt-level",
+            type=int,
+            metavar="N",
+            help="Optimize the tree before running it: 0 disables the optimizer, "
+            "1 folds and propagates constants and removes dead code, "
+            "2 also inlines small functions, "
+            "3 also hoists loop invariants and reuses common subexpressions "
+            "(default: 0)",
+        )
+        parser.add_argument(
+            "--inline-size",
+            type=int,
+            default=INLINE_SIZE,
+            metavar="N",
+            help="Largest function body, in tree nodes, inlined with --opt-level 2 "
+            f"(default: {INLINE_SIZE})",
+        )
+        parser.add_argument(
+            "--opt-stats",
+            action="store_true",
+            help="Print how many tree nodes the optimizer removed",
+        )
         parser.add_argument(
             "--line-by-line", action="store_true", help="Run in line-by-line mode"
         )
@@ -121,12 +519,79 @@ class Plox:
         if args.show_warnings:
             self.show_warnings = True
 
+        if args.regex_scanner:
+            self.scanner = RegexScanner
+        self.token_buffer = args.token_buffer
+        self.max_nesting = args.max_nesting
+        if not args.no_cache:
+            self.cache = CompileCache(max_nesting=args.max_nesting)
+
         if args.scanning:
             self.mode = "scanning"
         elif args.parsing:
             self.mode = "parsing"
         elif args.resolve:
             self.mode = "resolve"
+        elif args.dump_optimized:
+            self.mode = "optimized"
+        elif args.dump_cfg:
+            self.mode = "cfg"
+
+        if args.vm:
+            self.backend = "vm"
+        elif args.closures:
+            # El compilador a clausuras es un intérprete más: el resolvedor
+            # le completa las profundidades de las variables igual que al tree-walk
+            self.backend = "closures"
+            self.interpreter = ClosureCompiler()
+        elif args.explicit_stack:
+            # Igual que el compilador a clausuras, es un intérprete más
+            self.backend = "stack"
+            self.interpreter = StackInterpreter(args.max_depth)
+        elif args.jit:
+            # Otro intérprete más, que compila lo que más se ejecuta
+            self.backend = "jit"
+            self.interpreter = TieredInterpreter(
+                args.jit_threshold, args.jit_loop_threshold, args.jit_log
+            )
+        elif args.quicken:
+            # Un intérprete más, que se reescribe a sí mismo mientras corre
+            self.backend = "quicken"
+            self.interpreter = QuickeningInterpreter()
+            self.quicken_stats = args.quicken_stats
+        elif args.cfg:
+            # También es un intérprete más, que recorre el grafo en vez del árbol
+            self.backend = "cfg"
+            self.interpreter = CFGInterpreter()
+        elif args.python:
+            self.backend = "python"
+        elif args.emit_python:
+            self.emit_python = args.emit_python
+
+        if args.opt_level is not None:
+            self.opt_level = args.opt_level
+        elif args.dump_optimized:
+            self.opt_level = MAX_LEVEL
+        self.inline_size = args.inline_size
+        self.opt_stats = args.opt_stats
+
+        if args.memoize:
+            # Solo los intérpretes que recorren el árbol crean funciones
+            # memoizadas: en los demás backends el flag no haría nada
+            if self.backend not in ("tree-walk", "stack", "quicken") or (
+                args.emit_python
+            ):
+                parser.error(
+                    "--memoize only works with the tree-walk interpreter, "
+                    "--explicit-stack and --quicken"
+                )
+            self.purity = PurityAnalyzer()
+            self.interpreter.memo_size = args.memo_size
+            self.interpreter.memo_globals = self.purity.dependencies
+            self.memo_stats = args.memo_stats
+
+        self.specialize = args.specialize
+        self.specialize_stats = args.specialize_stats
 
         if args.file:
             self.in_repl = False
@@ -140,7 +605,9 @@ class Plox:
                 # modo multi-linea por default
                 else:
                     source = file.read()
+                    self.whole_program = True
                     self.run(source)
+                    self.whole_program = False
             self.in_repl = True
             return
 
@@ -0,0 +1,149 @@
+import math
+from enum import IntEnum, auto
+
+
+class OpCode(IntEnum):
+    # constantes y literales
+    CONSTANT = auto()  # CONSTANT <índice en el pool de constantes>
+    NIL = auto()
+    TRUE = auto()
+    FALSE = auto()
+    UNDEFINED = auto()  # el valor de una local declarada en un if o while sin bloque
+
+    # manejo del stack
+    POP = auto()
+    POPN = auto()  # POPN <cantidad de valores a descartar>
+
+    # variables
+    GET_LOCAL = auto()  # GET_LOCAL <slot>
+    SET_LOCAL = auto()  # SET_LOCAL <slot>
+    GET_CELL = auto()  # GET_CELL <slot>, para locales capturadas por una clausura
+    SET_CELL = auto()  # SET_CELL <slot>
+    BOX = auto()  # envuelve el tope del stack en una celda
+    BOX_LOCAL = auto()  # BOX_LOCAL <slot>, envuelve un parámetro capturado
+    GET_UPVALUE = auto()  # GET_UPVALUE <índice>
+    SET_UPVALUE = auto()  # SET_UPVALUE <índice>
+    GET_GLOBAL = auto()  # GET_GLOBAL <índice del nombre>
+    SET_GLOBAL = auto()  # SET_GLOBAL <índice del nombre>
+    DEFINE_GLOBAL = auto()  # DEFINE_GLOBAL <índice del nombre>
+
+    # operadores
+    ADD = auto()
+    SUBTRACT = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    MODULO = auto()
+    GREATER = auto()
+    GREATER_EQUAL = auto()
+    LESS = auto()
+    LESS_EQUAL = auto()
+    EQUAL = auto()
+    NOT_EQUAL = auto()
+    NEGATE = auto()
+    NOT = auto()
+
+    # statements
+    PRINT = auto()
+
+    # saltos, todos a direcciones absolutas dentro del chunk
+    JUMP = auto()  # JUMP <destino>
+    JUMP_IF_FALSE = auto()  # JUMP_IF_FALSE <destino>, sin desapilar la condición
+    JUMP_IF_TRUE = auto()  # JUMP_IF_TRUE <destino>, sin desapilar la condición
+    POP_JUMP_IF_FALSE = auto()  # POP_JUMP_IF_FALSE <destino>
+
+    # funciones
+    CLOSURE = auto()  # CLOSURE <índice de la función compilada>
+    CALL = auto()  # CALL <cantidad de argumentos>
+    RETURN = auto()
+
+    # errores
+    TOP_RETURN = auto()  # un return por fuera de una función
+    ERROR = auto()  # ERROR <índice del mensaje>
+    CHECK_DEFINED = auto()  # CHECK_DEFINED <índice del nombre>
+    CHECK_ASSIGNABLE = auto()  # CHECK_ASSIGNABLE <índice del nombre>
+
+
+# Cuántos operandos lleva cada instrucción. El resto no lleva ninguno
+OPERANDS = {
+    OpCode.CONSTANT: 1,
+    OpCode.POPN: 1,
+    OpCode.GET_LOCAL: 1,
+    OpCode.SET_LOCAL: 1,
+    OpCode.GET_CELL: 1,
+    OpCode.SET_CELL: 1,
+    OpCode.BOX_LOCAL: 1,
+    OpCode.GET_UPVALUE: 1,
+    OpCode.SET_UPVALUE: 1,
+    OpCode.GET_GLOBAL: 1,
+    OpCode.SET_GLOBAL: 1,
+    OpCode.DEFINE_GLOBAL: 1,
+    OpCode.JUMP: 1,
+    OpCode.JUMP_IF_FALSE: 1,
+    OpCode.JUMP_IF_TRUE: 1,
+    OpCode.POP_JUMP_IF_FALSE: 1,
+    OpCode.CLOSURE: 1,
+    OpCode.CALL: 1,
+    OpCode.ERROR: 1,
+    OpCode.CHECK_DEFINED: 1,
+    OpCode.CHECK_ASSIGNABLE: 1,
+}
+
+
+class Chunk(object):
+    def __init__(self):
+        # El bytecode es una lista plana de enteros: cada instrucción
+        # es un opcode seguido de sus operandos
+        self.code: list[int] = []
+        # Los valores que no entran en un operando (números, cadenas, nombres
+        # de variables globales, funciones compiladas) van al pool de constantes
+        self.constants: list[object] = []
+        # Índice de las constantes ya agregadas, para no repetirlas en el pool.
+        # Ojo con que en Python 1.0 == True, así que la clave incluye el tipo,
+        # y -0.0 == 0.0, así que para los números también el signo
+        self.constant_indexes: dict[tuple, int] = {}
+
+    # Agrega una instrucción y devuelve su posición en el chunk
+    def emit(self, opcode: OpCode, *operands: int) -> int:
+        position = len(self.code)
+        self.code.append(int(opcode))
+        self.code.extend(operands)
+        return position
+
+    # Agrega una constante al pool, reutilizándola si ya estaba
+    def add_constant(self, value: object) -> int:
+        key: tuple = (type(value), value)
+        if isinstance(value, float):
+            key += (math.copysign(1, value),)
+        if key not in self.constant_indexes:
+            self.constants.append(value)
+            self.constant_indexes[key] = len(self.constants) - 1
+        return self.constant_indexes[key]
+
+    # Completa el destino de un salto ya emitido
+    def patch_jump(self, position: int, target: int | None = None):
+        self.code[position + 1] = len(self.code) if target is None else target
+
+    # Devuelve una representación legible del bytecode, para debuggear
+    def disassemble(self, name: str) -> str:
+        lines = [f"== {name} =="]
+        ip = 0
+        while ip < len(self.code):
+            opcode = OpCode(self.code[ip])
+            operands = self.code[ip + 1 : ip + 1 + OPERANDS.get(opcode, 0)]
+            line = f"{ip:04} {opcode.name}"
+            if operands:
+                line += f" {operands[0]}"
+                if opcode in (
+                    OpCode.CONSTANT,
+                    OpCode.GET_GLOBAL,
+                    OpCode.SET_GLOBAL,
+                    OpCode.DEFINE_GLOBAL,
+                    OpCode.CLOSURE,
+                    OpCode.ERROR,
+                    OpCode.CHECK_DEFINED,
+                    OpCode.CHECK_ASSIGNABLE,
+                ):
+                    line += f" ({self.constants[operands[0]]!r})"
+            lines.append(line)
+            ip += 1 + len(operands)
+        return "\n".join(lines)
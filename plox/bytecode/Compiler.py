@@ -0,0 +1,443 @@
+from functools import singledispatchmethod
+from typing import Optional
+
+from ..Token import Token, TokenType
+from ..Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ReturnStmt,
+)
+from ..Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+from ..Captures import CaptureAnalyzer
+from .Chunk import OpCode
+from .Function import CompiledFunction
+
+
+BINARY_OPCODES = {
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.PERCENT: OpCode.MODULO,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+}
+
+
+class Local(object):
+    def __init__(self, name: str, slot: int, captured: bool):
+        self.name = name
+        self.slot = slot  # posición en el stack, relativa al inicio del frame
+        self.captured = captured  # si vive en una celda
+        self.defined = False  # False mientras se compila su inicializador
+        # Lox permite declarar variables en un if o while sin bloque, como en
+        # `if (c) var x = 1;`. Si la rama no se ejecuta, x queda sin definir
+        self.maybe_undefined = False
+
+
+# El estado del compilador para cada función que se está compilando.
+# Las funciones anidadas apuntan al estado de la función que las encierra
+class FunctionState(object):
+    def __init__(
+        self, function: CompiledFunction, enclosing: Optional["FunctionState"]
+    ):
+        self.function = function
+        self.enclosing = enclosing
+        # Las locales vivas, en orden de declaración.
+        # El slot 0 del frame lo ocupa la función que se está ejecutando
+        self.locals: list[Local] = []
+        # Cuántas locales declaró cada scope abierto
+        self.scope_sizes: list[int] = []
+        self.upvalue_indexes: dict[tuple[bool, int], int] = {}
+        # Los upvalues que capturan una local que puede no estar definida
+        self.maybe_undefined_upvalues: set[int] = set()
+
+    @property
+    def is_global_scope(self) -> bool:
+        return self.enclosing is None and not self.scope_sizes
+
+    def find_local(self, name: str) -> Local | None:
+        for local in reversed(self.locals):
+            if local.name == name:
+                return local
+        return None
+
+    def add_upvalue(self, is_local: bool, index: int) -> int:
+        key = (is_local, index)
+        if key not in self.upvalue_indexes:
+            self.function.upvalues.append(key)
+            self.upvalue_indexes[key] = len(self.function.upvalues) - 1
+        return self.upvalue_indexes[key]
+
+    # Busca una variable en las funciones que encierran a esta,
+    # capturándola a lo largo de la cadena si hace falta
+    def find_upvalue(self, name: str) -> int | None:
+        if self.enclosing is None:
+            return None
+
+        local = self.enclosing.find_local(name)
+        if local is not None:
+            upvalue = self.add_upvalue(True, local.slot)
+            if local.maybe_undefined:
+                self.maybe_undefined_upvalues.add(upvalue)
+            return upvalue
+
+        index = self.enclosing.find_upvalue(name)
+        if index is not None:
+            upvalue = self.add_upvalue(False, index)
+            if index in self.enclosing.maybe_undefined_upvalues:
+                self.maybe_undefined_upvalues.add(upvalue)
+            return upvalue
+
+        return None
+
+
+# El compilador recorre el árbol ya resuelto una única vez y emite
+# el bytecode de cada función en su propio chunk
+class Compiler(object):
+    def __init__(self):
+        self.captured: set[Token] = set()
+        self.state: FunctionState
+        # Las declaraciones sueltas en un if o while, con el slot que ya les reservamos
+        self.predeclared: dict[Stmt, Local] = {}
+
+    # Compila un programa entero a la función de más alto nivel (el "script")
+    def compile(self, statements: list[Stmt]) -> CompiledFunction:
+        analyzer = CaptureAnalyzer()
+        for statement in statements:
+            analyzer.analyze(statement)
+        self.captured = analyzer.captured
+
+        script = CompiledFunction("script", [])
+        self.state = FunctionState(script, None)
+
+        # Igual que el intérprete, el script devuelve el valor del último
+        # statement si es una expresión (para que el REPL lo pueda mostrar)
+        for i, statement in enumerate(statements):
+            if i == len(statements) - 1 and isinstance(statement, ExpressionStmt):
+                self.emit_expression(statement.expression)
+                self.emit(OpCode.RETURN)
+                return script
+            self.emit_statement(statement)
+
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+        return script
+
+    # ---------- Helpers ---------- #
+
+    def emit(self, opcode: OpCode, *operands: int) -> int:
+        return self.state.function.chunk.emit(opcode, *operands)
+
+    def here(self) -> int:
+        return len(self.state.function.chunk.code)
+
+    def constant(self, value: object) -> int:
+        return self.state.function.chunk.add_constant(value)
+
+    def begin_scope(self):
+        self.state.scope_sizes.append(0)
+
+    def end_scope(self):
+        size = self.state.scope_sizes.pop()
+        del self.state.locals[len(self.state.locals) - size :]
+        # Las locales del scope viven en el tope del stack: las descartamos
+        if size == 1:
+            self.emit(OpCode.POP)
+        elif size > 1:
+            self.emit(OpCode.POPN, size)
+
+    def declare_local(self, name: Token) -> Local:
+        local = Local(name.lexeme, len(self.state.locals) + 1, name in self.captured)
+        self.state.locals.append(local)
+        self.state.scope_sizes[-1] += 1
+        return local
+
+    # Reserva el slot de una declaración que es la rama de un if o el cuerpo de un
+    # while, antes de compilar la condición. La local arranca sin nombre, para
+    # que la condición no la vea, y con un valor que marca que no está definida
+    def predeclare(self, branch: Stmt | None):
+        if self.state.is_global_scope or not isinstance(branch, (VarDecl, FunDecl)):
+            return
+
+        local = self.declare_local(branch.name)
+        local.name = ""
+        local.defined = True
+        local.maybe_undefined = True
+        self.emit(OpCode.UNDEFINED)
+        if local.captured:
+            self.emit(OpCode.BOX)
+        self.predeclared[branch] = local
+
+    # Guarda el valor del tope del stack en una local ya reservada
+    def emit_store_predeclared(self, local: Local):
+        self.emit(OpCode.SET_CELL if local.captured else OpCode.SET_LOCAL, local.slot)
+        self.emit(OpCode.POP)
+
+    # Devuelve las instrucciones para leer y escribir una variable, su operando,
+    # y si puede no estar definida
+    def resolve_variable(self, name: str) -> tuple[OpCode, OpCode, int, bool]:
+        local = self.state.find_local(name)
+        if local is not None:
+            if local.captured:
+                return (
+                    OpCode.GET_CELL,
+                    OpCode.SET_CELL,
+                    local.slot,
+                    local.maybe_undefined,
+                )
+            return OpCode.GET_LOCAL, OpCode.SET_LOCAL, local.slot, local.maybe_undefined
+
+        upvalue = self.state.find_upvalue(name)
+        if upvalue is not None:
+            maybe_undefined = upvalue in self.state.maybe_undefined_upvalues
+            return OpCode.GET_UPVALUE, OpCode.SET_UPVALUE, upvalue, maybe_undefined
+
+        index = self.constant(name)
+        return OpCode.GET_GLOBAL, OpCode.SET_GLOBAL, index, False
+
+    # ---------- Compilación de Statements ---------- #
+
+    @singledispatchmethod
+    def emit_statement(self, statement: Stmt):
+        raise RuntimeError(f"Unknown statement type: `{type(statement)}`")
+
+    @emit_statement.register
+    def _(self, statement: ExpressionStmt):
+        self.emit_expression(statement.expression)
+        self.emit(OpCode.POP)
+
+    @emit_statement.register
+    def _(self, statement: PrintStmt):
+        self.emit_expression(statement.expression)
+        self.emit(OpCode.PRINT)
+
+    @emit_statement.register
+    def _(self, statement: VarDecl):
+        if self.state.is_global_scope:
+            self.emit_initializer(statement.initializer)
+            self.emit(OpCode.DEFINE_GLOBAL, self.constant(statement.name.lexeme))
+            return
+
+        if statement in self.predeclared:
+            local = self.predeclared.pop(statement)
+            self.emit_initializer(statement.initializer)
+            local.name = statement.name.lexeme
+            self.emit_store_predeclared(local)
+            return
+
+        # Las locales no necesitan instrucciones para definirse: el valor
+        # del inicializador queda en el tope del stack, que es justo su slot
+        local = self.declare_local(statement.name)
+        self.emit_initializer(statement.initializer)
+        if local.captured:
+            self.emit(OpCode.BOX)
+        local.defined = True
+
+    def emit_initializer(self, initializer: Expr | None):
+        if initializer is None:
+            self.emit(OpCode.NIL)
+        else:
+            self.emit_expression(initializer)
+
+    @emit_statement.register
+    def _(self, statement: FunDecl):
+        if self.state.is_global_scope:
+            self.emit_function(statement)
+            self.emit(OpCode.DEFINE_GLOBAL, self.constant(statement.name.lexeme))
+            return
+
+        if statement in self.predeclared:
+            local = self.predeclared.pop(statement)
+            local.name = statement.name.lexeme
+            self.emit_function(statement)
+            self.emit_store_predeclared(local)
+            return
+
+        # Una función local se define antes de compilar su cuerpo,
+        # para que pueda llamarse recursivamente
+        local = self.declare_local(statement.name)
+        local.defined = True
+        if local.captured:
+            # Si se captura (por ejemplo, a sí misma) la celda tiene que existir
+            # antes de crear la clausura
+            self.emit(OpCode.NIL)
+            self.emit(OpCode.BOX)
+            self.emit_function(statement)
+            self.emit(OpCode.SET_CELL, local.slot)
+            self.emit(OpCode.POP)
+        else:
+            self.emit_function(statement)
+
+    def emit_function(self, statement: FunDecl):
+        function = CompiledFunction(
+            statement.name.lexeme, [param.lexeme for param in statement.parameters]
+        )
+        enclosing = self.state
+        self.state = FunctionState(function, enclosing)
+
+        # Los parámetros y el cuerpo comparten el mismo scope, como en el resolvedor
+        self.begin_scope()
+        for param in statement.parameters:
+            local = self.declare_local(param)
+            local.defined = True
+            if local.captured:
+                self.emit(OpCode.BOX_LOCAL, local.slot)
+        for stmt in statement.body:
+            self.emit_statement(stmt)
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+        self.state = enclosing
+        self.emit(OpCode.CLOSURE, self.constant(function))
+
+    @emit_statement.register
+    def _(self, statement: ReturnStmt):
+        self.emit_initializer(statement.value)
+        if self.state.enclosing is None:
+            # Un return por fuera de una función es un error en tiempo de ejecución
+            self.emit(OpCode.TOP_RETURN)
+        else:
+            self.emit(OpCode.RETURN)
+
+    @emit_statement.register
+    def _(self, statement: IfStmt):
+        self.predeclare(statement.then_branch)
+        self.predeclare(statement.else_branch)
+        self.emit_expression(statement.condition)
+        then_jump = self.emit(OpCode.POP_JUMP_IF_FALSE, 0)
+        self.emit_statement(statement.then_branch)
+
+        if statement.else_branch is None:
+            self.state.function.chunk.patch_jump(then_jump)
+            return
+
+        else_jump = self.emit(OpCode.JUMP, 0)
+        self.state.function.chunk.patch_jump(then_jump)
+        self.emit_statement(statement.else_branch)
+        self.state.function.chunk.patch_jump(else_jump)
+
+    @emit_statement.register
+    def _(self, statement: WhileStmt):
+        self.predeclare(statement.body)
+        loop_start = self.here()
+        self.emit_expression(statement.condition)
+        exit_jump = self.emit(OpCode.POP_JUMP_IF_FALSE, 0)
+        self.emit_statement(statement.body)
+        self.emit(OpCode.JUMP, loop_start)
+        self.state.function.chunk.patch_jump(exit_jump)
+
+    @emit_statement.register
+    def _(self, statement: BlockStmt):
+        self.begin_scope()
+        for stmt in statement.statements:
+            self.emit_statement(stmt)
+        self.end_scope()
+
+    # ---------- Compilación de Expresiones ---------- #
+
+    @singledispatchmethod
+    def emit_expression(self, expression: Expr):
+        raise RuntimeError(f"Unknown expression type: `{type(expression)}`")
+
+    @emit_expression.register
+    def _(self, expression: LiteralExpr):
+        if expression.value is None:
+            self.emit(OpCode.NIL)
+        elif expression.value is True:
+            self.emit(OpCode.TRUE)
+        elif expression.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit(OpCode.CONSTANT, self.constant(expression.value))
+
+    @emit_expression.register
+    def _(self, expression: GroupingExpr):
+        self.emit_expression(expression.expression)
+
+    @emit_expression.register
+    def _(self, expression: UnaryExpr):
+        self.emit_expression(expression.right)
+        match expression.operator.token_type:
+            case TokenType.MINUS:
+                self.emit(OpCode.NEGATE)
+            case TokenType.BANG:
+                self.emit(OpCode.NOT)
+            case _:
+                raise RuntimeError(f"Unknown unary operator: `{expression.operator}`")
+
+    @emit_expression.register
+    def _(self, expression: BinaryExpr):
+        if expression.operator.token_type not in BINARY_OPCODES:
+            raise RuntimeError(f"Unknown binary operator: `{expression.operator}`")
+        self.emit_expression(expression.left)
+        self.emit_expression(expression.right)
+        self.emit(BINARY_OPCODES[expression.operator.token_type])
+
+    @emit_expression.register
+    def _(self, expression: LogicExpr):
+        # Los operadores lógicos cortocircuitan: si el primer operando ya
+        # define el resultado, saltamos por encima del segundo dejándolo en el stack
+        self.emit_expression(expression.left)
+        if expression.operator.token_type == TokenType.OR:
+            jump = self.emit(OpCode.JUMP_IF_TRUE, 0)
+        else:
+            jump = self.emit(OpCode.JUMP_IF_FALSE, 0)
+        self.emit(OpCode.POP)
+        self.emit_expression(expression.right)
+        self.state.function.chunk.patch_jump(jump)
+
+    @emit_expression.register
+    def _(self, expression: VariableExpr):
+        name = expression.name.lexeme
+        get, _, operand, maybe_undefined = self.resolve_variable(name)
+        self.emit(get, operand)
+        if maybe_undefined:
+            self.emit(OpCode.CHECK_DEFINED, self.constant(name))
+
+    @emit_expression.register
+    def _(self, expression: AssignmentExpr):
+        name = expression.name.lexeme
+        self.emit_expression(expression.value)
+
+        local = self.state.find_local(name)
+        if local is not None and not local.defined:
+            # `var x = (x = 1);`: el intérprete tree-walk tampoco encuentra
+            # a x en su entorno mientras evalúa el inicializador
+            message = f"Cannot assign to undefined variable '{name}'"
+            self.emit(OpCode.ERROR, self.constant(message))
+            return
+
+        get, set, operand, maybe_undefined = self.resolve_variable(name)
+        if maybe_undefined:
+            self.emit(get, operand)
+            self.emit(OpCode.CHECK_ASSIGNABLE, self.constant(name))
+            self.emit(OpCode.POP)
+        self.emit(set, operand)
+
+    @emit_expression.register
+    def _(self, expression: CallExpr):
+        self.emit_expression(expression.callee)
+        for arg in expression.arguments:
+            self.emit_expression(arg)
+        self.emit(OpCode.CALL, len(expression.arguments))
@@ -0,0 +1,38 @@
+from ..Env import Cell
+from .Chunk import Chunk
+
+
+# El resultado de compilar una declaración de función: su bytecode y
+# todo lo que hace falta saber de ella antes de ejecutarla
+class CompiledFunction(object):
+    def __init__(self, name: str, parameters: list[str]):
+        self.name = name
+        self.parameters = parameters
+        self.arity = len(parameters)
+        self.chunk = Chunk()
+        # Por cada variable libre de la función, de dónde capturarla al crear
+        # la clausura: (True, slot) si es una local de la función que la encierra,
+        # (False, índice) si es una variable que esa función ya capturó
+        self.upvalues: list[tuple[bool, int]] = []
+
+    def __repr__(self) -> str:
+        return f"<compiled fn {self.name}>"
+
+
+# El valor de una función en tiempo de ejecución: el código compilado
+# más las celdas de las variables que capturó
+class Closure(object):
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function: CompiledFunction, upvalues: list[Cell]):
+        self.function = function
+        self.upvalues = upvalues
+
+    @property
+    def arity(self) -> int:
+        return self.function.arity
+
+    # Se imprime igual que una función del intérprete tree-walk
+    def __repr__(self) -> str:
+        params = ", ".join(self.function.parameters)
+        return f"<fn {self.function.name}({params})>"
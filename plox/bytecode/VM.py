@@ -0,0 +1,321 @@
+from ..Stmt import Stmt
+from ..Function import ReturnValue
+from ..Env import Cell, UNDEFINED as UNDEFINED_VALUE
+from ..Operators import (
+    plus,
+    minus,
+    star,
+    slash,
+    percent,
+    greater,
+    greater_equal,
+    less,
+    less_equal,
+    negate,
+)
+from .Chunk import OpCode
+from .Compiler import Compiler
+from .Function import CompiledFunction, Closure
+
+
+# Cantidad máxima de llamados anidados antes de cortar la ejecución
+FRAMES_MAX = 10000
+
+# Traemos los opcodes a constantes del módulo, así el loop de ejecución
+# compara enteros y no miembros de un Enum
+CONSTANT = int(OpCode.CONSTANT)
+NIL = int(OpCode.NIL)
+TRUE = int(OpCode.TRUE)
+FALSE = int(OpCode.FALSE)
+UNDEFINED = int(OpCode.UNDEFINED)
+POP = int(OpCode.POP)
+POPN = int(OpCode.POPN)
+GET_LOCAL = int(OpCode.GET_LOCAL)
+SET_LOCAL = int(OpCode.SET_LOCAL)
+GET_CELL = int(OpCode.GET_CELL)
+SET_CELL = int(OpCode.SET_CELL)
+BOX = int(OpCode.BOX)
+BOX_LOCAL = int(OpCode.BOX_LOCAL)
+GET_UPVALUE = int(OpCode.GET_UPVALUE)
+SET_UPVALUE = int(OpCode.SET_UPVALUE)
+GET_GLOBAL = int(OpCode.GET_GLOBAL)
+SET_GLOBAL = int(OpCode.SET_GLOBAL)
+DEFINE_GLOBAL = int(OpCode.DEFINE_GLOBAL)
+ADD = int(OpCode.ADD)
+SUBTRACT = int(OpCode.SUBTRACT)
+MULTIPLY = int(OpCode.MULTIPLY)
+DIVIDE = int(OpCode.DIVIDE)
+MODULO = int(OpCode.MODULO)
+GREATER = int(OpCode.GREATER)
+GREATER_EQUAL = int(OpCode.GREATER_EQUAL)
+LESS = int(OpCode.LESS)
+LESS_EQUAL = int(OpCode.LESS_EQUAL)
+EQUAL = int(OpCode.EQUAL)
+NOT_EQUAL = int(OpCode.NOT_EQUAL)
+NEGATE = int(OpCode.NEGATE)
+NOT = int(OpCode.NOT)
+PRINT = int(OpCode.PRINT)
+JUMP = int(OpCode.JUMP)
+JUMP_IF_FALSE = int(OpCode.JUMP_IF_FALSE)
+JUMP_IF_TRUE = int(OpCode.JUMP_IF_TRUE)
+POP_JUMP_IF_FALSE = int(OpCode.POP_JUMP_IF_FALSE)
+CLOSURE = int(OpCode.CLOSURE)
+CALL = int(OpCode.CALL)
+RETURN = int(OpCode.RETURN)
+TOP_RETURN = int(OpCode.TOP_RETURN)
+ERROR = int(OpCode.ERROR)
+CHECK_DEFINED = int(OpCode.CHECK_DEFINED)
+CHECK_ASSIGNABLE = int(OpCode.CHECK_ASSIGNABLE)
+
+
+# El camino lento de los operadores binarios: cuando alguno de los operandos
+# no es un float, se usan los operadores de Operators.py, que chequean los
+# tipos igual que el intérprete
+BINARY_OPERATORS = {
+    ADD: plus,
+    SUBTRACT: minus,
+    MULTIPLY: star,
+    DIVIDE: slash,
+    MODULO: percent,
+    GREATER: greater,
+    GREATER_EQUAL: greater_equal,
+    LESS: less,
+    LESS_EQUAL: less_equal,
+}
+
+
+# Una máquina virtual de stack: todas las funciones comparten un único stack
+# de valores, y cada llamado apila un frame que recuerda dónde empiezan sus
+# variables locales y por dónde iba ejecutando
+class VM(object):
+    def __init__(self):
+        # Las variables globales sobreviven entre ejecuciones, como en el REPL
+        self.globals: dict[str, object] = {}
+
+    # Misma interfaz que Interpreter.interpret: recibe los statements ya
+    # resueltos y devuelve el valor del último statement de expresión
+    def interpret(self, statements: list[Stmt]):
+        script = Compiler().compile(statements)
+        return self.run(script)
+
+    def run(self, script: CompiledFunction):
+        closure = Closure(script, [])
+        stack: list = [closure]
+        push = stack.append
+        pop = stack.pop
+        globals_ = self.globals
+
+        # Los frames guardan el estado del llamador mientras se ejecuta el llamado
+        frames: list[tuple] = []
+
+        code = script.chunk.code
+        constants: list = script.chunk.constants
+        upvalues = closure.upvalues
+        base = 0
+        ip = 0
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == GET_LOCAL:
+                push(stack[base + code[ip]])
+                ip += 1
+            elif op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == POP_JUMP_IF_FALSE:
+                value = pop()
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == SET_LOCAL:
+                stack[base + code[ip]] = stack[-1]
+                ip += 1
+            elif op == POP:
+                pop()
+            elif op == GET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                if name not in globals_:
+                    raise RuntimeError(f"Undefined variable '{name}'")
+                push(globals_[name])
+            elif op == ADD:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left + right
+                else:
+                    stack[-1] = BINARY_OPERATORS[op](left, right)
+            elif op == SUBTRACT:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left - right
+                else:
+                    stack[-1] = BINARY_OPERATORS[op](left, right)
+            elif op == LESS:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left < right
+                else:
+                    stack[-1] = BINARY_OPERATORS[op](left, right)
+            elif op == LESS_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left <= right
+                else:
+                    stack[-1] = BINARY_OPERATORS[op](left, right)
+            elif op == GREATER:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left > right
+                else:
+                    stack[-1] = BINARY_OPERATORS[op](left, right)
+            elif op == GREATER_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left >= right
+                else:
+                    stack[-1] = BINARY_OPERATORS[op](left, right)
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] == right
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] != right
+            elif op == MULTIPLY:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left * right
+                else:
+                    stack[-1] = BINARY_OPERATORS[op](left, right)
+            elif op == DIVIDE or op == MODULO:
+                right = pop()
+                stack[-1] = BINARY_OPERATORS[op](stack[-1], right)
+            elif op == JUMP:
+                ip = code[ip]
+            elif op == CALL:
+                argc = code[ip]
+                ip += 1
+                callee = stack[-argc - 1]
+                if type(callee) is not Closure:
+                    raise RuntimeError(f"Cannot call non-callable object: `{callee}`")
+                function = callee.function
+                if argc != function.arity:
+                    raise RuntimeError(
+                        f"Expected {function.arity} arguments, got {argc}"
+                    )
+                if len(frames) >= FRAMES_MAX:
+                    raise RuntimeError("Stack overflow")
+
+                # Guardamos el estado del llamador y saltamos al código del llamado.
+                # Su slot 0 es la propia clausura, y después vienen los argumentos
+                frames.append((code, constants, upvalues, base, ip))
+                code = function.chunk.code
+                constants = function.chunk.constants
+                upvalues = callee.upvalues
+                base = len(stack) - argc - 1
+                ip = 0
+            elif op == RETURN:
+                result = pop()
+                if not frames:
+                    return result
+                # Descartamos las locales y la clausura del frame que termina
+                del stack[base:]
+                push(result)
+                code, constants, upvalues, base, ip = frames.pop()
+            elif op == GET_CELL:
+                push(stack[base + code[ip]].value)
+                ip += 1
+            elif op == SET_CELL:
+                stack[base + code[ip]].value = stack[-1]
+                ip += 1
+            elif op == GET_UPVALUE:
+                push(upvalues[code[ip]].value)
+                ip += 1
+            elif op == SET_UPVALUE:
+                upvalues[code[ip]].value = stack[-1]
+                ip += 1
+            elif op == SET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                if name not in globals_:
+                    raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+                globals_[name] = stack[-1]
+            elif op == DEFINE_GLOBAL:
+                globals_[constants[code[ip]]] = pop()
+                ip += 1
+            elif op == POPN:
+                del stack[len(stack) - code[ip] :]
+                ip += 1
+            elif op == NIL:
+                push(None)
+            elif op == TRUE:
+                push(True)
+            elif op == FALSE:
+                push(False)
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == NEGATE:
+                value = stack[-1]
+                if type(value) is float:
+                    stack[-1] = -value
+                else:
+                    stack[-1] = negate(value)
+            elif op == JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == JUMP_IF_TRUE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += 1
+                else:
+                    ip = code[ip]
+            elif op == PRINT:
+                print(pop())
+            elif op == CLOSURE:
+                compiled = constants[code[ip]]
+                ip += 1
+                # Capturamos las celdas que la función necesita: las locales
+                # del frame actual o las que este frame ya había capturado
+                cells = [
+                    stack[base + index] if is_local else upvalues[index]
+                    for is_local, index in compiled.upvalues
+                ]
+                push(Closure(compiled, cells))
+            elif op == BOX:
+                stack[-1] = Cell(stack[-1])
+            elif op == BOX_LOCAL:
+                slot = base + code[ip]
+                stack[slot] = Cell(stack[slot])
+                ip += 1
+            elif op == TOP_RETURN:
+                # El intérprete tree-walk deja escapar el ReturnValue
+                # cuando el return está por fuera de una función
+                raise ReturnValue(pop())
+            elif op == UNDEFINED:
+                push(UNDEFINED_VALUE)
+            elif op == CHECK_DEFINED:
+                if stack[-1] is UNDEFINED_VALUE:
+                    raise RuntimeError(f"Undefined variable '{constants[code[ip]]}'")
+                ip += 1
+            elif op == CHECK_ASSIGNABLE:
+                if stack[-1] is UNDEFINED_VALUE:
+                    name = constants[code[ip]]
+                    raise RuntimeError(f"Cannot assign to undefined variable '{name}'")
+                ip += 1
+            elif op == ERROR:
+                raise RuntimeError(constants[code[ip]])
+            else:
+                raise RuntimeError(f"Unknown opcode: `{op}`")
@@ -0,0 +1,221 @@
+from ..Stmt import VarDecl, FunDecl, BlockStmt, ReturnStmt
+from ..Expr import Expr
+
+
+# Una variable del programa, como la ven los análisis: cada declaración local
+# (una var, una fun o un parámetro) es una variable distinta, aunque se llame
+# igual que otra. Las globales se identifican solo por su nombre
+class Variable(object):
+    def __init__(
+        self, name: str, graph: "ControlFlowGraph | None", captured: bool = False
+    ):
+        self.name = name
+        # La función (o el script) que la declara, o None si es global
+        self.graph = graph
+        # Si alguna clausura la usa: una llamada la puede leer o cambiar
+        self.captured = captured
+        # Cómo se muestra en --dump-cfg: el nombre, con un número si en la
+        # misma función hay otra variable que se llama igual
+        self.label = name
+
+    # Si una llamada a cualquier función la puede leer o cambiar
+    def escapes(self) -> bool:
+        return self.graph is None or self.captured
+
+    def __repr__(self) -> str:
+        return self.label
+
+
+# Una instrucción de un bloque básico. Además del nodo del árbol que ejecuta,
+# lleva qué variables lee (uses) y cuáles puede escribir (defs). De esas,
+# kills son las que escribe siempre: una asignación del lado derecho de un
+# and/or puede no ejecutarse. Si la instrucción hace alguna llamada (calls),
+# además puede leer y escribir las variables que escapan (ver Variable.escapes)
+class Instruction(object):
+    def __init__(self):
+        self.uses: set[Variable] = set()
+        self.defs: set[Variable] = set()
+        self.kills: set[Variable] = set()
+        self.calls = False
+
+
+# `expresión;`. echo indica si su valor es el que muestra el REPL: el del
+# último statement del script, si es una expresión
+class Evaluate(Instruction):
+    def __init__(self, expression: Expr, echo: bool = False):
+        super().__init__()
+        self.expression = expression
+        self.echo = echo
+
+
+class Print(Instruction):
+    def __init__(self, expression: Expr):
+        super().__init__()
+        self.expression = expression
+
+
+class Declare(Instruction):
+    def __init__(self, declaration: VarDecl):
+        super().__init__()
+        self.declaration = declaration
+
+
+# Crea la función, con las celdas de las variables de afuera que usa, y la ata
+# a su nombre. El cuerpo es otro grafo
+class Closure(Instruction):
+    def __init__(self, declaration: FunDecl, graph: "ControlFlowGraph"):
+        super().__init__()
+        self.declaration = declaration
+        self.graph = graph
+
+
+# Los bloques que declaran variables tienen su propio entorno, igual que en el
+# intérprete: el resolvedor cuenta cuántos scopes hay que subir para llegar a
+# cada variable. Un return no pasa por el ExitScope: lo restaura la llamada
+class EnterScope(Instruction):
+    def __init__(self, block: BlockStmt):
+        super().__init__()
+        self.block = block
+
+
+class ExitScope(Instruction):
+    def __init__(self, block: BlockStmt):
+        super().__init__()
+        self.block = block
+
+
+# Las instrucciones que terminan un bloque básico, y deciden cuál sigue
+class Jump(Instruction):
+    def __init__(self, target: "BasicBlock"):
+        super().__init__()
+        self.target = target
+
+
+class Branch(Instruction):
+    def __init__(
+        self, condition: Expr, then_block: "BasicBlock", else_block: "BasicBlock"
+    ):
+        super().__init__()
+        self.condition = condition
+        self.then_block = then_block
+        self.else_block = else_block
+
+
+# Un return del programa, o (si statement es None) el final de la función
+# o del script, que devuelve nil
+class Return(Instruction):
+    def __init__(self, statement: ReturnStmt | None):
+        super().__init__()
+        self.statement = statement
+
+
+Terminator = Jump | Branch | Return
+
+
+# Una secuencia de instrucciones sin saltos en el medio: solo se entra por la
+# primera y solo se sale por el terminador
+class BasicBlock(object):
+    def __init__(self, index: int):
+        self.index = index
+        self.instructions: list[Instruction] = []
+        self.terminator: Terminator | None = None
+        self.predecessors: list[BasicBlock] = []
+
+    def successors(self) -> list["BasicBlock"]:
+        match self.terminator:
+            case Jump():
+                return [self.terminator.target]
+            case Branch():
+                return [self.terminator.then_block, self.terminator.else_block]
+        return []
+
+    def __repr__(self) -> str:
+        return f"B{self.index}"
+
+
+# El grafo de flujo de control de una función (o del script, si declaration
+# es None): sus bloques básicos, empezando por entry, y sus variables locales.
+# Las funciones que declara tienen su propio grafo
+class ControlFlowGraph(object):
+    def __init__(self, declaration: FunDecl | None):
+        self.declaration = declaration
+        self.blocks: list[BasicBlock] = []
+        self.entry = self.new_block()
+        self.parameters: list[Variable] = []
+        self.variables: list[Variable] = []
+        self.functions: list[ControlFlowGraph] = []
+
+    @property
+    def name(self) -> str:
+        if self.declaration is None:
+            return "<script>"
+        return self.declaration.name.lexeme
+
+    def new_block(self) -> BasicBlock:
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    # Deja solo los bloques a los que se llega desde la entrada (ej: saca lo
+    # que sigue a un return), junta cada bloque con el único que lo sigue si
+    # ese no tiene otra forma de llegar, y vuelve a numerarlos en orden
+    def simplify(self):
+        self.blocks = self.reachable()
+        self.link()
+        for block in self.blocks:
+            while isinstance(block.terminator, Jump):
+                target = block.terminator.target
+                if target is block or target is self.entry:
+                    break
+                if len(target.predecessors) != 1:
+                    break
+                block.instructions += target.instructions
+                block.terminator = target.terminator
+                target.instructions = []
+                target.terminator = None
+                for successor in block.successors():
+                    successor.predecessors = [
+                        block if p is target else p for p in successor.predecessors
+                    ]
+        self.blocks = self.reachable()
+        for index, block in enumerate(self.blocks):
+            block.index = index
+        self.link()
+
+    # Los bloques a los que se llega desde la entrada, en orden de recorrido
+    def reachable(self) -> list[BasicBlock]:
+        seen = {self.entry}
+        order = []
+        pending = [self.entry]
+        while pending:
+            block = pending.pop()
+            order.append(block)
+            for successor in reversed(block.successors()):
+                if successor not in seen:
+                    seen.add(successor)
+                    pending.append(successor)
+        return order
+
+    # Recalcula los predecesores de cada bloque
+    def link(self):
+        for block in self.blocks:
+            block.predecessors = []
+        for block in self.blocks:
+            for successor in block.successors():
+                successor.predecessors.append(block)
+
+    # Todas las variables que escapan de la función, según sus instrucciones:
+    # las globales que usa y sus locales capturadas por alguna clausura
+    def escaping(self) -> set[Variable]:
+        return {
+            variable
+            for block in self.blocks
+            for instruction in [*block.instructions, block.terminator]
+            if instruction is not None
+            for variable in instruction.uses | instruction.defs
+            if variable.escapes()
+        } | {
+            variable
+            for variable in self.parameters + self.variables
+            if variable.captured
+        }
@@ -0,0 +1,144 @@
+from functools import singledispatchmethod
+from typing import cast
+
+from ..Stmt import Stmt
+from ..Expr import CallExpr
+from ..Function import Function, ReturnValue, TailCall
+from ..Interpreter import Interpreter
+from ..Env import Env, Cell, UNDEFINED
+from .CFG import (
+    Instruction,
+    Evaluate,
+    Print,
+    Declare,
+    Closure,
+    EnterScope,
+    ExitScope,
+    Jump,
+    Branch,
+    Return,
+    ControlFlowGraph,
+)
+from .Lowering import Lowering
+
+
+# Una función cuyo cuerpo se ejecuta recorriendo su grafo
+class GraphFunction(Function):
+    def __init__(self, graph: ControlFlowGraph, upvalues: list[Cell]):
+        assert graph.declaration is not None
+        super().__init__(graph.declaration, upvalues)
+        self.graph = graph
+
+    def __call__(self, interpreter: "Interpreter", arguments: list):
+        function = self
+        while True:
+            completion = cast(CFGInterpreter, interpreter).run(
+                function.graph, function.bind(arguments)
+            )
+            # Igual que en Function.__call__, las tail calls se hacen acá
+            if type(completion) is TailCall:
+                callee, arguments = completion.function, completion.arguments
+                if not isinstance(callee, GraphFunction):
+                    return callee(interpreter, arguments)
+                function = callee
+                continue
+            if completion is not None:
+                return completion[0]
+            return None
+
+
+# Ejecuta el programa bajado a grafos de flujo de control (plox --cfg): recorre
+# los bloques básicos siguiendo los saltos, en vez de recorrer el árbol.
+# Las expresiones y las declaraciones se evalúan igual que en el intérprete,
+# con las anotaciones del resolvedor: los scopes se abren y se cierran con las
+# instrucciones EnterScope y ExitScope
+class CFGInterpreter(Interpreter):
+    def __init__(self):
+        super().__init__()
+        # El valor que muestra el REPL
+        self.echo: object = None
+
+    def interpret(self, statements: list[Stmt]):
+        graph = Lowering().lower(statements)
+        self.echo = None
+        completion = self.run(graph, self.env)
+        if completion is not None:
+            # Un return por fuera de una función
+            raise ReturnValue(completion[0])
+        return self.echo
+
+    # Ejecuta el grafo en el entorno dado. Devuelve lo mismo que
+    # Interpreter.execute: None, (valor,) o una TailCall
+    def run(self, graph: ControlFlowGraph, env: Env):
+        previous_env = self.env
+        self.env = env
+        try:
+            block = graph.entry
+            while True:
+                for instruction in block.instructions:
+                    self.step(instruction)
+                terminator = block.terminator
+                if isinstance(terminator, Jump):
+                    block = terminator.target
+                elif isinstance(terminator, Branch):
+                    if self.is_truthy(self.evaluate(terminator.condition)):
+                        block = terminator.then_block
+                    else:
+                        block = terminator.else_block
+                else:
+                    return self.complete(cast(Return, terminator))
+        finally:
+            self.env = previous_env
+
+    def complete(self, terminator: Return):
+        statement = terminator.statement
+        if statement is None:
+            return None
+        if statement.tail_call:
+            callee, arguments = self.prepare_call(cast(CallExpr, statement.value))
+            return TailCall(callee, arguments)
+        if statement.value is None:
+            return (None,)
+        return (self.evaluate(statement.value),)
+
+    @singledispatchmethod
+    def step(self, instruction: Instruction):
+        raise RuntimeError(f"Unknown instruction type: `{type(instruction)}`")
+
+    @step.register
+    def _(self, instruction: Evaluate):
+        value = self.evaluate(instruction.expression)
+        if instruction.echo:
+            self.echo = value
+
+    @step.register
+    def _(self, instruction: Print):
+        print(self.evaluate(instruction.expression))
+
+    @step.register
+    def _(self, instruction: Declare):
+        self.execute(instruction.declaration)
+
+    @step.register
+    def _(self, instruction: Closure):
+        statement = instruction.declaration
+        # Igual que Interpreter.execute(FunDecl)
+        cell = None
+        if statement.slot is not None and statement.captured:
+            cell = Cell(UNDEFINED)
+            self.env.define(statement.slot, cell)
+        upvalues = [self.cell(variable) for variable in statement.captures]
+        fun = GraphFunction(instruction.graph, upvalues)
+        if cell is not None:
+            cell.value = fun
+        else:
+            self.define(statement, fun)
+
+    @step.register
+    def _(self, instruction: EnterScope):
+        self.env = Env(instruction.block.scope_size, enclosing=self.env)
+
+    @step.register
+    def _(self, instruction: ExitScope):
+        assert self.env.enclosing is not None
+        self.env = self.env.enclosing
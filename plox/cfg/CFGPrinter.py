@@ -0,0 +1,142 @@
+from functools import singledispatchmethod
+
+from ..Stmt import Stmt, ExpressionStmt, PrintStmt
+from ..optimizer.SourcePrinter import SourcePrinter
+from .CFG import (
+    Instruction,
+    Evaluate,
+    Print,
+    Declare,
+    Closure,
+    EnterScope,
+    ExitScope,
+    Jump,
+    Branch,
+    Return,
+    ControlFlowGraph,
+)
+from .Dataflow import Liveness
+
+# Desde qué columna se muestran las variables que lee y escribe cada instrucción
+COLUMN = 36
+
+
+# Muestra los grafos como texto (plox --dump-cfg): cada función con sus
+# bloques básicos, y cada bloque con sus predecesores y las variables vivas al
+# entrar. Al lado de cada instrucción, las variables que escribe y que lee:
+#   <script>:
+#     B0:
+#       var i = 0;                      defs i
+#       jump B1
+#     B1:  ; preds B0, B2; live i
+#       branch i < 3 ? B2 : B3          uses i
+class CFGPrinter(object):
+    def __init__(self):
+        self.source = SourcePrinter()
+
+    def print(self, graph: ControlFlowGraph) -> str:
+        return "\n".join(self.lines(graph))
+
+    def lines(self, graph: ControlFlowGraph) -> list[str]:
+        liveness = Liveness(graph)
+        if graph.declaration is None:
+            lines = [f"{graph.name}:"]
+        else:
+            params = ", ".join(str(param) for param in graph.parameters)
+            lines = [f"fun {graph.name}({params}):"]
+
+        for block in graph.blocks:
+            notes = []
+            if block.predecessors:
+                preds = sorted(block.predecessors, key=lambda p: p.index)
+                notes.append(f"preds {', '.join(map(str, preds))}")
+            if liveness.live_in[block]:
+                notes.append(f"live {self.names(liveness.live_in[block])}")
+            header = f"  {block}:"
+            if notes:
+                header += f"  ; {'; '.join(notes)}"
+            lines.append(header)
+
+            for instruction in liveness.instructions(block):
+                line = f"    {self.format(instruction)}"
+                effects = self.effects(instruction)
+                if effects:
+                    line = f"{line:<{COLUMN - 1}} {effects}"
+                lines.append(line.rstrip())
+
+        for function in graph.functions:
+            lines += ["", *self.lines(function)]
+        return lines
+
+    def names(self, items: list | set) -> str:
+        return ", ".join(sorted(str(item) for item in items))
+
+    def effects(self, instruction: Instruction) -> str:
+        parts = []
+        if instruction.defs:
+            defs = self.names(instruction.defs)
+            # Las escrituras que pueden no hacerse, entre corchetes
+            maybe = instruction.defs - instruction.kills
+            if maybe:
+                defs = ", ".join(
+                    f"[{v}]" if v in maybe else str(v)
+                    for v in sorted(instruction.defs, key=str)
+                )
+            parts.append(f"defs {defs}")
+        if instruction.uses:
+            parts.append(f"uses {self.names(instruction.uses)}")
+        if instruction.calls:
+            parts.append("calls")
+        return "  ".join(parts)
+
+    @singledispatchmethod
+    def format(self, instruction: Instruction) -> str:
+        raise RuntimeError(f"Unknown instruction type: `{type(instruction)}`")
+
+    @format.register
+    def _(self, instruction: Evaluate) -> str:
+        line = self.source.lines(self.statement(instruction))[0]
+        return f"{line}  ; echo" if instruction.echo else line
+
+    @format.register
+    def _(self, instruction: Print | Declare) -> str:
+        return self.source.lines(self.statement(instruction))[0]
+
+    @format.register
+    def _(self, instruction: Closure) -> str:
+        params = ", ".join(str(param) for param in instruction.graph.parameters)
+        return f"closure {instruction.declaration.name.lexeme}({params})"
+
+    @format.register
+    def _(self, instruction: EnterScope) -> str:
+        size = instruction.block.scope_size
+        return f"enter scope ({size} slot{'s' if size > 1 else ''})"
+
+    @format.register
+    def _(self, instruction: ExitScope) -> str:
+        return "exit scope"
+
+    @format.register
+    def _(self, instruction: Jump) -> str:
+        return f"jump {instruction.target}"
+
+    @format.register
+    def _(self, instruction: Branch) -> str:
+        condition = self.source.bare(instruction.condition)
+        return (
+            f"branch {condition} ? {instruction.then_block} : {instruction.else_block}"
+        )
+
+    @format.register
+    def _(self, instruction: Return) -> str:
+        if instruction.statement is None:
+            return "return (end)"
+        return self.source.lines(instruction.statement)[0]
+
+    def statement(self, instruction: Evaluate | Print | Declare) -> Stmt:
+        match instruction:
+            case Evaluate():
+                return ExpressionStmt(instruction.expression)
+            case Print():
+                return PrintStmt(instruction.expression)
+        return instruction.declaration
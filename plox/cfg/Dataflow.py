@@ -0,0 +1,163 @@
+from .CFG import Variable, Instruction, Return, BasicBlock, ControlFlowGraph
+
+
+# Los análisis de flujo de datos sobre el grafo de una función. Se calculan
+# por bloque, repitiendo hasta que ningún bloque cambie, y después se pueden
+# consultar por instrucción.
+# Las variables que escapan (globales, o locales que usa alguna clausura) las
+# puede leer o escribir cualquier llamada, y siguen vivas después del return
+
+
+# Una escritura de una variable: la instrucción que la hace, o None si la
+# variable ya tiene un valor al entrar a la función (los parámetros, y las
+# variables que escapan)
+class Definition(object):
+    def __init__(self, variable: Variable, instruction: Instruction | None):
+        self.variable = variable
+        self.instruction = instruction
+
+    def __repr__(self) -> str:
+        if self.instruction is None:
+            return f"{self.variable}@entry"
+        return f"{self.variable}@{type(self.instruction).__name__}"
+
+
+class Dataflow(object):
+    def __init__(self, graph: ControlFlowGraph):
+        self.graph = graph
+        self.escaping = graph.escaping()
+
+    def instructions(self, block: BasicBlock) -> list[Instruction]:
+        if block.terminator is None:
+            return block.instructions
+        return [*block.instructions, block.terminator]
+
+    # Las variables que la instrucción puede leer
+    def uses(self, instruction: Instruction) -> set[Variable]:
+        if instruction.calls or isinstance(instruction, Return):
+            return instruction.uses | self.escaping
+        return instruction.uses
+
+    # Las variables que la instrucción puede escribir
+    def defs(self, instruction: Instruction) -> set[Variable]:
+        if instruction.calls:
+            return instruction.defs | self.escaping
+        return instruction.defs
+
+
+# Las variables vivas en cada punto: las que se pueden leer más adelante antes
+# de volver a escribirse. Una variable que no está viva después de una
+# escritura, se escribió para nada
+class Liveness(Dataflow):
+    def __init__(self, graph: ControlFlowGraph):
+        super().__init__(graph)
+        self.live_in: dict[BasicBlock, set[Variable]] = {}
+        self.live_out: dict[BasicBlock, set[Variable]] = {}
+        for block in graph.blocks:
+            self.live_in[block] = set()
+            self.live_out[block] = set()
+
+        changed = True
+        while changed:
+            changed = False
+            for block in reversed(graph.blocks):
+                live_out: set[Variable] = set()
+                for successor in block.successors():
+                    live_out |= self.live_in[successor]
+                live_in = self.before(block, live_out)[0]
+                if live_in != self.live_in[block] or live_out != self.live_out[block]:
+                    self.live_in[block] = live_in
+                    self.live_out[block] = live_out
+                    changed = True
+
+    # Las variables vivas antes de cada instrucción del bloque (con el terminador)
+    def before(self, block: BasicBlock, live_out: set[Variable]) -> list[set[Variable]]:
+        instructions = self.instructions(block)
+        result = []
+        live = live_out
+        for instruction in reversed(instructions):
+            live = (live - instruction.kills) | self.uses(instruction)
+            result.append(live)
+        result.reverse()
+        return result or [live_out]
+
+    # Las variables vivas después de cada instrucción del bloque
+    def after(self, block: BasicBlock) -> list[set[Variable]]:
+        return self.before(block, self.live_out[block])[1:] + [self.live_out[block]]
+
+
+# Las escrituras que pueden llegar a cada punto sin que otra escritura de la
+# misma variable las tape. Si a una lectura llega una sola, se sabe de dónde
+# viene el valor
+class ReachingDefinitions(Dataflow):
+    def __init__(self, graph: ControlFlowGraph):
+        super().__init__(graph)
+        self.definitions: dict[tuple[int, Variable], Definition] = {}
+        entry = {
+            self.definition(variable, None)
+            for variable in set(graph.parameters) | self.escaping
+        }
+        self.reach_in: dict[BasicBlock, set[Definition]] = {}
+        self.reach_out: dict[BasicBlock, set[Definition]] = {}
+        for block in graph.blocks:
+            self.reach_in[block] = set()
+            self.reach_out[block] = set()
+
+        changed = True
+        while changed:
+            changed = False
+            for block in graph.blocks:
+                reach_in = set(entry) if block is graph.entry else set()
+                for predecessor in block.predecessors:
+                    reach_in |= self.reach_out[predecessor]
+                reach_out = self.after(block, reach_in)[-1]
+                if (
+                    reach_in != self.reach_in[block]
+                    or reach_out != self.reach_out[block]
+                ):
+                    self.reach_in[block] = reach_in
+                    self.reach_out[block] = reach_out
+                    changed = True
+
+    # Cada escritura es un único objeto, así los conjuntos se pueden comparar
+    def definition(
+        self, variable: Variable, instruction: Instruction | None
+    ) -> Definition:
+        key = (id(instruction), variable)
+        if key not in self.definitions:
+            self.definitions[key] = Definition(variable, instruction)
+        return self.definitions[key]
+
+    # Las escrituras que llegan después de cada instrucción del bloque
+    def after(
+        self, block: BasicBlock, reach_in: set[Definition]
+    ) -> list[set[Definition]]:
+        result = []
+        reaching = reach_in
+        for instruction in self.instructions(block):
+            reaching = {
+                definition
+                for definition in reaching
+                if definition.variable not in instruction.kills
+            } | {
+                self.definition(variable, instruction)
+                for variable in self.defs(instruction)
+            }
+            result.append(reaching)
+        return result or [reach_in]
+
+    # Las escrituras que llegan antes de cada instrucción del bloque
+    def before(self, block: BasicBlock) -> list[set[Definition]]:
+        reach_in = self.reach_in[block]
+        return [reach_in] + self.after(block, reach_in)[:-1]
+
+    # Las escrituras de la variable que pueden llegar a la instrucción
+    def reaching(
+        self, block: BasicBlock, instruction: Instruction, variable: Variable
+    ) -> set[Definition]:
+        index = self.instructions(block).index(instruction)
+        return {
+            definition
+            for definition in self.before(block)[index]
+            if definition.variable is variable
+        }
@@ -0,0 +1,272 @@
+from functools import singledispatchmethod
+
+from ..Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ReturnStmt,
+)
+from ..Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+from ..Purity import is_global
+from .CFG import (
+    Variable,
+    Instruction,
+    Evaluate,
+    Print,
+    Declare,
+    Closure,
+    EnterScope,
+    ExitScope,
+    Jump,
+    Branch,
+    Return,
+    Terminator,
+    BasicBlock,
+    ControlFlowGraph,
+)
+
+
+# Baja el árbol ya resuelto a un grafo de flujo de control por función: los
+# ifs y whiles (y los fors, que el parser ya convirtió en whiles) pasan a ser
+# saltos entre bloques básicos, y cada instrucción anota qué variables lee y
+# escribe. Las expresiones quedan como están, con las anotaciones del
+# resolvedor: un and/or es parte de la instrucción que lo evalúa
+class Lowering(object):
+    def __init__(self):
+        self.graph: ControlFlowGraph
+        self.block: BasicBlock
+        # Las variables locales, por la declaración que las crea: una VarDecl,
+        # una FunDecl, o el token de un parámetro
+        self.locals: dict[object, Variable] = {}
+        self.globals: dict[str, Variable] = {}
+        # Los parámetros de las funciones que se están bajando, de la más
+        # externa a la más interna
+        self.parameters: list[dict[str, Variable]] = []
+        # La variable de cada acceso, asignación y declaración que se bajó
+        self.references: dict[object, Variable] = {}
+
+    def lower(self, statements: list[Stmt]) -> ControlFlowGraph:
+        self.graph = ControlFlowGraph(None)
+        self.block = self.graph.entry
+        for i, statement in enumerate(statements):
+            # El REPL muestra el valor del script si termina en una expresión
+            if i == len(statements) - 1 and isinstance(statement, ExpressionStmt):
+                expression = statement.expression
+                self.emit(Evaluate(expression, echo=True), expression)
+            else:
+                self.lower_stmt(statement)
+        self.terminate(Return(None))
+        return self.finish(self.graph)
+
+    def lower_function(self, declaration: FunDecl) -> ControlFlowGraph:
+        enclosing, block = self.graph, self.block
+        self.graph = ControlFlowGraph(declaration)
+        self.block = self.graph.entry
+        enclosing.functions.append(self.graph)
+
+        parameters = {}
+        for slot, param in enumerate(declaration.parameters):
+            variable = Variable(
+                param.lexeme, self.graph, slot in declaration.captured_params
+            )
+            self.locals[param] = parameters[param.lexeme] = variable
+            self.graph.parameters.append(variable)
+        self.parameters.append(parameters)
+        for statement in declaration.body:
+            self.lower_stmt(statement)
+        self.terminate(Return(None))
+        self.parameters.pop()
+
+        graph = self.finish(self.graph)
+        self.graph, self.block = enclosing, block
+        return graph
+
+    def finish(self, graph: ControlFlowGraph) -> ControlFlowGraph:
+        graph.simplify()
+        seen: dict[str, int] = {}
+        for variable in graph.parameters + graph.variables:
+            count = seen[variable.name] = seen.get(variable.name, 0) + 1
+            if count > 1:
+                variable.label = f"{variable.name}#{count}"
+        return graph
+
+    # ---------- Bloques e instrucciones ---------- #
+
+    def emit(self, instruction: Instruction, *expressions: Expr | None):
+        for expression in expressions:
+            if expression is not None:
+                self.effects(instruction, expression, True)
+        self.block.instructions.append(instruction)
+
+    # Termina el bloque actual. Lo que se baje después (ej: lo que sigue a un
+    # return) va a un bloque nuevo, al que no se llega
+    def terminate(self, terminator: Terminator, *expressions: Expr | None):
+        for expression in expressions:
+            if expression is not None:
+                self.effects(terminator, expression, True)
+        self.block.terminator = terminator
+        self.block = self.graph.new_block()
+
+    # Anota en la instrucción las variables que lee y escribe la expresión.
+    # `definite` indica si la expresión se evalúa siempre que se ejecuta la
+    # instrucción (no está del lado derecho de un and/or)
+    def effects(self, instruction: Instruction, expression: Expr, definite: bool):
+        match expression:
+            case VariableExpr():
+                instruction.uses.add(self.variable(expression))
+            case AssignmentExpr():
+                self.effects(instruction, expression.value, definite)
+                variable = self.variable(expression)
+                instruction.defs.add(variable)
+                if definite:
+                    instruction.kills.add(variable)
+            case LogicExpr():
+                self.effects(instruction, expression.left, definite)
+                self.effects(instruction, expression.right, False)
+            case CallExpr():
+                self.effects(instruction, expression.callee, definite)
+                for argument in expression.arguments:
+                    self.effects(instruction, argument, definite)
+                instruction.calls = True
+            case GroupingExpr():
+                self.effects(instruction, expression.expression, definite)
+            case UnaryExpr():
+                self.effects(instruction, expression.right, definite)
+            case BinaryExpr():
+                self.effects(instruction, expression.left, definite)
+                self.effects(instruction, expression.right, definite)
+
+    # La variable a la que se refiere un acceso ya resuelto
+    def variable(self, expression: VariableExpr | AssignmentExpr) -> Variable:
+        variable = self.find(expression)
+        self.references[expression] = variable
+        return variable
+
+    def find(self, expression: VariableExpr | AssignmentExpr) -> Variable:
+        name = expression.name.lexeme
+        if is_global(expression):
+            return self.global_variable(name)
+        if expression.declaration is not None:
+            return self.locals[expression.declaration]
+        # Las locales sin declaración son parámetros, de la función más
+        # interna que tenga uno con ese nombre
+        for parameters in reversed(self.parameters):
+            if name in parameters:
+                return parameters[name]
+        # Si el resolvedor está bien hecho, esto no debería pasar nunca!
+        raise RuntimeError(f"Cannot lower unresolved variable '{name}'")
+
+    def global_variable(self, name: str) -> Variable:
+        if name not in self.globals:
+            self.globals[name] = Variable(name, None)
+        return self.globals[name]
+
+    def declare(self, declaration: VarDecl | FunDecl) -> Variable:
+        if declaration.slot is None:
+            variable = self.global_variable(declaration.name.lexeme)
+        else:
+            variable = Variable(
+                declaration.name.lexeme, self.graph, declaration.captured
+            )
+            self.locals[declaration] = variable
+            self.graph.variables.append(variable)
+        self.references[declaration] = variable
+        return variable
+
+    # ---------- Statements ---------- #
+
+    @singledispatchmethod
+    def lower_stmt(self, statement: Stmt):
+        raise RuntimeError(f"Unknown statement type: `{type(statement)}`")
+
+    @lower_stmt.register
+    def _(self, statement: ExpressionStmt):
+        self.emit(Evaluate(statement.expression), statement.expression)
+
+    @lower_stmt.register
+    def _(self, statement: PrintStmt):
+        self.emit(Print(statement.expression), statement.expression)
+
+    @lower_stmt.register
+    def _(self, statement: VarDecl):
+        # La variable existe desde antes del inicializador, que puede asignarla:
+        # `var x = (x = 1);`
+        variable = self.declare(statement)
+        instruction = Declare(statement)
+        instruction.defs.add(variable)
+        instruction.kills.add(variable)
+        self.emit(instruction, statement.initializer)
+
+    @lower_stmt.register
+    def _(self, statement: FunDecl):
+        variable = self.declare(statement)
+        instruction = Closure(statement, self.lower_function(statement))
+        # Crear la función lee las variables que captura
+        for capture in statement.captures:
+            instruction.uses.add(self.variable(capture))
+        instruction.defs.add(variable)
+        instruction.kills.add(variable)
+        self.emit(instruction)
+
+    @lower_stmt.register
+    def _(self, statement: BlockStmt):
+        # Igual que en el intérprete, un bloque que no declara variables no
+        # tiene entorno propio
+        if statement.scope_size > 0:
+            self.emit(EnterScope(statement))
+        for s in statement.statements:
+            self.lower_stmt(s)
+        if statement.scope_size > 0:
+            self.emit(ExitScope(statement))
+
+    @lower_stmt.register
+    def _(self, statement: IfStmt):
+        then_block = self.graph.new_block()
+        join = self.graph.new_block()
+        else_block = join
+        if statement.else_branch is not None:
+            else_block = self.graph.new_block()
+        self.terminate(
+            Branch(statement.condition, then_block, else_block), statement.condition
+        )
+
+        self.block = then_block
+        self.lower_stmt(statement.then_branch)
+        self.terminate(Jump(join))
+        if statement.else_branch is not None:
+            self.block = else_block
+            self.lower_stmt(statement.else_branch)
+            self.terminate(Jump(join))
+        self.block = join
+
+    @lower_stmt.register
+    def _(self, statement: WhileStmt):
+        header = self.graph.new_block()
+        body = self.graph.new_block()
+        exit = self.graph.new_block()
+        self.terminate(Jump(header))
+
+        self.block = header
+        self.terminate(Branch(statement.condition, body, exit), statement.condition)
+        self.block = body
+        self.lower_stmt(statement.body)
+        self.terminate(Jump(header))
+        self.block = exit
+
+    @lower_stmt.register
+    def _(self, statement: ReturnStmt):
+        self.terminate(Return(statement), statement.value)
@@ -0,0 +1,237 @@
+from copy import deepcopy
+
+from ..Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+)
+from ..Expr import UnaryExpr
+from ..Token import Token, TokenType
+from .CFG import (
+    Instruction,
+    Evaluate,
+    Print,
+    Declare,
+    Closure,
+    EnterScope,
+    ExitScope,
+    Jump,
+    Branch,
+    Return,
+    BasicBlock,
+    ControlFlowGraph,
+)
+
+
+# Vuelve a armar el árbol a partir del grafo, para seguir con el resto de plox
+# (el resolvedor, cualquier backend) después de transformar el grafo.
+# Funciona con los grafos que salen de Lowering, aunque después se les cambien
+# las instrucciones o se saquen bloques: cada loop tiene una sola entrada, su
+# header, y la salida de cada if es el primer bloque por el que pasan sus dos
+# ramas (sin contar las que terminan en un return).
+# El árbol que devuelve no está resuelto
+class Raising(object):
+    def __init__(self):
+        self.graph: ControlFlowGraph
+        # Los headers de los loops, con los bloques de cada loop
+        self.loops: dict[BasicBlock, set[BasicBlock]] = {}
+        # Dónde se juntan las dos ramas de cada branch, si es que se juntan
+        self.joins: dict[BasicBlock, BasicBlock | None] = {}
+        self.raised: set[BasicBlock] = set()
+
+    def raise_graph(self, graph: ControlFlowGraph) -> list[Stmt]:
+        self.graph = graph
+        self.loops = self.find_loops()
+        self.joins = self.find_joins()
+        self.raised = set()
+        return self.region(graph.entry, set())
+
+    # Los statements desde el bloque hasta llegar a alguno de los bloques de
+    # `stops` (la salida del if que se está armando, o el header del loop),
+    # o hasta un return
+    def region(self, block: BasicBlock | None, stops: set[BasicBlock]) -> list[Stmt]:
+        # Cada EnterScope abre un bloque, hasta su ExitScope
+        scopes: list[list[Stmt]] = [[]]
+        while block is not None and block not in stops:
+            if block in self.raised:
+                raise RuntimeError(f"Cannot raise unstructured control flow at {block}")
+            self.raised.add(block)
+
+            statements = self.statements(block.instructions, scopes)
+            terminator = block.terminator
+            if block in self.loops:
+                assert isinstance(terminator, Branch)
+                block = self.loop(block, terminator, statements, stops, scopes)
+            elif isinstance(terminator, Jump):
+                block = terminator.target
+            elif isinstance(terminator, Branch):
+                join = self.joins[block]
+                inner = stops | {join} if join is not None else stops
+                then_branch = self.region(terminator.then_block, inner)
+                else_branch = self.region(terminator.else_block, inner)
+                scopes[-1].append(
+                    IfStmt(
+                        terminator.condition,
+                        self.branch(then_branch),
+                        self.branch(else_branch) if else_branch else None,
+                    )
+                )
+                block = join
+            elif isinstance(terminator, Return):
+                if terminator.statement is not None:
+                    scopes[-1].append(terminator.statement)
+                block = None
+
+        # Un return sale de todos los bloques abiertos
+        while len(scopes) > 1:
+            statements = scopes.pop()
+            scopes[-1].append(BlockStmt(statements))
+        return scopes[0]
+
+    # Un loop: lo que calcula el header se repite antes de cada vuelta
+    def loop(
+        self,
+        header: BasicBlock,
+        terminator: Branch,
+        statements: list[Stmt],
+        stops: set[BasicBlock],
+        scopes: list[list[Stmt]],
+    ) -> BasicBlock:
+        condition = terminator.condition
+        body, exit = terminator.then_block, terminator.else_block
+        if body not in self.loops[header]:
+            body, exit = exit, body
+            condition = UnaryExpr(
+                Token(TokenType.BANG, lexeme="!", literal=None, line=0), condition
+            )
+        raised = self.region(body, stops | {header})
+        scopes[-1].append(
+            WhileStmt(condition, self.branch(raised + deepcopy(statements)))
+        )
+        return exit
+
+    def statements(
+        self, instructions: list[Instruction], scopes: list[list[Stmt]]
+    ) -> list[Stmt]:
+        start = len(scopes[-1])
+        for instruction in instructions:
+            match instruction:
+                case Evaluate():
+                    scopes[-1].append(ExpressionStmt(instruction.expression))
+                case Print():
+                    scopes[-1].append(PrintStmt(instruction.expression))
+                case Declare():
+                    scopes[-1].append(instruction.declaration)
+                case Closure():
+                    declaration = instruction.declaration
+                    body = Raising().raise_graph(instruction.graph)
+                    scopes[-1].append(
+                        FunDecl(declaration.name, declaration.parameters, body)
+                    )
+                case EnterScope():
+                    scopes.append([])
+                case ExitScope():
+                    if len(scopes) == 1:
+                        raise RuntimeError(
+                            "Cannot raise a scope opened in another region"
+                        )
+                    block = scopes.pop()
+                    scopes[-1].append(BlockStmt(block))
+        return scopes[-1][start:]
+
+    # La rama de un if o el cuerpo de un while. Un único statement va solo: si
+    # es una declaración, es del scope de afuera (`if (c) var x = 1;`)
+    def branch(self, statements: list[Stmt]) -> Stmt:
+        if len(statements) == 1:
+            return statements[0]
+        return BlockStmt(statements)
+
+    # ---------- Análisis del grafo ---------- #
+
+    # Los loops: cada arista que vuelve a un bloque que está en el camino
+    # desde la entrada vuelve al header de un loop. El loop son los bloques
+    # desde los que se llega a esa arista sin pasar por el header
+    def find_loops(self) -> dict[BasicBlock, set[BasicBlock]]:
+        loops: dict[BasicBlock, set[BasicBlock]] = {}
+        on_path: set[BasicBlock] = set()
+        visited: set[BasicBlock] = set()
+        # Un DFS iterativo: cada elemento es el bloque y los sucesores que le faltan
+        pending = [(self.graph.entry, iter(self.graph.entry.successors()))]
+        on_path.add(self.graph.entry)
+        visited.add(self.graph.entry)
+        while pending:
+            block, successors = pending[-1]
+            successor = next(successors, None)
+            if successor is None:
+                pending.pop()
+                on_path.discard(block)
+            elif successor in on_path:
+                loop = loops.setdefault(successor, {successor})
+                inside = [block]
+                while inside:
+                    member = inside.pop()
+                    if member not in loop:
+                        loop.add(member)
+                        inside.extend(member.predecessors)
+            elif successor not in visited:
+                visited.add(successor)
+                on_path.add(successor)
+                pending.append((successor, iter(successor.successors())))
+        return loops
+
+    # El post-dominador inmediato de cada branch: el primer bloque por el que
+    # pasan todos los caminos que siguen hasta el final de la función. Los
+    # caminos que terminan en un return del programa no cuentan (salvo que
+    # no haya otra salida): en el árbol, esa rama sale de la función sin
+    # llegar a la salida del if
+    def find_joins(self) -> dict[BasicBlock, BasicBlock | None]:
+        blocks = self.graph.blocks
+        everything = frozenset(blocks)
+        exits = [
+            block
+            for block in blocks
+            if isinstance(block.terminator, Return)
+            and block.terminator.statement is None
+        ]
+        # Si la función termina con un return, no llega al final: la salida es
+        # cualquier return
+        if not exits:
+            exits = [block for block in blocks if isinstance(block.terminator, Return)]
+        postdominators: dict[BasicBlock, frozenset[BasicBlock]] = {}
+        for block in blocks:
+            if block in exits:
+                postdominators[block] = frozenset({block})
+            else:
+                postdominators[block] = everything
+
+        changed = True
+        while changed:
+            changed = False
+            for block in reversed(blocks):
+                successors = block.successors()
+                if not successors:
+                    continue
+                common = everything
+                for successor in successors:
+                    common = common & postdominators[successor]
+                result = common | {block}
+                if result != postdominators[block]:
+                    postdominators[block] = result
+                    changed = True
+
+        joins: dict[BasicBlock, BasicBlock | None] = {}
+        for block in blocks:
+            if not isinstance(block.terminator, Branch):
+                continue
+            candidates = postdominators[block] - {block}
+            joins[block] = None
+            if postdominators[block] == everything:
+                continue
+            for candidate in candidates:
+                if postdominators[candidate] == candidates:
+                    joins[block] = candidate
+        return joins
@@ -0,0 +1,279 @@
+from functools import singledispatchmethod
+
+from ..Stmt import Stmt
+from ..Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+    NumberBinaryExpr,
+    StringBinaryExpr,
+    NumberUnaryExpr,
+)
+from ..Token import TokenType
+from ..Walk import walk
+from .CFG import (
+    Variable,
+    Instruction,
+    Evaluate,
+    Print,
+    Declare,
+    Closure,
+    EnterScope,
+    ExitScope,
+    Jump,
+    Branch,
+    Return,
+    BasicBlock,
+    ControlFlowGraph,
+)
+from .Lowering import Lowering
+
+# El tipo de un valor es el conjunto de los tipos de Lox que puede tener
+Type = frozenset[str]
+NUMBER: Type = frozenset({"number"})
+STRING: Type = frozenset({"string"})
+BOOL: Type = frozenset({"bool"})
+NIL: Type = frozenset({"nil"})
+FUNCTION: Type = frozenset({"function"})
+ANY: Type = NUMBER | STRING | BOOL | NIL | FUNCTION
+
+# Los operadores que chequean el tipo de sus operandos
+ARITHMETIC = {
+    TokenType.PLUS,
+    TokenType.MINUS,
+    TokenType.STAR,
+    TokenType.SLASH,
+    TokenType.PERCENT,
+}
+COMPARISON = {
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+}
+
+# Los tipos conocidos de las variables en un punto del programa. Las que no
+# están pueden tener cualquier tipo
+State = dict[Variable, Type]
+
+
+# Infiere los tipos de las variables sobre el grafo de flujo de control de
+# cada función, siguiendo el orden en que se ejecuta: `var i = 0;` y después
+# `i = i + 1;` hacen que i sea siempre un número dentro del loop.
+# Donde puede probar que los operandos de un operador son números (o cadenas,
+# en un +), lo reemplaza por su versión especializada, que el intérprete
+# evalúa sin chequear tipos. El resto de los operadores quedan como estaban.
+# Los parámetros, los resultados de las llamadas y las variables que escapan
+# (globales o capturadas) después de una llamada pueden ser de cualquier tipo
+class TypeInference(object):
+    def __init__(self):
+        self.lowering = Lowering()
+        # Los operadores que chequean tipos, y la especialización que admite
+        # cada uno (None si en algún punto no se pudo probar)
+        self.sites: dict[Expr, type[Expr] | None] = {}
+        self.escaping: set[Variable] = set()
+        self.recording = False
+
+    # Especializa los operadores del programa ya resuelto. Como en
+    # Quickening.py, a cada operador se le cambia la clase por su versión
+    # especializada: el nodo es el mismo, con sus hijos y sus anotaciones, así
+    # que no hace falta volver a resolverlo, ni tocar a su padre (y el árbol
+    # se recorre sin recursión, por más anidado que esté)
+    def specialize(self, statements: list[Stmt]) -> list[Stmt]:
+        self.sites = {}
+        self.infer(self.lowering.lower(statements))
+        for node in walk(statements):
+            specialization = self.sites.get(node)
+            if specialization is not None:
+                node.__class__ = specialization
+        return statements
+
+    # Cuántos operadores que chequean tipos tiene el programa, y cuántos se
+    # especializaron
+    @property
+    def specialized(self) -> int:
+        return sum(1 for site in self.sites.values() if site is not None)
+
+    def infer(self, graph: ControlFlowGraph):
+        self.escaping = graph.escaping()
+        self.recording = False
+        entry = self.fixpoint(graph)
+        # Con los tipos a la entrada de cada bloque ya fijos, se anota qué
+        # operadores se pueden especializar
+        self.recording = True
+        for block in graph.blocks:
+            self.transfer(block, dict(entry[block]))
+        for function in graph.functions:
+            self.infer(function)
+
+    # Los tipos a la entrada de cada bloque, repitiendo hasta que no cambien.
+    # Donde se juntan dos caminos, cada variable puede tener el tipo de
+    # cualquiera de los dos
+    def fixpoint(self, graph: ControlFlowGraph) -> dict[BasicBlock, State]:
+        entry: dict[BasicBlock, State] = {graph.entry: {}}
+        pending = [graph.entry]
+        while pending:
+            block = pending.pop()
+            state = self.transfer(block, dict(entry[block]))
+            for successor in block.successors():
+                if successor not in entry:
+                    entry[successor] = dict(state)
+                else:
+                    merged = join(entry[successor], state)
+                    if merged == entry[successor]:
+                        continue
+                    entry[successor] = merged
+                pending.append(successor)
+        return entry
+
+    def transfer(self, block: BasicBlock, state: State) -> State:
+        for instruction in block.instructions:
+            self.step(instruction, state)
+        if block.terminator is not None:
+            self.step(block.terminator, state)
+        return state
+
+    # ---------- Instrucciones ---------- #
+
+    @singledispatchmethod
+    def step(self, instruction: Instruction, state: State):
+        raise RuntimeError(f"Unknown instruction type: `{type(instruction)}`")
+
+    @step.register
+    def _(self, instruction: Evaluate | Print, state: State):
+        self.typeof(instruction.expression, state)
+
+    @step.register
+    def _(self, instruction: Declare, state: State):
+        declaration = instruction.declaration
+        kind = NIL
+        if declaration.initializer is not None:
+            kind = self.typeof(declaration.initializer, state)
+        state[self.lowering.references[declaration]] = kind
+
+    @step.register
+    def _(self, instruction: Closure, state: State):
+        state[self.lowering.references[instruction.declaration]] = FUNCTION
+
+    @step.register
+    def _(self, instruction: EnterScope | ExitScope | Jump, state: State):
+        pass
+
+    @step.register
+    def _(self, instruction: Branch, state: State):
+        self.typeof(instruction.condition, state)
+
+    @step.register
+    def _(self, instruction: Return, state: State):
+        statement = instruction.statement
+        if statement is not None and statement.value is not None:
+            self.typeof(statement.value, state)
+
+    # ---------- Expresiones ---------- #
+
+    # El tipo de la expresión. Como las asignaciones se evalúan en orden,
+    # también actualiza los tipos de las variables que asigna
+    @singledispatchmethod
+    def typeof(self, expression: Expr, state: State) -> Type:
+        raise RuntimeError(f"Unknown expression type: `{type(expression)}`")
+
+    @typeof.register
+    def _(self, expression: LiteralExpr, state: State) -> Type:
+        value = expression.value
+        if value is None:
+            return NIL
+        if isinstance(value, bool):
+            return BOOL
+        if isinstance(value, str):
+            return STRING
+        return NUMBER
+
+    @typeof.register
+    def _(self, expression: GroupingExpr, state: State) -> Type:
+        return self.typeof(expression.expression, state)
+
+    @typeof.register
+    def _(self, expression: VariableExpr, state: State) -> Type:
+        return state.get(self.lowering.references[expression], ANY)
+
+    @typeof.register
+    def _(self, expression: AssignmentExpr, state: State) -> Type:
+        kind = self.typeof(expression.value, state)
+        state[self.lowering.references[expression]] = kind
+        return kind
+
+    @typeof.register
+    def _(self, expression: UnaryExpr, state: State) -> Type:
+        right = self.typeof(expression.right, state)
+        if expression.operator.token_type == TokenType.BANG:
+            return BOOL
+        self.record(expression, NumberUnaryExpr if right <= NUMBER else None)
+        return NUMBER
+
+    @typeof.register
+    def _(self, expression: BinaryExpr, state: State) -> Type:
+        left = self.typeof(expression.left, state)
+        right = self.typeof(expression.right, state)
+        operator = expression.operator.token_type
+        if operator not in ARITHMETIC and operator not in COMPARISON:
+            return BOOL
+
+        numbers = left <= NUMBER and right <= NUMBER
+        strings = left <= STRING and right <= STRING
+        if numbers:
+            self.record(expression, NumberBinaryExpr)
+        elif strings and operator == TokenType.PLUS:
+            self.record(expression, StringBinaryExpr)
+        else:
+            self.record(expression, None)
+
+        # Si el operador no falla, el resultado es de este tipo
+        if operator in COMPARISON:
+            return BOOL
+        if operator != TokenType.PLUS or numbers:
+            return NUMBER
+        if strings:
+            return STRING
+        return NUMBER | STRING
+
+    @typeof.register
+    def _(self, expression: LogicExpr, state: State) -> Type:
+        left = self.typeof(expression.left, state)
+        # El lado derecho puede no evaluarse
+        evaluated = dict(state)
+        right = self.typeof(expression.right, evaluated)
+        state.update(join(state, evaluated))
+        for variable in list(state):
+            if variable not in evaluated:
+                del state[variable]
+        return left | right
+
+    @typeof.register
+    def _(self, expression: CallExpr, state: State) -> Type:
+        self.typeof(expression.callee, state)
+        for argument in expression.arguments:
+            self.typeof(argument, state)
+        # La función llamada puede cambiar cualquier variable que escapa
+        for variable in self.escaping:
+            state.pop(variable, None)
+        return ANY
+
+    # Anota la especialización de un operador. Si en algún momento del
+    # análisis no se pudo probar, el operador queda sin especializar
+    def record(self, expression: Expr, specialization: type[Expr] | None):
+        if not self.recording:
+            return
+        if expression in self.sites and self.sites[expression] != specialization:
+            specialization = None
+        self.sites[expression] = specialization
+
+
+# Dos estados juntos: una variable tiene tipo conocido si lo tiene en los dos
+def join(a: State, b: State) -> State:
+    return {variable: a[variable] | b[variable] for variable in a if variable in b}
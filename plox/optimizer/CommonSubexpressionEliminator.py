@@ -0,0 +1,206 @@
+from functools import singledispatchmethod
+
+from ..Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    ReturnStmt,
+)
+from ..Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+from ..Walk import walk
+from .Pass import Pass, Temporaries, identifiers, pure_key, operators
+
+
+# Una expresión que se calcula más de una vez en un bloque básico
+class Subexpression(object):
+    def __init__(self, definition: Expr, statement: int):
+        # La primera vez que se calcula, y en qué statement del bloque
+        self.definition = definition
+        self.statement = statement
+        # Las veces siguientes, que pueden usar lo que se calculó la primera
+        self.uses: list[Expr] = []
+        # Las variables de las que depende, y si alguna la puede cambiar
+        # una llamada (globales o capturadas por una clausura)
+        self.variables = {
+            node.name.lexeme
+            for node in walk([definition])
+            if isinstance(node, VariableExpr)
+        }
+        self.volatile = any(
+            isinstance(node, VariableExpr) and (node.depth is None or node.captured)
+            for node in walk([definition])
+        )
+
+
+# Elimina las subexpresiones comunes: si en un bloque básico (una serie de
+# statements sin control de flujo, adentro de un bloque o de una función) se
+# calcula dos veces `a * b + c` y en el medio no cambia ninguna de sus variables,
+# la primera vez se guarda el resultado en una temporal y las siguientes se usa:
+#   { var cse0; print (cse0 = a * b + c); print cse0 - 1; }
+# La primera vez tiene que calcularse seguro antes que las otras (no puede estar
+# del lado derecho de un and/or), así si falla lo hace en el mismo lugar.
+# En el nivel global no se hace, para no agregarle variables al entorno global
+class CommonSubexpressionEliminator(Pass):
+    def __init__(self):
+        super().__init__()
+        self.temporaries = Temporaries("cse")
+        self.taken: set[str] = set()
+        # Las subexpresiones disponibles en el punto actual del bloque básico
+        self.available: dict[tuple, Subexpression] = {}
+        self.found: list[Subexpression] = []
+        self.statement = 0
+
+    def run(self, statements: list[Stmt]) -> list[Stmt]:
+        self.taken = identifiers(statements)
+        return super().run(statements)
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    @rewrite.register
+    def _(self, statement: BlockStmt) -> Stmt | None:
+        statement.statements = self.eliminate(statement.statements)
+        return self.traverse(statement)
+
+    @rewrite.register
+    def _(self, statement: FunDecl) -> Stmt | None:
+        statement.body = self.eliminate(statement.body)
+        return self.traverse(statement)
+
+    def eliminate(self, statements: list[Stmt]) -> list[Stmt]:
+        self.available = {}
+        self.found = []
+        for i, statement in enumerate(statements):
+            self.statement = i
+            match statement:
+                case ExpressionStmt() | PrintStmt():
+                    self.scan(statement.expression, True)
+                case VarDecl():
+                    if statement.initializer is not None:
+                        self.scan(statement.initializer, True)
+                    # Desde acá el nombre se refiere a otra variable
+                    self.kill(statement.name.lexeme)
+                case FunDecl():
+                    self.kill(statement.name.lexeme)
+                case ReturnStmt():
+                    if statement.value is not None:
+                        self.scan(statement.value, True)
+                case _:
+                    # Los ifs, whiles y bloques terminan el bloque básico
+                    self.available = {}
+
+        # Solo vale la pena si se ahorran al menos dos operaciones
+        found = [
+            subexpression
+            for subexpression in self.found
+            if operators(subexpression.definition) * len(subexpression.uses) >= 2
+        ]
+        if not found:
+            return statements
+
+        replacements: dict[int, Expr] = {}
+        declarations: dict[int, list[Stmt]] = {}
+        for subexpression in found:
+            name = self.temporaries.fresh(self.taken)
+            replacements[id(subexpression.definition)] = AssignmentExpr(
+                name, subexpression.definition
+            )
+            for use in subexpression.uses:
+                replacements[id(use)] = VariableExpr(name)
+            declarations.setdefault(subexpression.statement, []).append(
+                VarDecl(name, None)
+            )
+
+        replacing = Replacing(replacements)
+        result: list[Stmt] = []
+        for i, statement in enumerate(statements):
+            result.extend(declarations.get(i, []))
+            rewritten = replacing.rewrite(statement)
+            assert rewritten is not None
+            result.append(rewritten)
+        self.changed = True
+        return result
+
+    # Recorre la expresión en el orden en que se evalúa. `definite` indica si
+    # la expresión se evalúa siempre que se ejecuta el statement
+    def scan(self, expression: Expr, definite: bool):
+        match expression:
+            case UnaryExpr() | BinaryExpr() if key := pure_key(expression):
+                if key in self.available:
+                    self.available[key].uses.append(expression)
+                    return
+                for child in children(expression):
+                    self.scan(child, definite)
+                if definite:
+                    subexpression = Subexpression(expression, self.statement)
+                    self.available[key] = subexpression
+                    self.found.append(subexpression)
+            case LogicExpr():
+                self.scan(expression.left, definite)
+                self.scan(expression.right, False)
+            case AssignmentExpr():
+                self.scan(expression.value, definite)
+                self.kill(expression.name.lexeme)
+            case CallExpr():
+                self.scan(expression.callee, definite)
+                for argument in expression.arguments:
+                    self.scan(argument, definite)
+                # La función llamada puede cambiar globales y variables capturadas
+                self.available = {
+                    key: subexpression
+                    for key, subexpression in self.available.items()
+                    if not subexpression.volatile
+                }
+            case _:
+                for child in children(expression):
+                    self.scan(child, definite)
+
+    # Descarta las subexpresiones que dependen de una variable que cambió
+    def kill(self, name: str):
+        self.available = {
+            key: subexpression
+            for key, subexpression in self.available.items()
+            if name not in subexpression.variables
+        }
+
+
+def children(expression: Expr) -> list[Expr]:
+    match expression:
+        case GroupingExpr():
+            return [expression.expression]
+        case UnaryExpr():
+            return [expression.right]
+        case BinaryExpr():
+            return [expression.left, expression.right]
+    return []
+
+
+# Reemplaza las expresiones (por identidad) según la tabla. Las definiciones se
+# reemplazan después de reescribir sus hijos, que pueden ser a su vez
+# definiciones o usos de otras subexpresiones
+class Replacing(Pass):
+    def __init__(self, replacements: dict[int, Expr]):
+        super().__init__()
+        self.replacements = replacements
+
+    def rewrite(self, node: Stmt | Expr):
+        replacement = self.replacements.get(id(node))
+        if isinstance(replacement, VariableExpr):
+            return replacement
+        self.traverse(node)
+        if replacement is not None:
+            return replacement
+        return node
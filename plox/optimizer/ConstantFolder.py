@@ -0,0 +1,82 @@
+from functools import singledispatchmethod
+
+from ..Stmt import Stmt
+from ..Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    LogicExpr,
+)
+from ..Interpreter import Interpreter
+from ..Token import TokenType
+from .Pass import Pass
+
+
+# Calcula en tiempo de compilación las operaciones cuyos operandos son literales,
+# ej: `1 + 2 * 3` queda como `<7.0>`, y `"a" + "b"` como `<"ab">`.
+# Los operadores son los mismos del intérprete, así que el resultado es
+# exactamente el que daría en tiempo de ejecución. Si la operación falla
+# (ej: `1 / 0` o `"a" + 1`) se deja como está: el error se tiene que levantar
+# cuando se ejecuta, no antes
+class ConstantFolder(Pass):
+    def __init__(self):
+        super().__init__()
+        self.operators = Interpreter()
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    # Los paréntesis solo sirven para armar el árbol, así que los sacamos
+    @rewrite.register
+    def _(self, expression: GroupingExpr) -> Expr:
+        return self.replace(self.rewrite(expression.expression))
+
+    @rewrite.register
+    def _(self, expression: UnaryExpr) -> Expr:
+        expression.right = self.rewrite(expression.right)
+        if not isinstance(expression.right, LiteralExpr):
+            return expression
+
+        try:
+            value = self.operators.unary(expression.operator, expression.right.value)
+        except RuntimeError:
+            return expression
+        return self.replace(LiteralExpr(value))
+
+    @rewrite.register
+    def _(self, expression: BinaryExpr) -> Expr:
+        expression.left = self.rewrite(expression.left)
+        expression.right = self.rewrite(expression.right)
+        if not isinstance(expression.left, LiteralExpr) or not isinstance(
+            expression.right, LiteralExpr
+        ):
+            return expression
+
+        try:
+            value = self.operators.binary(
+                expression.operator, expression.left.value, expression.right.value
+            )
+        except RuntimeError:
+            return expression
+        return self.replace(LiteralExpr(value))
+
+    # Con el operando izquierdo literal ya sabemos cuál de los dos es el resultado,
+    # aunque el derecho no sea constante: `true or x` es `true`, `nil or x` es `x`
+    @rewrite.register
+    def _(self, expression: LogicExpr) -> Expr:
+        expression.left = self.rewrite(expression.left)
+        expression.right = self.rewrite(expression.right)
+        if not isinstance(expression.left, LiteralExpr):
+            return expression
+
+        truthy = self.operators.is_truthy(expression.left.value)
+        if expression.operator.token_type == TokenType.OR:
+            short_circuits = truthy
+        else:
+            short_circuits = not truthy
+        if short_circuits:
+            return self.replace(expression.left)
+        return self.replace(expression.right)
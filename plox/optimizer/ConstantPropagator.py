@@ -0,0 +1,51 @@
+from functools import singledispatchmethod
+
+from ..Stmt import Stmt, VarDecl
+from ..Expr import Expr, LiteralExpr, VariableExpr, AssignmentExpr
+from ..Walk import walk
+from .Pass import Pass, branch_declarations
+
+
+# Reemplaza las lecturas de variables locales que siempre valen lo mismo
+# por su valor: si `var x = 2;` nunca se reasigna, cada `x` es un `<2.0>`.
+# Usa el enlace que deja el resolvedor entre cada acceso y su declaración.
+# Las globales no se propagan: otra línea del REPL puede reasignarlas, y una
+# función puede leerlas antes de que se ejecute su declaración
+class ConstantPropagator(Pass):
+    def __init__(self):
+        super().__init__()
+        self.constants: dict[VarDecl, LiteralExpr] = {}
+
+    def run(self, statements: list[Stmt]) -> list[Stmt]:
+        self.constants = self.find_constants(statements)
+        return super().run(statements)
+
+    def find_constants(self, statements: list[Stmt]) -> dict[VarDecl, LiteralExpr]:
+        constants: dict[VarDecl, LiteralExpr] = {}
+        # `if (c) var x = 1;` puede dejar a x sin definir,
+        # así que no sabemos qué hay en x después del if
+        assigned: set[Stmt] = branch_declarations(statements)
+        for node in walk(statements):
+            match node:
+                case VarDecl(initializer=LiteralExpr() as literal) if (
+                    node.slot is not None
+                ):
+                    constants[node] = literal
+                case AssignmentExpr() if node.declaration is not None:
+                    assigned.add(node.declaration)
+        return {
+            declaration: literal
+            for declaration, literal in constants.items()
+            if declaration not in assigned
+        }
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    @rewrite.register
+    def _(self, expression: VariableExpr) -> Expr:
+        literal = self.constants.get(expression.declaration)  # type: ignore[arg-type]
+        if literal is None:
+            return expression
+        return self.replace(LiteralExpr(literal.value))
@@ -0,0 +1,52 @@
+from functools import singledispatchmethod
+
+from ..Stmt import Stmt, VarDecl, FunDecl, IfStmt, WhileStmt
+from ..Expr import Expr, LiteralExpr
+from ..Interpreter import Interpreter
+from .Pass import Pass
+
+
+# Saca las ramas que nunca se ejecutan: un `if` con condición literal se
+# reemplaza por la rama que se toma, y un `while (false)` desaparece
+class DeadBranchEliminator(Pass):
+    def __init__(self):
+        super().__init__()
+        self.operators = Interpreter()
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    @rewrite.register
+    def _(self, statement: IfStmt) -> Stmt | None:
+        self.traverse(statement)
+        if not isinstance(statement.condition, LiteralExpr):
+            return statement
+
+        taken: Stmt | None
+        skipped: Stmt | None
+        if self.operators.is_truthy(statement.condition.value):
+            taken, skipped = statement.then_branch, statement.else_branch
+        else:
+            taken, skipped = statement.else_branch, statement.then_branch
+        # Una declaración suelta en una rama es del scope que encierra al if
+        # (ver Resolver.resolve_branch): aunque no se ejecute, sacarla cambiaría
+        # a qué variable se refieren los accesos que le siguen
+        if is_declaration(skipped):
+            return statement
+        return self.replace(taken)
+
+    @rewrite.register
+    def _(self, statement: WhileStmt) -> Stmt | None:
+        self.traverse(statement)
+        if not isinstance(statement.condition, LiteralExpr):
+            return statement
+        if self.operators.is_truthy(statement.condition.value):
+            return statement
+        if is_declaration(statement.body):
+            return statement
+        return self.replace(None)
+
+
+def is_declaration(statement: Stmt | None) -> bool:
+    return isinstance(statement, (VarDecl, FunDecl))
@@ -0,0 +1,166 @@
+from functools import singledispatchmethod
+
+from ..Stmt import (
+    Stmt,
+    ExpressionStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    ReturnStmt,
+)
+from ..Expr import Expr, LiteralExpr, VariableExpr, AssignmentExpr
+from ..Purity import is_global
+from ..Walk import walk
+from .Pass import Pass, branch_declarations
+
+
+# Saca del árbol el código que no hace falta:
+#  - los statements que siguen a un return (o a un if que retorna en sus dos
+#    ramas), que nunca se ejecutan
+#  - las variables y funciones locales que nunca se usan, si declararlas no
+#    puede fallar (su inicializador es un literal o una local ya definida)
+#  - los statements de expresión que no hacen nada, ej: `1;` (salvo en el
+#    nivel global, donde el REPL muestra su valor)
+#  - las funciones globales a las que no se llega desde el código que se
+#    ejecuta (tree shaking). Solo con el programa entero: en el REPL una línea
+#    posterior puede llamarlas
+# Lleva la cuenta de cuántos nodos sacó, para --opt-stats
+class DeadCodeEliminator(Pass):
+    def __init__(self, whole_program: bool = False):
+        super().__init__()
+        self.whole_program = whole_program
+        # Las declaraciones locales que se leen o se asignan en algún lugar
+        self.used: set[Stmt] = set()
+        self.branches: set[Stmt] = set()
+        # Cuántos nodos y cuántas funciones globales se sacaron, en todas las vueltas
+        self.removed = 0
+        self.removed_functions = 0
+
+    def run(self, statements: list[Stmt]) -> list[Stmt]:
+        self.used = set()
+        for node in walk(statements):
+            if isinstance(node, (VariableExpr, AssignmentExpr)):
+                if node.declaration is not None:
+                    self.used.add(node.declaration)
+        self.branches = branch_declarations(statements)
+
+        statements = super().run(statements)
+        if self.whole_program:
+            statements = self.shake(statements)
+        return statements
+
+    # Anota que se sacó el nodo, con todo lo que cuelga de él
+    def remove(self, node: Stmt | Expr):
+        self.removed += sum(1 for _ in walk([node]))
+        self.changed = True
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    @rewrite.register
+    def _(self, statement: BlockStmt) -> Stmt | None:
+        self.traverse(statement)
+        statement.statements = self.live(statement.statements)
+        return statement
+
+    @rewrite.register
+    def _(self, statement: FunDecl) -> Stmt | None:
+        if self.unused(statement):
+            self.remove(statement)
+            return None
+        self.traverse(statement)
+        statement.body = self.live(statement.body)
+        return statement
+
+    @rewrite.register
+    def _(self, statement: VarDecl) -> Stmt | None:
+        if self.unused(statement) and (
+            statement.initializer is None or self.harmless(statement.initializer)
+        ):
+            self.remove(statement)
+            return None
+        return self.traverse(statement)
+
+    def unused(self, declaration: VarDecl | FunDecl) -> bool:
+        return declaration.slot is not None and declaration not in self.used
+
+    # Si evaluar la expresión no puede tener efectos ni fallar
+    def harmless(self, expression: Expr) -> bool:
+        if isinstance(expression, LiteralExpr):
+            return True
+        # Una local siempre está definida cuando se lee, salvo si se declaró
+        # suelta en una rama (`if (c) var x = 1;`). Los parámetros no tienen
+        # declaración, y siempre están definidos
+        return (
+            isinstance(expression, VariableExpr)
+            and expression.depth is not None
+            and expression.declaration not in self.branches
+        )
+
+    # Los statements de un bloque o de una función que pueden hacer algo
+    def live(self, statements: list[Stmt]) -> list[Stmt]:
+        result = []
+        for i, statement in enumerate(statements):
+            if isinstance(statement, ExpressionStmt) and self.harmless(
+                statement.expression
+            ):
+                self.remove(statement)
+                continue
+            result.append(statement)
+            if always_returns(statement):
+                for unreachable in statements[i + 1 :]:
+                    self.remove(unreachable)
+                break
+        return result
+
+    # Saca las funciones globales que no se usan desde el código que se ejecuta
+    def shake(self, statements: list[Stmt]) -> list[Stmt]:
+        functions: dict[str, list[FunDecl]] = {}
+        roots: list[Stmt] = []
+        for statement in statements:
+            if isinstance(statement, FunDecl):
+                functions.setdefault(statement.name.lexeme, []).append(statement)
+            else:
+                roots.append(statement)
+
+        reached: set[str] = set()
+        pending = [global_names(roots)]
+        while pending:
+            for name in pending.pop() - reached:
+                reached.add(name)
+                for function in functions.get(name, []):
+                    pending.append(global_names(function.body))
+
+        result = []
+        for statement in statements:
+            if isinstance(statement, FunDecl) and statement.name.lexeme not in reached:
+                self.remove(statement)
+                self.removed_functions += 1
+                continue
+            result.append(statement)
+        return result
+
+
+# Los nombres globales que se usan en los statements
+def global_names(statements: list[Stmt]) -> set[str]:
+    return {
+        node.name.lexeme
+        for node in walk(statements)
+        if isinstance(node, (VariableExpr, AssignmentExpr)) and is_global(node)
+    }
+
+
+# Si el statement siempre termina con un return
+def always_returns(statement: Stmt) -> bool:
+    match statement:
+        case ReturnStmt():
+            return True
+        case BlockStmt():
+            return any(always_returns(s) for s in statement.statements)
+        case IfStmt() if statement.else_branch is not None:
+            return always_returns(statement.then_branch) and always_returns(
+                statement.else_branch
+            )
+    return False
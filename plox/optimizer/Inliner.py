@@ -0,0 +1,262 @@
+from copy import copy, deepcopy
+from functools import singledispatchmethod
+
+from ..Stmt import Stmt, ExpressionStmt, VarDecl, FunDecl, BlockStmt, ReturnStmt
+from ..Expr import Expr, LiteralExpr, VariableExpr, AssignmentExpr, CallExpr
+from ..Purity import is_global
+from ..Walk import walk
+from .Pass import Pass, branch_declarations
+
+# Cuántos nodos puede tener como mucho el cuerpo de una función para inlinearla
+INLINE_SIZE = 40
+
+
+# Reemplaza las llamadas a funciones chicas por el cuerpo de la función, así
+# no hay que armar un entorno ni pasar por Function.__call__ en cada llamada.
+# Hay dos formas de funciones que se pueden inlinear:
+#  - las de una sola expresión, `fun sq(x) { return x * x; }`: la llamada
+#    `sq(i)` queda como `i * i`. Los argumentos se copian donde se usan los
+#    parámetros, así que tienen que ser literales o locales que ninguna
+#    clausura pueda cambiar mientras se evalúa la expresión
+#  - las que no devuelven nada y se llaman como statement, `assert(a, b);`:
+#    queda como `{ var input = a; var expected = b; <cuerpo> }`
+# Para no cambiar el scope léxico, la función solo puede usar sus parámetros,
+# sus locales y globales que no se llamen igual que ninguna local del programa
+# (que en el lugar de la llamada podrían taparlas, ver examples/closure-bug.lox).
+# Además no puede ser recursiva, tiene que usarse solo para llamarla, y su
+# nombre nunca se puede reasignar
+class Inliner(Pass):
+    def __init__(self, size: int = INLINE_SIZE, whole_program: bool = False):
+        super().__init__()
+        self.size = size
+        # Si el árbol es el programa entero: si no (ej: en el REPL), una línea
+        # posterior puede redefinir las funciones globales, y solo se inlinean
+        # las locales
+        self.whole_program = whole_program
+        self.inlinable: dict[FunDecl, str] = {}
+        self.global_functions: dict[str, FunDecl] = {}
+        self.branches: set[Stmt] = set()
+
+    def run(self, statements: list[Stmt]) -> list[Stmt]:
+        self.branches = branch_declarations(statements)
+        self.inlinable = self.find_inlinable(statements)
+        self.global_functions = {
+            function.name.lexeme: function
+            for function in self.inlinable
+            if function.slot is None
+        }
+        return super().run(statements)
+
+    # Las funciones que se pueden inlinear, con su forma: "expression" o "statement"
+    def find_inlinable(self, statements: list[Stmt]) -> dict[FunDecl, str]:
+        nodes = list(walk(statements))
+        functions = [node for node in nodes if isinstance(node, FunDecl)]
+        callees = {id(node.callee) for node in nodes if isinstance(node, CallExpr)}
+
+        # Los nombres que en algún lugar del programa son locales
+        local_names = {param.lexeme for f in functions for param in f.parameters}
+        local_names |= {
+            node.name.lexeme
+            for node in nodes
+            if isinstance(node, (VarDecl, FunDecl)) and node.slot is not None
+        }
+
+        # Las funciones globales que ya están definidas antes de que se ejecute
+        # cualquier otra cosa, y que nunca cambian de valor
+        assigned: set[Stmt] = set()
+        assigned_globals: set[str] = set()
+        declared: dict[str, int] = {}
+        for node in nodes:
+            if isinstance(node, AssignmentExpr) and node.declaration is not None:
+                assigned.add(node.declaration)
+            elif isinstance(node, AssignmentExpr) and is_global(node):
+                assigned_globals.add(node.name.lexeme)
+            elif isinstance(node, (VarDecl, FunDecl)) and node.slot is None:
+                declared[node.name.lexeme] = declared.get(node.name.lexeme, 0) + 1
+        leading = set()
+        for statement in statements:
+            if not isinstance(statement, FunDecl):
+                break
+            leading.add(statement)
+
+        # Las globales que usa cada función global, para encontrar las recursivas
+        uses = {
+            f.name.lexeme: {
+                node.name.lexeme
+                for node in walk(f.body)
+                if isinstance(node, VariableExpr) and is_global(node)
+            }
+            for f in functions
+            if f.slot is None
+        }
+
+        inlinable = {}
+        for function in functions:
+            name = function.name.lexeme
+            if function in self.branches or function in assigned:
+                continue
+            if function.slot is None and not (
+                self.whole_program
+                and function in leading
+                and declared[name] == 1
+                and name not in assigned_globals
+            ):
+                continue
+            if sum(1 for _ in walk(function.body)) > self.size:
+                continue
+
+            shape = self.shape(function, local_names)
+            if shape is None or self.recursive(function, uses):
+                continue
+
+            # Si el nombre se usa para algo más que llamarla, la función se escapa
+            if any(
+                isinstance(node, VariableExpr)
+                and refers_to(node, function)
+                and id(node) not in callees
+                for node in nodes
+            ):
+                continue
+            inlinable[function] = shape
+        return inlinable
+
+    # La forma de la función, o None si no se puede inlinear
+    def shape(self, function: FunDecl, local_names: set[str]) -> str | None:
+        for node in walk(function.body):
+            match node:
+                # Las variables de afuera que no son globales son upvalues,
+                # y las globales pueden estar tapadas en el lugar de la llamada
+                case VariableExpr() | AssignmentExpr() if node.depth is None:
+                    if node.upvalue is not None or node.name.lexeme in local_names:
+                        return None
+                case FunDecl():
+                    return None
+
+        match function.body:
+            case [ReturnStmt(value=Expr() as value)]:
+                if any(isinstance(node, AssignmentExpr) for node in walk([value])):
+                    return None
+                return "expression"
+        if any(isinstance(node, ReturnStmt) for node in walk(function.body)):
+            return None
+        return "statement"
+
+    def recursive(self, function: FunDecl, uses: dict[str, set[str]]) -> bool:
+        if function.slot is not None:
+            # Una local que se llama a sí misma lo hace a través de una upvalue,
+            # y esas funciones ya no se inlinean
+            return False
+
+        name = function.name.lexeme
+        pending = list(uses.get(name, ()))
+        seen: set[str] = set()
+        while pending:
+            used = pending.pop()
+            if used == name:
+                return True
+            if used not in seen:
+                seen.add(used)
+                pending.extend(uses.get(used, ()))
+        return False
+
+    # La función inlineable a la que llama la expresión, si los argumentos alcanzan
+    def target(self, expression: CallExpr, shape: str) -> FunDecl | None:
+        callee = expression.callee
+        if not isinstance(callee, VariableExpr):
+            return None
+
+        function: Stmt | None
+        if is_global(callee):
+            function = self.global_functions.get(callee.name.lexeme)
+        else:
+            function = callee.declaration
+        if not isinstance(function, FunDecl) or self.inlinable.get(function) != shape:
+            return None
+        if len(expression.arguments) != len(function.parameters):
+            return None
+        return function
+
+    # Si evaluar la expresión da siempre lo mismo mientras se evalúa el cuerpo
+    # de una función de una sola expresión (que no asigna variables), y nunca
+    # falla: un parámetro que no se usa deja de evaluarse. Son los literales y
+    # las locales que ninguna clausura puede cambiar, salvo las declaradas
+    # sueltas en una rama (`if (c) var x = 1;`), que pueden no estar definidas
+    def is_stable(self, expression: Expr) -> bool:
+        if isinstance(expression, LiteralExpr):
+            return True
+        return (
+            isinstance(expression, VariableExpr)
+            and expression.depth is not None
+            and not expression.captured
+            and expression.declaration not in self.branches
+        )
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    @rewrite.register
+    def _(self, expression: CallExpr) -> Expr:
+        self.traverse(expression)
+        function = self.target(expression, "expression")
+        if function is None or not all(map(self.is_stable, expression.arguments)):
+            return expression
+
+        body = function.body[0]
+        assert isinstance(body, ReturnStmt) and body.value is not None
+        arguments = {
+            param.lexeme: arg
+            for param, arg in zip(function.parameters, expression.arguments)
+        }
+        return self.replace(Substitution(arguments).rewrite(deepcopy(body.value)))
+
+    @rewrite.register
+    def _(self, statement: ExpressionStmt) -> Stmt | None:
+        self.traverse(statement)
+        expression = statement.expression
+        if not isinstance(expression, CallExpr):
+            return statement
+        function = self.target(expression, "statement")
+        if function is None:
+            return statement
+
+        # Los argumentos se evalúan con los parámetros anteriores ya declarados,
+        # así que no pueden usar variables que se llamen como un parámetro
+        params = {param.lexeme for param in function.parameters}
+        if any(
+            isinstance(node, (VariableExpr, AssignmentExpr))
+            and node.name.lexeme in params
+            for node in walk(expression.arguments)
+        ):
+            return statement
+
+        declarations: list[Stmt] = [
+            VarDecl(param, arg)
+            for param, arg in zip(function.parameters, expression.arguments)
+        ]
+        return self.replace(BlockStmt(declarations + deepcopy(function.body)))
+
+
+# Si la variable es el nombre de la función
+def refers_to(expression: VariableExpr, function: FunDecl) -> bool:
+    if function.slot is not None:
+        return expression.declaration is function
+    return is_global(expression) and expression.name.lexeme == function.name.lexeme
+
+
+# Reemplaza los parámetros de una función de una sola expresión por una copia
+# de los argumentos de la llamada
+class Substitution(Pass):
+    def __init__(self, arguments: dict[str, Expr]):
+        super().__init__()
+        self.arguments = arguments
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    @rewrite.register
+    def _(self, expression: VariableExpr) -> Expr:
+        if expression.depth is None or expression.name.lexeme not in self.arguments:
+            return expression
+        return copy(self.arguments[expression.name.lexeme])
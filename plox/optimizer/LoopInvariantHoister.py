@@ -0,0 +1,159 @@
+from functools import singledispatchmethod
+
+from ..Stmt import Stmt, VarDecl, FunDecl, BlockStmt, WhileStmt
+from ..Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+from ..Walk import walk
+from ..Token import Token, TokenType
+from .Pass import Pass, Temporaries, identifiers, pure_key, operators
+
+# Los operadores cuyo resultado, si no falla, es un número o una cadena:
+# siempre truthy, así que sirve como marca de "ya calculado"
+ARITHMETIC = {
+    TokenType.PLUS,
+    TokenType.MINUS,
+    TokenType.STAR,
+    TokenType.SLASH,
+    TokenType.PERCENT,
+}
+
+# Cuántos operadores tiene que tener una expresión para que convenga sacarla del loop
+MIN_OPERATORS = 2
+
+
+# Saca de los loops las expresiones que dan lo mismo en todas las iteraciones
+# (loop-invariant code motion), ej: en `while (i < n) { t = t + n * 2 + 1; ... }`
+# no hace falta calcular `n * 2 + 1` en cada vuelta si nadie cambia n.
+# La expresión no se puede calcular antes del loop sin más: si falla
+# (ej: `n` no es un número) el error tiene que aparecer recién cuando se evalúa,
+# y si el loop no da ninguna vuelta no tiene que aparecer. Así que se calcula
+# la primera vez que hace falta y se guarda en una variable temporal:
+#   { var licm0; while (i < n) { t = t + (licm0 or (licm0 = n * 2 + 1)); ... } }
+# Solo se sacan expresiones aritméticas, que dan un número o una cadena (truthy),
+# así que una vez calculada el `or` siempre corta en la temporal
+class LoopInvariantHoister(Pass):
+    def __init__(self):
+        super().__init__()
+        self.temporaries = Temporaries("licm")
+        self.taken: set[str] = set()
+
+    def run(self, statements: list[Stmt]) -> list[Stmt]:
+        self.taken = identifiers(statements)
+        return super().run(statements)
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    # Los loops se procesan de afuera hacia adentro: lo que es invariante en
+    # el loop de afuera se saca hasta ahí, y el de adentro ya no lo ve
+    @rewrite.register
+    def _(self, statement: WhileStmt) -> Stmt | None:
+        hoisting = Hoisting(self.invariants(statement), self)
+        statement.condition = hoisting.rewrite(statement.condition)
+        statement.body = hoisting.branch(statement.body)
+        self.traverse(statement)
+        if not hoisting.hoisted:
+            return statement
+
+        declarations: list[Stmt] = [
+            VarDecl(name, None) for name in hoisting.hoisted.values()
+        ]
+        return self.replace(BlockStmt(declarations + [statement]))
+
+    # Qué variables no cambian mientras corre el loop: las que no se asignan ni
+    # se declaran adentro. Si en el loop hay llamadas, además tienen que ser
+    # locales que ninguna clausura pueda cambiar
+    def invariants(self, loop: WhileStmt):
+        nodes = list(walk([loop.condition, loop.body]))
+        changed = set()
+        for node in nodes:
+            if isinstance(node, (AssignmentExpr, VarDecl)):
+                changed.add(node.name.lexeme)
+            elif isinstance(node, FunDecl):
+                changed.add(node.name.lexeme)
+                changed.update(param.lexeme for param in node.parameters)
+        calls = any(isinstance(node, CallExpr) for node in nodes)
+
+        def invariant(expression: Expr) -> bool:
+            match expression:
+                case LiteralExpr():
+                    return True
+                case VariableExpr():
+                    if expression.name.lexeme in changed:
+                        return False
+                    return not calls or (
+                        expression.depth is not None and not expression.captured
+                    )
+                case GroupingExpr():
+                    return invariant(expression.expression)
+                case UnaryExpr():
+                    return invariant(expression.right)
+                case BinaryExpr():
+                    return invariant(expression.left) and invariant(expression.right)
+            return False
+
+        return invariant
+
+
+# Reemplaza las expresiones invariantes de un loop por su temporal
+class Hoisting(Pass):
+    def __init__(self, invariant, hoister: LoopInvariantHoister):
+        super().__init__()
+        self.invariant = invariant
+        self.hoister = hoister
+        # La temporal de cada expresión que se sacó, por su clave
+        self.hoisted: dict[tuple, Token] = {}
+
+    @singledispatchmethod
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    @rewrite.register
+    def _(self, expression: UnaryExpr | BinaryExpr) -> Expr:
+        if not self.hoistable(expression):
+            return self.traverse(expression)
+
+        key = pure_key(expression)
+        assert key is not None
+        if key not in self.hoisted:
+            self.hoisted[key] = self.hoister.temporaries.fresh(self.hoister.taken)
+        name = self.hoisted[key]
+        self.hoister.changed = True
+        return LogicExpr(
+            VariableExpr(name),
+            Token(TokenType.OR, lexeme="or", literal=None, line=name.line),
+            AssignmentExpr(name, expression),
+        )
+
+    def hoistable(self, expression: UnaryExpr | BinaryExpr) -> bool:
+        if expression.operator.token_type not in ARITHMETIC:
+            return False
+        if operators(expression) < MIN_OPERATORS:
+            return False
+        # Una expresión sin variables es un error que dejó el plegado de constantes
+        if not any(isinstance(node, VariableExpr) for node in walk([expression])):
+            return False
+        return self.invariant(expression)
+
+    # Las funciones que se declaran en el loop pueden llamarse después,
+    # cuando las variables ya cambiaron
+    @rewrite.register
+    def _(self, statement: FunDecl) -> Stmt | None:
+        return statement
+
+    # Lo que ya se sacó de un loop no se vuelve a sacar
+    @rewrite.register
+    def _(self, expression: AssignmentExpr) -> Expr:
+        if expression.name.lexeme in self.hoister.temporaries.names:
+            return expression
+        return self.traverse(expression)
@@ -0,0 +1,66 @@
+from ..Stmt import Stmt
+from ..Resolver import Resolver
+from .Pass import Pass
+from .ConstantFolder import ConstantFolder
+from .ConstantPropagator import ConstantPropagator
+from .DeadBranchEliminator import DeadBranchEliminator
+from .DeadCodeEliminator import DeadCodeEliminator
+from .Inliner import Inliner, INLINE_SIZE
+from .LoopInvariantHoister import LoopInvariantHoister
+from .CommonSubexpressionEliminator import CommonSubexpressionEliminator
+
+# El nivel más alto de --opt-level
+MAX_LEVEL = 3
+
+# Cuántas veces como mucho se repiten las pasadas
+MAX_ROUNDS = 10
+
+
+# Corre las pasadas de optimización sobre el árbol ya resuelto, entre el
+# resolvedor y la ejecución (plox --opt-level N). Una pasada puede habilitar a
+# otra (propagar una constante deja una suma de literales para plegar, que
+# deja una condición literal para podar), así que se repiten hasta que ninguna
+# cambie nada.
+# Las pasadas mueven y reemplazan nodos, así que entre una vuelta y la otra el
+# árbol se vuelve a resolver, para que las anotaciones del resolvedor estén al
+# día. El árbol que devuelve optimize ya está resuelto
+class Optimizer(object):
+    def __init__(
+        self,
+        level: int = 1,
+        inline_size: int = INLINE_SIZE,
+        whole_program: bool = False,
+    ):
+        self.level = level
+        self.passes: list[Pass] = []
+        # Se guarda aparte para poder mostrar cuánto código sacó
+        self.dead_code = DeadCodeEliminator(whole_program)
+        if level >= 1:
+            self.passes += [
+                ConstantFolder(),
+                ConstantPropagator(),
+                DeadBranchEliminator(),
+                self.dead_code,
+            ]
+        if level >= 2:
+            self.passes.append(Inliner(inline_size, whole_program))
+        if level >= 3:
+            self.passes += [
+                LoopInvariantHoister(),
+                CommonSubexpressionEliminator(),
+            ]
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        for i in range(MAX_ROUNDS):
+            if i > 0:
+                resolver = Resolver()
+                for statement in statements:
+                    resolver.resolve(statement)
+
+            changed = False
+            for optimization in self.passes:
+                statements = optimization.run(statements)
+                changed = changed or optimization.changed
+            if not changed:
+                break
+        return statements
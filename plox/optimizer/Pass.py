@@ -0,0 +1,243 @@
+from functools import singledispatchmethod
+
+from ..Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ReturnStmt,
+)
+from ..Walk import walk
+from ..Token import Token, TokenType
+from ..Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+
+
+# Una pasada del optimizador: recorre el árbol ya resuelto y devuelve, por cada
+# nodo, el nodo que lo reemplaza. Por defecto (traverse) cada nodo se reemplaza
+# por sí mismo, con sus hijos ya reescritos. Cada pasada define su propio
+# `rewrite` como un singledispatchmethod que cae en traverse, y registra solo
+# los nodos que le interesan. Un statement puede reescribirse a None para
+# sacarlo del árbol
+class Pass(object):
+    def __init__(self):
+        # Si la última corrida cambió algo, para repetir las pasadas hasta que no
+        # quede nada por optimizar
+        self.changed = False
+
+    def run(self, statements: list[Stmt]) -> list[Stmt]:
+        self.changed = False
+        result = []
+        for statement in statements:
+            rewritten = self.rewrite(statement)
+            # En el REPL se muestra el valor de los statements de expresión
+            # del nivel más externo: un statement que se reescribe a uno de
+            # esos no tiene que empezar a mostrarse (ej: `if (true) 1;`)
+            if isinstance(rewritten, ExpressionStmt) and rewritten is not statement:
+                rewritten = BlockStmt([rewritten])
+            if rewritten is not None:
+                result.append(rewritten)
+        return result
+
+    # Anota que la pasada cambió el árbol, y devuelve el nodo nuevo
+    def replace(self, node):
+        self.changed = True
+        return node
+
+    def statements(self, statements: list[Stmt]) -> list[Stmt]:
+        result = []
+        for statement in statements:
+            rewritten = self.rewrite(statement)
+            if rewritten is not None:
+                result.append(rewritten)
+        return result
+
+    # Las ramas de un if y el cuerpo de un while tienen que ser un statement,
+    # así que si se eliminan quedan como un bloque vacío
+    def branch(self, statement: Stmt) -> Stmt:
+        rewritten = self.rewrite(statement)
+        if rewritten is None:
+            return BlockStmt([])
+        return rewritten
+
+    def rewrite(self, node: Stmt | Expr):
+        return self.traverse(node)
+
+    @singledispatchmethod
+    def traverse(self, node: Stmt | Expr):
+        raise NameError(f"Unknown statement or expression type: `{type(node)}`")
+
+    # ---------- Statements ---------- #
+
+    @traverse.register
+    def _(self, statement: ExpressionStmt | PrintStmt) -> Stmt | None:
+        statement.expression = self.rewrite(statement.expression)
+        return statement
+
+    @traverse.register
+    def _(self, statement: VarDecl) -> Stmt | None:
+        if statement.initializer is not None:
+            statement.initializer = self.rewrite(statement.initializer)
+        return statement
+
+    @traverse.register
+    def _(self, statement: FunDecl) -> Stmt | None:
+        statement.body = self.statements(statement.body)
+        return statement
+
+    @traverse.register
+    def _(self, statement: BlockStmt) -> Stmt | None:
+        statement.statements = self.statements(statement.statements)
+        return statement
+
+    @traverse.register
+    def _(self, statement: IfStmt) -> Stmt | None:
+        statement.condition = self.rewrite(statement.condition)
+        statement.then_branch = self.branch(statement.then_branch)
+        if statement.else_branch is not None:
+            statement.else_branch = self.branch(statement.else_branch)
+        return statement
+
+    @traverse.register
+    def _(self, statement: WhileStmt) -> Stmt | None:
+        statement.condition = self.rewrite(statement.condition)
+        statement.body = self.branch(statement.body)
+        return statement
+
+    @traverse.register
+    def _(self, statement: ReturnStmt) -> Stmt | None:
+        if statement.value is not None:
+            statement.value = self.rewrite(statement.value)
+        return statement
+
+    # ---------- Expresiones ---------- #
+
+    @traverse.register
+    def _(self, expression: LiteralExpr | VariableExpr) -> Expr:
+        return expression
+
+    @traverse.register
+    def _(self, expression: GroupingExpr) -> Expr:
+        expression.expression = self.rewrite(expression.expression)
+        return expression
+
+    @traverse.register
+    def _(self, expression: UnaryExpr) -> Expr:
+        expression.right = self.rewrite(expression.right)
+        return expression
+
+    @traverse.register
+    def _(self, expression: BinaryExpr | LogicExpr) -> Expr:
+        expression.left = self.rewrite(expression.left)
+        expression.right = self.rewrite(expression.right)
+        return expression
+
+    @traverse.register
+    def _(self, expression: AssignmentExpr) -> Expr:
+        expression.value = self.rewrite(expression.value)
+        return expression
+
+    @traverse.register
+    def _(self, expression: CallExpr) -> Expr:
+        expression.callee = self.rewrite(expression.callee)
+        expression.arguments = [self.rewrite(arg) for arg in expression.arguments]
+        return expression
+
+
+# Las declaraciones sueltas en una rama de un if o en el cuerpo de un while
+# (ej: `if (c) var x = 1;`): son del scope que encierra al statement,
+# pero pueden quedar sin definir si la rama no se ejecuta
+def branch_declarations(statements: list[Stmt]) -> set[Stmt]:
+    declarations: set[Stmt] = set()
+    for node in walk(statements):
+        match node:
+            case IfStmt():
+                branches = [node.then_branch, node.else_branch]
+            case WhileStmt():
+                branches = [node.body]
+            case _:
+                continue
+        for branch in branches:
+            if isinstance(branch, (VarDecl, FunDecl)):
+                declarations.add(branch)
+    return declarations
+
+
+# Todos los nombres de variables que aparecen en el programa
+def identifiers(statements: list[Stmt]) -> set[str]:
+    names = set()
+    for node in walk(statements):
+        if isinstance(node, (VariableExpr, AssignmentExpr, VarDecl)):
+            names.add(node.name.lexeme)
+        elif isinstance(node, FunDecl):
+            names.add(node.name.lexeme)
+            names.update(param.lexeme for param in node.parameters)
+    return names
+
+
+# Nombres para las variables temporales que agregan algunas pasadas.
+# Son identificadores comunes de Lox (así los backends los tratan como a
+# cualquier otra variable), elegidos para no chocar con ningún nombre del programa
+class Temporaries(object):
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.counter = 0
+        # Los nombres que ya se crearon, para reconocerlos en las vueltas siguientes
+        self.names: set[str] = set()
+
+    def fresh(self, taken: set[str]) -> Token:
+        name = f"{self.prefix}{self.counter}"
+        while name in taken:
+            self.counter += 1
+            name = f"{self.prefix}{self.counter}"
+        self.counter += 1
+        self.names.add(name)
+        taken.add(name)
+        return Token(TokenType.IDENTIFIER, lexeme=name, literal=None, line=0)
+
+
+# Una clave que identifica a una expresión sin efectos por su estructura:
+# dos expresiones con la misma clave calculan lo mismo, mientras no cambien
+# sus variables. Es None si la expresión puede tener efectos (llamadas o
+# asignaciones)
+def pure_key(expression: Expr) -> tuple | None:
+    match expression:
+        case LiteralExpr():
+            # El tipo separa a true de 1, y repr a 0 de -0
+            return ("literal", type(expression.value), repr(expression.value))
+        case VariableExpr():
+            return ("variable", expression.name.lexeme)
+        case GroupingExpr():
+            return pure_key(expression.expression)
+        case UnaryExpr():
+            right = pure_key(expression.right)
+            if right is None:
+                return None
+            return ("unary", expression.operator.token_type, right)
+        case BinaryExpr():
+            left = pure_key(expression.left)
+            right = pure_key(expression.right)
+            if left is None or right is None:
+                return None
+            return ("binary", expression.operator.token_type, left, right)
+    return None
+
+
+# Cuántos operadores tiene la expresión, para decidir si vale la pena guardarla
+def operators(expression: Expr) -> int:
+    return sum(
+        1 for node in walk([expression]) if isinstance(node, (UnaryExpr, BinaryExpr))
+    )
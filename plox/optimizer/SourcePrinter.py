@@ -0,0 +1,146 @@
+from functools import singledispatchmethod
+
+from ..Stmt import (
+    Stmt,
+    ExpressionStmt,
+    PrintStmt,
+    VarDecl,
+    FunDecl,
+    BlockStmt,
+    IfStmt,
+    WhileStmt,
+    ReturnStmt,
+)
+from ..Expr import (
+    Expr,
+    BinaryExpr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    AssignmentExpr,
+    LogicExpr,
+    CallExpr,
+)
+
+INDENT = "    "
+
+
+# Vuelve a escribir el árbol como código Lox, para ver qué hizo el optimizador
+# (plox --dump-optimized). Todas las expresiones binarias van entre paréntesis,
+# así no hay que pensar en precedencias
+class SourcePrinter(object):
+    def print(self, statements: list[Stmt]) -> str:
+        return "\n".join(line for s in statements for line in self.lines(s))
+
+    @singledispatchmethod
+    def lines(self, statement: Stmt) -> list[str]:
+        raise NameError(f"Unknown statement type: `{type(statement)}`")
+
+    @lines.register
+    def _(self, statement: ExpressionStmt) -> list[str]:
+        return [f"{self.bare(statement.expression)};"]
+
+    @lines.register
+    def _(self, statement: PrintStmt) -> list[str]:
+        return [f"print {self.bare(statement.expression)};"]
+
+    @lines.register
+    def _(self, statement: VarDecl) -> list[str]:
+        if statement.initializer is None:
+            return [f"var {statement.name.lexeme};"]
+        return [f"var {statement.name.lexeme} = {self.bare(statement.initializer)};"]
+
+    @lines.register
+    def _(self, statement: ReturnStmt) -> list[str]:
+        if statement.value is None:
+            return ["return;"]
+        return [f"return {self.bare(statement.value)};"]
+
+    @lines.register
+    def _(self, statement: FunDecl) -> list[str]:
+        params = ", ".join(param.lexeme for param in statement.parameters)
+        return [
+            f"fun {statement.name.lexeme}({params}) {{",
+            *self.indented(statement.body),
+            "}",
+        ]
+
+    @lines.register
+    def _(self, statement: BlockStmt) -> list[str]:
+        return ["{", *self.indented(statement.statements), "}"]
+
+    @lines.register
+    def _(self, statement: IfStmt) -> list[str]:
+        lines = self.header(
+            f"if ({self.bare(statement.condition)})", statement.then_branch
+        )
+        if statement.else_branch is not None:
+            lines += self.header("else", statement.else_branch)
+        return lines
+
+    @lines.register
+    def _(self, statement: WhileStmt) -> list[str]:
+        return self.header(f"while ({self.bare(statement.condition)})", statement.body)
+
+    # Un `if (...)`, `else` o `while (...)` seguido de su statement: los bloques
+    # abren la llave en la misma línea, el resto va en la línea siguiente
+    def header(self, header: str, statement: Stmt) -> list[str]:
+        lines = self.lines(statement)
+        if isinstance(statement, BlockStmt):
+            return [f"{header} {lines[0]}", *lines[1:]]
+        return [header, *(INDENT + line for line in lines)]
+
+    def indented(self, statements: list[Stmt]) -> list[str]:
+        return [INDENT + line for s in statements for line in self.lines(s)]
+
+    # Una expresión que no es parte de otra no necesita paréntesis
+    def bare(self, expression: Expr) -> str:
+        formatted = self.format(expression)
+        if isinstance(expression, (BinaryExpr, LogicExpr, AssignmentExpr)):
+            return formatted[1:-1]
+        return formatted
+
+    @singledispatchmethod
+    def format(self, expression: Expr) -> str:
+        raise NameError(f"Unknown expression type: `{type(expression)}`")
+
+    @format.register
+    def _(self, expression: LiteralExpr) -> str:
+        value = expression.value
+        if value is None:
+            return "nil"
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, str):
+            return f'"{value}"'
+        if value.is_integer():
+            return f"{value:.0f}"
+        return repr(value)
+
+    @format.register
+    def _(self, expression: VariableExpr) -> str:
+        return expression.name.lexeme
+
+    @format.register
+    def _(self, expression: AssignmentExpr) -> str:
+        return f"({expression.name.lexeme} = {self.format(expression.value)})"
+
+    @format.register
+    def _(self, expression: GroupingExpr) -> str:
+        return f"({self.format(expression.expression)})"
+
+    @format.register
+    def _(self, expression: UnaryExpr) -> str:
+        return f"{expression.operator.lexeme}{self.format(expression.right)}"
+
+    @format.register
+    def _(self, expression: BinaryExpr | LogicExpr) -> str:
+        left = self.format(expression.left)
+        right = self.format(expression.right)
+        return f"({left} {expression.operator.lexeme} {right})"
+
+    @format.register
+    def _(self, expression: CallExpr) -> str:
+        arguments = ", ".join(self.bare(arg) for arg in expression.arguments)
+        return f"{self.format(expression.callee)}({arguments})"
@@ -0,0 +1,122 @@
+import os
+import pytest
+from plox.ClosureCompiler import ClosureCompiler
+from plox.Interpreter import Interpreter
+from plox.Quickening import QuickeningInterpreter
+from plox.Resolver import Resolver
+from plox.Scanner import Scanner
+from plox.Parser import Parser
+from plox.StackInterpreter import StackInterpreter
+from plox.TieredInterpreter import TieredInterpreter
+from plox.Transpiler import Transpiler
+from plox.bytecode.VM import VM
+from plox.cfg.CFGInterpreter import CFGInterpreter
+from plox.cfg.Lowering import Lowering
+from plox.cfg.Raising import Raising
+from plox.cfg.TypeInference import TypeInference
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Los programas que todos los backends tienen que correr igual que el intérprete
+PROGRAMS = [
+    "examples/calc.lox",
+    "examples/closure-bug.lox",
+    "examples/fib.lox",
+    "examples/flow.lox",
+    "examples/function.lox",
+    "examples/quad-loops.lox",
+    "examples/scopes.lox",
+    "examples/statements.lox",
+    "real-tests/0-simple.lox",
+    "real-tests/1-flow.lox",
+    "real-tests/2-functions.lox",
+    "real-tests/3-minsky.lox",
+    "real-tests/4-fizzbuzz.lox",
+]
+
+
+# Los helpers de acá también se importan desde los tests (ej:
+# `from conftest import compile`), para usarlos fuera de un fixture
+
+
+# Escanea, parsea y resuelve el código. Devuelve el árbol y el resolvedor
+def compile(source):
+    statements = Parser(Scanner(source).scan()).parse()
+    resolver = Resolver()
+    for statement in statements:
+        resolver.resolve(statement)
+    return statements, resolver
+
+
+# Resuelve un árbol que no salió del parser (ej: uno optimizado o subido de
+# un grafo de flujo de control)
+def resolve(statements):
+    resolver = Resolver()
+    for statement in statements:
+        resolver.resolve(statement)
+    return statements
+
+
+# Lo baja a un grafo de flujo de control, lo vuelve a subir a un árbol y lo
+# corre en el intérprete
+def raised(statements):
+    statements = resolve(Raising().raise_graph(Lowering().lower(statements)))
+    return Interpreter().interpret(statements)
+
+
+def specialized(statements):
+    return Interpreter().interpret(TypeInference().specialize(statements))
+
+
+# Cada backend corre un programa ya resuelto y devuelve el valor de su última
+# expresión, igual que Interpreter.interpret
+BACKENDS = {
+    "vm": lambda statements: VM().interpret(statements),
+    "closures": lambda statements: ClosureCompiler().interpret(statements),
+    "python": lambda statements: Transpiler().interpret(statements),
+    "stack": lambda statements: StackInterpreter().interpret(statements),
+    "cfg": lambda statements: CFGInterpreter().interpret(statements),
+    "raised": raised,
+    "specialized": specialized,
+    "quicken": lambda statements: QuickeningInterpreter().interpret(statements),
+    "jit": lambda statements: TieredInterpreter().interpret(statements),
+    # Compila todo apenas se ejecuta
+    "jit-eager": lambda statements: TieredInterpreter(1, 1).interpret(statements),
+}
+
+
+# Escanea, parsea y resuelve el código, y lo corre en el intérprete recibido
+@pytest.fixture
+def run():
+    def run(source, interpreter):
+        statements, _ = compile(source)
+        return interpreter.interpret(statements)
+
+    return run
+
+
+# Un archivo del repo, por su ruta desde la raíz
+@pytest.fixture
+def read():
+    def read(path):
+        with open(os.path.join(ROOT, path)) as file:
+            return file.read()
+
+    return read
+
+
+# Los tests que piden un backend se corren una vez con cada uno. Recibe el
+# código sin resolver
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    execute = BACKENDS[request.param]
+
+    def backend(source):
+        return execute(compile(source)[0])
+
+    return backend
+
+
+@pytest.fixture(params=PROGRAMS)
+def program(request, read):
+    return read(request.param)
@@ -0,0 +1,62 @@
+import pytest
+from plox.Interpreter import Interpreter
+
+# Cada test de este archivo se corre con todos los backends (ver conftest.py).
+# Lo propio de cada uno queda en su archivo
+
+
+def test_expressions(backend):
+    tests = [
+        ("2 + 2;", 4.0),
+        ('"a" + "b";', "ab"),
+        ("1 + 2 * 3 - 4;", 3.0),
+        ("((1 + 2) * (3 + 4)) / 3;", 7.0),
+        ("5 % 2;", 1.0),
+        ("-(--1);", -1.0),
+        ("!nil;", True),
+        ("3 >= 3;", True),
+        ('"ab" == "aa";', False),
+        ("1 == true;", True),
+        ('false or "x";', "x"),
+        ("nil and 1;", None),
+        ("var a = 1; { var b = 2; { a = a + b; } } a;", 3.0),
+        ("var a = 0; if (a == 0) a = 1; else a = 2; a;", 1.0),
+        ("var i = 0; while (i < 5) i = i + 1; i;", 5.0),
+        ("var s = 0; for (var i = 0; i < 4; i = i + 1) s = s + i; s;", 6.0),
+        ("var a; a;", None),
+        ("print 1;", None),
+    ]
+
+    for src, expected in tests:
+        assert backend(src) == expected
+
+
+# Todos los backends usan los operadores de Operators.py, así que fallan con
+# los mismos mensajes
+def test_operator_errors(backend):
+    tests = [
+        ('"a" + 1;', "Operands of + must be either numbers or strings, got: `a + 1.0`"),
+        ('"a" - 1;', "Operands of - must be numbers, got: `a - 1.0`"),
+        ("true * 2;", "Operands of * must be numbers, got: `True * 2.0`"),
+        ("1 < nil;", "Operands of < must be numbers, got: `1.0 < None`"),
+        ("var a = 0; 1 / a;", "Division by 0.0 is not allowed"),
+        ("var a = 0; 1 % a;", "Modulo by 0.0 is not allowed"),
+        ('-"a";', "Operand of - must be a number, got: `-a`"),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            backend(src)
+        assert str(excinfo.value) == message
+
+
+def test_same_output_as_interpreter(backend, program, run, capsys):
+    outputs = []
+    for execute in (lambda: run(program, Interpreter()), lambda: backend(program)):
+        try:
+            execute()
+        except RuntimeError as e:
+            print(f"Runtime Error: {e}")
+        outputs.append(capsys.readouterr().out)
+
+    assert outputs[0] == outputs[1]
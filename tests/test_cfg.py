@@ -0,0 +1,208 @@
+import pytest
+from plox.cfg.CFG import Branch, Jump, Return
+from plox.cfg.CFGInterpreter import CFGInterpreter
+from plox.cfg.CFGPrinter import CFGPrinter
+from plox.cfg.Dataflow import Liveness, ReachingDefinitions
+from plox.cfg.Lowering import Lowering
+from plox.cfg.Raising import Raising
+from plox.Interpreter import Interpreter
+from plox.Expr import UnaryExpr
+from plox.Token import Token, TokenType
+from plox.__main__ import Plox
+from conftest import compile, raised, resolve
+
+
+def lowered(source):
+    return Lowering().lower(compile(source)[0])
+
+
+def variables(graph):
+    return {variable.label: variable for variable in graph.variables}
+
+
+def test_lowering():
+    graph = lowered("var a = 1; print a;")
+    assert len(graph.blocks) == 1
+    assert isinstance(graph.entry.terminator, Return)
+
+    # El for ya es un while: inicialización, header, cuerpo (con el incremento)
+    graph = lowered("for (var i = 0; i < 3; i = i + 1) print i; print 0;")
+    entry, header, body, exit = graph.blocks
+    assert isinstance(entry.terminator, Jump) and entry.terminator.target is header
+    assert isinstance(header.terminator, Branch)
+    assert header.terminator.then_block is body
+    assert header.terminator.else_block is exit
+    assert header.predecessors == [entry, body]
+    assert isinstance(exit.terminator, Return)
+
+    # Lo que sigue a un return no está en el grafo
+    graph = lowered("fun f() { return 1; print 2; } f();")
+    (function,) = graph.functions
+    assert len(function.blocks) == 1
+    assert "print" not in CFGPrinter().print(function)
+
+
+def test_defs_and_uses():
+    graph = lowered("{ var a = 1; var b = 2; var c; c = a + b; a = b or (c = 3); }")
+    a, b, c = (variables(graph)[name] for name in "abc")
+    instructions = graph.entry.instructions
+    add, logic = instructions[-3], instructions[-2]
+    assert add.uses == {a, b} and add.defs == add.kills == {c}
+    # La asignación del lado derecho del or puede no hacerse
+    assert logic.uses == {b} and logic.defs == {a, c} and logic.kills == {a}
+
+    # Dos variables que se llaman igual son distintas
+    graph = lowered("{ var x = 1; { var x = 2; print x; } print x; }")
+    assert set(variables(graph)) == {"x", "x#2"}
+
+
+def test_liveness():
+    graph = lowered(
+        """
+        {
+            var a = 1;
+            var b = 2;
+            var i = 0;
+            while (i < 10) { i = i + a; }
+            b = 3;
+            print i;
+        }
+        """
+    )
+    a, b, i = (variables(graph)[name] for name in "abi")
+    entry, header, body, exit = graph.blocks
+    liveness = Liveness(graph)
+    assert liveness.live_in[header] == {a, i}
+    assert liveness.live_in[body] == {a, i}
+    assert liveness.live_in[exit] == {i}
+    # `var b = 2;` y `b = 3;` no los lee nadie
+    declare_b = entry.instructions[2]
+    assert b not in liveness.after(entry)[entry.instructions.index(declare_b)]
+    assert all(b not in live for live in liveness.after(exit))
+
+    # Las globales y las capturadas siguen vivas si hay una llamada
+    graph = lowered("fun f() { var x = 1; fun g() { print x; } x = 2; g(); }")
+    (f,) = graph.functions
+    liveness = Liveness(f)
+    x = variables(f)["x"]
+    declare_x, closure_g, assign_x, call_g = f.entry.instructions
+    after = liveness.after(f.entry)
+    assert x in after[0] and x not in after[1] and x in after[2]
+
+
+def test_reaching_definitions():
+    graph = lowered(
+        """
+        fun f(n) {
+            var x = 1;
+            if (n > 0) x = 2;
+            print x;
+            x = 3;
+            return x;
+        }
+        """
+    )
+    (f,) = graph.functions
+    reaching = ReachingDefinitions(f)
+    x = variables(f)["x"]
+    (n,) = f.parameters
+    entry, then, join = f.blocks
+
+    definitions = reaching.reaching(join, join.instructions[0], x)
+    assert {d.instruction for d in definitions} == {
+        entry.instructions[0],
+        then.instructions[0],
+    }
+    definitions = reaching.reaching(join, join.terminator, x)
+    assert {d.instruction for d in definitions} == {join.instructions[1]}
+    # El parámetro llega desde la entrada
+    (definition,) = reaching.reaching(entry, entry.terminator, n)
+    assert definition.instruction is None
+
+
+def test_dump():
+    dump = CFGPrinter().print(
+        lowered("var t = 0; for (var i = 0; i < 3; i = i + 1) t = t + i; print t;")
+    )
+    assert dump.splitlines()[:3] == [
+        "<script>:",
+        "  B0:",
+        "    var t = 0;                      defs t",
+    ]
+    assert "  B1:  ; preds B0, B2; live i, t" in dump
+    assert "branch i < 3 ? B2 : B3" in dump
+
+
+def test_dump_too_deep(capsys):
+    # Bajar y mostrar el grafo es recursivo: un programa demasiado anidado es
+    # un error más de plox, y no un traceback
+    plox = Plox()
+    plox.mode = "cfg"
+    plox.run("print " + "(" * 500 + "1" + ")" * 500 + ";")
+    assert capsys.readouterr().out.startswith("CFG Error: maximum recursion")
+
+
+def test_raising(run, capsys):
+    tests = [
+        # Una declaración sola en una rama es del scope de afuera
+        ("{ if (true) var x = 1; print x; }", "1.0\n"),
+        # Las clausuras creadas en un loop ven cada una su variable
+        (
+            """
+            var fs = nil;
+            for (var i = 0; i < 3; i = i + 1) {
+                var j = i;
+                fun f() { return j; }
+                if (i == 1) fs = f;
+            }
+            print fs();
+            """,
+            "1.0\n",
+        ),
+        # Un loop que siempre sale por el return
+        ("fun f() { while (true) { return 1; } } print f();", "1.0\n"),
+        ("fun f(n) { if (n > 0) return 1; print 2; } print f(0);", "2.0\nNone\n"),
+        (
+            "var i = 0; while (i < 3) { if (i == 1) print i; i = i + 1; } print i;",
+            "1.0\n3.0\n",
+        ),
+    ]
+
+    for src, expected in tests:
+        run(src, CFGInterpreter())
+        assert capsys.readouterr().out == expected
+        raised(compile(src)[0])
+        assert capsys.readouterr().out == expected
+
+
+def test_raising_transformed_graph(capsys):
+    # Un loop que sigue por la rama del else: se sube negando la condición
+    graph = lowered("var i = 0; while (i < 3) i = i + 1; print i;")
+    branch = graph.blocks[1].terminator
+    bang = Token(TokenType.BANG, lexeme="!", literal=None, line=0)
+    branch.condition = UnaryExpr(bang, branch.condition)
+    branch.then_block, branch.else_block = branch.else_block, branch.then_block
+
+    Interpreter().interpret(resolve(Raising().raise_graph(graph)))
+    assert capsys.readouterr().out == "3.0\n"
+
+
+def test_errors(run):
+    tests = [
+        ('"aaa" + 5;', "Operands of + must be either numbers or strings"),
+        ("print x;", "Undefined variable 'x'"),
+        ("fun f(a) {} f();", "Expected 1 arguments, got 0"),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            run(src, CFGInterpreter())
+        assert message in str(excinfo.value)
+
+
+def test_tail_calls(run):
+    src = """
+    fun countdown(n) { if (n == 0) return "done"; return countdown(n - 1); }
+    countdown(100000);
+    """
+    assert run(src, CFGInterpreter()) == "done"
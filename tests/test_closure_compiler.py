@@ -0,0 +1,26 @@
+import pytest
+from plox.ClosureCompiler import ClosureCompiler
+
+
+def test_errors(run):
+    tests = [
+        ('"aaa" + 5;', "Operands of + must be either numbers or strings"),
+        ('"aaa" - "bbb";', "Operands of - must be numbers"),
+        ("5 / 0;", "Division by 0.0 is not allowed"),
+        ("print x;", "Undefined variable 'x'"),
+        ("x = 1;", "Cannot assign to undefined variable 'x'"),
+        ("fun f(a) {} f();", "Expected 1 arguments, got 0"),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            run(src, ClosureCompiler())
+        assert message in str(excinfo.value)
+
+
+def test_tail_calls(run):
+    src = """
+    fun countdown(n) { if (n == 0) return "done"; return countdown(n - 1); }
+    countdown(1000000);
+    """
+    assert run(src, ClosureCompiler()) == "done"
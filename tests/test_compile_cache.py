@@ -0,0 +1,131 @@
+import os
+import pickle
+from plox.CompileCache import CompileCache
+from plox.Interpreter import Interpreter
+from plox.Walk import walk
+from plox.Scanner import Scanner
+from plox.__main__ import Plox
+from conftest import compile
+
+SOURCE = """
+var total = 0;
+fun add(n) {
+    fun inner(x) { return x + n; }
+    return inner;
+}
+for (var i = 0; i < 5; i = i + 1) {
+    total = add(i)(total);
+}
+print total;
+"""
+
+
+def test_load_and_store(tmp_path, capsys):
+    cache = CompileCache(str(tmp_path))
+    assert cache.load(SOURCE) is None
+
+    statements, resolver = compile(SOURCE)
+    cache.store(SOURCE, statements, resolver)
+    assert [path.suffix for path in tmp_path.iterdir()] == [".pickle"]
+
+    # El programa vuelve con todo lo que anotó el resolvedor, y el resolvedor
+    # sigue apuntando a los nodos del árbol
+    loaded = cache.load(SOURCE)
+    assert loaded is not None
+    cached, cached_resolver = loaded
+    assert repr(cached) == repr(statements)
+    assert [(k.depth, k.slot, k.upvalue) for k in cached_resolver.locals] == [
+        (k.depth, k.slot, k.upvalue) for k in resolver.locals
+    ]
+    nodes = {id(node) for node in walk(cached)}
+    assert all(id(node) in nodes for node in cached_resolver.locals)
+    assert all(id(node) in nodes for node in cached_resolver.declarations)
+
+    Interpreter().interpret(cached)
+    assert capsys.readouterr().out == "10.0\n"
+
+
+def test_invalidation(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    cache.store(SOURCE, *compile(SOURCE))
+
+    # Otro código, otro límite de anidamiento u otro plox no encuentran el árbol
+    assert cache.load(SOURCE + " ") is None
+    assert CompileCache(str(tmp_path), max_nesting=100).load(SOURCE) is None
+    other = CompileCache(str(tmp_path))
+    other.fingerprint = "otro plox"
+    assert other.load(SOURCE) is None
+    assert CompileCache(str(tmp_path)).load(SOURCE) is not None
+
+    # Un archivo roto es como un archivo que no está
+    (path,) = tmp_path.iterdir()
+    path.write_bytes(b"no es un pickle")
+    assert cache.load(SOURCE) is None
+    path.write_bytes(pickle.dumps("tampoco es un programa"))
+    assert cache.load(SOURCE) is None
+
+
+def test_size_limit(tmp_path):
+    cache = CompileCache(str(tmp_path), maxsize=2)
+    sources = [SOURCE + f"print {i};" for i in range(3)]
+    cache.store(sources[0], *compile(sources[0]))
+    cache.store(sources[1], *compile(sources[1]))
+    os.utime(cache.path(sources[0]), ns=(1, 1))
+    os.utime(cache.path(sources[1]), ns=(2, 2))
+
+    # Leer un programa cuenta como usarlo, así que al guardar uno nuevo se
+    # borra el que hace más tiempo que no se usa
+    assert cache.load(sources[0]) is not None
+    cache.store(sources[2], *compile(sources[2]))
+    assert len(list(tmp_path.iterdir())) == 2
+    assert cache.load(sources[1]) is None
+    assert cache.load(sources[0]) is not None
+    assert cache.load(sources[2]) is not None
+
+    # Los que armó otro plox nunca se vuelven a leer, así que se terminan borrando
+    for path in tmp_path.iterdir():
+        os.utime(path, ns=(3, 3))
+    other = CompileCache(str(tmp_path), maxsize=2)
+    other.fingerprint = "otro plox"
+    other.store(sources[0], *compile(sources[0]))
+    other.store(sources[1], *compile(sources[1]))
+    assert sorted(tmp_path.iterdir()) == sorted(
+        [other.path(sources[0]), other.path(sources[1])]
+    )
+
+
+def test_unwritable_or_too_deep(tmp_path):
+    # Si no se puede escribir, el programa simplemente no se guarda
+    file = tmp_path / "archivo"
+    file.write_text("")
+    cache = CompileCache(str(file))
+    cache.store(SOURCE, *compile(SOURCE))
+    assert cache.load(SOURCE) is None
+
+    # pickle no puede guardar árboles tan profundos, así que no se guardan
+    source = "print " + "(" * 100_000 + "1" + ")" * 100_000 + ";"
+    cache = CompileCache(str(tmp_path / "cache"))
+    cache.store(source, *compile(source))
+    assert cache.load(source) is None
+    assert not (tmp_path / "cache").exists()
+
+
+def test_plox_uses_cache(tmp_path, capsys, monkeypatch):
+    plox = Plox()
+    plox.cache = CompileCache(str(tmp_path))
+    plox.whole_program = True
+    plox.run(SOURCE)
+    assert capsys.readouterr().out == "10.0\n"
+
+    # La segunda vez, el programa sale del cache sin volver a escanearse
+    def scan(self):
+        raise AssertionError("scanned again")
+
+    monkeypatch.setattr(Scanner, "scan", scan)
+    plox.run(SOURCE)
+    assert capsys.readouterr().out == "10.0\n"
+
+    # Las líneas del REPL no pasan por el cache
+    plox.whole_program = False
+    plox.run(SOURCE)
+    assert "scanned again" in capsys.readouterr().out
@@ -0,0 +1,393 @@
+import pytest
+from plox.Interpreter import Interpreter
+from plox.optimizer.Optimizer import Optimizer
+from plox.optimizer.SourcePrinter import SourcePrinter
+from plox.__main__ import Plox
+from conftest import compile, resolve
+
+
+def optimize(source, level=1, **options):
+    statements, _ = compile(source)
+    return resolve(Optimizer(level, **options).optimize(statements))
+
+
+def optimized(source, level=1, **options):
+    statements = optimize(source, level, **options)
+    return "; ".join(repr(statement) for statement in statements)
+
+
+def inlined(source, **options):
+    return optimized(source, 2, whole_program=True, **options)
+
+
+def dumped(source, level=3):
+    return SourcePrinter().print(optimize(source, level))
+
+
+def test_constant_folding():
+    tests = [
+        ("(1 + 2) * 3;", "<9.0>"),
+        ('"a" + "b" + "c";', '<"abc">'),
+        ("-(2 - 3);", "<1.0>"),
+        ("!nil;", "<TRUE>"),
+        ("1 < 2 == true;", "<TRUE>"),
+        ("x + (1 + 1);", "(<x> PLUS <2.0>)"),
+        ("true or x;", "<TRUE>"),
+        ("nil or x;", "<x>"),
+        ("false and x;", "<FALSE>"),
+        ('"a" and x;', "<x>"),
+        ("x and 1 + 1;", "(<x> AND <2.0>)"),
+    ]
+
+    for src, expected in tests:
+        assert optimized(src) == expected
+
+
+def test_runtime_errors_are_not_folded():
+    tests = [
+        ("5 / 0;", "(<5.0> SLASH <0.0>)", "Division by 0.0 is not allowed"),
+        ("5 % (1 - 1);", "(<5.0> PERCENT <0.0>)", "Modulo by 0.0 is not allowed"),
+        ('"a" + 1;', '(<"a"> PLUS <1.0>)', r"Operands of \+ must be"),
+        ('-"a";', '(MINUS<"a">)', "Operand of - must be a number"),
+    ]
+
+    for src, expected, message in tests:
+        assert optimized(src) == expected
+        with pytest.raises(RuntimeError, match=message):
+            Interpreter().interpret(optimize(src))
+
+    # El error no aparece si la expresión nunca se ejecuta
+    assert Interpreter().interpret(optimize("fun f() { return 1 / 0; } 2;")) == 2.0
+
+
+def test_constant_propagation():
+    assert optimized("{ var a = 2; var b = a * 3; print b + a; }") == "{ PRINT <8.0> }"
+    # También adentro de las clausuras que la capturan
+    assert (
+        optimized("{ var a = 1; fun f() { return a; } print f; }")
+        == "{ FUN fn<f()> { RETURN <1.0> }; PRINT <f> }"
+    )
+
+    # Las reasignadas, las que se pueden quedar sin definir y las globales no
+    tests = [
+        "{ var a = 1; a = 2; print a; }",
+        "{ var a = 1; fun f() { a = 2; } f(); print a; }",
+        "{ if (c) var a = 1; print a; }",
+        "var a = 1; print a;",
+    ]
+    for src in tests:
+        assert "PRINT <a>" in optimized(src)
+
+
+def test_dead_branches():
+    tests = [
+        ('if (1 < 2) print "yes"; else print "no";', 'PRINT <"yes">'),
+        (
+            '{ var debug = false; if (debug) print "debug"; print "done"; }',
+            '{ PRINT <"done"> }',
+        ),
+        ("while (false) print 1; print 2;", "PRINT <2.0>"),
+        ("while (true and x) print 1;", "WHILE <x> PRINT <1.0>"),
+        ("if (c) { if (false) print 1; }", "IF <c> THEN {  }"),
+        # Una declaración suelta en la rama que no se toma es del scope de
+        # afuera, así que el if se queda para no cambiar a qué se refiere `x`
+        (
+            "{ if (false) var x = 1; print x; }",
+            "{ IF <FALSE> THEN VAR x = <1.0>; PRINT <x> }",
+        ),
+        ("if (true) var x = 1;", "VAR x = <1.0>"),
+    ]
+
+    for src, expected in tests:
+        assert optimized(src) == expected
+
+    # En el REPL, una rama que queda suelta no empieza a mostrar su valor
+    assert Interpreter().interpret(optimize("if (true) 1;")) is None
+
+
+def test_dead_code():
+    tests = [
+        # lo que sigue a un return
+        (
+            "fun f() { print 1; return 2; print 3; }",
+            "FUN fn<f()> { PRINT <1.0>; RETURN <2.0> }",
+        ),
+        (
+            "fun f(a) { if (a) return 1; else { return 2; } print 3; }",
+            "FUN fn<f(a)> { IF <a> THEN RETURN <1.0> ELSE { RETURN <2.0> } }",
+        ),
+        # las locales sin usar, y las expresiones que no hacen nada
+        ("{ var a = 1; var b; fun f() {} print 2; }", "{ PRINT <2.0> }"),
+        ("fun f(a) { var b = a; a; 1; }", "FUN fn<f(a)> {  }"),
+        # salvo si declararlas o evaluarlas puede fallar
+        (
+            "{ var a = 1 / 0; var b = x; x; }",
+            "{ VAR a = (<1.0> SLASH <0.0>); VAR b = <x>; <x> }",
+        ),
+        (
+            "{ if (c) var a = 1; var b = a; }",
+            "{ IF <c> THEN VAR a = <1.0>; VAR b = <a> }",
+        ),
+        # en el nivel global, el REPL muestra el valor de la expresión
+        ("var a = 1; 2;", "VAR a = <1.0>; <2.0>"),
+    ]
+    for src, expected in tests:
+        assert optimized(src) == expected
+
+    # Con el programa entero, se sacan las funciones globales a las que no se
+    # llega desde el código que se ejecuta. En el REPL, otra línea las puede usar
+    src = """
+    fun used() { return helper(); }
+    fun helper() { return 1; }
+    fun unused() { return helper(); }
+    fun other() { return unused(); }
+    print used;
+    """
+    assert optimized(src, whole_program=True) == (
+        "FUN fn<used()> { RETURN fn<<helper>()> }; "
+        "FUN fn<helper()> { RETURN <1.0> }; PRINT <used>"
+    )
+    assert "FUN fn<other()>" in optimized(src)
+
+
+def test_dead_code_stats():
+    src = """
+    fun helper(a) { var unused = 1; return a; print a; }
+    fun unused() { return helper(1); }
+    fun main() { return helper(2); }
+    print main();
+    """
+    statements, _ = compile(src)
+    optimizer = Optimizer(1, whole_program=True)
+    optimizer.optimize(statements)
+    # `var unused = 1;` y `print a;` tienen 2 nodos cada uno, y la función
+    # `unused` tiene 5
+    assert optimizer.dead_code.removed == 9
+    assert optimizer.dead_code.removed_functions == 1
+
+
+def test_inlining():
+    src = "fun sq(x) { return x * x; } { var i = 3; print sq(i) + sq(2); }"
+    assert inlined(src) == "{ PRINT <13.0> }"
+    src = "fun sq(x) { return x * x; } fun f(n) { return sq(n); } print f;"
+    assert inlined(src) == "FUN fn<f(n)> { RETURN (<n> STAR <n>) }; PRINT <f>"
+    # Las que no devuelven nada se inlinean como un bloque
+    assert inlined("fun show(a, b) { print b; print a; } show(x, 2);") == (
+        "{ VAR a = <x>; PRINT <2.0>; PRINT <a> }"
+    )
+
+    # Las locales se inlinean aunque no sea el programa entero (ej: en el REPL)
+    assert optimized("{ fun one() { return 1; } print one(); }", 2) == (
+        "{ PRINT <1.0> }"
+    )
+    assert optimized("fun one() { return 1; } print one();", 2).endswith(
+        "PRINT fn<<one>()>"
+    )
+
+    not_inlined = [
+        # recursivas, también a través de otra función
+        "fun f(n) { if (n > 0) f(n - 1); } f(1);",
+        "fun f(n) { g(n); } fun g(n) { if (n > 0) f(n - 1); } f(1);",
+        # su nombre se usa como valor o se reasigna
+        "fun f() { return 1; } var g = f; f();",
+        "fun f() { return 1; } f = nil; f();",
+        "{ fun f() { return 1; } f = nil; f(); }",
+        # usan variables de afuera que no son globales
+        "{ var y = 1; fun f() { return y; } y = 2; f(); }",
+        # puede no estar definida cuando se llama
+        "f(); fun f() { return 1; }",
+        # los argumentos tienen efectos, o no alcanzan
+        "fun sq(x) { return x * x; } fun g() { print 1; return 1; } sq(g());",
+        "fun f(x) { return x; } f();",
+        # un argumento puede no estar definido, aunque no se use
+        "fun one(x) { return 1; } { if (false) var y = 1; print one(y); }",
+        # un argumento usa el nombre de un parámetro
+        "fun f(a, b) { print a; } { var b = 1; b = 3; f(b, 2); }",
+    ]
+    for src in not_inlined:
+        assert optimized(src, 1) == inlined(src)
+
+    # El tamaño del cuerpo que se inlinea se puede configurar
+    src = "fun add(a, b) { return a + b; } fun f(i) { print add(i, i); } print f;"
+    assert "PRINT (<i> PLUS <i>)" in inlined(src, inline_size=4)
+    assert "PRINT fn<<add>(<i>, <i>)>" in inlined(src, inline_size=3)
+
+
+@pytest.mark.parametrize(
+    "program", ["examples/closure-bug.lox", "examples/resolve.lox"]
+)
+def test_inlining_keeps_lexical_scope(program, read, capsys):
+    lines = read(program).splitlines()
+
+    # Como en --line-by-line, cada línea se resuelve y se optimiza por separado
+    outputs = []
+    for level in (0, 2):
+        interpreter = Interpreter()
+        for line in lines:
+            try:
+                interpreter.interpret(optimize(line, level, whole_program=True))
+            except (RuntimeError, NameError, SyntaxError) as e:
+                print(f"Error: {e}")
+        outputs.append(capsys.readouterr().out)
+    assert outputs[0] == outputs[1]
+
+    # showA usa la `a` global, que en el bloque está tapada por una local
+    src = 'fun showA() { print a; } { showA(); var a = "b"; showA(); a = "c"; }'
+    assert inlined(src).endswith(
+        '{ fn<<showA>()>; VAR a = <"b">; fn<<showA>()>; a = <"c"> }'
+    )
+
+
+def test_loop_invariants():
+    src = """
+    fun f(n, m) {
+        var i = 0;
+        while (i < n) { print n * 2 + 1; print i * 2 + 1; i = i + 1; }
+    }
+    """
+    assert dumped(src) == (
+        "fun f(n, m) {\n"
+        "    var i = 0;\n"
+        "    {\n"
+        "        var licm0;\n"
+        "        while (i < n) {\n"
+        "            print licm0 or (licm0 = ((n * 2) + 1));\n"
+        "            print (i * 2) + 1;\n"
+        "            i = (i + 1);\n"
+        "        }\n"
+        "    }\n"
+        "}"
+    )
+
+    # Lo invariante en el loop de afuera se saca hasta ahí
+    src = """
+    fun f(n) {
+        while (n > 0) {
+            var j = 0;
+            while (j < 3) { print n * n * j; print n * n * n; j = j + 1; }
+            n = n - 1;
+        }
+    }
+    """
+    assert "var licm0;\n            while (j < 3)" in dumped(src)
+    assert "print licm0 or (licm0 = ((n * n) * n));" in dumped(src)
+
+    not_hoisted = [
+        # se asigna o se declara adentro del loop
+        "fun f(n) { while (n > 0) { print n * 2 + 1; n = n - 1; } }",
+        "fun f(n) { while (n > 0) { var m = n; print m * 2 + 1; } }",
+        # hay llamadas que pueden cambiar la global o la variable capturada
+        "var g = 1; fun f(n) { while (n > 0) { print g * 2 + 1; f(0); } }",
+        "fun f(n) { fun c() { n = 1; } while (n > 0) { print n * 2 + 1; c(); } }",
+        # no es aritmética, o tiene un solo operador
+        "fun f(n) { while (n > 0) { print n * 2 < 1; } }",
+        "fun f(n) { while (n > 0) { print n * 2; } }",
+    ]
+    for src in not_hoisted:
+        assert "licm" not in dumped(src)
+    # Sin llamadas, una global no puede cambiar si el loop no la asigna
+    assert "licm0" in dumped("var g = 1; while (true) { print g * 2 + 1; }")
+
+
+def test_loop_invariant_errors_stay_in_place(capsys):
+    src = """
+    fun f(n, s) {
+        var i = 0;
+        while (i < n) { print i; print s * 2 + 1; i = i + 1; }
+    }
+    f(0, "a");
+    f(3, "a");
+    """
+    assert "licm0" in dumped(src)
+    # El error aparece recién cuando se evalúa la expresión, y no si el loop
+    # no da ninguna vuelta
+    with pytest.raises(RuntimeError, match="Operands of \\* must be numbers"):
+        Interpreter().interpret(optimize(src, 3, whole_program=True))
+    assert capsys.readouterr().out == "0.0\n"
+
+
+def test_common_subexpressions():
+    src = """
+    fun f(a, b) {
+        print a * b + 1;
+        print a * b + 1;
+        print (a * b + 1) * 2;
+    }
+    """
+    assert dumped(src) == (
+        "fun f(a, b) {\n"
+        "    var cse0;\n"
+        "    print cse0 = ((a * b) + 1);\n"
+        "    print cse0;\n"
+        "    print cse0 * 2;\n"
+        "}"
+    )
+
+    not_eliminated = [
+        # una variable cambia en el medio
+        "fun f(a, b) { print a * b + 1; a = 2; print a * b + 1; }",
+        # una llamada puede cambiar una global
+        "var g = 1; fun h() {} fun f(a) { print g * a + 1; h(); print g * a + 1; }",
+        # la primera vez puede no calcularse
+        "fun f(a, b) { print b or a * b + 1; print a * b + 1; }",
+        # un if termina el bloque básico
+        "fun f(a, b) { print a * b + 1; if (a) print 1; print a * b + 1; }",
+        # en el nivel global no se agregan variables
+        "var a = 1; var b = 2; print a * b + 1; print a * b + 1;",
+    ]
+    for src in not_eliminated:
+        assert "cse" not in dumped(src)
+
+
+def test_dump_is_valid_lox(capsys):
+    src = """
+    fun f(a, b) {
+        var i = 0;
+        while (i < 3) { print -a * b + 1 - (a * b); print -a * b + 1; i = i + 1; }
+        if (a > b) return "a"; else { return b or nil; }
+    }
+    print f(2, 1);
+    """
+    outputs = []
+    for source in (src, dumped(src)):
+        Interpreter().interpret(optimize(source, 0))
+        outputs.append(capsys.readouterr().out)
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize(
+    "program",
+    [
+        "examples/closure-bug.lox",
+        "examples/fib.lox",
+        "examples/flow.lox",
+        "examples/function.lox",
+        "examples/scopes.lox",
+        "real-tests/2-functions.lox",
+        "real-tests/3-minsky.lox",
+        "real-tests/4-fizzbuzz.lox",
+    ],
+)
+def test_same_output_as_unoptimized(program, read, capsys):
+    source = read(program)
+
+    outputs = []
+    for level in (0, 1, 2, 3):
+        try:
+            Interpreter().interpret(optimize(source, level, whole_program=True))
+        except RuntimeError as e:
+            print(f"Runtime Error: {e}")
+        outputs.append(capsys.readouterr().out)
+
+    assert outputs[0] == outputs[1] == outputs[2] == outputs[3]
+
+
+@pytest.mark.parametrize("mode", [None, "optimized"])
+def test_too_deep(mode, capsys):
+    # Las pasadas son recursivas: un programa demasiado anidado es un error
+    # más de plox, y no un traceback
+    plox = Plox()
+    plox.opt_level = 1
+    plox.mode = mode
+    plox.run("print " + "(" * 500 + "1" + ")" * 500 + ";")
+    assert capsys.readouterr().out.startswith("Optimizer Error: maximum recursion")
@@ -7,7 +7,10 @@ from plox.Expr import (
     AssignmentExpr,
 )
 from plox.Scanner import Scanner
+from plox.RegexScanner import RegexScanner
 from plox.Parser import Parser
+from plox.__main__ import Plox
+from plox.Walk import children
 from plox.Token import TokenType
 from plox.Stmt import (
     ExpressionStmt,
@@ -18,6 +21,7 @@ from plox.Stmt import (
     ReturnStmt,
     IfStmt,
     WhileStmt,
+    ForStmt,
 )
 from plox.Expr import VariableExpr
 
@@ -160,6 +164,39 @@ def test_precedence_unary():
     assert expr.right.value == 2.0
 
 
+def test_binding_powers():
+    tests = [
+        # Cada nivel de la gramática liga más fuerte que el anterior
+        ("a or b and c", "(<a> OR (<b> AND <c>))"),
+        ("a and b == c", "(<a> AND (<b> EQUAL_EQUAL <c>))"),
+        ("a != b < c", "(<a> BANG_EQUAL (<b> LESS <c>))"),
+        ("a >= b - c", "(<a> GREATER_EQUAL (<b> MINUS <c>))"),
+        ("a + b % c", "(<a> PLUS (<b> PERCENT <c>))"),
+        ("-a * !b", "((MINUS<a>) STAR (BANG<b>))"),
+        # Todos asocian a izquierda, salvo la asignación
+        ("a or b or c", "((<a> OR <b>) OR <c>)"),
+        ("a / b * c", "((<a> SLASH <b>) STAR <c>)"),
+        ("a = b = c or d", "a = b = (<c> OR <d>)"),
+        # Las llamadas ligan más fuerte que los unarios
+        ("-f(1)(2)", "(MINUSfn<fn<<f>(<1.0>)>(<2.0>)>)"),
+        ("f(a + b, c)", "fn<<f>((<a> PLUS <b>), <c>)>"),
+    ]
+    for src, expected in tests:
+        assert repr(Parser(Scanner(src).scan()).expression()) == expected
+
+    errors = [
+        ("a + b = c", "Invalid assignment target, got `IDENTIFIER<c>` instead"),
+        ("f(a,)", "Expected expression, got `RIGHT_PAREN` instead"),
+        ("f(a", "Expected ')' after function arguments, got `EOF` instead"),
+        ("(a", "Expected ')' after grouping expression, got `EOF` instead"),
+        ("a or", "Expected expression, got `EOF` instead"),
+    ]
+    for src, message in errors:
+        with pytest.raises(SyntaxError) as excinfo:
+            Parser(Scanner(src).scan()).expression()
+        assert str(excinfo.value) == message
+
+
 def test_big():
     tokens = Scanner("1 - (2 * 3) < 4 == false").scan()
     expr = Parser(tokens).expression()
@@ -342,6 +379,9 @@ def test_for():
     assert stmt.statements[0].name.lexeme == "i"
     assert isinstance(stmt.statements[1], WhileStmt)
     ws = stmt.statements[1]
+    # El while queda marcado como un for, con el incremento al final del cuerpo
+    assert isinstance(ws, ForStmt)
+    assert ws.increment
     assert isinstance(ws.condition, BinaryExpr)
     assert ws.condition.operator.token_type == TokenType.LESS
 
@@ -373,4 +413,77 @@ def test_for():
     inner_body = stmt.statements[1].body
     assert isinstance(inner_body, BlockStmt)
     assert len(inner_body.statements) == 1
+    assert not stmt.statements[1].increment
     assert isinstance(inner_body.statements[0], PrintStmt)
+
+
+# La profundidad del árbol (en nodos), sin recursión
+def depth(node):
+    deepest = 0
+    pending = [(node, 1)]
+    while pending:
+        node, level = pending.pop()
+        deepest = max(deepest, level)
+        pending.extend((child, level + 1) for child in children(node))
+    return deepest
+
+
+def test_deep_nesting():
+    # Con el stack de Python, unos mil niveles ya alcanzarían para un
+    # RecursionError. El parser guarda los niveles abiertos en sus propias pilas
+    n = 100_000
+    tests = [
+        "(" * n + "1" + ")" * n + ";",
+        "!-" * (n // 2) + "1;",
+        "a = " * n + "1;",
+        "f(1, " * n + "1" + ")" * n + ";",
+        "1 + (" * n + "1" + ")" * n + ";",
+        "{" * n + "}" * n,
+        "if (a) print 1; else " * n + "print 2;",
+        "fun f() { " * n + "}" * n,
+    ]
+    for src in tests:
+        # (el scanner de expresiones regulares es más rápido para programas tan largos)
+        stmts = Parser(RegexScanner(src).scan()).parse()
+        assert len(stmts) == 1
+        assert depth(stmts[0]) >= n
+
+
+def test_deep_nesting_output(capsys):
+    # plox --parsing muestra el árbol con repr, que sí es recursivo: un
+    # programa demasiado anidado es un error más, y no un traceback
+    plox = Plox()
+    plox.mode = "parsing"
+    plox.run("print " + "(" * 5000 + "1" + ")" * 5000 + ";")
+    assert capsys.readouterr().out.startswith("Parsing Error: maximum recursion")
+
+
+def test_max_depth():
+    src = """
+    {
+        {
+            print -((1 + 2) * 3);
+        }
+    }
+    """
+    # Los dos bloques, el -, los dos paréntesis y la suma que tiene pendiente
+    # el de adentro son seis niveles anidados
+    stmts = Parser(Scanner(src).scan(), max_depth=6).parse()
+    assert len(stmts) == 1
+    with pytest.raises(SyntaxError) as excinfo:
+        Parser(Scanner(src).scan(), max_depth=5).parse()
+    assert (
+        str(excinfo.value)
+        == "Nesting deeper than 5 levels at line 4, got `NUMBER<2.0>`"
+    )
+
+    src = "if (true)\n" * 5 + "print 1;"
+    Parser(Scanner(src).scan(), max_depth=5).parse()
+    with pytest.raises(SyntaxError) as excinfo:
+        Parser(Scanner(src).scan(), max_depth=4).parse()
+    assert str(excinfo.value) == "Nesting deeper than 4 levels at line 6, got `PRINT`"
+
+    # El límite corta el parseo en cuanto se pasa, sin parsear el resto
+    n = 100_000
+    with pytest.raises(SyntaxError, match="Nesting deeper than 1000 levels"):
+        Parser(RegexScanner("{" * n + "}" * n).scan(), max_depth=1000).parse()
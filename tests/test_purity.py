@@ -0,0 +1,151 @@
+import sys
+import pytest
+from plox.Function import MemoizedFunction
+from plox.Interpreter import Interpreter
+from plox.Purity import PurityAnalyzer
+from plox.Quickening import QuickeningInterpreter
+from plox.StackInterpreter import StackInterpreter
+from plox.Stmt import FunDecl
+from plox.__main__ import Plox
+from conftest import compile
+
+
+def analyze(source, analyzer=None):
+    statements, _ = compile(source)
+    (analyzer or PurityAnalyzer()).analyze(statements)
+    return statements
+
+
+def memoizing_interpreter(analyzer, size=1024, backend=Interpreter):
+    interpreter = backend()
+    interpreter.memo_size = size
+    interpreter.memo_globals = analyzer.dependencies
+    return interpreter
+
+
+def analyzer_globals(statements):
+    analyzer = PurityAnalyzer()
+    analyzer.analyze(statements)
+    return analyzer.pure_globals
+
+
+def test_purity():
+    statements = analyze(
+        """
+        fun fib(n) { if (n <= 1) return n; return fib(n - 2) + fib(n - 1); }
+        fun loop(n) { var t = 0; while (n > 0) { t = t + n; n = n - 1; } return t; }
+        fun calls(n) { return fib(n) + loop(n); }
+        fun prints(n) { print n; return n; }
+        fun indirect(n) { return prints(n); }
+        var g = 1;
+        fun reads_global() { return g; }
+        fun writes_global() { g = 2; }
+        fun calls_param(f) { return f(); }
+        fun makes_closure() { fun inner() { return 1; } return inner; }
+        fun outer() { var x = 1; fun uses_upvalue() { return x; } return uses_upvalue; }
+        fun reassigned() { return 1; }
+        reassigned = nil;
+        fun uses_reassigned() { return reassigned(); }
+        """
+    )
+    pure = {s.name.lexeme for s in statements if isinstance(s, FunDecl) and s.pure}
+    assert pure == {"fib", "loop", "calls", "reassigned"}
+    # reassigned es pura, pero su nombre global cambia de valor
+    assert analyzer_globals(statements) == {"fib", "loop", "calls"}
+
+    functions = {s.name.lexeme: s for s in statements if isinstance(s, FunDecl)}
+    assert not functions["outer"].body[1].pure
+
+
+@pytest.mark.parametrize(
+    "backend", [Interpreter, StackInterpreter, QuickeningInterpreter]
+)
+def test_memoization(backend, capsys):
+    analyzer = PurityAnalyzer()
+    interpreter = memoizing_interpreter(analyzer, backend=backend)
+    statements = analyze(
+        """
+        fun fib(n) { if (n <= 1) return n; return fib(n - 2) + fib(n - 1); }
+        fun same(x) { return x; }
+        print fib(30);
+        print same(true);
+        print same(1);
+        print same(-0);
+        print same(0);
+        """,
+        analyzer,
+    )
+    interpreter.interpret(statements)
+    # true == 1.0 en Python, pero son claves distintas del cache
+    assert capsys.readouterr().out == "832040.0\nTrue\n1.0\n-0.0\n0.0\n"
+
+    fib = interpreter.globals["fib"]
+    assert isinstance(fib, MemoizedFunction)
+    assert (fib.cache.hits, fib.cache.misses) == (28, 31)
+    # --memo-stats las muestra en el orden en que se crearon
+    assert list(interpreter.memoized) == [fib, interpreter.globals["same"]]
+
+
+def test_memoization_is_bounded():
+    analyzer = PurityAnalyzer()
+    interpreter = memoizing_interpreter(analyzer, size=3)
+    statements = analyze(
+        """
+        fun square(x) { return x * x; }
+        var i = 0;
+        while (i < 10) { square(i); square(i); i = i + 1; }
+        square(9);
+        square(0);
+        """,
+        analyzer,
+    )
+    interpreter.interpret(statements)
+    cache = interpreter.globals["square"].cache
+    # Solo quedan los tres que se usaron más recientemente
+    assert list(cache.entries) == [((float, 8.0),), ((float, 9.0),), ((float, 0.0),)]
+    assert (cache.hits, cache.misses) == (11, 11)
+
+
+def test_redefined_dependencies_disable_memoization(capsys):
+    analyzer = PurityAnalyzer()
+    interpreter = memoizing_interpreter(analyzer)
+
+    def line(source):
+        return interpreter.interpret(analyze(source, analyzer))
+
+    line("fun helper(x) { return x + 1; }")
+    line("fun f(x) { return helper(x); }")
+    assert line("f(1);") == 2.0
+    assert "f" in analyzer.pure_globals
+
+    # Si una línea posterior del REPL cambia helper, f ya no puede usar su cache
+    line('fun helper(x) { print "side effect"; return x; }')
+    assert "helper" not in analyzer.pure_globals
+    assert line("f(1);") == 1.0
+    assert line("f(1);") == 1.0
+    assert capsys.readouterr().out == "side effect\nside effect\n"
+
+    with pytest.raises(RuntimeError, match="Cannot call non-callable object"):
+        line("helper = nil; f(1);")
+
+
+def test_memoize_flag(read, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "fib.lox"
+    path.write_text(read("examples/fib.lox"))
+
+    # Con --explicit-stack, las llamadas también pasan por el cache
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["plox", "--memoize", "--memo-stats", "--explicit-stack", str(path)],
+    )
+    Plox().main()
+    out = capsys.readouterr().out
+    assert "Memoized <fn fib(n)>: 18 hits, 21 misses" in out
+
+    # Los demás backends no memoizan, así que no aceptan el flag
+    for backend in ["--vm", "--closures", "--jit", "--cfg", "--python"]:
+        monkeypatch.setattr(sys, "argv", ["plox", "--memoize", backend, str(path)])
+        with pytest.raises(SystemExit):
+            Plox().main()
+        assert "--memoize only works with" in capsys.readouterr().err
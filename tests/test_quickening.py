@@ -0,0 +1,110 @@
+import gc
+import weakref
+import pytest
+from plox.Quickening import QuickeningInterpreter, QUICKEN_AFTER
+from conftest import compile
+
+
+def test_specializations(run):
+    interpreter = QuickeningInterpreter()
+    src = """
+    fun add(a, b) { return a + b; }
+    var s = "";
+    var total = 0;
+    for (var i = 0; i < 20; i = i + 1) {
+        total = add(total, i);
+        s = s + "a";
+    }
+    total;
+    """
+    assert run(src, interpreter) == 190.0
+    # a + b, y add(...) (el + de las cadenas). El for es un loop contado, así
+    # que i < 20 y i + 1 no se evalúan
+    assert interpreter.specializations == {"number": 1, "concat": 1, "call": 1}
+    assert interpreter.deoptimizations == {}
+
+    # Un nodo que se evalúa pocas veces no se especializa (la condición se
+    # evalúa una vez más que el incremento)
+    interpreter = QuickeningInterpreter()
+    run(f"var i = 0; while (i < {QUICKEN_AFTER - 2}) i = i + 1;", interpreter)
+    assert interpreter.specializations == {}
+
+
+def test_deoptimizations(run):
+    interpreter = QuickeningInterpreter()
+    src = """
+    fun add(a, b) { return a + b; }
+    for (var i = 0; i < 20; i = i + 1) add(i, i);
+    add("a", "b");
+    """
+    assert run(src, interpreter) == "ab"
+    assert interpreter.deoptimizations == {"number": 1}
+
+    interpreter = QuickeningInterpreter()
+    src = """
+    fun f() { return 1; }
+    fun g() { return 2; }
+    var h = f;
+    var total = 0;
+    for (var i = 0; i < 20; i = i + 1) {
+        if (i == 10) h = g;
+        total = total + h();
+    }
+    total;
+    """
+    assert run(src, interpreter) == 30.0
+    assert interpreter.deoptimizations == {"call": 1}
+
+
+def test_errors(run):
+    # Después de desespecializarse, los errores son los de siempre
+    tests = [
+        (
+            'fun sub(a, b) { return a - b; } for (var i = 0; i < 20; i = i + 1) sub(i, 1); sub("a", 1);',
+            "Operands of - must be numbers",
+        ),
+        (
+            'fun cat(a, b) { return a + b; } for (var i = 0; i < 20; i = i + 1) cat("a", "b"); cat("a", 1);',
+            "Operands of + must be either numbers or strings",
+        ),
+        (
+            "fun f(a) {} fun g() {} var h = f; for (var i = 0; i < 20; i = i + 1) h(1); h = g; h(1);",
+            "Expected 0 arguments, got 1",
+        ),
+        (
+            "fun f() {} var h = f; for (var i = 0; i < 20; i = i + 1) h(); h = 1; h();",
+            "Cannot call non-callable object",
+        ),
+        (
+            "var a = 1; for (var i = 0; i < 20; i = i + 1) a / (i + 1); a / 0;",
+            "Division by 0.0 is not allowed",
+        ),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            run(src, QuickeningInterpreter())
+        assert message in str(excinfo.value)
+
+
+def test_repl_memory_does_not_grow():
+    # Los contadores no se quedan con los nodos: el árbol de cada línea del
+    # REPL se libera apenas se ejecuta
+    interpreter = QuickeningInterpreter()
+    interpreter.interpret(compile("fun f(n) { return n; }")[0])
+
+    def line():
+        statements, _ = compile("var i = 0; while (i < 20) { i = f(i) + 1; }")
+        interpreter.interpret(statements)
+        return weakref.ref(statements[1])
+
+    refs = [line() for _ in range(50)]
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+    assert interpreter.specializations == {"number": 100, "call": 50}
+    assert not interpreter.countdown and not interpreter.deopts
+
+    # Un nodo especializado deja de contarse
+    statements, _ = compile("var j = 0; while (j < 20) { j = j + 1; }")
+    interpreter.interpret(statements)
+    assert len(interpreter.countdown) == 0
@@ -0,0 +1,82 @@
+import glob
+import os
+import random
+import pytest
+from plox.RegexScanner import RegexScanner
+from plox.Scanner import Scanner
+import test_scanner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Los tokens que devuelve un scanner, o el error que levanta
+def scan(scanner, source):
+    try:
+        tokens = scanner(source).scan()
+    except Exception as e:
+        return str(e)
+    return [(t.token_type, t.lexeme, t.literal, t.line) for t in tokens]
+
+
+# Los mismos tests que Scanner, con RegexScanner
+@pytest.mark.parametrize(
+    "test",
+    [test for name, test in vars(test_scanner).items() if name.startswith("test_")],
+)
+def test_scanner_suite(test, monkeypatch):
+    monkeypatch.setattr(test_scanner, "Scanner", RegexScanner)
+    test()
+
+
+def test_same_tokens_as_scanner():
+    tests = [
+        "var x = 1;\nprint x;\n",
+        # Los saltos de línea adentro de una cadena no se cuentan
+        'print "a\nb";\nprint 1;',
+        "print 'a';\n'b",
+        # Comentarios, y un / solo
+        "1 / 2 // comentario\n/ 3",
+        "// al final",
+        # Números e identificadores pegados
+        "123abc 1.5.2",
+        "12.",
+        "a1_b _x trueman or_ nil",
+        # Identificadores con letras que no son ASCII, y números que no son dígitos
+        "ñandú = año²;",
+        "²x",
+        "x٣ ٣",
+        # Caracteres inesperados, y espacios que Lox no acepta
+        "a @ b",
+        "a\fb",
+        "a b",
+        "",
+        "\n\n\n",
+        '"sin cerrar\n\n',
+        "'sin cerrar\nx",
+    ]
+    for src in tests:
+        assert scan(RegexScanner, src) == scan(Scanner, src)
+
+
+@pytest.mark.parametrize(
+    "program",
+    sorted(glob.glob(os.path.join(ROOT, "examples", "*.lox")))
+    + sorted(glob.glob(os.path.join(ROOT, "real-tests", "*.lox"))),
+)
+def test_same_tokens_on_programs(program):
+    with open(program) as file:
+        source = file.read()
+    assert scan(RegexScanner, source) == scan(Scanner, source)
+
+
+def test_same_tokens_on_random_sources():
+    # Pedazos de código al azar, con todo lo que puede confundir a un scanner
+    pieces = [
+        "var", "x", "_y2", "and", "1", "2.5", "3.", "..", "'s'", '"m\nl"', "'", '"',
+        "//c", "/", "!", "=", "<", ">", "(", ")", "{", "}", ";", ",", "-", "+",
+        "*", "%", " ", "\t", "\r", "\n", "ñ", "²", "@", ".",
+    ]  # fmt: skip
+    rng = random.Random(0)
+    for _ in range(2000):
+        src = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert scan(RegexScanner, src) == scan(Scanner, src)
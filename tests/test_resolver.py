@@ -0,0 +1,391 @@
+import gc
+import tracemalloc
+import weakref
+from itertools import product
+import pytest
+from plox.ClosureCompiler import ClosureCompiler
+from plox.Interpreter import Interpreter
+from plox.StackInterpreter import StackInterpreter
+from plox.Walk import walk
+from plox.Stmt import ForStmt, FunDecl
+from plox.Resolver import Resolver
+from plox.Scanner import Scanner
+from plox.Parser import Parser
+from conftest import compile
+
+
+def run(source):
+    statements, _ = compile(source)
+    return Interpreter().interpret(statements)
+
+
+def test_slots():
+    statements, resolver = compile(
+        """
+        var g = 0;
+        fun f(a, b) {
+            var c = a;
+            { var d = b; print c + d; }
+        }
+        """
+    )
+
+    declarations = {k.name.lexeme: k.slot for k in resolver.declarations}
+    # Las globales no tienen slot. Los parámetros ocupan los primeros slots de la
+    # función, y cada bloque numera sus variables desde 0
+    assert declarations == {"c": 2, "d": 0}
+
+    accesses = {k.name.lexeme: (k.depth, k.slot) for k in resolver.locals}
+    assert accesses == {"a": (0, 0), "b": (1, 1), "c": (1, 2), "d": (0, 0)}
+
+    g, f = statements
+    assert g.slot is None
+    assert f.scope_size == 3
+    assert f.body[1].scope_size == 1
+
+
+def test_shadowing():
+    src = """
+    var x = "global";
+    {
+        var x = "outer";
+        {
+            var x = "inner";
+            x = x + "!";
+        }
+        x;
+    }
+    """
+    statements, _ = compile(src)
+    interpreter = Interpreter()
+    interpreter.interpret(statements)
+    assert interpreter.globals["x"] == "global"
+    assert run("var x = 1; { var y = x + 1; x = y; } x;") == 2.0
+
+
+def test_undefined_slots():
+    tests = [
+        ("{ if (false) var x = 1; print x; }", "Undefined variable 'x'"),
+        ("{ if (false) var x = 1; x = 2; }", "Cannot assign to undefined variable 'x'"),
+        ("{ var x = (x = 1); }", "Cannot assign to undefined variable 'x'"),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            run(src)
+        assert message in str(excinfo.value)
+
+    assert run("var r; { if (true) var x = 1; r = x; } r;") == 1.0
+
+
+def test_repl_memory_does_not_grow():
+    # Una única instancia del intérprete vive durante toda la sesión del REPL.
+    # Como la resolución queda anotada en los nodos, el árbol de cada línea
+    # puede liberarse apenas se ejecuta
+    interpreter = Interpreter()
+    interpreter.interpret(compile("var total = 0;")[0])
+
+    def line(i):
+        statements, _ = compile(f"{{ var x = {i}; total = total + x; }}")
+        interpreter.interpret(statements)
+        return weakref.ref(statements[0])
+
+    refs = [line(i) for i in range(100)]
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+    tracemalloc.start()
+    for i in range(200):
+        line(i)
+    gc.collect()
+    before, _ = tracemalloc.get_traced_memory()
+    for i in range(2000):
+        line(i)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert after - before < 10_000
+    assert interpreter.globals["total"] == sum(range(100)) + sum(range(200)) + sum(
+        range(2000)
+    )
+
+
+def test_block_environments():
+    statements, resolver = compile(
+        """
+        fun f() {
+            var a = 1;
+            { { print a; } }
+            while (a < 3) { var b = a; a = b + 1; }
+            while (a < 5) { var c = a; fun g() { return c; } a = g() + 1; }
+        }
+        """
+    )
+    (f,) = statements
+    empty, loop, escaping = f.body[1], f.body[2].body, f.body[3].body
+
+    # Los bloques que no declaran nada no tienen entorno, así que no cuentan
+    # en la profundidad: `a` está directamente en el entorno de la función
+    assert empty.scope_size == 0
+    assert empty.statements[0].scope_size == 0
+    assert empty.statements[0].statements[0].expression.depth == 0
+
+    # Los cuerpos de los dos while reutilizan su entorno en cada iteración:
+    # la clausura de g no se queda con él, solo con la celda de c
+    interpreter = Interpreter()
+    interpreter.interpret(statements)
+    interpreter.interpret(compile("f();")[0])
+    assert loop.free_env is not None
+    assert escaping.free_env is not None
+
+
+def test_reused_environments_keep_semantics(capsys):
+    src = """
+    var i = 0;
+    while (i < 2) {
+        if (i == 0) var x = "defined";
+        var y;
+        print y;
+        y = i;
+        i = i + 1;
+        print x;
+    }
+    """
+    with pytest.raises(RuntimeError, match="Undefined variable 'x'"):
+        run(src)
+    assert capsys.readouterr().out == "None\ndefined\nNone\n"
+
+    src = """
+    fun countdown(n) {
+        { var local = n; if (n > 0) countdown(n - 1); print local; }
+    }
+    countdown(2);
+    """
+    run(src)
+    assert capsys.readouterr().out == "0.0\n1.0\n2.0\n"
+
+
+@pytest.mark.parametrize("backend", [Interpreter, StackInterpreter, ClosureCompiler])
+def test_reused_environments_are_released(backend):
+    # El entorno que el bloque guarda para reutilizar no se queda ni con sus
+    # valores (block) ni con el entorno de la función que lo ejecutó (frame)
+    src = """
+    var a;
+    var b;
+    fun call() {
+        fun frame() {}
+        a = frame;
+        { fun block() {} b = block; }
+    }
+    call();
+    """
+    interpreter = backend()
+    interpreter.interpret(compile(src)[0])
+    refs = [weakref.ref(interpreter.globals[name]) for name in ("a", "b")]
+    interpreter.interpret(compile("a = nil; b = nil;")[0])
+    gc.collect()
+    assert [ref() for ref in refs] == [None, None]
+
+
+def test_flat_closures():
+    statements, resolver = compile(
+        """
+        fun outer(unused, p) {
+            var big = "big";
+            var a = 1;
+            fun mid() {
+                fun inner() { a = a + p; return a; }
+                return inner;
+            }
+            return mid();
+        }
+        """
+    )
+    (outer,) = statements
+    big, a, mid = outer.body[0], outer.body[1], outer.body[2]
+    inner = mid.body[0]
+
+    # Las funciones solo capturan las variables de afuera que usan. mid no usa
+    # a ni p, pero tiene que capturarlas para poder dárselas a inner
+    assert [v.name.lexeme for v in inner.captures] == ["a", "p"]
+    assert [v.name.lexeme for v in mid.captures] == ["a", "p"]
+    assert [v.upvalue for v in inner.captures] == [0, 1]
+    assert [(v.depth, v.slot) for v in mid.captures] == [(0, 3), (0, 1)]
+
+    # Solo las variables capturadas se guardan en celdas
+    assert a.captured and not big.captured
+    assert outer.captured_params == [1]
+
+    interpreter = Interpreter()
+    interpreter.interpret(statements)
+    inc = interpreter.interpret(compile('outer("unused", 10);')[0])
+    assert inc(interpreter, []) == 11.0
+    assert inc(interpreter, []) == 21.0
+    # La clausura no mantiene vivo nada más del scope en el que se creó
+    assert [cell.value for cell in inc.upvalues] == [21.0, 10.0]
+
+
+def test_closures_share_captured_variables():
+    src = """
+    var get; var set; var first; var last;
+    fun make() {
+        var x = "before";
+        fun g() { return x; }
+        fun s(v) { x = v; }
+        get = g; set = s;
+        for (var i = 0; i < 3; i = i + 1) {
+            var j = i;
+            fun f() { return j; }
+            if (i == 0) first = f;
+            last = f;
+        }
+    }
+    make();
+    set("after");
+    """
+    # Las funciones que capturan la misma variable comparten su celda,
+    # y cada iteración del loop tiene su propia j
+    assert run(src + "get();") == "after"
+    assert run(src + "first() + last();") == 2.0
+
+
+def test_tail_calls():
+    statements, _ = compile(
+        """
+        fun f(n) {
+            if (n > 0) return f(n - 1);
+            return 1 + f(0);
+        }
+        return f(1);
+        """
+    )
+    f, top = statements
+    # Solo son tail calls los returns de una llamada adentro de una función
+    assert f.body[0].then_branch.tail_call
+    assert not f.body[1].tail_call
+    assert not top.tail_call
+
+    # Una recursión de cola no anida frames de Python: con el límite de
+    # recursión por defecto, sin tail calls esto sería un RecursionError
+    src = """
+    fun even(n) { if (n == 0) return true; return odd(n - 1); }
+    fun odd(n) { if (n == 0) return false; { return even(n - 1); } }
+    even(20001);
+    """
+    assert run(src) is False
+
+    with pytest.raises(RuntimeError, match="Expected 1 arguments, got 0"):
+        run("fun f(n) { return f(); } f(1);")
+
+
+def test_counted_loops(capsys):
+    def counted(source):
+        statements, _ = compile(source)
+        loops = [node for node in walk(statements) if isinstance(node, ForStmt)]
+        return [loop.counted is not None and loop.counted.local() for loop in loops]
+
+    # Los for que cuentan, hacia arriba o hacia abajo, contra un número o
+    # contra una variable que no cambia en el loop
+    assert counted("for (var i = 0; i < 10; i = i + 1) print i;") == [True]
+    assert counted("for (var i = 10; i >= 0; i = i - 2) print i;") == [True]
+    assert counted("fun f(n) { for (var i = 0; i <= n; i = i + 1) print i; }") == [True]
+    assert counted("{ var i = 0; for (; i < 3; i = i + 1) {} print i; }") == [True]
+
+    tests = [
+        # Sin incremento, o con un incremento que no es un paso constante
+        "for (var i = 0; i < 10;) i = i + 1;",
+        "for (var i = 1; i < 10; i = i * 2) print i;",
+        "for (var i = 0; i < 10; i = i + 0.5) print i;",
+        # El cuerpo asigna el contador o el límite
+        "for (var i = 0; i < 10; i = i + 1) i = i + 1;",
+        "{ var n = 10; for (var i = 0; i < n; i = i + 1) n = n - 1; }",
+        # La condición no compara el contador
+        "for (var i = 0; i == 10; i = i + 1) print i;",
+        "for (var i = 0; 10 > i; i = i + 1) print i;",
+        # Un contador global, o uno que captura una clausura
+        "var i; for (i = 0; i < 10; i = i + 1) print i;",
+        "for (var i = 0; i < 3; i = i + 1) { fun f() { return i; } }",
+        # Un límite global, que cualquier llamada puede cambiar
+        "var n = 3; for (var i = 0; i < n; i = i + 1) print i;",
+    ]
+    for src in tests:
+        assert counted(src) == [False]
+
+    # Recorrerlos con un range da lo mismo que recorrerlos como un while
+    tests = [
+        "for (var i = 0; i < 5; i = i + 1) print i;",
+        "for (var i = 0; i <= 5; i = i + 2) print i;",
+        "for (var i = 5; i > 0; i = i - 1) print i;",
+        "for (var i = 5; i >= -1.5; i = i - 3) print i;",
+        "for (var i = 0; i < 2.5; i = i + 1) print i;",
+        "for (var i = 0; i > 3; i = i + 1) print i;",
+        "for (var i = 0.5; i < 3; i = i + 1) print i;",
+        "for (var i = -0; i < 2; i = i + 1) print i;",
+        "{ var i = 0; for (; i < 3; i = i + 1) {} print i; }",
+        "{ var i = 7; for (; i >= 2.5; i = i - 2) {} print i; }",
+        "fun f(n) { for (var i = 0; i < n; i = i + 1) if (i * i > n) return i; } print f(20);",
+        "for (var i = 0; i < 3; i = i + 1) for (var j = i; j < 3; j = j + 1) print i * 10 + j;",
+        'for (var i = "a"; i < 3; i = i + 1) print i;',
+        'fun f(n) { for (var i = 0; i < n; i = i + 1) print i; } f(2); f("a");',
+    ]
+    for src in tests:
+        outputs = []
+        for backend, enabled in product((Interpreter, ClosureCompiler), (True, False)):
+            statements, _ = compile(src)
+            if not enabled:
+                for node in walk(statements):
+                    if isinstance(node, ForStmt):
+                        node.counted = None
+            try:
+                backend().interpret(statements)
+            except RuntimeError as e:
+                print(f"Runtime Error: {e}")
+            outputs.append(capsys.readouterr().out)
+        assert outputs[0] == outputs[1] == outputs[2] == outputs[3]
+
+
+def test_deep_nesting():
+    # El resolvedor recorre el árbol con su propia pila de frames, así que
+    # resuelve árboles mucho más profundos que el límite de recursión de Python
+    n = 100_000
+
+    # Cada bloque declara una variable, y el más interno usa la del más externo
+    src = "".join(f"{{ var v{i} = {i};" for i in range(n)) + "print v0;" + "}" * n
+    _, resolver = compile(src)
+    (access,) = resolver.locals
+    assert access.name.lexeme == "v0"
+    assert (access.depth, access.slot) == (n - 1, 0)
+
+    src = "{ var a = 1; print " + "(" * n + "a" + " + a)" * n + "; }"
+    _, resolver = compile(src)
+    assert len(resolver.locals) == n + 1
+    assert all(access.depth == 0 for access in resolver.locals)
+
+    # Las funciones anidadas capturan la variable cada una de la que la encierra
+    src = "fun f() { var x = 1; " + "fun g() { " * n + "return x;" + "}" * (n + 1)
+    statements, _ = compile(src)
+    functions = [node for node in walk(statements) if isinstance(node, FunDecl)]
+    assert len(functions) == n + 1
+    (outer,) = functions[1].captures
+    assert (outer.depth, outer.slot, outer.upvalue) == (0, 0, None)
+    assert outer.declaration is not None and outer.declaration.captured
+    for function in functions[2:]:
+        (capture,) = function.captures
+        assert (capture.depth, capture.upvalue) == (None, 0)
+
+
+def test_max_depth():
+    src = """
+    fun f(a) {
+        if (a) {
+            print -(a + 1);
+        }
+    }
+    """
+    statements = Parser(Scanner(src).scan()).parse()
+    # La función, el if, el bloque, el print, el -, el paréntesis y la suma
+    Resolver(max_depth=7).resolve(statements[0])
+    with pytest.raises(NameError) as excinfo:
+        Resolver(max_depth=6).resolve(statements[0])
+    assert str(excinfo.value) == "Nesting deeper than 6 levels at line 4"
@@ -0,0 +1,56 @@
+import pytest
+from plox.Interpreter import Interpreter
+from plox.StackInterpreter import StackInterpreter
+from plox.Scanner import Scanner
+from plox.Parser import Parser
+
+
+def test_errors(run):
+    tests = [
+        ('"aaa" + 5;', "Operands of + must be either numbers or strings"),
+        ("5 / 0;", "Division by 0.0 is not allowed"),
+        ("print x;", "Undefined variable 'x'"),
+        ("{ var x = (x = 1); }", "Cannot assign to undefined variable 'x'"),
+        ("fun f(a) {} f();", "Expected 1 arguments, got 0"),
+        ("fun f() { return 1 + nil; } f();", "Operands of + must be"),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            run(src, StackInterpreter())
+        assert message in str(excinfo.value)
+
+    # Después de un error adentro de una función, el REPL sigue en el entorno global
+    interpreter = StackInterpreter()
+    with pytest.raises(RuntimeError):
+        run("var a = 1; fun f(x) { { var y = x; return y + nil; } } f(1);", interpreter)
+    assert interpreter.depth == 0
+    assert run("a + 1;", interpreter) == 2.0
+
+
+def test_deep_recursion(run):
+    src = """
+    fun sum(n) { if (n == 0) return 0; return n + sum(n - 1); }
+    sum(5000);
+    """
+    # Con el stack de Python esto es un RecursionError
+    with pytest.raises(RecursionError):
+        run(src, Interpreter())
+    assert run(src, StackInterpreter()) == 12502500.0
+
+    with pytest.raises(RuntimeError, match="Stack overflow"):
+        run(src, StackInterpreter(max_depth=1000))
+
+    # Las tail calls no cuentan para la profundidad
+    src = "fun f(n) { if (n == 0) return 0; return f(n - 1); } f(5000);"
+    assert run(src, StackInterpreter(max_depth=10)) == 0
+
+
+def test_deeply_nested_expressions():
+    # El parser arma sumas y productos encadenados iterativamente,
+    # así que el árbol queda tan profundo como términos tenga
+    expression = Parser(Scanner(" + ".join(["1"] * 100_000)).scan()).expression()
+    assert StackInterpreter().run(expression) == 100_000.0
+
+    expression = Parser(Scanner(" * ".join(["2"] * 1_000)).scan()).expression()
+    assert StackInterpreter().run(expression) == 2.0**1_000
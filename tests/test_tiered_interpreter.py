@@ -0,0 +1,122 @@
+import gc
+import weakref
+import pytest
+from plox.TieredInterpreter import TieredInterpreter, TieredFunction
+from conftest import compile
+
+
+def test_hot_functions(run):
+    interpreter = TieredInterpreter(call_threshold=5)
+    src = """
+    fun square(n) { return n * n; }
+    fun cold() { return 0; }
+    var total = cold();
+    for (var i = 0; i < 10; i = i + 1) total = total + square(i);
+    total;
+    """
+    assert run(src, interpreter) == 285.0
+    assert [f.name.lexeme for f in interpreter.functions] == ["square"]
+    assert interpreter.calls[next(iter(interpreter.functions))] == 5
+
+    # Una función declarada adentro de código compilado sigue siendo del
+    # intérprete por niveles, y ya está compilada
+    interpreter = TieredInterpreter(call_threshold=1)
+    src = """
+    fun outer() { fun inner(x) { return x + 1; } return inner; }
+    var f = outer();
+    f(1);
+    """
+    assert run(src, interpreter) == 2.0
+    assert type(interpreter.globals["f"]) is TieredFunction
+    assert {f.name.lexeme for f in interpreter.functions} == {"outer", "inner"}
+
+
+def test_hot_loops(run):
+    # El loop se compila en la vuelta 10, y sigue compilado
+    interpreter = TieredInterpreter(loop_threshold=10)
+    src = """
+    var total = 0;
+    for (var i = 0; i < 100; i = i + 1) total = total + i;
+    total;
+    """
+    # Los loops compilados se guardan mientras el árbol siga vivo
+    statements, _ = compile(src)
+    assert interpreter.interpret(statements) == 4950.0
+    assert len(interpreter.loops) == 1
+
+    # Las vueltas se suman entre ejecuciones del mismo loop
+    interpreter = TieredInterpreter(loop_threshold=10)
+    src = """
+    fun count(n) { var i = 0; while (i < n) i = i + 1; return i; }
+    count(4); count(4); count(4);
+    """
+    statements, _ = compile(src)
+    assert interpreter.interpret(statements) == 4.0
+    assert len(interpreter.loops) == 1
+
+    # Un return adentro de un loop que se compila
+    interpreter = TieredInterpreter(loop_threshold=3)
+    src = """
+    fun find(n) { var i = 0; while (true) { if (i == n) return i; i = i + 1; } }
+    find(10);
+    """
+    assert run(src, interpreter) == 10.0
+
+
+def test_tail_calls(run):
+    src = """
+    fun countdown(n) { if (n == 0) return "done"; return countdown(n - 1); }
+    countdown(100000);
+    """
+    assert run(src, TieredInterpreter()) == "done"
+
+
+def test_errors(run):
+    tests = [
+        ('"aaa" + 5;', "Operands of + must be either numbers or strings"),
+        ("5 / 0;", "Division by 0.0 is not allowed"),
+        ("print x;", "Undefined variable 'x'"),
+        ("fun f(a) {} f();", "Expected 1 arguments, got 0"),
+        (
+            'fun f(a) { return a - 1; } for (var i = 0; i < 5; i = i + 1) f(i); f("a");',
+            "Operands of - must be numbers",
+        ),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            run(src, TieredInterpreter(call_threshold=1, loop_threshold=1))
+        assert message in str(excinfo.value)
+
+
+def test_log(run, capsys):
+    interpreter = TieredInterpreter(call_threshold=2, loop_threshold=2, log=True)
+    run(
+        "fun f() {} f(); f(); var i = 0; while (i < 3) i = i + 1;",
+        interpreter,
+    )
+    log = capsys.readouterr().err.splitlines()
+    assert len(log) == 2
+    assert "compiled fun f (line 1) after 2 calls" in log[0]
+    assert "compiled loop while (i < 3) after 2 iterations" in log[1]
+
+
+@pytest.mark.parametrize("thresholds", [(100, 1000), (1, 1)])
+def test_repl_memory_does_not_grow(thresholds):
+    # Igual que en el intérprete, el árbol de cada línea del REPL se libera
+    # apenas se ejecuta, aunque se haya contado o compilado
+    interpreter = TieredInterpreter(*thresholds)
+
+    def line():
+        statements, _ = compile(
+            "var i = 0; while (i < 20) { i = i + 1; } fun f() {} f(); f();"
+        )
+        interpreter.interpret(statements)
+        return weakref.ref(statements[1])
+
+    refs = [line() for _ in range(50)]
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+    assert not interpreter.loops and not interpreter.iterations
+    # Solo queda la última f, que sigue siendo una global
+    assert len(interpreter.calls) == 1
@@ -0,0 +1,81 @@
+import glob
+import os
+import pytest
+from plox.Parser import Parser
+from plox.RegexScanner import RegexScanner
+from plox.Scanner import Scanner
+from plox.Token import TokenType
+from plox.TokenBuffer import TokenBuffer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMS = sorted(glob.glob(os.path.join(ROOT, "examples", "*.lox"))) + sorted(
+    glob.glob(os.path.join(ROOT, "real-tests", "*.lox"))
+)
+
+
+def fields(tokens):
+    return [(t.token_type, t.lexeme, t.literal, t.line) for t in tokens]
+
+
+def test_columns():
+    buffer = RegexScanner("var x = 'a';\nprint x + 1.5;").scan_buffer()
+    assert isinstance(buffer, TokenBuffer)
+    assert len(buffer) == 11
+    # Solo números: el tipo, dónde empieza y termina el lexema, y la línea
+    assert list(buffer.starts[:5]) == [0, 4, 6, 8, 11]
+    assert list(buffer.ends[:5]) == [3, 5, 7, 11, 12]
+    assert list(buffer.lines) == [1] * 5 + [2] * 6
+    assert buffer.type(0) == TokenType.VAR
+
+    # Los lexemas y los literales se arman cuando se piden
+    assert buffer.lexeme(3) == "'a'"
+    assert buffer.literal(3) == "a"
+    assert buffer.literal(8) == 1.5
+    assert buffer.literal(1) is None
+    token = buffer[1]
+    assert (token.token_type, token.lexeme, token.line) == (
+        TokenType.IDENTIFIER,
+        "x",
+        1,
+    )
+    assert buffer.type(-1) == TokenType.EOF
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_same_tokens_and_tree(program):
+    with open(program) as file:
+        source = file.read()
+    try:
+        tokens = Scanner(source).scan()
+    except Exception as e:
+        with pytest.raises(Exception) as excinfo:
+            RegexScanner(source).scan_buffer()
+        assert str(excinfo.value) == str(e)
+        return
+
+    buffer = RegexScanner(source).scan_buffer()
+    assert fields(buffer) == fields(tokens)
+
+    # El parser consume el buffer directamente, y arma el mismo árbol
+    trees = []
+    for scanned in (tokens, buffer):
+        try:
+            trees.append(repr(Parser(scanned).parse()))
+        except SyntaxError as e:
+            trees.append(str(e))
+    assert trees[0] == trees[1]
+
+
+def test_errors():
+    tests = [
+        ("1.2.3", "Invalid number: `1.2.3`"),
+        ("'abc", "Unterminated string: `'abc`"),
+        ("a @ b", "Unexpected character: `@`"),
+    ]
+    for src, message in tests:
+        with pytest.raises(Exception) as excinfo:
+            RegexScanner(src).scan_buffer()
+        assert str(excinfo.value) == message
+
+    with pytest.raises(SyntaxError, match="Expected expression, got `SEMICOLON`"):
+        Parser(RegexScanner("print (1 + ;").scan_buffer()).parse()
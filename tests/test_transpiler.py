@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import pytest
+from plox.Scanner import Scanner
+from plox.Parser import Parser
+from plox.Transpiler import Transpiler
+
+
+def test_long_expressions(run):
+    # Una cadena más larga que el límite de paréntesis anidados de Python
+    assert run(" + ".join(["1"] * 150) + ";", Transpiler()) == 150.0
+
+
+def test_closures(run, capsys):
+    src = """
+    fun counter() {
+        var i = 0;
+        fun inc() { i = i + 1; return i; }
+        return inc;
+    }
+    var a = counter();
+    var b = counter();
+    a(); a();
+    print a();
+    print b();
+
+    // Cada iteración tiene su propia j, aunque Python comparta las variables de un loop
+    var first;
+    var second;
+    for (var i = 0; i < 2; i = i + 1) {
+        var j = i;
+        fun show() { print j; }
+        if (i == 0) first = show; else second = show;
+    }
+    first();
+    second();
+    """
+    run(src, Transpiler())
+    assert capsys.readouterr().out == "3.0\n1.0\n0.0\n1.0\n"
+
+
+def test_errors(run):
+    tests = [
+        ('"aaa" + 5;', "Operands of + must be either numbers or strings"),
+        ('"aaa" - "bbb";', "Operands of - must be numbers"),
+        ("true < 1;", "Operands of < must be numbers"),
+        ('-"aaa";', "Operand of - must be a number"),
+        ("5 / 0;", "Division by 0.0 is not allowed"),
+        ("var z = 0; 5 % z;", "Modulo by 0.0 is not allowed"),
+        ("print x;", "Undefined variable 'x'"),
+        ("x = 1;", "Cannot assign to undefined variable 'x'"),
+        ('"x"();', "Cannot call non-callable object"),
+        ("fun f(a) {} f();", "Expected 1 arguments, got 0"),
+        ("{ if (false) var x = 1; print x; }", "Undefined variable 'x'"),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            run(src, Transpiler())
+        assert message in str(excinfo.value)
+
+
+def test_globals_persist_between_runs():
+    transpiler = Transpiler()
+    for src, expected in [("var x = 1;", None), ("x = x + 1;", 2.0), ("x;", 2.0)]:
+        statements = Parser(Scanner(src).scan()).parse()
+        assert transpiler.interpret(statements) == expected
+
+
+def test_emitted_module(tmp_path, pytestconfig):
+    src = "fun add(a, b) { return a + b; } print add(1, 2);"
+    statements = Parser(Scanner(src).scan()).parse()
+    source = Transpiler().transpile(statements)
+
+    # Las variables de Lox no chocan con los nombres de Python
+    assert "def " in source
+    module = tmp_path / "out.py"
+    module.write_text(source)
+    result = subprocess.run(
+        [sys.executable, str(module)],
+        capture_output=True,
+        text=True,
+        cwd=pytestconfig.rootpath,
+    )
+    assert result.stdout == "3.0\n"
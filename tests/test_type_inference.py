@@ -0,0 +1,120 @@
+import pytest
+from plox.cfg.TypeInference import TypeInference
+from plox.Expr import NumberBinaryExpr, StringBinaryExpr, NumberUnaryExpr
+from plox.Interpreter import Interpreter
+from plox.Walk import walk
+from plox.__main__ import Plox
+from conftest import compile
+
+
+def specialized(source):
+    statements, _ = compile(source)
+    inference = TypeInference()
+    return inference, inference.specialize(statements)
+
+
+# Los operadores especializados del programa, en orden, como (clase, operador)
+def specializations(source):
+    _, statements = specialized(source)
+    return [
+        (type(node).__name__, node.operator.lexeme)
+        for node in walk(statements)
+        if isinstance(node, (NumberBinaryExpr, StringBinaryExpr, NumberUnaryExpr))
+    ]
+
+
+def test_specialized():
+    tests = [
+        (
+            "var i = 0; while (i < 10) i = i + 1;",
+            [("NumberBinaryExpr", "<"), ("NumberBinaryExpr", "+")],
+        ),
+        ('var s = "a"; s = s + "b"; print s + s;', [("StringBinaryExpr", "+")] * 2),
+        ("var n = 1; print -n;", [("NumberUnaryExpr", "-")]),
+        (
+            "{ var a = 1; var b = a * 2; print b - a; }",
+            [("NumberBinaryExpr", "*"), ("NumberBinaryExpr", "-")],
+        ),
+        # El lado derecho de un and/or no siempre se evalúa, pero acá da igual
+        ("var a = 1; false and (a = 2); print a - 1;", [("NumberBinaryExpr", "-")]),
+        # Los resultados de los operadores también tienen tipo
+        (
+            "var a = (1 + 2) * 3; print -a;",
+            [
+                ("NumberBinaryExpr", "*"),
+                ("NumberBinaryExpr", "+"),
+                ("NumberUnaryExpr", "-"),
+            ],
+        ),
+    ]
+
+    for src, expected in tests:
+        assert specializations(src) == expected
+
+
+def test_deep_expressions(capsys):
+    # Los operadores se especializan sin recursión, por más anidados que estén
+    source = "print " + " + ".join(["1"] * 300) + ";"
+    assert specializations(source) == [("NumberBinaryExpr", "+")] * 299
+
+    # Si el programa es demasiado profundo para inferir sus tipos, es un error
+    # más de plox, y no un traceback
+    plox = Plox()
+    plox.specialize = True
+    plox.run("print " + " + ".join(["1"] * 5000) + ";")
+    assert capsys.readouterr().out.startswith("Specialize Error: maximum recursion")
+
+
+def test_not_specialized():
+    tests = [
+        # Los parámetros pueden ser cualquier cosa
+        "fun f(a) { return a - 1; }",
+        # Los resultados de las llamadas también
+        "fun f() { return 1; } print f() - 1;",
+        # Después de un loop, a puede ser un número o una cadena
+        'var a = 1; var i = 0; while (i < 1) { a = "s"; i = i + 1; } print a - 1;',
+        # Una asignación del lado derecho de un or puede hacerse o no
+        'var a = 1; true or (a = "s"); print a - 1;',
+        # Una llamada puede cambiar cualquier global
+        'var a = 1; fun g() { a = "s"; } g(); print a - 1;',
+        # O cualquier variable capturada
+        'fun f() { var a = 1; fun g() { a = "s"; } g(); return a - 1; }',
+        # Incluso en medio de una expresión
+        'var a = 1; fun g() { a = "s"; return 1; } print (a = 1) * g() * (a - 1);',
+    ]
+
+    for src in tests:
+        assert ("NumberBinaryExpr", "-") not in specializations(src)
+
+    # El + entre un número y una cadena es un error
+    assert specializations('var a = 1; print a + "b";') == []
+
+
+def test_stats():
+    inference, _ = specialized(
+        """
+        fun f(n) { return n * 2; }
+        var i = 0;
+        while (i < 10) { i = i + 1; }
+        print -f(i);
+        """
+    )
+    assert len(inference.sites) == 4
+    assert inference.specialized == 2
+
+
+def test_errors():
+    tests = [
+        ("var a = 1; var b = 0; print a / b;", "Division by 0.0 is not allowed"),
+        ("var a = 1; var b = 0; print a % b;", "Modulo by 0.0 is not allowed"),
+        (
+            'var a = 1; fun g() { a = "s"; } g(); print a - 1;',
+            "Operands of - must be numbers",
+        ),
+    ]
+
+    for src, message in tests:
+        _, statements = specialized(src)
+        with pytest.raises(RuntimeError) as excinfo:
+            Interpreter().interpret(statements)
+        assert message in str(excinfo.value)
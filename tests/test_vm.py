@@ -0,0 +1,74 @@
+import pytest
+from plox.Scanner import Scanner
+from plox.Parser import Parser
+from plox.bytecode.VM import VM
+from plox.bytecode.Compiler import Compiler
+from plox.bytecode.Chunk import Chunk
+
+
+def test_closures(run, capsys):
+    src = """
+    fun counter() {
+        var i = 0;
+        fun inc() { i = i + 1; return i; }
+        return inc;
+    }
+    var a = counter();
+    var b = counter();
+    a(); a();
+    print a();
+    print b();
+
+    for (var i = 0; i < 2; i = i + 1) {
+        var j = i;
+        fun show() { print j; }
+        show();
+    }
+    """
+    run(src, VM())
+    assert capsys.readouterr().out == "3.0\n1.0\n0.0\n1.0\n"
+
+
+def test_errors(run):
+    tests = [
+        ('"aaa" + 5;', "Operands of + must be either numbers or strings"),
+        ('-"aaa";', "Operand of - must be a number"),
+        ("5 / 0;", "Division by 0.0 is not allowed"),
+        ("5 % 0;", "Modulo by 0.0 is not allowed"),
+        ("print x;", "Undefined variable 'x'"),
+        ("x = 1;", "Cannot assign to undefined variable 'x'"),
+        ('"x"();', "Cannot call non-callable object"),
+        ("fun f(a) {} f();", "Expected 1 arguments, got 0"),
+        ("{ if (false) var x = 1; print x; }", "Undefined variable 'x'"),
+        ("fun f() { return f(); } f();", "Stack overflow"),
+    ]
+
+    for src, message in tests:
+        with pytest.raises(RuntimeError) as excinfo:
+            run(src, VM())
+        assert message in str(excinfo.value)
+
+
+def test_globals_persist_between_runs():
+    vm = VM()
+    for src, expected in [("var x = 1;", None), ("x = x + 1;", 2.0), ("x;", 2.0)]:
+        statements = Parser(Scanner(src).scan()).parse()
+        assert vm.interpret(statements) == expected
+
+
+def test_bytecode():
+    statements = Parser(Scanner("{ var a = 1; print a + 2; }").scan()).parse()
+    disassembly = Compiler().compile(statements).chunk.disassemble("script")
+
+    # a es una local: se lee de su slot en el stack, no de las globales
+    assert "GET_LOCAL 1" in disassembly
+    assert "GET_GLOBAL" not in disassembly
+    assert "ADD" in disassembly
+
+
+def test_constants():
+    chunk = Chunk()
+    # Valores iguales para Python que en Lox son constantes distintas
+    indexes = [chunk.add_constant(v) for v in (1.0, True, 0.0, -0.0, 1.0, -0.0)]
+    assert indexes == [0, 1, 2, 3, 0, 3]
+    assert list(map(repr, chunk.constants)) == ["1.0", "True", "0.0", "-0.0"]